@@ -0,0 +1,54 @@
+"""materialized activity calendar and streaks
+
+Revision ID: 007_activity_calendar
+Revises: 006_foods_database
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007_activity_calendar'
+down_revision = '006_foods_database'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # One row per user per UTC day with session activity
+    op.create_table(
+        'activity_days',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('completed_sessions', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('abandoned_sessions', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'date', name='uq_activity_day'),
+    )
+    op.create_index('ix_activity_days_id', 'activity_days', ['id'])
+    op.create_index('ix_activity_days_user_id', 'activity_days', ['user_id'])
+
+    # Running streak per user
+    op.create_table(
+        'user_streaks',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('current_streak', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('longest_streak', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_active_date', sa.Date(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Populate both from existing sessions: python backfill_activity_calendar.py
+
+
+def downgrade():
+    op.drop_table('user_streaks')
+    op.drop_index('ix_activity_days_user_id', table_name='activity_days')
+    op.drop_index('ix_activity_days_id', table_name='activity_days')
+    op.drop_table('activity_days')
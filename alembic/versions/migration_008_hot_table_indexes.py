@@ -0,0 +1,37 @@
+"""composite indexes for hot AI / tracking queries
+
+Revision ID: 008_hot_table_indexes
+Revises: 007_activity_calendar
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '008_hot_table_indexes'
+down_revision = '007_activity_calendar'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    # name, table, columns
+    ('ix_health_memories_user_category_created', 'health_memories', ['user_id', 'category', 'created_at']),
+    ('ix_meal_logs_user_logged', 'meal_logs', ['user_id', 'logged_at']),
+    ('ix_body_weight_logs_user_logged', 'body_weight_logs', ['user_id', 'logged_at']),
+    ('ix_workout_sessions_user_status_completed', 'workout_sessions', ['user_id', 'status', 'completed_at']),
+    # Reminders have no status column — "pending" is is_active + not missed_processed
+    ('ix_reminders_due', 'reminders', ['is_active', 'missed_processed', 'scheduled_at']),
+    ('ix_reminders_user_scheduled', 'reminders', ['user_id', 'scheduled_at']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
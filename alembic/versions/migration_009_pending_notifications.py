@@ -0,0 +1,83 @@
+"""pending notification outbox
+
+Revision ID: 009_pending_notifications
+Revises: 008_hot_table_indexes
+Create Date: 2026-10-17
+
+"""
+import json
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009_pending_notifications'
+down_revision = '008_hot_table_indexes'
+branch_labels = None
+depends_on = None
+
+TTL_DAYS = 7
+
+
+def upgrade():
+    op.create_table(
+        'pending_notifications',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('event_type', sa.String(), nullable=False),
+        sa.Column('title', sa.String(), nullable=True),
+        sa.Column('body', sa.String(), nullable=True),
+        sa.Column('data', sa.JSON(), nullable=True),
+        sa.Column('delivered', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('delivered_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_pending_notifications_id', 'pending_notifications', ['id'])
+    op.create_index(
+        'ix_pending_notifications_user_delivered', 'pending_notifications',
+        ['user_id', 'delivered', 'created_at'],
+    )
+    op.create_index('ix_pending_notifications_expires', 'pending_notifications', ['expires_at'])
+
+    # Move still-pending notifications out of health_memories, drop the rest
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT user_id, content, created_at FROM health_memories WHERE category = 'notification'"
+    )).fetchall()
+
+    now = datetime.utcnow()
+    moved = []
+    for user_id, content, created_at in rows:
+        if isinstance(content, str):
+            content = json.loads(content)
+        content = content or {}
+        if not content.get("pending"):
+            continue
+        moved.append({
+            "user_id": user_id,
+            "event_type": content.get("event_type") or "notification",
+            "title": content.get("title"),
+            "body": content.get("body"),
+            "data": json.dumps(content.get("data") or {}),
+            "created_at": created_at or now,
+            "expires_at": now + timedelta(days=TTL_DAYS),
+        })
+    if moved:
+        bind.execute(sa.text(
+            "INSERT INTO pending_notifications "
+            "(user_id, event_type, title, body, data, delivered, created_at, expires_at) "
+            "VALUES (:user_id, :event_type, :title, :body, :data, false, :created_at, :expires_at)"
+        ), moved)
+    bind.execute(sa.text("DELETE FROM health_memories WHERE category = 'notification'"))
+
+
+def downgrade():
+    op.drop_index('ix_pending_notifications_expires', table_name='pending_notifications')
+    op.drop_index('ix_pending_notifications_user_delivered', table_name='pending_notifications')
+    op.drop_index('ix_pending_notifications_id', table_name='pending_notifications')
+    op.drop_table('pending_notifications')
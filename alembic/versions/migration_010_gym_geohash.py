@@ -0,0 +1,39 @@
+"""geohash spatial index on gyms
+
+Revision ID: 010_gym_geohash
+Revises: 009_pending_notifications
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.geo_index import encode
+
+
+# revision identifiers, used by Alembic.
+revision = '010_gym_geohash'
+down_revision = '009_pending_notifications'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('gyms', sa.Column('geohash', sa.String(length=9), nullable=True))
+    op.create_index('ix_gyms_geohash', 'gyms', ['geohash'])
+
+    # Backfill existing rows; new writes are kept current by the Gym mapper hook
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT id, lat, lng FROM gyms WHERE lat IS NOT NULL AND lng IS NOT NULL"
+    )).fetchall()
+    if rows:
+        bind.execute(
+            sa.text("UPDATE gyms SET geohash = :geohash WHERE id = :id"),
+            [{"id": gym_id, "geohash": encode(lat, lng)} for gym_id, lat, lng in rows],
+        )
+
+
+def downgrade():
+    op.drop_index('ix_gyms_geohash', table_name='gyms')
+    op.drop_column('gyms', 'geohash')
@@ -0,0 +1,32 @@
+"""per-cell Google Places sync freshness
+
+Revision ID: 011_places_area_syncs
+Revises: 010_gym_geohash
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011_places_area_syncs'
+down_revision = '010_gym_geohash'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # One row per geohash cell (precision 5) last searched on Google Places
+    op.create_table(
+        'places_area_syncs',
+        sa.Column('cell', sa.String(length=12), nullable=False),
+        sa.Column('radius_m', sa.Integer(), nullable=False),
+        sa.Column('result_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('synced_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('cell')
+    )
+
+
+def downgrade():
+    op.drop_table('places_area_syncs')
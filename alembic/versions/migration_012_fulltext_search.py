@@ -0,0 +1,31 @@
+"""full-text search indexes for food_items, foods and exercises
+
+Revision ID: 012_fulltext_search
+Revises: 011_places_area_syncs
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+
+from app.services.text_search import ALL_INDEXES
+
+
+# revision identifiers, used by Alembic.
+revision = '012_fulltext_search'
+down_revision = '011_places_area_syncs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite: FTS5 tables + sync triggers, populated from existing rows.
+    # Postgres: generated tsvector column + GIN index.
+    bind = op.get_bind()
+    for index in ALL_INDEXES:
+        index.install(bind)
+
+
+def downgrade():
+    bind = op.get_bind()
+    for index in ALL_INDEXES:
+        index.uninstall(bind)
@@ -0,0 +1,49 @@
+"""normalised exercise filter facets
+
+Revision ID: 013_exercise_facets
+Revises: 012_fulltext_search
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.exercise_facets import facet_rows
+
+
+# revision identifiers, used by Alembic.
+revision = '013_exercise_facets'
+down_revision = '012_fulltext_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'exercise_facets',
+        sa.Column('exercise_id', sa.Integer(), sa.ForeignKey('exercises.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('facet', sa.String(length=20), nullable=False),
+        sa.Column('value', sa.String(), nullable=False),
+        sa.Column('label', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('exercise_id', 'facet', 'value'),
+    )
+    op.create_index('ix_exercise_facets_facet_value', 'exercise_facets', ['facet', 'value', 'exercise_id'])
+
+    # Backfill; new writes are kept current by the Exercise mapper hooks
+    bind = op.get_bind()
+    rows = []
+    for r in bind.execute(sa.text(
+        "SELECT id, primary_muscles, secondary_muscles, equipment, category, difficulty FROM exercises"
+    )):
+        rows.extend(facet_rows(*r))
+    if rows:
+        bind.execute(
+            sa.text("INSERT INTO exercise_facets (exercise_id, facet, value, label) "
+                    "VALUES (:exercise_id, :facet, :value, :label)"),
+            rows,
+        )
+
+
+def downgrade():
+    op.drop_index('ix_exercise_facets_facet_value', table_name='exercise_facets')
+    op.drop_table('exercise_facets')
@@ -0,0 +1,43 @@
+"""youtube quota ledger and exercise video lookups
+
+Revision ID: 014_youtube_resolution
+Revises: 013_exercise_facets
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '014_youtube_resolution'
+down_revision = '013_exercise_facets'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'youtube_quota_days',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('searches', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('search_limit', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('day'),
+    )
+    op.create_table(
+        'exercise_video_lookups',
+        sa.Column('exercise_id', sa.Integer(), sa.ForeignKey('exercises.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('views', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('status', sa.String(length=10), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_attempt_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('retry_after', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('exercise_id'),
+    )
+    op.create_index('ix_exercise_video_lookups_queue', 'exercise_video_lookups', ['retry_after', 'views'])
+
+
+def downgrade():
+    op.drop_index('ix_exercise_video_lookups_queue', table_name='exercise_video_lookups')
+    op.drop_table('exercise_video_lookups')
+    op.drop_table('youtube_quota_days')
@@ -0,0 +1,270 @@
+"""
+backplane.py
+============
+Pub/sub backplane for NotificationManager — lets a push raised in one
+uvicorn worker reach a WebSocket held by another.
+
+Every worker's NotificationManager owns one Backplane. The backplane tracks
+which worker holds which user's sockets (presence) and carries two kinds
+of message between workers:
+
+  {"kind": "push",      "user_id": int, "event": dict}   → each worker holding
+                                                           a socket for user_id
+  {"kind": "broadcast", "event": dict}                   → every other worker
+
+Backends (NOTIF_BACKPLANE):
+  inprocess (default)  InProcessBackplane — members of one InProcessHub.
+                       Each process gets its own hub, so a single worker
+                       behaves exactly as before; tests join several
+                       managers to one hub to simulate workers.
+  sqlite               SQLiteBackplane — a shared SQLite file
+                       (NOTIF_BACKPLANE_PATH) used as a message queue +
+                       presence table. Works across processes on one host;
+                       each worker polls every NOTIF_BACKPLANE_POLL_MS.
+
+Presence from a worker that stops heartbeating is ignored after
+WORKER_TIMEOUT_S, so a crashed worker's users fall back to the DB.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+WORKER_TIMEOUT_S = 10.0
+HEARTBEAT_S = 2.0
+MESSAGE_TTL_S = 60.0
+
+# handler(message) — installed by NotificationManager.start()
+MessageHandler = Callable[[dict], Awaitable[None]]
+
+
+class Backplane(ABC):
+    """Presence + message transport between NotificationManagers."""
+
+    name = "base"
+
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._handler: Optional[MessageHandler] = None
+
+    async def start(self, handler: MessageHandler) -> None:
+        self._handler = handler
+
+    async def stop(self) -> None:
+        self._handler = None
+
+    @abstractmethod
+    async def publish(self, message: dict, target: Optional[str] = None) -> None:
+        """Send to worker `target`, or to every other worker when None."""
+
+    @abstractmethod
+    async def set_presence(self, user_id: int, online: bool) -> None:
+        ...
+
+    @abstractmethod
+    async def locate(self, user_id: int) -> List[str]:
+        """Every other live worker holding a socket for user_id."""
+
+    async def _deliver(self, message: dict) -> None:
+        if self._handler is None:
+            return
+        try:
+            await self._handler(message)
+        except Exception as e:
+            logger.warning(f"[Backplane] handler error: {e}")
+
+
+# ─────────────────────────────────────────────────────────────
+# In-process
+# ─────────────────────────────────────────────────────────────
+
+class InProcessHub:
+    """Shared state for InProcessBackplanes — one per simulated cluster."""
+
+    def __init__(self):
+        self.members: Dict[str, "InProcessBackplane"] = {}
+        self.presence: Dict[int, Set[str]] = defaultdict(set)
+
+
+class InProcessBackplane(Backplane):
+    name = "inprocess"
+
+    def __init__(self, hub: Optional[InProcessHub] = None):
+        super().__init__()
+        self.hub = hub or InProcessHub()
+
+    async def start(self, handler: MessageHandler) -> None:
+        await super().start(handler)
+        self.hub.members[self.worker_id] = self
+
+    async def stop(self) -> None:
+        self.hub.members.pop(self.worker_id, None)
+        for workers in self.hub.presence.values():
+            workers.discard(self.worker_id)
+        await super().stop()
+
+    async def publish(self, message: dict, target: Optional[str] = None) -> None:
+        for worker_id, member in list(self.hub.members.items()):
+            if worker_id != self.worker_id and target in (None, worker_id):
+                await member._deliver(message)
+
+    async def set_presence(self, user_id: int, online: bool) -> None:
+        if online:
+            self.hub.presence[user_id].add(self.worker_id)
+        else:
+            self.hub.presence[user_id].discard(self.worker_id)
+
+    async def locate(self, user_id: int) -> List[str]:
+        return [
+            worker_id for worker_id in self.hub.presence.get(user_id, ())
+            if worker_id != self.worker_id and worker_id in self.hub.members
+        ]
+
+
+# ─────────────────────────────────────────────────────────────
+# SQLite queue
+# ─────────────────────────────────────────────────────────────
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bp_messages (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    origin     TEXT NOT NULL,
+    target     TEXT,
+    body       TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bp_workers (
+    worker  TEXT PRIMARY KEY,
+    seen_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bp_presence (
+    worker  TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    PRIMARY KEY (worker, user_id)
+);
+CREATE INDEX IF NOT EXISTS ix_bp_presence_user ON bp_presence (user_id);
+"""
+
+
+class SQLiteBackplane(Backplane):
+    name = "sqlite"
+
+    def __init__(self, path: str, poll_interval: float = 0.05):
+        super().__init__()
+        self.path = path
+        self.poll_interval = poll_interval
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._last_id = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def _exec(self, sql: str, params: tuple = ()) -> list:
+        with self._db_lock:
+            cur = self._conn.execute(sql, params)
+            rows = cur.fetchall()
+            self._conn.commit()
+            return rows
+
+    def _open(self) -> None:
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._exec("INSERT OR REPLACE INTO bp_workers (worker, seen_at) VALUES (?, ?)", (self.worker_id, time.time()))
+        self._last_id = self._exec("SELECT COALESCE(MAX(id), 0) FROM bp_messages")[0][0]
+
+    async def start(self, handler: MessageHandler) -> None:
+        await super().start(handler)
+        await asyncio.to_thread(self._open)
+        self._task = asyncio.create_task(self._poll(), name="notif_backplane")
+        logger.info(f"[Backplane] sqlite worker {self.worker_id} on {self.path}")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._conn is not None:
+            await asyncio.to_thread(self._exec, "DELETE FROM bp_presence WHERE worker = ?", (self.worker_id,))
+            await asyncio.to_thread(self._exec, "DELETE FROM bp_workers WHERE worker = ?", (self.worker_id,))
+            self._conn.close()
+            self._conn = None
+        await super().stop()
+
+    async def publish(self, message: dict, target: Optional[str] = None) -> None:
+        await asyncio.to_thread(
+            self._exec,
+            "INSERT INTO bp_messages (origin, target, body, created_at) VALUES (?, ?, ?, ?)",
+            (self.worker_id, target, json.dumps(message), time.time()),
+        )
+
+    async def set_presence(self, user_id: int, online: bool) -> None:
+        if online:
+            sql = "INSERT OR IGNORE INTO bp_presence (worker, user_id) VALUES (?, ?)"
+        else:
+            sql = "DELETE FROM bp_presence WHERE worker = ? AND user_id = ?"
+        await asyncio.to_thread(self._exec, sql, (self.worker_id, user_id))
+
+    async def locate(self, user_id: int) -> List[str]:
+        rows = await asyncio.to_thread(
+            self._exec,
+            "SELECT p.worker FROM bp_presence p JOIN bp_workers w ON w.worker = p.worker "
+            "WHERE p.user_id = ? AND p.worker != ? AND w.seen_at >= ?",
+            (user_id, self.worker_id, time.time() - WORKER_TIMEOUT_S),
+        )
+        return [row[0] for row in rows]
+
+    def _fetch(self) -> list:
+        rows = self._exec(
+            "SELECT id, body FROM bp_messages WHERE id > ? AND origin != ? "
+            "AND (target IS NULL OR target = ?) ORDER BY id",
+            (self._last_id, self.worker_id, self.worker_id),
+        )
+        if rows:
+            self._last_id = rows[-1][0]
+        return rows
+
+    def _heartbeat(self) -> None:
+        now = time.time()
+        self._exec("UPDATE bp_workers SET seen_at = ? WHERE worker = ?", (now, self.worker_id))
+        self._exec("DELETE FROM bp_messages WHERE created_at < ?", (now - MESSAGE_TTL_S,))
+        self._exec(
+            "DELETE FROM bp_presence WHERE worker IN "
+            "(SELECT worker FROM bp_workers WHERE seen_at < ?)", (now - WORKER_TIMEOUT_S,),
+        )
+
+    async def _poll(self) -> None:
+        next_beat = 0.0
+        while True:
+            try:
+                if time.monotonic() >= next_beat:
+                    await asyncio.to_thread(self._heartbeat)
+                    next_beat = time.monotonic() + HEARTBEAT_S
+                for _, body in await asyncio.to_thread(self._fetch):
+                    await self._deliver(json.loads(body))
+            except Exception as e:
+                logger.warning(f"[Backplane] poll error: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+
+def get_backplane() -> Backplane:
+    """Backplane for this process, from NOTIF_BACKPLANE."""
+    if os.getenv("NOTIF_BACKPLANE", "inprocess") == "sqlite":
+        return SQLiteBackplane(
+            os.getenv("NOTIF_BACKPLANE_PATH", "notif_backplane.db"),
+            poll_interval=int(os.getenv("NOTIF_BACKPLANE_POLL_MS", "50")) / 1000,
+        )
+    return InProcessBackplane()
@@ -0,0 +1,204 @@
+"""
+job_runner.py
+=============
+Bounded-concurrency fan-out for the per-user agent jobs.
+
+The narrative, morning brief, adaptation and nudge jobs all do the same
+thing: load every active user, then run a few queries + one LLM call each.
+fan_out() runs those per-user handlers concurrently:
+
+  • A semaphore caps in-flight users at AGENT_JOB_CONCURRENCY
+  • Every user gets their own SessionLocal (rolled back + closed on error),
+    so one bad user never poisons the session the others write through
+  • with_rate_limit_retry() wraps the LLM call. A 429 trips a gate that
+    every worker waits on (honouring Retry-After), so a rate-limited key
+    backs off as a whole instead of 16 workers hammering it in lockstep.
+
+Each run returns a JobRunStats (throughput, p95 per-user latency) which the
+job logs; the latest run per job is kept in last_runs and served by
+GET /api/agent/jobs/stats.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Iterable, Optional
+
+from openai import RateLimitError
+
+from app.db.database import SessionLocal
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+AGENT_JOB_CONCURRENCY = int(os.getenv("AGENT_JOB_CONCURRENCY", "16"))
+
+RATE_LIMIT_MAX_ATTEMPTS = 5
+RATE_LIMIT_BASE_DELAY = 1.0     # seconds, doubled per attempt (+ jitter)
+RATE_LIMIT_MAX_DELAY = 60.0
+
+
+# ─────────────────────────────────────────────────────────────
+# Run stats
+# ─────────────────────────────────────────────────────────────
+
+@dataclass
+class JobRunStats:
+    job: str
+    total: int = 0
+    done: int = 0
+    skipped: int = 0
+    failed: int = 0
+    elapsed_s: float = 0.0
+    latencies: list = field(default_factory=list, repr=False)   # seconds per user
+
+    @property
+    def throughput(self) -> float:
+        """Users per second over the whole run."""
+        return self.total / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    @property
+    def p95_latency(self) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def summary(self) -> dict:
+        return {
+            "job": self.job,
+            "total": self.total,
+            "done": self.done,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "elapsed_s": round(self.elapsed_s, 2),
+            "users_per_s": round(self.throughput, 2),
+            "p95_user_s": round(self.p95_latency, 3),
+        }
+
+    def __str__(self) -> str:
+        return (
+            f"{self.total} users in {self.elapsed_s:.1f}s "
+            f"({self.throughput:.1f} users/s, p95 {self.p95_latency:.2f}s/user)"
+        )
+
+
+# job → summary() of its most recent run
+last_runs: dict = {}
+
+
+# ─────────────────────────────────────────────────────────────
+# Rate-limit aware retry
+# ─────────────────────────────────────────────────────────────
+
+class RateLimitGate:
+    """Shared pause window — once any caller sees a 429, all callers wait it out."""
+
+    def __init__(self):
+        self._resume_at = 0.0
+
+    async def wait(self) -> None:
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def trip(self, delay: float) -> None:
+        self._resume_at = max(self._resume_at, time.monotonic() + delay)
+
+
+# Global singleton — one OpenAI key, one gate
+rate_limit_gate = RateLimitGate()
+
+
+def _retry_after(err: RateLimitError) -> Optional[float]:
+    try:
+        value = err.response.headers.get("retry-after")
+        return float(value) if value else None
+    except Exception:
+        return None
+
+
+async def with_rate_limit_retry(
+    make_call: Callable[[], Awaitable],
+    *,
+    attempts: int = RATE_LIMIT_MAX_ATTEMPTS,
+    gate: RateLimitGate = rate_limit_gate,
+):
+    """
+    Await make_call(), retrying on 429 with Retry-After / exponential backoff.
+    Other errors propagate immediately so callers keep their own fallbacks.
+    """
+    for attempt in range(1, attempts + 1):
+        await gate.wait()
+        try:
+            return await make_call()
+        except RateLimitError as e:
+            if attempt == attempts:
+                raise
+            backoff = min(RATE_LIMIT_MAX_DELAY, RATE_LIMIT_BASE_DELAY * 2 ** (attempt - 1))
+            delay = _retry_after(e) or backoff * (0.5 + random.random() / 2)
+            gate.trip(delay)
+            logger.info(f"[JobRunner] rate limited — retry {attempt}/{attempts - 1} in {delay:.1f}s")
+
+
+# ─────────────────────────────────────────────────────────────
+# Fan-out
+# ─────────────────────────────────────────────────────────────
+
+# handler(db, user) → True when it did work, False/None when the user was skipped
+UserHandler = Callable[..., Awaitable[Optional[bool]]]
+
+
+def active_user_ids(session_factory=SessionLocal) -> list:
+    db = session_factory()
+    try:
+        return [uid for (uid,) in db.query(User.id).filter(User.is_active == True).all()]
+    finally:
+        db.close()
+
+
+async def fan_out(
+    job: str,
+    handler: UserHandler,
+    user_ids: Optional[Iterable[int]] = None,
+    concurrency: Optional[int] = None,
+    session_factory=SessionLocal,
+) -> JobRunStats:
+    """
+    Run handler(db, user) for every active user (or `user_ids`), at most
+    `concurrency` at a time, each on its own session.
+    """
+    ids = list(user_ids) if user_ids is not None else active_user_ids(session_factory)
+    stats = JobRunStats(job=job, total=len(ids))
+    sem = asyncio.Semaphore(concurrency or AGENT_JOB_CONCURRENCY)
+
+    async def _run_one(user_id: int):
+        async with sem:
+            started = time.monotonic()
+            db = session_factory()
+            try:
+                user = db.get(User, user_id)
+                did_work = await handler(db, user) if user is not None else False
+                if did_work:
+                    stats.done += 1
+                else:
+                    stats.skipped += 1
+            except Exception as e:
+                stats.failed += 1
+                logger.warning(f"[{job}] Error for user {user_id}: {e}")
+                try:
+                    db.rollback()
+                except Exception:
+                    pass
+            finally:
+                db.close()
+                stats.latencies.append(time.monotonic() - started)
+
+    started = time.monotonic()
+    await asyncio.gather(*(_run_one(uid) for uid in ids))
+    stats.elapsed_s = time.monotonic() - started
+    last_runs[job] = stats.summary()
+    return stats
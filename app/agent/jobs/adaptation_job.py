@@ -28,13 +28,14 @@ import json
 from datetime import datetime, timezone, timedelta
 from collections import defaultdict
 
-from app.db.database import SessionLocal
+from app.agent.job_runner import fan_out, with_rate_limit_retry
 from app.models.user import User
 from app.models.health_memory import HealthMemory
 from app.models.fitness_tracking import (
     WorkoutSession, SessionStatus, MealLog, BodyWeightLog,
     BehavioralPattern, EatingPattern,
 )
+from app.services.openai_clients import get_openai
 
 logger = logging.getLogger(__name__)
 
@@ -61,12 +62,6 @@ DATA:
 Rules: Reference real numbers. Never say "stay consistent". If adherence is high, push them harder next week. If low, reduce scope and identify the barrier."""
 
 
-def _get_openai_client():
-    from openai import OpenAI
-    import os
-    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-
 # ── Correlation Engine ────────────────────────────────────────────────────────
 
 def _run_correlations(db, user_id: int, since: datetime) -> list:
@@ -228,100 +223,97 @@ def _score_adherence(db, user_id: int, week_start: datetime) -> dict:
 
 # ── Main job ──────────────────────────────────────────────────────────────────
 
-async def run_weekly_adaptation():
-    """Main scheduler job. Runs correlation engine + adaptation for all active users."""
-    logger.info("[Adaptation] Starting weekly adaptation run...")
-    db = SessionLocal()
-    now = datetime.now(timezone.utc)
+async def _adapt_user(db, user: User, now: datetime, notif_manager) -> bool:
+    """Correlations + adaptation report for one user. Returns False when skipped."""
     week_start = now - timedelta(days=7)
     month_start = now - timedelta(days=30)
 
+    # ── Part A: Correlation Engine ─────────────────
+    correlations = _run_correlations(db, user.id, month_start)
+
+    if correlations:
+        db.add(HealthMemory(
+            user_id=user.id,
+            category="correlation_insight",
+            source="system",
+            content={
+                "date": now.strftime("%Y-%m-%d"),
+                "insights": correlations,
+                "days_analysed": 30,
+            },
+        ))
+        db.commit()
+
+    # ── Part B: Adaptation Agent ───────────────────
+    adherence = _score_adherence(db, user.id, week_start)
+
+    # Only generate adaptation if they have meaningful data
+    if adherence["workouts_completed"] + adherence["workouts_abandoned"] == 0 and adherence["meals_on_plan"] + adherence["meals_off_plan"] == 0:
+        return False
+
+    data_summary = {
+        "adherence": adherence,
+        "correlations": [c["insight"] for c in correlations],
+        "week": now.strftime("Week of %b %d"),
+    }
+
+    prompt = _ADAPTATION_PROMPT.format(
+        date=now.strftime("%b %d, %Y"),
+        data=json.dumps(data_summary, indent=2, default=str),
+    )
+
     try:
-        from app.agent.notification_manager import notif_manager
-        users = db.query(User).filter(User.is_active == True).all()
-        processed = 0
-
-        for user in users:
-            try:
-                # ── Part A: Correlation Engine ─────────────────
-                correlations = _run_correlations(db, user.id, month_start)
-
-                if correlations:
-                    db.add(HealthMemory(
-                        user_id=user.id,
-                        category="correlation_insight",
-                        source="system",
-                        content={
-                            "date": now.strftime("%Y-%m-%d"),
-                            "insights": correlations,
-                            "days_analysed": 30,
-                        },
-                    ))
-                    db.commit()
-
-                # ── Part B: Adaptation Agent ───────────────────
-                adherence = _score_adherence(db, user.id, week_start)
-
-                # Only generate adaptation if they have meaningful data
-                if adherence["workouts_completed"] + adherence["workouts_abandoned"] == 0 and adherence["meals_on_plan"] + adherence["meals_off_plan"] == 0:
-                    continue
-
-                data_summary = {
-                    "adherence": adherence,
-                    "correlations": [c["insight"] for c in correlations],
-                    "week": now.strftime("Week of %b %d"),
-                }
-
-                prompt = _ADAPTATION_PROMPT.format(
-                    date=now.strftime("%b %d, %Y"),
-                    data=json.dumps(data_summary, indent=2, default=str),
-                )
-
-                try:
-                    client = _get_openai_client()
-                    resp = client.chat.completions.create(
-                        model="gpt-5-nano",
-                        messages=[{"role": "user", "content": prompt}],
-                        max_completion_tokens=500,
-                    )
-                    adaptation_text = resp.choices[0].message.content.strip()
-                except Exception as ai_err:
-                    logger.warning(f"[Adaptation] AI error for user {user.id}: {ai_err}")
-                    adaptation_text = f"Weekly summary: {adherence['workouts_completed']} workouts completed ({adherence['workout_adherence_pct']}% adherence). Meal plan adherence: {adherence['meal_adherence_pct']}%."
-
-                db.add(HealthMemory(
-                    user_id=user.id,
-                    category="weekly_adaptation",
-                    source="system",
-                    content={
-                        "date": now.strftime("%Y-%m-%d"),
-                        "report": adaptation_text,
-                        "adherence": adherence,
-                        "correlations_found": len(correlations),
-                    },
-                ))
-                db.commit()
-
-                # Push to user
-                await notif_manager.push(user.id, {
-                    "type": "adaptation",
-                    "title": "📊 Your weekly report is ready",
-                    "body": f"Workout adherence: {adherence['workout_adherence_pct']}% | {len(correlations)} insight(s) found",
-                    "data": {"report": adaptation_text},
-                })
+        client = get_openai("gpt-5-nano")
+        resp = await with_rate_limit_retry(lambda: client.chat.completions.create(
+            model="gpt-5-nano",
+            messages=[{"role": "user", "content": prompt}],
+            max_completion_tokens=500,
+        ))
+        adaptation_text = resp.choices[0].message.content.strip()
+    except Exception as ai_err:
+        logger.warning(f"[Adaptation] AI error for user {user.id}: {ai_err}")
+        adaptation_text = f"Weekly summary: {adherence['workouts_completed']} workouts completed ({adherence['workout_adherence_pct']}% adherence). Meal plan adherence: {adherence['meal_adherence_pct']}%."
+
+    db.add(HealthMemory(
+        user_id=user.id,
+        category="weekly_adaptation",
+        source="system",
+        content={
+            "date": now.strftime("%Y-%m-%d"),
+            "report": adaptation_text,
+            "adherence": adherence,
+            "correlations_found": len(correlations),
+        },
+    ))
+    db.commit()
+
+    # Push to user
+    await notif_manager.push(user.id, {
+        "type": "adaptation",
+        "title": "📊 Your weekly report is ready",
+        "body": f"Workout adherence: {adherence['workout_adherence_pct']}% | {len(correlations)} insight(s) found",
+        "data": {"report": adaptation_text},
+    })
+    return True
 
-                processed += 1
 
-            except Exception as e:
-                logger.warning(f"[Adaptation] Error for user {user.id}: {e}")
-                try:
-                    db.rollback()
-                except Exception:
-                    pass
+async def run_weekly_adaptation():
+    """Main scheduler job. Runs correlation engine + adaptation for all active users."""
+    logger.info("[Adaptation] Starting weekly adaptation run...")
+    now = datetime.now(timezone.utc)
 
-        logger.info(f"[Adaptation] Done — {processed} users processed.")
+    try:
+        from app.agent.notification_manager import notif_manager
 
+        async with notif_manager.batched_offline():
+            stats = await fan_out(
+                "Adaptation",
+                lambda db, user: _adapt_user(db, user, now, notif_manager),
+            )
+        logger.info(
+            f"[Adaptation] Done — {stats.done} users processed, {stats.skipped} skipped, "
+            f"{stats.failed} failed — {stats}"
+        )
+        return stats.summary()
     except Exception as e:
         logger.error(f"[Adaptation] Job failed: {e}")
-    finally:
-        db.close()
@@ -17,16 +17,26 @@ The brief is also served to the Home screen via GET /api/agent/morning-brief
 
 import logging
 from datetime import datetime, timezone, timedelta
+from typing import Optional
 
-from app.db.database import SessionLocal
+from app.agent.job_runner import fan_out, with_rate_limit_retry
+from app.agent.llm_batch import (
+    BatchCollector, BatchItem, batch_enabled, pending_user_ids, register_writer, submit_batch,
+)
 from app.models.user import User
 from app.models.health_memory import HealthMemory
 from app.models.fitness_tracking import (
     WorkoutSession, SessionStatus, MealLog, BodyWeightLog, WaterLog, DietPlan,
 )
+from app.services.activity_calendar import get_streak, streak_as_of
+from app.services.openai_clients import get_openai
 
 logger = logging.getLogger(__name__)
 
+# A batched brief that lands later than this after the run is stored quietly
+# (no "your morning brief is ready" push); one from an earlier day is dropped.
+_BRIEF_PUSH_WINDOW = timedelta(hours=3)
+
 # Weekday abbreviations matching the app's _WEEKDAY_ABBR convention
 _WEEKDAY_ABBR = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
 
@@ -60,12 +70,6 @@ Rules:
 """
 
 
-def _get_openai_client():
-    from openai import OpenAI
-    import os
-    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-
 def _get_today_program_day(db, user: User) -> str | None:
     """
     Return the name of today's workout day from the user's active program, or None.
@@ -184,24 +188,8 @@ def _build_user_data_summary(db, user: User) -> dict:
         data["sessions_this_week"] = len(completed)
         data["missed_sessions"] = len(abandoned)
 
-        # Streak: consecutive days with a completed session
-        streak = 0
-        check_day = today
-        for _ in range(30):
-            day_start = datetime.combine(check_day, datetime.min.time()).replace(tzinfo=timezone.utc)
-            day_end = day_start + timedelta(days=1)
-            day_session = any(
-                s.status == SessionStatus.COMPLETED and
-                s.completed_at and
-                day_start <= s.completed_at.replace(tzinfo=timezone.utc) < day_end
-                for s in sessions
-            )
-            if day_session:
-                streak += 1
-                check_day -= timedelta(days=1)
-            else:
-                break
-        data["streak_days"] = streak
+        # Streak: consecutive days with a completed session, through today
+        data["streak_days"] = streak_as_of(get_streak(db, user.id), today)
     except Exception as e:
         logger.debug(f"[MorningBrief] sessions error: {e}")
 
@@ -333,111 +321,176 @@ def _build_user_data_summary(db, user: User) -> dict:
     return data
 
 
-def _generate_brief(data: dict) -> str:
-    """Call GPT to generate the morning brief."""
+def _brief_prompt(data: dict) -> str:
     import json
     name_part = f", {data['name'].split()[0]}" if data.get("name") and data["name"] != "there" else ""
     user_data_str = json.dumps(data, indent=2, default=str)
-    prompt = _BRIEF_PROMPT.format(name_part=name_part, user_data=user_data_str)
+    return _BRIEF_PROMPT.format(name_part=name_part, user_data=user_data_str)
+
+
+def _fallback_brief(data: dict) -> str:
+    name = data["name"].split()[0] if data.get("name") else "there"
+    day_hint = f" ({data['today_program_day']})" if data.get("today_program_day") else ""
+    return (
+        f"## Good morning, {name}! ☀️\n"
+        f"You've logged {data['sessions_this_week']} session(s) this week — keep the momentum going.\n\n"
+        f"**Today's focus:** {data.get('today_program_day', 'your planned workout')}{day_hint}\n\n"
+        f"**One thing:** Open the app and log your first activity of the day."
+    )
+
+
+async def _generate_brief(data: dict) -> str:
+    """Call GPT to generate the morning brief."""
+    prompt = _brief_prompt(data)
 
     try:
-        client = _get_openai_client()
-        response = client.chat.completions.create(
+        client = get_openai("gpt-5-nano")
+        response = await with_rate_limit_retry(lambda: client.chat.completions.create(
             model="gpt-5-nano",
             messages=[{"role": "user", "content": prompt}],
             max_completion_tokens=350,
-        )
+        ))
         return response.choices[0].message.content.strip()
     except Exception as e:
         logger.error(f"[MorningBrief] OpenAI error: {e}")
-        name = data["name"].split()[0] if data.get("name") else "there"
-        day_hint = f" ({data['today_program_day']})" if data.get("today_program_day") else ""
-        return (
-            f"## Good morning, {name}! ☀️\n"
-            f"You've logged {data['sessions_this_week']} session(s) this week — keep the momentum going.\n\n"
-            f"**Today's focus:** {data.get('today_program_day', 'your planned workout')}{day_hint}\n\n"
-            f"**One thing:** Open the app and log your first activity of the day."
+        return _fallback_brief(data)
+
+
+def _brief_stats(data: dict) -> dict:
+    return {
+        "streak_days": data["streak_days"],
+        "sessions_this_week": data["sessions_this_week"],
+        "avg_calories": data["avg_calories_this_week"],
+        "calorie_target": data["calorie_target"],
+        "calorie_gap": data["calorie_gap_vs_target"],
+        "latest_weight": data["latest_weight"],
+        "weight_goal": data["weight_goal"],
+        "today_program_day": data["today_program_day"],
+        "anomalies": data["anomalies"],
+    }
+
+
+async def _store_brief(db, user_id: int, brief_text: str, payload: dict) -> None:
+    """
+    Store the brief and push it live. Also the batch-mode result writer, where
+    the batch may finish hours after the run: a stale brief is stored without a
+    push, and one generated for an earlier day is discarded.
+    """
+    from app.agent.notification_manager import notif_manager
+
+    now = datetime.now(timezone.utc)
+    if payload["date"] != now.strftime("%Y-%m-%d"):
+        logger.info(f"[MorningBrief] Dropping brief for {payload['date']} (user {user_id}) — batch finished too late")
+        return
+    generated_at = datetime.fromisoformat(payload.get("generated_at") or now.isoformat())
+
+    # Store in health_memories
+    memory = HealthMemory(
+        user_id=user_id,
+        category="morning_brief",
+        source="system",
+        content={
+            "date": payload["date"],
+            "brief": brief_text,
+            "stats": payload["stats"],
+        },
+    )
+    db.add(memory)
+    db.commit()
+
+    if now - generated_at > _BRIEF_PUSH_WINDOW:
+        return
+
+    # Push to WebSocket if online
+    await notif_manager.push(user_id, {
+        "type": "morning_brief",
+        "title": "Your morning brief is ready",
+        "body": brief_text[:120] + "…" if len(brief_text) > 120 else brief_text,
+        "data": {"full_brief": brief_text},
+    })
+
+
+register_writer("morning_brief", _store_brief)
+
+
+async def _brief_user(
+    db, user: User, now: datetime,
+    batch: Optional[BatchCollector] = None, pending: frozenset = frozenset(),
+) -> bool:
+    """
+    Generate, store and push one user's brief — or queue its prompt when
+    running in batch mode. Returns False when skipped.
+    """
+    # A brief for this user is still in an uncollected batch
+    if user.id in pending:
+        return False
+
+    # Skip if brief already generated today (within 2 hours)
+    existing = (
+        db.query(HealthMemory)
+        .filter(
+            HealthMemory.user_id == user.id,
+            HealthMemory.category == "morning_brief",
         )
+        .order_by(HealthMemory.created_at.desc())
+        .first()
+    )
+    if existing:
+        age = (now - existing.created_at.replace(tzinfo=timezone.utc)).total_seconds()
+        if age < 7200:
+            return False
+
+    data = _build_user_data_summary(db, user)
+    payload = {
+        "date": now.strftime("%Y-%m-%d"),
+        "generated_at": now.isoformat(),
+        "stats": _brief_stats(data),
+    }
+    if batch is not None:
+        batch.add(BatchItem(
+            kind="morning_brief",
+            user_id=user.id,
+            prompt=_brief_prompt(data),
+            max_completion_tokens=350,
+            fallback=_fallback_brief(data),
+            payload=payload,
+        ))
+        return True
+
+    brief_text = await _generate_brief(data)
+    await _store_brief(db, user.id, brief_text, payload)
+    return True
 
 
 async def run_morning_brief():
     """
-    Main scheduler job. Generates and stores morning briefs for all active users.
+    Main scheduler job. Generates and stores morning briefs for all active users,
+    fanned out with bounded concurrency.
     Pushes live to any user currently connected via WebSocket.
+    With AGENT_BATCH_JOBS including "morning_brief" the prompts go out as one
+    offline batch; briefs are stored + pushed when it completes.
     """
     logger.info("[MorningBrief] Starting morning brief generation run...")
-    db = SessionLocal()
     now = datetime.now(timezone.utc)
+    batch = BatchCollector("morning_brief") if batch_enabled("morning_brief") else None
 
     try:
-        from app.agent.notification_manager import notif_manager
+        # The 2-hour "already generated" check can't see briefs still in a batch
+        pending = frozenset(pending_user_ids("morning_brief"))
 
-        users = db.query(User).filter(User.is_active == True).all()
-        generated = 0
-
-        for user in users:
-            try:
-                # Skip if brief already generated today (within 2 hours)
-                existing = (
-                    db.query(HealthMemory)
-                    .filter(
-                        HealthMemory.user_id == user.id,
-                        HealthMemory.category == "morning_brief",
-                    )
-                    .order_by(HealthMemory.created_at.desc())
-                    .first()
-                )
-                if existing:
-                    age = (now - existing.created_at.replace(tzinfo=timezone.utc)).total_seconds()
-                    if age < 7200:
-                        continue
-
-                data = _build_user_data_summary(db, user)
-                brief_text = _generate_brief(data)
-
-                # Store in health_memories
-                memory = HealthMemory(
-                    user_id=user.id,
-                    category="morning_brief",
-                    source="system",
-                    content={
-                        "date": now.strftime("%Y-%m-%d"),
-                        "brief": brief_text,
-                        "stats": {
-                            "streak_days": data["streak_days"],
-                            "sessions_this_week": data["sessions_this_week"],
-                            "avg_calories": data["avg_calories_this_week"],
-                            "calorie_target": data["calorie_target"],
-                            "calorie_gap": data["calorie_gap_vs_target"],
-                            "latest_weight": data["latest_weight"],
-                            "weight_goal": data["weight_goal"],
-                            "today_program_day": data["today_program_day"],
-                            "anomalies": data["anomalies"],
-                        },
-                    },
-                )
-                db.add(memory)
-                db.commit()
-                generated += 1
-
-                # Push to WebSocket if online
-                await notif_manager.push(user.id, {
-                    "type": "morning_brief",
-                    "title": "Your morning brief is ready",
-                    "body": brief_text[:120] + "…" if len(brief_text) > 120 else brief_text,
-                    "data": {"full_brief": brief_text},
-                })
-
-            except Exception as e:
-                logger.warning(f"[MorningBrief] Error for user {user.id}: {e}")
-                try:
-                    db.rollback()
-                except Exception:
-                    pass
-
-        logger.info(f"[MorningBrief] Done — {generated} briefs generated.")
+        from app.agent.notification_manager import notif_manager
 
+        async with notif_manager.batched_offline():
+            stats = await fan_out(
+                "MorningBrief",
+                lambda db, user: _brief_user(db, user, now, batch, pending),
+            )
+        if batch is not None:
+            await submit_batch(batch)
+        logger.info(
+            f"[MorningBrief] Done — {stats.done} briefs {'queued' if batch is not None else 'generated'}, "
+            f"{stats.skipped} skipped, {stats.failed} failed — {stats}"
+        )
+        return stats.summary()
     except Exception as e:
         logger.error(f"[MorningBrief] Job failed: {e}")
-    finally:
-        db.close()
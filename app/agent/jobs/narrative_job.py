@@ -14,13 +14,18 @@ Instead of feeding 50 raw JSON events to the AI, it feeds ONE rich narrative per
 
 import logging
 from datetime import datetime, timezone, timedelta
+from typing import Optional
 
-from app.db.database import SessionLocal
+from app.agent.job_runner import fan_out, with_rate_limit_retry
+from app.agent.llm_batch import (
+    BatchCollector, BatchItem, batch_enabled, pending_user_ids, register_writer, submit_batch,
+)
 from app.models.user import User
 from app.models.health_memory import HealthMemory
 from app.models.fitness_tracking import (
     WorkoutSession, SessionStatus, MealLog, BodyWeightLog, WaterLog,
 )
+from app.services.openai_clients import get_openai
 
 logger = logging.getLogger(__name__)
 
@@ -38,12 +43,6 @@ RAW DATA:
 {raw_data}"""
 
 
-def _get_openai_client():
-    from openai import OpenAI
-    import os
-    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-
 def _collect_events(db, user_id: int, since: datetime) -> dict:
     """Collect all raw events for the past 24h for a user."""
     events = {
@@ -129,110 +128,150 @@ def _has_any_data(events: dict) -> bool:
     )
 
 
-def _synthesise_narrative(events: dict) -> str:
-    """Call GPT-4o-mini to turn raw events into a readable narrative."""
+def _narrative_prompt(events: dict) -> str:
     import json
     raw_data = json.dumps(events, indent=2, default=str)
-    prompt = _NARRATIVE_PROMPT.format(raw_data=raw_data)
+    return _NARRATIVE_PROMPT.format(raw_data=raw_data)
+
+
+def _fallback_narrative(events: dict) -> str:
+    """Simple structured summary without AI."""
+    parts = []
+    if events["workouts"]:
+        completed = [w for w in events["workouts"] if w["status"] == "completed"]
+        parts.append(f"Completed {len(completed)} workout(s).")
+    if events["meals"]:
+        total_cal = sum(m["calories"] for m in events["meals"])
+        total_p = sum(m["protein_g"] for m in events["meals"])
+        parts.append(f"Logged {len(events['meals'])} meal(s), {total_cal} kcal, {total_p}g protein.")
+    if events["weight_entries"]:
+        parts.append(f"Logged weight: {events['weight_entries'][-1]['kg']} kg.")
+    if events["water"]:
+        w = events["water"]
+        parts.append(f"Water: {w['glasses']}/{w['target']} glasses.")
+    return " ".join(parts) if parts else "No activity logged."
+
+
+async def _synthesise_narrative(events: dict) -> str:
+    """Call GPT-4o-mini to turn raw events into a readable narrative."""
+    prompt = _narrative_prompt(events)
 
     try:
-        client = _get_openai_client()
-        response = client.chat.completions.create(
+        client = get_openai("gpt-5-nano")
+        response = await with_rate_limit_retry(lambda: client.chat.completions.create(
             model="gpt-5-nano",
             messages=[{"role": "user", "content": prompt}],
             max_completion_tokens=400,
-        )
+        ))
         return response.choices[0].message.content.strip()
     except Exception as e:
         logger.error(f"[Narrative] OpenAI error: {e}")
-        # Fallback: write a simple structured summary without AI
-        parts = []
-        if events["workouts"]:
-            completed = [w for w in events["workouts"] if w["status"] == "completed"]
-            parts.append(f"Completed {len(completed)} workout(s).")
-        if events["meals"]:
-            total_cal = sum(m["calories"] for m in events["meals"])
-            total_p = sum(m["protein_g"] for m in events["meals"])
-            parts.append(f"Logged {len(events['meals'])} meal(s), {total_cal} kcal, {total_p}g protein.")
-        if events["weight_entries"]:
-            parts.append(f"Logged weight: {events['weight_entries'][-1]['kg']} kg.")
-        if events["water"]:
-            w = events["water"]
-            parts.append(f"Water: {w['glasses']}/{w['target']} glasses.")
-        return " ".join(parts) if parts else "No activity logged."
+        return _fallback_narrative(events)
+
+
+def _event_counts(events: dict) -> dict:
+    return {
+        "workouts": len(events["workouts"]),
+        "meals": len(events["meals"]),
+        "weight_entries": len(events["weight_entries"]),
+        "water_logged": events["water"] is not None,
+    }
+
+
+async def _store_narrative(db, user_id: int, text: str, payload: dict) -> None:
+    """Write one daily_narrative memory. Also the batch-mode result writer."""
+    db.add(HealthMemory(
+        user_id=user_id,
+        category="daily_narrative",
+        source="system",
+        content={
+            "date": payload["date"],
+            "narrative": text,
+            "raw_event_counts": payload["raw_event_counts"],
+        },
+    ))
+    db.commit()
+
+
+register_writer("daily_narrative", _store_narrative)
+
+
+async def _synthesise_user(
+    db, user: User, now: datetime, since: datetime, date_label: str,
+    batch: Optional[BatchCollector] = None, pending: frozenset = frozenset(),
+) -> bool:
+    """
+    Synthesise and store one user's narrative — or queue its prompt when
+    running in batch mode. Returns False when skipped.
+    """
+    # A narrative for this user is still in an uncollected batch
+    if user.id in pending:
+        return False
+
+    # Don't re-synthesise if we already did this for today
+    existing = (
+        db.query(HealthMemory)
+        .filter(
+            HealthMemory.user_id == user.id,
+            HealthMemory.category == "daily_narrative",
+        )
+        .order_by(HealthMemory.created_at.desc())
+        .first()
+    )
+    if existing:
+        # Check if it was written today (within last 2h to avoid double-run)
+        age = (now - existing.created_at.replace(tzinfo=timezone.utc)).total_seconds()
+        if age < 7200:
+            return False
+
+    events = _collect_events(db, user.id, since)
+    if not _has_any_data(events):
+        return False
+
+    payload = {"date": date_label, "raw_event_counts": _event_counts(events)}
+    if batch is not None:
+        batch.add(BatchItem(
+            kind="daily_narrative",
+            user_id=user.id,
+            prompt=_narrative_prompt(events),
+            max_completion_tokens=400,
+            fallback=_fallback_narrative(events),
+            payload=payload,
+        ))
+        return True
+
+    narrative_text = await _synthesise_narrative(events)
+    await _store_narrative(db, user.id, narrative_text, payload)
+    return True
 
 
 async def run_daily_narrative_synthesis():
     """
-    Main scheduler job. Iterates all active users and synthesises their
+    Main scheduler job. Fans out over all active users and synthesises their
     yesterday narrative. Called at 06:00 UTC — covers the past 24h.
+    With AGENT_BATCH_JOBS including "daily_narrative" the prompts go out as
+    one offline batch instead (see llm_batch.py).
     """
     logger.info("[Narrative] Starting daily synthesis run...")
-    db = SessionLocal()
     now = datetime.now(timezone.utc)
     since = now - timedelta(hours=24)
     date_label = (now - timedelta(hours=1)).strftime("%Y-%m-%d")  # label = yesterday
+    batch = BatchCollector("narrative") if batch_enabled("daily_narrative") else None
 
     try:
-        users = db.query(User).filter(User.is_active == True).all()
-        processed = 0
-        skipped = 0
-
-        for user in users:
-            try:
-                # Don't re-synthesise if we already did this for today
-                existing = (
-                    db.query(HealthMemory)
-                    .filter(
-                        HealthMemory.user_id == user.id,
-                        HealthMemory.category == "daily_narrative",
-                    )
-                    .order_by(HealthMemory.created_at.desc())
-                    .first()
-                )
-                if existing:
-                    # Check if it was written today (within last 2h to avoid double-run)
-                    age = (now - existing.created_at.replace(tzinfo=timezone.utc)).total_seconds()
-                    if age < 7200:
-                        skipped += 1
-                        continue
-
-                events = _collect_events(db, user.id, since)
-                if not _has_any_data(events):
-                    skipped += 1
-                    continue
-
-                narrative_text = _synthesise_narrative(events)
-
-                memory = HealthMemory(
-                    user_id=user.id,
-                    category="daily_narrative",
-                    source="system",
-                    content={
-                        "date": date_label,
-                        "narrative": narrative_text,
-                        "raw_event_counts": {
-                            "workouts": len(events["workouts"]),
-                            "meals": len(events["meals"]),
-                            "weight_entries": len(events["weight_entries"]),
-                            "water_logged": events["water"] is not None,
-                        },
-                    },
-                )
-                db.add(memory)
-                db.commit()
-                processed += 1
-
-            except Exception as e:
-                logger.warning(f"[Narrative] Error processing user {user.id}: {e}")
-                try:
-                    db.rollback()
-                except Exception:
-                    pass
-
-        logger.info(f"[Narrative] Done — {processed} synthesised, {skipped} skipped.")
+        # The 2-hour "already done" check can't see narratives still in a batch
+        pending = frozenset(pending_user_ids("daily_narrative"))
 
+        stats = await fan_out(
+            "Narrative",
+            lambda db, user: _synthesise_user(db, user, now, since, date_label, batch, pending),
+        )
+        if batch is not None:
+            await submit_batch(batch)
+        logger.info(
+            f"[Narrative] Done — {stats.done} {'queued' if batch is not None else 'synthesised'}, "
+            f"{stats.skipped} skipped, {stats.failed} failed — {stats}"
+        )
+        return stats.summary()
     except Exception as e:
         logger.error(f"[Narrative] Job failed: {e}")
-    finally:
-        db.close()
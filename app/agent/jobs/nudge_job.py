@@ -3,8 +3,9 @@ nudge_job.py
 ============
 Layer 3 — Real-Time Nudge Agent.
 
-Runs every 4 hours. For each active user, checks for gaps and behavioural
-triggers, then generates and pushes a contextual nudge if warranted.
+Runs every 4 hours. A set-based pre-filter checks every active user for gaps
+and behavioural triggers in a few aggregate queries; only users with a firing
+trigger get a generated + pushed contextual nudge.
 
 Nudge triggers:
   T1 — No meal logged in 5+ hours during waking hours → calorie gap nudge
@@ -17,15 +18,28 @@ A cooldown prevents the same trigger from firing more than once per 8 hours.
 """
 
 import logging
-from datetime import datetime, timezone, timedelta
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone, timedelta
+from typing import Optional
 
+from sqlalchemy import func, select
+
+from app.agent.job_runner import fan_out, with_rate_limit_retry
+from app.agent.llm_batch import (
+    BatchCollector, BatchItem, batch_enabled, register_writer, submit_batch,
+)
 from app.db.database import SessionLocal
 from app.models.user import User
 from app.models.health_memory import HealthMemory
-from app.models.fitness_tracking import MealLog, WorkoutSession, SessionStatus, WaterLog
+from app.models.fitness_tracking import MealLog, WorkoutSession, SessionStatus, WaterLog, UserStreak
+from app.services.activity_calendar import streak_as_of
+from app.services.openai_clients import get_openai
 
 logger = logging.getLogger(__name__)
 
+# Batched nudges are time-sensitive — drop results that land later than this
+NUDGE_BATCH_TTL = timedelta(hours=2)
+
 _NUDGE_PROMPT = """You are Central — a supportive AI fitness coach.
 Write a SHORT, warm nudge notification (max 60 words, 2 sentences).
 Be specific about the real numbers. Do NOT be preachy or generic.
@@ -36,30 +50,6 @@ Context: {context}
 Output ONLY the notification text. No labels, no quotes."""
 
 
-def _get_openai_client():
-    from openai import OpenAI
-    import os
-    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-
-def _recent_nudge_cooldown(db, user_id: int, trigger_type: str, hours: int = 8) -> bool:
-    """Returns True if a nudge of this trigger type was sent within the cooldown window."""
-    since = datetime.now(timezone.utc) - timedelta(hours=hours)
-    existing = (
-        db.query(HealthMemory)
-        .filter(
-            HealthMemory.user_id == user_id,
-            HealthMemory.category == "nudge_sent",
-            HealthMemory.created_at >= since,
-        )
-        .all()
-    )
-    for m in existing:
-        if m.content.get("trigger_type") == trigger_type:
-            return True
-    return False
-
-
 def _record_nudge_sent(db, user_id: int, trigger_type: str, nudge_text: str):
     """Record that a nudge was sent (for cooldown tracking)."""
     memory = HealthMemory(
@@ -76,210 +66,339 @@ def _record_nudge_sent(db, user_id: int, trigger_type: str, nudge_text: str):
     db.commit()
 
 
-def _generate_nudge_text(trigger_type: str, context: dict) -> str:
-    """Generate personalised nudge text via GPT-4o-mini."""
+def _nudge_prompt(trigger_type: str, context: dict) -> str:
     import json
     ctx_str = json.dumps(context, default=str)
-    prompt = _NUDGE_PROMPT.format(trigger_type=trigger_type, context=ctx_str)
+    return _NUDGE_PROMPT.format(trigger_type=trigger_type, context=ctx_str)
+
+
+def _fallback_nudge(trigger_type: str, context: dict) -> str:
+    """Static nudges used when the model is unavailable."""
+    fallbacks = {
+        "calorie_gap": f"You're behind on calories today — {context.get('hours_since_last_meal', '?')}h since your last meal. Quick protein-rich snack?",
+        "workout_due": "Your workout window is coming up. Last session was great — let's keep the momentum.",
+        "water_low": f"Only {context.get('glasses', 0)}/{context.get('target', 8)} glasses so far. Grab some water now.",
+        "streak_guard": f"You've got a {context.get('streak', 0)}-day streak going. Don't let today break it — even a short session counts.",
+    }
+    return fallbacks.get(trigger_type, "Time to check in on today's goals.")
+
+
+async def _generate_nudge_text(trigger_type: str, context: dict) -> str:
+    """Generate personalised nudge text via GPT-4o-mini."""
+    prompt = _nudge_prompt(trigger_type, context)
 
     try:
-        client = _get_openai_client()
-        response = client.chat.completions.create(
+        client = get_openai("gpt-5-nano")
+        response = await with_rate_limit_retry(lambda: client.chat.completions.create(
             model="gpt-5-nano",
             messages=[{"role": "user", "content": prompt}],
             max_completion_tokens=100,
-        )
+        ))
         return response.choices[0].message.content.strip()
     except Exception as e:
         logger.error(f"[NudgeJob] OpenAI error: {e}")
-        # Fallback static nudges
-        fallbacks = {
-            "calorie_gap": f"You're behind on calories today — {context.get('hours_since_last_meal', '?')}h since your last meal. Quick protein-rich snack?",
-            "workout_due": "Your workout window is coming up. Last session was great — let's keep the momentum.",
-            "water_low": f"Only {context.get('glasses', 0)}/{context.get('target', 8)} glasses so far. Grab some water now.",
-            "streak_guard": f"You've got a {context.get('streak', 0)}-day streak going. Don't let today break it — even a short session counts.",
-        }
-        return fallbacks.get(trigger_type, "Time to check in on today's goals.")
+        return _fallback_nudge(trigger_type, context)
 
 
-async def _check_user_nudges(db, user: User, now: datetime, notif_manager):
-    """Run all nudge trigger checks for a single user."""
-    hour_utc = now.hour
+async def _deliver_nudge(db, user_id: int, nudge: str, payload: dict) -> None:
+    """
+    Push a nudge and record it for cooldown tracking. Also the batch-mode
+    result writer — batched nudges that land after their expiry are dropped.
+    """
+    expires_at = payload.get("expires_at")
+    if expires_at and datetime.fromisoformat(expires_at) < datetime.now(timezone.utc):
+        logger.debug(f"[NudgeJob] dropping stale {payload['trigger']} nudge for user {user_id}")
+        return
 
-    # Only nudge during reasonable waking hours (7am–10pm UTC approx)
-    if not (7 <= hour_utc <= 22):
+    from app.agent.notification_manager import notif_manager
+    await notif_manager.push(user_id, {
+        "type": "nudge",
+        "title": payload["title"],
+        "body": nudge,
+        "data": payload["data"],
+    })
+    _record_nudge_sent(db, user_id, payload["trigger"], nudge)
+
+
+register_writer("nudge", _deliver_nudge)
+
+
+async def _send_nudge(
+    db, user_id: int, trigger_type: str, ctx: dict, title: str, data: dict,
+    batch: Optional[BatchCollector] = None,
+) -> None:
+    """Generate + deliver one nudge now, or queue it when running in batch mode."""
+    payload = {"trigger": trigger_type, "title": title, "data": data}
+    if batch is not None:
+        payload["expires_at"] = (datetime.now(timezone.utc) + NUDGE_BATCH_TTL).isoformat()
+        batch.add(BatchItem(
+            kind="nudge",
+            user_id=user_id,
+            prompt=_nudge_prompt(trigger_type, ctx),
+            max_completion_tokens=100,
+            fallback=_fallback_nudge(trigger_type, ctx),
+            payload=payload,
+        ))
         return
 
+    nudge = await _generate_nudge_text(trigger_type, ctx)
+    await _deliver_nudge(db, user_id, nudge, payload)
+
+
+def _in_waking_hours(now: datetime) -> bool:
+    # Only nudge during reasonable waking hours (7am–10pm UTC approx)
+    return 7 <= now.hour <= 22
+
+
+# ── Set-based pre-filter ─────────────────────────────────────────────────────
+#
+# A handful of aggregate queries decide, for every user at once, which of
+# T1–T4 fire right now. Only users with at least one firing trigger get a
+# session + LLM work in the fan-out.
+
+T1_MEAL_GAP_HOURS = 5
+T2_PATTERN_DAYS = 28
+T4_MIN_STREAK = 3
+
+
+@dataclass
+class NudgeFacts:
+    """Per-user inputs for T1–T4, loaded in bulk by _load_nudge_facts."""
+    cooldowns: set = field(default_factory=set)          # trigger types sent < 8h ago
+    last_meal_at: Optional[datetime] = None
+    last_meal_name: Optional[str] = None
+    water: Optional[tuple] = None                        # (glasses, target_glasses) today
+    session_today: bool = False                          # any session started today
+    recent_weekday_count: int = 0                        # completions on today's weekday, last 28d
+    streak: int = 0                                      # consecutive days through yesterday
+
+
+def _day(value) -> date:
+    # SQLite's date() returns text, Postgres returns a date
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+def _load_nudge_facts(db, now: datetime, cooldown_hours: int = 8) -> dict:
+    """Six set-based queries → {user_id: NudgeFacts} for every active user."""
+    # Subquery rather than an IN-list, so the user count never hits bind limits
+    active = select(User.id).where(User.is_active == True)
+
+    # Active users + their materialized streak (activity_calendar) in one pass
+    yesterday = now.date() - timedelta(days=1)
+    facts = {}
+    for user_id, streak in (
+        db.query(User.id, UserStreak)
+        .outerjoin(UserStreak, UserStreak.user_id == User.id)
+        .filter(User.is_active == True)
+    ):
+        facts[user_id] = NudgeFacts(streak=streak_as_of(streak, yesterday))
+    if not facts:
+        return facts
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    # Active cooldowns — (user, trigger) pairs only, not whole memory rows
+    trigger = HealthMemory.content["trigger_type"].as_string()
+    for uid, trig in (
+        db.query(HealthMemory.user_id, trigger)
+        .filter(
+            HealthMemory.category == "nudge_sent",
+            HealthMemory.created_at >= now - timedelta(hours=cooldown_hours),
+            HealthMemory.user_id.in_(active),
+        )
+        .distinct()
+    ):
+        facts[uid].cooldowns.add(trig)
+
+    # Latest meal per user
+    rn = func.row_number().over(
+        partition_by=MealLog.user_id, order_by=MealLog.logged_at.desc(),
+    ).label("rn")
+    latest = (
+        select(MealLog.user_id, MealLog.logged_at, MealLog.meal_name, rn)
+        .where(MealLog.user_id.in_(active))
+        .subquery()
+    )
+    for uid, logged_at, meal_name in db.execute(
+        select(latest.c.user_id, latest.c.logged_at, latest.c.meal_name).where(latest.c.rn == 1)
+    ):
+        facts[uid].last_meal_at = logged_at.replace(tzinfo=timezone.utc)
+        facts[uid].last_meal_name = meal_name
+
+    # Today's water
+    for uid, glasses, target in db.query(
+        WaterLog.user_id, WaterLog.glasses, WaterLog.target_glasses,
+    ).filter(WaterLog.date == now.date(), WaterLog.user_id.in_(active)):
+        facts[uid].water = (glasses, target)
+
+    # Anyone who started a session today
+    for (uid,) in db.query(WorkoutSession.user_id).filter(
+        WorkoutSession.started_at >= today_start,
+        WorkoutSession.user_id.in_(active),
+    ).distinct():
+        facts[uid].session_today = True
+
+    # Completed sessions per user per day over T2's 28-day pattern window
+    day = func.date(WorkoutSession.completed_at)
+    weekday = now.weekday()
+    for uid, d, count in (
+        db.query(WorkoutSession.user_id, day, func.count())
+        .filter(
+            WorkoutSession.status == SessionStatus.COMPLETED,
+            WorkoutSession.completed_at >= now - timedelta(days=T2_PATTERN_DAYS),
+            WorkoutSession.user_id.in_(active),
+        )
+        .group_by(WorkoutSession.user_id, day)
+    ):
+        if _day(d).weekday() == weekday:
+            facts[uid].recent_weekday_count += count
+
+    return facts
+
+
+def _eligible_nudges(facts: NudgeFacts, now: datetime) -> list:
+    """Which of T1–T4 fire for one user → [(trigger, ctx, title, data)]."""
+    hour_utc = now.hour
+    nudges = []
+
     # ── T1: Calorie gap nudge ─────────────────────────────────
-    try:
-        if not _recent_nudge_cooldown(db, user.id, "calorie_gap"):
-            last_meal = (
-                db.query(MealLog)
-                .filter(MealLog.user_id == user.id)
-                .order_by(MealLog.logged_at.desc())
-                .first()
-            )
-            if last_meal:
-                hours_since = (now - last_meal.logged_at.replace(tzinfo=timezone.utc)).total_seconds() / 3600
-            else:
-                hours_since = 999  # No meals ever logged
-
-            if hours_since >= 5:
-                ctx = {
-                    "hours_since_last_meal": round(hours_since, 1),
-                    "last_meal_name": last_meal.meal_name if last_meal else "none",
-                    "hour_of_day": hour_utc,
-                }
-                nudge = _generate_nudge_text("calorie_gap", ctx)
-                await notif_manager.push(user.id, {
-                    "type": "nudge",
-                    "title": "🍽 Fuel check",
-                    "body": nudge,
-                    "data": {"trigger": "calorie_gap"},
-                })
-                _record_nudge_sent(db, user.id, "calorie_gap", nudge)
-    except Exception as e:
-        logger.debug(f"[NudgeJob] T1 error user {user.id}: {e}")
+    if "calorie_gap" not in facts.cooldowns:
+        if facts.last_meal_at:
+            hours_since = (now - facts.last_meal_at).total_seconds() / 3600
+        else:
+            hours_since = 999  # No meals ever logged
+        if hours_since >= T1_MEAL_GAP_HOURS:
+            ctx = {
+                "hours_since_last_meal": round(hours_since, 1),
+                "last_meal_name": facts.last_meal_name if facts.last_meal_at else "none",
+                "hour_of_day": hour_utc,
+            }
+            nudges.append(("calorie_gap", ctx, "🍽 Fuel check", {"trigger": "calorie_gap"}))
 
     # ── T2: Workout due nudge ─────────────────────────────────
-    try:
-        if not _recent_nudge_cooldown(db, user.id, "workout_due"):
-            today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            session_today = (
-                db.query(WorkoutSession)
-                .filter(
-                    WorkoutSession.user_id == user.id,
-                    WorkoutSession.started_at >= today_start,
-                )
-                .first()
-            )
-            if not session_today:
-                # Check if they typically work out on this weekday
-                weekday = now.weekday()  # 0=Mon
-                past_month = now - timedelta(days=28)
-                past_sessions = (
-                    db.query(WorkoutSession)
-                    .filter(
-                        WorkoutSession.user_id == user.id,
-                        WorkoutSession.status == SessionStatus.COMPLETED,
-                        WorkoutSession.completed_at >= past_month,
-                    )
-                    .all()
-                )
-                weekday_count = sum(
-                    1 for s in past_sessions
-                    if s.completed_at and s.completed_at.weekday() == weekday
-                )
-                # If they've worked out on this day 2+ times in the past month, it's a pattern
-                if weekday_count >= 2 and 10 <= hour_utc <= 20:
-                    last_session = (
-                        db.query(WorkoutSession)
-                        .filter(
-                            WorkoutSession.user_id == user.id,
-                            WorkoutSession.status == SessionStatus.COMPLETED,
-                        )
-                        .order_by(WorkoutSession.completed_at.desc())
-                        .first()
-                    )
-                    ctx = {
-                        "weekday": now.strftime("%A"),
-                        "historical_sessions_on_this_day": weekday_count,
-                        "last_session_duration": last_session.duration_minutes if last_session else None,
-                    }
-                    nudge = _generate_nudge_text("workout_due", ctx)
-                    await notif_manager.push(user.id, {
-                        "type": "nudge",
-                        "title": "🏋️ Workout window",
-                        "body": nudge,
-                        "data": {"trigger": "workout_due"},
-                    })
-                    _record_nudge_sent(db, user.id, "workout_due", nudge)
-    except Exception as e:
-        logger.debug(f"[NudgeJob] T2 error user {user.id}: {e}")
+    # If they've worked out on this weekday 2+ times in the past month, it's a pattern
+    if (
+        "workout_due" not in facts.cooldowns
+        and not facts.session_today
+        and facts.recent_weekday_count >= 2
+        and 10 <= hour_utc <= 20
+    ):
+        ctx = {
+            "weekday": now.strftime("%A"),
+            "historical_sessions_on_this_day": facts.recent_weekday_count,
+            "last_session_duration": None,   # filled in for eligible users only
+        }
+        nudges.append(("workout_due", ctx, "🏋️ Workout window", {"trigger": "workout_due"}))
 
     # ── T3: Water nudge ───────────────────────────────────────
-    try:
-        if not _recent_nudge_cooldown(db, user.id, "water_low") and 13 <= hour_utc <= 16:
-            today = now.date()
-            water = db.query(WaterLog).filter(
-                WaterLog.user_id == user.id, WaterLog.date == today
-            ).first()
-            if water and water.glasses < (water.target_glasses * 0.5):
-                ctx = {"glasses": water.glasses, "target": water.target_glasses, "hour": hour_utc}
-                nudge = _generate_nudge_text("water_low", ctx)
-                await notif_manager.push(user.id, {
-                    "type": "nudge",
-                    "title": "💧 Hydration check",
-                    "body": nudge,
-                    "data": {"trigger": "water_low"},
-                })
-                _record_nudge_sent(db, user.id, "water_low", nudge)
-    except Exception as e:
-        logger.debug(f"[NudgeJob] T3 error user {user.id}: {e}")
+    if "water_low" not in facts.cooldowns and 13 <= hour_utc <= 16 and facts.water:
+        glasses, target = facts.water
+        if glasses < target * 0.5:
+            ctx = {"glasses": glasses, "target": target, "hour": hour_utc}
+            nudges.append(("water_low", ctx, "💧 Hydration check", {"trigger": "water_low"}))
 
     # ── T4: Streak guard ──────────────────────────────────────
-    try:
-        if not _recent_nudge_cooldown(db, user.id, "streak_guard") and 18 <= hour_utc <= 21:
-            today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            session_today = (
-                db.query(WorkoutSession)
-                .filter(
-                    WorkoutSession.user_id == user.id,
-                    WorkoutSession.started_at >= today_start,
-                )
-                .first()
+    if "streak_guard" not in facts.cooldowns and 18 <= hour_utc <= 21 and not facts.session_today:
+        streak = facts.streak
+        if streak >= T4_MIN_STREAK:  # Only guard meaningful streaks
+            ctx = {"streak": streak, "hour": hour_utc}
+            nudges.append((
+                "streak_guard", ctx, f"🔥 {streak}-day streak at risk",
+                {"trigger": "streak_guard", "streak": streak},
+            ))
+
+    return nudges
+
+
+def prefilter_nudges(db, now: datetime) -> tuple:
+    """
+    Set-based eligibility for T1–T4 → (active users checked,
+    {user_id: [(trigger, ctx, title, data)]} for users with a nudge to send).
+    """
+    if not _in_waking_hours(now):
+        return 0, {}
+
+    facts = _load_nudge_facts(db, now)
+    eligible = {}
+    for uid, user_facts in facts.items():
+        nudges = _eligible_nudges(user_facts, now)
+        if nudges:
+            eligible[uid] = nudges
+
+    # T2 context wants the last session's duration — fetch it for eligible users only
+    t2_users = [uid for uid, nudges in eligible.items() if any(n[0] == "workout_due" for n in nudges)]
+    durations = {}
+    for i in range(0, len(t2_users), 500):
+        chunk = t2_users[i:i + 500]
+        rn = func.row_number().over(
+            partition_by=WorkoutSession.user_id, order_by=WorkoutSession.completed_at.desc(),
+        ).label("rn")
+        last = (
+            select(WorkoutSession.user_id, WorkoutSession.duration_minutes, rn)
+            .where(
+                WorkoutSession.user_id.in_(chunk),
+                WorkoutSession.status == SessionStatus.COMPLETED,
             )
-            if not session_today:
-                # Calculate current streak
-                streak = 0
-                check_day = now.date() - timedelta(days=1)  # yesterday
-                for _ in range(30):
-                    ds = datetime.combine(check_day, datetime.min.time()).replace(tzinfo=timezone.utc)
-                    de = ds + timedelta(days=1)
-                    had_session = db.query(WorkoutSession).filter(
-                        WorkoutSession.user_id == user.id,
-                        WorkoutSession.status == SessionStatus.COMPLETED,
-                        WorkoutSession.completed_at >= ds,
-                        WorkoutSession.completed_at < de,
-                    ).first()
-                    if had_session:
-                        streak += 1
-                        check_day -= timedelta(days=1)
-                    else:
-                        break
-
-                if streak >= 3:  # Only guard meaningful streaks
-                    ctx = {"streak": streak, "hour": hour_utc}
-                    nudge = _generate_nudge_text("streak_guard", ctx)
-                    await notif_manager.push(user.id, {
-                        "type": "nudge",
-                        "title": f"🔥 {streak}-day streak at risk",
-                        "body": nudge,
-                        "data": {"trigger": "streak_guard", "streak": streak},
-                    })
-                    _record_nudge_sent(db, user.id, "streak_guard", nudge)
-    except Exception as e:
-        logger.debug(f"[NudgeJob] T4 error user {user.id}: {e}")
+            .subquery()
+        )
+        durations.update(db.execute(
+            select(last.c.user_id, last.c.duration_minutes).where(last.c.rn == 1)
+        ).all())
+    for uid in t2_users:
+        for trig, ctx, _, _ in eligible[uid]:
+            if trig == "workout_due":
+                ctx["last_session_duration"] = durations.get(uid)
+
+    return len(facts), eligible
+
+
+async def _send_user_nudges(
+    db, user: User, nudges: list, batch: Optional[BatchCollector] = None,
+) -> int:
+    """Generate + deliver (or queue) one user's pre-filtered nudges. Returns the count sent."""
+    sent = 0
+    for trigger_type, ctx, title, data in nudges:
+        try:
+            await _send_nudge(db, user.id, trigger_type, ctx, title=title, data=data, batch=batch)
+            sent += 1
+        except Exception as e:
+            logger.debug(f"[NudgeJob] {trigger_type} error user {user.id}: {e}")
+    return sent
 
 
 async def run_nudge_check():
-    """Main scheduler job — runs nudge checks for all active users."""
+    """
+    Main scheduler job. A set-based pre-filter picks the users with a firing
+    trigger; only those are fanned out for LLM text + delivery.
+    With AGENT_BATCH_JOBS including "nudge" the texts are generated in one
+    offline batch and delivered when it completes (if still fresh).
+    """
     logger.info("[NudgeJob] Starting nudge check run...")
-    db = SessionLocal()
     now = datetime.now(timezone.utc)
+    if not _in_waking_hours(now):
+        logger.info("[NudgeJob] Outside waking hours — nothing to do.")
+        return None
+    batch = BatchCollector("nudge") if batch_enabled("nudge") else None
 
     try:
-        from app.agent.notification_manager import notif_manager
-        users = db.query(User).filter(User.is_active == True).all()
+        db = SessionLocal()
+        try:
+            checked, eligible = prefilter_nudges(db, now)
+        finally:
+            db.close()
 
-        for user in users:
-            try:
-                await _check_user_nudges(db, user, now, notif_manager)
-            except Exception as e:
-                logger.warning(f"[NudgeJob] Error for user {user.id}: {e}")
+        async def _nudge_user(db, user):
+            return await _send_user_nudges(db, user, eligible[user.id], batch) > 0
 
-        logger.info(f"[NudgeJob] Done — checked {len(users)} users.")
+        from app.agent.notification_manager import notif_manager
+
+        async with notif_manager.batched_offline():
+            stats = await fan_out("NudgeJob", _nudge_user, user_ids=list(eligible))
+        if batch is not None:
+            await submit_batch(batch)
+        logger.info(
+            f"[NudgeJob] Done — checked {checked} users, {len(eligible)} eligible, "
+            f"{stats.done} {'queued' if batch is not None else 'nudged'}, {stats.failed} failed — {stats}"
+        )
+        return stats.summary()
     except Exception as e:
         logger.error(f"[NudgeJob] Job failed: {e}")
-    finally:
-        db.close()
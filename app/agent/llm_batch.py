@@ -0,0 +1,375 @@
+"""
+llm_batch.py
+============
+Offline batch mode for the scheduled LLM jobs (narrative, morning brief, nudges).
+
+Instead of one chat-completion per user, a job run in batch mode:
+  1. Collects every per-user prompt into a BatchCollector
+  2. submit_batch() writes them to one JSONL file (OpenAI Batch API format)
+     plus a manifest, and hands the file to the configured BatchBackend
+  3. collect_finished_batches() — scheduled every 10 min — polls pending
+     manifests and, once a batch finishes, hands each result to the writer
+     the job registered for that kind (which stores it in HealthMemory)
+
+A request that errors, or a batch that fails / expires, falls back to the
+deterministic text the job computed at collection time — same as realtime.
+
+Config:
+  AGENT_BATCH_JOBS     comma-separated kinds to batch, e.g.
+                       "daily_narrative,morning_brief" (default: none → realtime)
+  AGENT_BATCH_BACKEND  "openai" (default) | "local"
+  AGENT_BATCH_DIR      where JSONL + manifests live (default: batches/)
+
+LocalBatchBackend completes synchronously from a responder callable — use it
+in tests and local dev, no network involved.
+"""
+
+import json
+import logging
+import os
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from app.db.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+BATCH_MODEL = "gpt-5-nano"
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+
+
+def batch_enabled(kind: str) -> bool:
+    kinds = os.getenv("AGENT_BATCH_JOBS", "")
+    return kind in {k.strip() for k in kinds.split(",") if k.strip()}
+
+
+def _batch_dir() -> Path:
+    path = Path(os.getenv("AGENT_BATCH_DIR", "batches"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+# ─────────────────────────────────────────────────────────────
+# Items + collector
+# ─────────────────────────────────────────────────────────────
+
+@dataclass
+class BatchItem:
+    kind: str                    # writer key — "daily_narrative" | "morning_brief" | "nudge"
+    user_id: int
+    prompt: str
+    max_completion_tokens: int
+    fallback: str                # stored when the request errors or the batch fails
+    payload: dict = field(default_factory=dict)   # JSON-safe, handed back to the writer
+
+
+class BatchCollector:
+    """Accumulates BatchItems during a job run. Safe under fan_out (single loop)."""
+
+    def __init__(self, job: str):
+        self.job = job
+        self.items: dict[str, BatchItem] = {}
+
+    def add(self, item: BatchItem) -> str:
+        custom_id = f"{item.kind}-{item.user_id}-{len(self.items)}"
+        self.items[custom_id] = item
+        return custom_id
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+def write_batch_jsonl(items: dict, path: Path, model: str = BATCH_MODEL) -> None:
+    """One OpenAI Batch API request line per item."""
+    with open(path, "w", encoding="utf-8") as f:
+        for custom_id, item in items.items():
+            f.write(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": {
+                    "model": model,
+                    "messages": [{"role": "user", "content": item.prompt}],
+                    "max_completion_tokens": item.max_completion_tokens,
+                },
+            }, default=str) + "\n")
+
+
+# ─────────────────────────────────────────────────────────────
+# Backends
+# ─────────────────────────────────────────────────────────────
+
+class BatchBackend(ABC):
+    """submit() a JSONL file → batch id; status() → pending | completed | failed."""
+
+    name = "base"
+
+    @abstractmethod
+    async def submit(self, jsonl_path: Path) -> str:
+        ...
+
+    @abstractmethod
+    async def status(self, batch_id: str) -> str:
+        ...
+
+    @abstractmethod
+    async def results(self, batch_id: str) -> dict:
+        """custom_id → response text (None for requests that errored)."""
+
+
+class OpenAIBatchBackend(BatchBackend):
+    name = "openai"
+
+    _FAILED = {"failed", "expired", "cancelled", "cancelling"}
+
+    async def submit(self, jsonl_path: Path) -> str:
+        from app.services.openai_clients import get_openai
+        client = get_openai()
+        with open(jsonl_path, "rb") as f:
+            upload = await client.files.create(file=f, purpose="batch")
+        batch = await client.batches.create(
+            input_file_id=upload.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=BATCH_COMPLETION_WINDOW,
+        )
+        return batch.id
+
+    async def status(self, batch_id: str) -> str:
+        from app.services.openai_clients import get_openai
+        batch = await get_openai().batches.retrieve(batch_id)
+        if batch.status == "completed":
+            return "completed"
+        if batch.status in self._FAILED:
+            return "failed"
+        return "pending"
+
+    async def results(self, batch_id: str) -> dict:
+        from app.services.openai_clients import get_openai
+        client = get_openai()
+        batch = await client.batches.retrieve(batch_id)
+        if not batch.output_file_id:
+            return {}
+        content = await client.files.content(batch.output_file_id)
+        return parse_batch_output(content.text)
+
+
+def parse_batch_output(text: str) -> dict:
+    """Batch output JSONL → custom_id → message text (None when the line errored)."""
+    results = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        try:
+            response = row.get("response") or {}
+            if row.get("error") or response.get("status_code") != 200:
+                results[row["custom_id"]] = None
+                continue
+            results[row["custom_id"]] = response["body"]["choices"][0]["message"]["content"].strip()
+        except Exception:
+            results[row.get("custom_id")] = None
+    return results
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    In-process fake: answers every request with responder(prompt) on submit.
+    Completed batches live in memory only.
+    """
+
+    name = "local"
+
+    def __init__(self, responder: Optional[Callable[[str], Optional[str]]] = None):
+        self.responder = responder or (lambda prompt: f"[local] {prompt[:60]}")
+        self._batches: dict[str, str] = {}
+
+    async def submit(self, jsonl_path: Path) -> str:
+        batch_id = f"local_{uuid.uuid4().hex[:12]}"
+        lines = []
+        with open(jsonl_path, encoding="utf-8") as f:
+            for line in f:
+                request = json.loads(line)
+                text = self.responder(request["body"]["messages"][-1]["content"])
+                if text is None:
+                    lines.append({"custom_id": request["custom_id"], "error": {"message": "local failure"}})
+                else:
+                    lines.append({
+                        "custom_id": request["custom_id"],
+                        "response": {
+                            "status_code": 200,
+                            "body": {"choices": [{"message": {"content": text}}]},
+                        },
+                    })
+        self._batches[batch_id] = "\n".join(json.dumps(l) for l in lines)
+        return batch_id
+
+    async def status(self, batch_id: str) -> str:
+        return "completed" if batch_id in self._batches else "failed"
+
+    async def results(self, batch_id: str) -> dict:
+        return parse_batch_output(self._batches.get(batch_id, ""))
+
+
+_backend: Optional[BatchBackend] = None
+
+
+def get_backend() -> BatchBackend:
+    global _backend
+    if _backend is None:
+        name = os.getenv("AGENT_BATCH_BACKEND", "openai")
+        _backend = LocalBatchBackend() if name == "local" else OpenAIBatchBackend()
+    return _backend
+
+
+def set_backend(backend: Optional[BatchBackend]) -> None:
+    """Swap the backend (tests / local dev). None resets to the env default."""
+    global _backend
+    _backend = backend
+
+
+# ─────────────────────────────────────────────────────────────
+# Writers
+# ─────────────────────────────────────────────────────────────
+
+# kind → async writer(db, user_id, text, payload)
+BatchWriter = Callable[..., Awaitable[None]]
+_writers: dict[str, BatchWriter] = {}
+
+
+def register_writer(kind: str, writer: BatchWriter) -> None:
+    _writers[kind] = writer
+
+
+def _load_writers() -> None:
+    # Jobs register their writers at import time
+    import app.agent.jobs.narrative_job     # noqa: F401
+    import app.agent.jobs.morning_brief_job  # noqa: F401
+    import app.agent.jobs.nudge_job          # noqa: F401
+
+
+# ─────────────────────────────────────────────────────────────
+# Submit + collect
+# ─────────────────────────────────────────────────────────────
+
+def _manifest_path(local_id: str) -> Path:
+    return _batch_dir() / f"{local_id}.manifest.json"
+
+
+async def submit_batch(collector: BatchCollector) -> Optional[str]:
+    """Write the collector to JSONL, submit it, persist the manifest. Returns the batch id."""
+    if not collector.items:
+        return None
+
+    backend = get_backend()
+    local_id = f"{collector.job}_{datetime.now(timezone.utc):%Y%m%dT%H%M%S}_{uuid.uuid4().hex[:6]}"
+    jsonl_path = _batch_dir() / f"{local_id}.jsonl"
+    write_batch_jsonl(collector.items, jsonl_path)
+
+    batch_id = await backend.submit(jsonl_path)
+    manifest = {
+        "job": collector.job,
+        "backend": backend.name,
+        "batch_id": batch_id,
+        "status": "submitted",
+        "submitted_at": datetime.now(timezone.utc).isoformat(),
+        "input": jsonl_path.name,
+        "items": {cid: asdict(item) for cid, item in collector.items.items()},
+    }
+    with open(_manifest_path(local_id), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, default=str)
+
+    logger.info(f"[LLMBatch] {collector.job}: submitted {len(collector)} requests as {batch_id}")
+    return batch_id
+
+
+def pending_user_ids(kind: str) -> set:
+    """User ids with a `kind` item in a batch still awaiting collection on this backend."""
+    directory = Path(os.getenv("AGENT_BATCH_DIR", "batches"))
+    if not directory.is_dir():
+        return set()
+    backend_name = get_backend().name
+    users = set()
+    for path in directory.glob("*.manifest.json"):
+        try:
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except Exception as e:
+            logger.warning(f"[LLMBatch] unreadable manifest {path.name}: {e}")
+            continue
+        if manifest.get("status") != "submitted" or manifest.get("backend") != backend_name:
+            continue
+        users.update(item["user_id"] for item in manifest["items"].values() if item["kind"] == kind)
+    return users
+
+
+async def _write_results(manifest: dict, results: dict, session_factory) -> int:
+    from app.agent.notification_manager import notif_manager
+
+    db = session_factory()
+    written = 0
+    try:
+        # Writers push; offline users' rows are inserted together at the end
+        async with notif_manager.batched_offline():
+            for custom_id, item in manifest["items"].items():
+                writer = _writers.get(item["kind"])
+                if writer is None:
+                    logger.warning(f"[LLMBatch] no writer for kind {item['kind']}")
+                    continue
+                text = results.get(custom_id) or item["fallback"]
+                try:
+                    await writer(db, item["user_id"], text, item["payload"])
+                    written += 1
+                except Exception as e:
+                    logger.warning(f"[LLMBatch] write error {custom_id}: {e}")
+                    try:
+                        db.rollback()
+                    except Exception:
+                        pass
+    finally:
+        db.close()
+    return written
+
+
+async def collect_finished_batches(session_factory=SessionLocal) -> int:
+    """
+    Scheduler job. Polls every submitted manifest; finished (or failed)
+    batches are written back through the registered writers.
+    Returns the number of items written.
+    """
+    _load_writers()
+    backend = get_backend()
+    total = 0
+
+    for path in sorted(_batch_dir().glob("*.manifest.json")):
+        try:
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("status") != "submitted" or manifest.get("backend") != backend.name:
+                continue
+
+            status = await backend.status(manifest["batch_id"])
+            if status == "pending":
+                continue
+            results = await backend.results(manifest["batch_id"]) if status == "completed" else {}
+
+            written = await _write_results(manifest, results, session_factory)
+            total += written
+            manifest["status"] = status
+            manifest["collected_at"] = datetime.now(timezone.utc).isoformat()
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, default=str)
+
+            answered = sum(1 for v in results.values() if v)
+            logger.info(
+                f"[LLMBatch] {manifest['job']} {manifest['batch_id']} {status} — "
+                f"{answered}/{len(manifest['items'])} answered, {written} written"
+            )
+        except Exception as e:
+            logger.error(f"[LLMBatch] collect error for {path.name}: {e}")
+
+    return total
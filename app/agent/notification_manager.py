@@ -7,6 +7,24 @@ Maintains a registry of active WebSocket connections keyed by user_id.
 Any background agent can call `push(user_id, event)` to deliver a real-time
 notification to the user's open app session.
 
+With several uvicorn workers, the user's sockets may live in other
+processes — a tab per worker. push() queues on this worker's sockets and
+routes the event through the backplane (backplane.py) to every other
+worker that holds one; only when no worker does is it persisted to the
+pending_notifications outbox (notification_outbox.py) for the next app
+open. broadcast() reaches every worker's sockets the same way. Jobs wrap
+their fan-out in batched_offline() so offline rows go out as one bulk
+INSERT.
+
+Delivery never blocks the caller on a client: each socket has a bounded
+outbound queue (NOTIF_QUEUE_SIZE) drained by its own writer task. An event
+is serialised once and the same string is queued for every recipient; a
+full queue drops the message, and a send slower than NOTIF_SEND_TIMEOUT_S
+evicts the socket. An event that none of the user's sockets could queue is
+persisted to the outbox like an offline one, so a burst to a slow client is
+not lost. Counters + queue depth: stats() /
+GET /api/agent/notifications/stats.
+
 Notification event schema:
   {
     "type":    "morning_brief" | "nudge" | "reminder" | "adaptation" | "insight",
@@ -19,21 +37,113 @@ Notification event schema:
 import asyncio
 import json
 import logging
+import os
 from collections import defaultdict
-from typing import Dict, List
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
 
 from fastapi import WebSocket
 
+from app.agent.backplane import Backplane, get_backplane
+
 logger = logging.getLogger(__name__)
 
+OUTBOUND_QUEUE_SIZE = int(os.getenv("NOTIF_QUEUE_SIZE", "64"))       # per socket
+SEND_TIMEOUT_S = float(os.getenv("NOTIF_SEND_TIMEOUT_S", "5"))        # slower → evicted
+
+# Set by batched_offline(); tasks spawned inside inherit the same list
+_offline_batch: ContextVar[Optional[list]] = ContextVar("notif_offline_batch", default=None)
+
+
+class _Connection:
+    """
+    One socket + its bounded outbound queue, drained by its own writer task.
+    A full queue drops the new message; a send that exceeds the timeout
+    evicts the socket.
+    """
+
+    def __init__(self, manager: "NotificationManager", user_id: int, websocket: WebSocket):
+        self.manager = manager
+        self.user_id = user_id
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=manager.queue_size)
+        self.task = asyncio.create_task(self._writer(), name=f"notif_writer_{user_id}")
+
+    def offer(self, payload: str, sent: Optional[asyncio.Future] = None) -> bool:
+        """
+        Queue a payload for the writer. `sent`, when given, resolves True once
+        the payload is on the wire and False if it is dropped or never sent.
+        """
+        try:
+            self.queue.put_nowait((payload, sent))
+            return True
+        except asyncio.QueueFull:
+            self.manager.metrics["dropped"] += 1
+            if sent is not None:
+                sent.set_result(False)
+            return False
+
+    async def _writer(self):
+        while True:
+            payload, sent = await self.queue.get()
+            try:
+                await asyncio.wait_for(self.websocket.send_text(payload), self.manager.send_timeout)
+                self.manager.metrics["sent"] += 1
+                if sent is not None:
+                    sent.set_result(True)
+            except Exception as e:
+                # Slow or dead consumer — drop the socket instead of backing everyone up
+                self.manager.metrics["evicted"] += 1
+                if isinstance(e, asyncio.TimeoutError):
+                    self.manager.metrics["timeouts"] += 1
+                logger.info(f"[NotifManager] Evicting socket for user {self.user_id}: {type(e).__name__}")
+                asyncio.create_task(self.manager._evict(self))
+                return
+            finally:
+                if sent is not None and not sent.done():
+                    sent.set_result(False)
+                self.queue.task_done()
+
+    def close(self):
+        self.task.cancel()
+        # Unblock drain() for anything still queued
+        while not self.queue.empty():
+            _, sent = self.queue.get_nowait()
+            if sent is not None and not sent.done():
+                sent.set_result(False)
+            self.queue.task_done()
+
 
 class NotificationManager:
     """Thread-safe registry of user WebSocket connections."""
 
-    def __init__(self):
-        # user_id → list of active WebSocket connections (user may have multiple tabs)
-        self._connections: Dict[int, List[WebSocket]] = defaultdict(list)
+    def __init__(
+        self,
+        backplane: Optional[Backplane] = None,
+        queue_size: int = OUTBOUND_QUEUE_SIZE,
+        send_timeout: float = SEND_TIMEOUT_S,
+    ):
+        # user_id → active connections (user may have multiple tabs)
+        self._connections: Dict[int, List[_Connection]] = defaultdict(list)
         self._lock = asyncio.Lock()
+        self._backplane = backplane
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.metrics = {"enqueued": 0, "sent": 0, "dropped": 0, "evicted": 0, "timeouts": 0}
+
+    @property
+    def backplane(self) -> Backplane:
+        if self._backplane is None:
+            self._backplane = get_backplane()
+        return self._backplane
+
+    async def start(self):
+        """Join the backplane. Called once at app startup."""
+        await self.backplane.start(self._on_backplane)
+
+    async def stop(self):
+        await self.backplane.stop()
 
     # ──────────────────────────────────────────────────────────
     # Connection lifecycle
@@ -42,92 +152,193 @@ class NotificationManager:
     async def connect(self, user_id: int, websocket: WebSocket):
         await websocket.accept()
         async with self._lock:
-            self._connections[user_id].append(websocket)
+            self._connections[user_id].append(_Connection(self, user_id, websocket))
+            first = len(self._connections[user_id]) == 1
+        if first:
+            await self._set_presence(user_id, True)
         logger.info(f"[NotifManager] User {user_id} connected ({len(self._connections[user_id])} sockets).")
 
     async def disconnect(self, user_id: int, websocket: WebSocket):
         async with self._lock:
             conns = self._connections.get(user_id, [])
-            if websocket in conns:
-                conns.remove(websocket)
-            if not conns:
+            for conn in [c for c in conns if c.websocket is websocket]:
+                conns.remove(conn)
+                conn.close()
+            gone = user_id in self._connections and not conns
+            if gone:
                 self._connections.pop(user_id, None)
+        if gone:
+            await self._set_presence(user_id, False)
         logger.info(f"[NotifManager] User {user_id} disconnected.")
 
+    async def _evict(self, conn: _Connection):
+        try:
+            await asyncio.wait_for(conn.websocket.close(code=1013), self.send_timeout)
+        except Exception:
+            pass
+        await self.disconnect(conn.user_id, conn.websocket)
+
     # ──────────────────────────────────────────────────────────
     # Push to a specific user
     # ──────────────────────────────────────────────────────────
 
     async def push(self, user_id: int, event: dict):
         """
-        Send a notification event to all open sockets for user_id.
-        Stale sockets are removed automatically.
+        Send a notification event to all open sockets for user_id — here,
+        and via the backplane on every other worker that holds one. Returns
+        once queued; each socket's writer task does the actual send.
         """
-        async with self._lock:
-            sockets = list(self._connections.get(user_id, []))
+        delivered = self._send_local(user_id, json.dumps(event))
 
-        if not sockets:
+        for worker in await self._locate(user_id):
+            # Only one worker falls back to the outbox if its sockets have
+            # gone or are all backed up
+            message = {"kind": "push", "user_id": user_id, "event": event, "persist": not delivered}
+            try:
+                await self.backplane.publish(message, target=worker)
+                delivered = True
+            except Exception as e:
+                logger.warning(f"[NotifManager] backplane publish to {worker} failed: {e}")
+
+        if not delivered:
             logger.debug(f"[NotifManager] User {user_id} has no active connections — event queued in DB.")
             await self._persist_pending(user_id, event)
-            return
 
-        payload = json.dumps(event)
-        dead = []
-        for ws in sockets:
-            try:
-                await ws.send_text(payload)
-            except Exception:
-                dead.append(ws)
-
-        # Clean up dead connections
-        if dead:
-            async with self._lock:
-                for ws in dead:
-                    try:
-                        self._connections[user_id].remove(ws)
-                    except ValueError:
-                        pass
+    def _send_local(self, user_id: int, payload: str) -> bool:
+        """
+        Queue a serialised event on this worker's sockets. False when it holds
+        none, or every one of their queues was full and dropped it.
+        """
+        queued = False
+        for conn in list(self._connections.get(user_id, ())):
+            if conn.offer(payload):
+                self.metrics["enqueued"] += 1
+                queued = True
+        return queued
+
+    async def send_to_socket(self, user_id: int, websocket: WebSocket, events: list) -> list:
+        """
+        Queue events on one connected socket's writer, in order, and wait for
+        them to go out. Returns a sent / not-sent flag per event — the caller
+        re-queues whatever didn't make it (e.g. the outbox on connect).
+        """
+        conn = next((c for c in self._connections.get(user_id, ()) if c.websocket is websocket), None)
+        if conn is None:
+            return [False] * len(events)
+        loop = asyncio.get_running_loop()
+        futures = []
+        for event in events:
+            sent = loop.create_future()
+            if conn.offer(json.dumps(event), sent):
+                self.metrics["enqueued"] += 1
+            futures.append(sent)
+        return list(await asyncio.gather(*futures))
 
     # ──────────────────────────────────────────────────────────
     # Broadcast to all connected users
     # ──────────────────────────────────────────────────────────
 
     async def broadcast(self, event: dict):
-        async with self._lock:
-            user_ids = list(self._connections.keys())
-        for uid in user_ids:
-            await self.push(uid, event)
+        await self._broadcast_local(event)
+        try:
+            await self.backplane.publish({"kind": "broadcast", "event": event})
+        except Exception as e:
+            logger.warning(f"[NotifManager] backplane broadcast failed: {e}")
+
+    async def _broadcast_local(self, event: dict):
+        # Serialised once, shared by every recipient's queue
+        payload = json.dumps(event)
+        for uid in list(self._connections.keys()):
+            if not self._send_local(uid, payload):
+                await self._persist_pending(uid, event)
+
+    async def drain(self):
+        """Wait until every outbound queue is empty (tests / graceful shutdown)."""
+        conns = [c for cs in list(self._connections.values()) for c in cs]
+        await asyncio.gather(*(c.queue.join() for c in conns))
+
+    def stats(self) -> dict:
+        depths = [c.queue.qsize() for cs in self._connections.values() for c in cs]
+        return {
+            "users": len(self._connections),
+            "sockets": len(depths),
+            "queued": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "queue_size": self.queue_size,
+            **self.metrics,
+        }
+
+    # ──────────────────────────────────────────────────────────
+    # Backplane
+    # ──────────────────────────────────────────────────────────
+
+    async def _on_backplane(self, message: dict):
+        """Messages from other workers."""
+        if message.get("kind") == "push":
+            user_id = message["user_id"]
+            # The socket may have closed since presence was read
+            if not self._send_local(user_id, json.dumps(message["event"])) and message.get("persist", True):
+                await self._persist_pending(user_id, message["event"])
+        elif message.get("kind") == "broadcast":
+            await self._broadcast_local(message["event"])
+
+    async def _set_presence(self, user_id: int, online: bool):
+        try:
+            await self.backplane.set_presence(user_id, online)
+        except Exception as e:
+            logger.warning(f"[NotifManager] presence update failed: {e}")
+
+    async def _locate(self, user_id: int) -> List[str]:
+        try:
+            return await self.backplane.locate(user_id)
+        except Exception as e:
+            logger.warning(f"[NotifManager] presence lookup failed: {e}")
+            return []
 
     # ──────────────────────────────────────────────────────────
     # Persist pending notifications for offline users
     # ──────────────────────────────────────────────────────────
 
     async def _persist_pending(self, user_id: int, event: dict):
-        """Store notification in DB so it can be fetched on next app open."""
+        """
+        Store notification in the outbox so it can be fetched on next app open.
+        Inside batched_offline() it is buffered and written with the rest.
+        """
+        batch = _offline_batch.get()
+        if batch is not None:
+            batch.append((user_id, event))
+            return
+        await self._write_pending([(user_id, event)])
+
+    async def _write_pending(self, items: list):
+        if not items:
+            return
         try:
             from app.db.database import SessionLocal
-            from app.models.health_memory import HealthMemory
+            from app.services.notification_outbox import enqueue_many
 
             db = SessionLocal()
             try:
-                memory = HealthMemory(
-                    user_id=user_id,
-                    category="notification",
-                    source="system",
-                    content={
-                        "pending": True,
-                        "event_type": event.get("type"),
-                        "title": event.get("title"),
-                        "body": event.get("body"),
-                        "data": event.get("data", {}),
-                    },
-                )
-                db.add(memory)
-                db.commit()
+                enqueue_many(db, items)
             finally:
                 db.close()
         except Exception as e:
-            logger.warning(f"[NotifManager] Failed to persist pending notification: {e}")
+            logger.warning(f"[NotifManager] Failed to persist {len(items)} pending notification(s): {e}")
+
+    @asynccontextmanager
+    async def batched_offline(self):
+        """
+        Buffer offline notifications raised inside the block (including in
+        tasks it spawns) and write them as one bulk INSERT on exit.
+        Scheduled jobs wrap their fan-out in this.
+        """
+        batch: list = []
+        token = _offline_batch.set(batch)
+        try:
+            yield
+        finally:
+            _offline_batch.reset(token)
+            await self._write_pending(batch)
 
     # ──────────────────────────────────────────────────────────
     # Helpers
@@ -0,0 +1,320 @@
+"""
+reminder_dispatcher.py
+======================
+Event-driven reminder delivery — replaces the once-a-minute polling sweep.
+
+Upcoming reminders live in an in-memory min-heap keyed by due time. One
+asyncio task sleeps until the earliest one is due (or until it is woken
+by a change), claims everything due with one conditional UPDATE, and
+fires what it claimed.
+
+The heap is kept current by:
+  • refresh()  — loads every active, unfired reminder due within
+                 REMINDER_HORIZON_MINUTES, plus overdue ones from the last
+                 REMINDER_CATCHUP_HOURS (downtime / lag catch-up). Runs at
+                 startup and every REMINDER_REFRESH_MINUTES from the scheduler.
+  • upsert() / cancel() — called by the reminder endpoints on create,
+                 update, delete, acknowledge / missed, and for every occurrence
+                 _spawn_next_reminder / fire() spawns.
+
+Entries are never removed from the heap in place: each reminder's current
+due time lives in `_due`, and stale heap entries are skipped on pop.
+The claim re-checks the rows in the DB, so a reminder deactivated through
+a path that didn't call cancel() is still not sent, and with one dispatcher
+per worker each reminder is sent by exactly one of them. Firing a
+recurring reminder spawns the chain's next row (reminder_recurrence.py)
+in the same commit, so a series keeps going even if the user never
+acknowledges an occurrence.
+
+The endpoints are sync (threadpool), so heap access is under a threading
+lock and wake-ups go through loop.call_soon_threadsafe.
+"""
+
+import asyncio
+import heapq
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+
+from sqlalchemy import event, update
+
+from app.db.database import SessionLocal
+from app.models.reminder import Reminder
+from app.services.reminder_recurrence import rule_of, spawn_next
+
+logger = logging.getLogger(__name__)
+
+REMINDER_HORIZON_MINUTES = int(os.getenv("REMINDER_HORIZON_MINUTES", "60"))
+REMINDER_REFRESH_MINUTES = int(os.getenv("REMINDER_REFRESH_MINUTES", "15"))
+REMINDER_CATCHUP_HOURS = int(os.getenv("REMINDER_CATCHUP_HOURS", "6"))
+LATE_AFTER_S = 60      # fired this long after due → flagged "late" in the event
+
+
+def _ts(dt: datetime) -> float:
+    """Reminder datetimes are stored as UTC, naive on SQLite."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+class ReminderDispatcher:
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._heap: list = []                 # (due_ts, reminder_id)
+        self._due: dict = {}                  # reminder_id → current due_ts
+        self._lock = threading.Lock()
+        self._loaded_until = 0.0              # heap holds every reminder due before this
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.fired = 0
+        self.batches = 0
+
+    # ──────────────────────────────────────────────────────────
+    # Lifecycle
+    # ──────────────────────────────────────────────────────────
+
+    async def start(self):
+        if self._task and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self.refresh()
+        self._task = asyncio.create_task(self._run(), name="reminder_dispatcher")
+        logger.info(f"[ReminderDispatcher] Started — {len(self._due)} reminders queued.")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        logger.info("[ReminderDispatcher] Stopped.")
+
+    # ──────────────────────────────────────────────────────────
+    # Heap maintenance
+    # ──────────────────────────────────────────────────────────
+
+    def refresh(self, now: Optional[datetime] = None) -> int:
+        """
+        Load active, unfired reminders due in [now - catch-up, now + horizon].
+        One range query on ix_reminders_due. Returns the number loaded.
+        """
+        now = now or datetime.now(timezone.utc)
+        until = now + timedelta(minutes=REMINDER_HORIZON_MINUTES)
+        db = self.session_factory()
+        try:
+            rows = (
+                db.query(Reminder.id, Reminder.scheduled_at)
+                .filter(
+                    Reminder.is_active == True,
+                    Reminder.missed_processed == False,
+                    Reminder.scheduled_at >= now - timedelta(hours=REMINDER_CATCHUP_HOURS),
+                    Reminder.scheduled_at <= until,
+                )
+                .all()
+            )
+        except Exception as e:
+            logger.error(f"[ReminderDispatcher] refresh failed: {e}")
+            return 0
+        finally:
+            db.close()
+
+        with self._lock:
+            for reminder_id, scheduled_at in rows:
+                self._push(reminder_id, _ts(scheduled_at))
+            self._loaded_until = max(self._loaded_until, until.timestamp())
+        self._notify()
+        return len(rows)
+
+    def schedule(self, reminder_id: int, scheduled_at: datetime) -> None:
+        """(Re)schedule one reminder. Ignored beyond the loaded horizon — refresh() picks it up."""
+        due = _ts(scheduled_at)
+        with self._lock:
+            if due > self._loaded_until:
+                self._due.pop(reminder_id, None)
+                return
+            self._push(reminder_id, due)
+        self._notify()
+
+    def cancel(self, reminder_id: int) -> None:
+        with self._lock:
+            self._due.pop(reminder_id, None)
+
+    def upsert(self, reminder: Reminder) -> None:
+        """Sync the heap with a committed reminder row."""
+        if reminder.is_active and not reminder.missed_processed:
+            self.schedule(reminder.id, reminder.scheduled_at)
+        else:
+            self.cancel(reminder.id)
+
+    def upsert_on_commit(self, db, reminder: Reminder) -> None:
+        """upsert() once `db` commits — for rows added inside a larger transaction."""
+        def _after_commit(session):
+            try:
+                self.upsert(reminder)
+            except Exception as e:
+                logger.warning(f"[ReminderDispatcher] upsert after commit failed: {e}")
+
+        event.listen(db, "after_commit", _after_commit, once=True)
+
+    def _push(self, reminder_id: int, due: float) -> None:
+        # Caller holds the lock
+        if self._due.get(reminder_id) == due:
+            return
+        self._due[reminder_id] = due
+        heapq.heappush(self._heap, (due, reminder_id))
+
+    def _pop_due(self, now: float) -> list:
+        """Remove and return (reminder_id, due_ts) for everything due by `now`."""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                ts, reminder_id = heapq.heappop(self._heap)
+                if self._due.get(reminder_id) == ts:
+                    del self._due[reminder_id]
+                    due.append((reminder_id, ts))
+        return due
+
+    def _next_due(self) -> Optional[float]:
+        with self._lock:
+            while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)        # stale entry
+            return self._heap[0][0] if self._heap else None
+
+    def _notify(self) -> None:
+        if self._loop is not None and self._wake is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:
+                pass          # loop closed
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    # ──────────────────────────────────────────────────────────
+    # Firing
+    # ──────────────────────────────────────────────────────────
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            try:
+                due = self._pop_due(time.time())
+                if due:
+                    await self.fire(due)
+            except Exception as e:
+                logger.error(f"[ReminderDispatcher] loop error: {e}")
+
+            next_due = self._next_due()
+            timeout = None if next_due is None else max(0.0, next_due - time.time())
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def fire(self, due: list) -> int:
+        """
+        Deliver a batch of (reminder_id, due_ts): one conditional UPDATE claims
+        the rows, concurrent pushes, one commit for spawned chain rows and
+        released claims. Returns the number fired.
+
+        Every worker runs its own dispatcher over the same rows, so the claim
+        (missed_processed 0 → 1, RETURNING id) decides which worker sends each
+        reminder; the others get nothing back and skip it.
+        """
+        from app.agent.notification_manager import notif_manager
+
+        due_at = dict(due)
+        db = self.session_factory()
+        try:
+            claimed = db.execute(
+                update(Reminder)
+                .where(
+                    Reminder.id.in_(due_at),
+                    Reminder.is_active == True,
+                    Reminder.missed_processed == False,
+                )
+                .values(missed_processed=True)
+                .returning(Reminder.id)
+                .execution_options(synchronize_session=False)
+            ).scalars().all()
+            db.commit()
+            if not claimed:
+                return 0
+
+            reminders = db.query(Reminder).filter(Reminder.id.in_(claimed)).all()
+            now = time.time()
+
+            async def _deliver(reminder: Reminder) -> Optional[int]:
+                try:
+                    await notif_manager.push(reminder.user_id, {
+                        "type": "reminder",
+                        "title": "Reminder",
+                        "body": reminder.message,
+                        "data": {
+                            "reminder_id": reminder.id,
+                            "reminder_type": reminder.type,
+                            "late": now - due_at[reminder.id] > LATE_AFTER_S,
+                        },
+                    })
+                    return reminder.id
+                except Exception as e:
+                    logger.warning(f"[ReminderDispatcher] Failed to fire reminder {reminder.id}: {e}")
+                    return None
+
+            async with notif_manager.batched_offline():
+                fired = [rid for rid in await asyncio.gather(*(_deliver(r) for r in reminders)) if rid]
+
+            # Continue recurring chains from the precomputed schedule —
+            # acknowledge / missed later find the row already there
+            fired_ids = set(fired)
+            spawned = []
+            for reminder in reminders:
+                if reminder.id in fired_ids and rule_of(reminder).repeats:
+                    next_reminder = spawn_next(db, reminder)
+                    if next_reminder is not None:
+                        spawned.append(next_reminder)
+
+            # Release claims whose push failed so the next refresh() retries them
+            failed = [r.id for r in reminders if r.id not in fired_ids]
+            if failed:
+                db.execute(
+                    update(Reminder)
+                    .where(Reminder.id.in_(failed))
+                    .values(missed_processed=False)
+                    .execution_options(synchronize_session=False)
+                )
+            db.commit()
+            for next_reminder in spawned:
+                self.upsert(next_reminder)
+
+            self.fired += len(fired)
+            self.batches += 1
+            logger.info(f"[ReminderDispatcher] Fired {len(fired)}/{len(reminders)} reminders")
+            return len(fired)
+        except Exception as e:
+            logger.error(f"[ReminderDispatcher] fire error: {e}")
+            db.rollback()
+            return 0
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._due),
+            "fired": self.fired,
+            "batches": self.batches,
+            "loaded_until": datetime.fromtimestamp(self._loaded_until, timezone.utc).isoformat()
+            if self._loaded_until else None,
+        }
+
+
+# Global singleton — import this everywhere
+reminder_dispatcher = ReminderDispatcher()
@@ -9,12 +9,15 @@ All agent jobs are registered here and run in the background on their own clock.
 Timezone: Asia/Kolkata (IST, UTC+5:30) — app is India-first.
 
 Job registry:
-  • Every 1 min   — check + fire due reminders
+  • Every 15 min  — reload the reminder dispatcher's horizon (reminder_dispatcher.py)
   • Every 4 hrs   — nudge agent (real-time gap detection)
   • 00:00 IST     — daily narrative synthesis (Foundation B)   [18:30 UTC prev day]
   • 03:30 IST     — daily agent / morning brief generation     [22:00 UTC prev day]
   • 02:00 IST Sun — weekly adaptation agent + correlation engine [20:30 UTC Sat]
   • 23:30 IST     — immutable daily health snapshot builder    [18:00 UTC]
+  • Every 10 min  — collect finished offline LLM batches (llm_batch.py)
+  • 04:00 IST     — purge delivered / expired pending notifications
+  • Every 30 min  — prewarm missing exercise form videos (youtube_videos.py)
 """
 
 import logging
@@ -38,17 +41,19 @@ def start_scheduler():
         return
 
     # ──────────────────────────────────────────────
-    # 1. Reminder fire check (every 1 minute)
+    # 1. Reminder dispatcher refresh (every 15 minutes)
+    #    The dispatcher fires from its own heap at the exact due time;
+    #    this only loads the next horizon + catches up anything overdue.
     # ──────────────────────────────────────────────
-    from app.agent.jobs.reminder_job import check_and_fire_reminders
+    from app.agent.reminder_dispatcher import reminder_dispatcher, REMINDER_REFRESH_MINUTES
     scheduler.add_job(
-        check_and_fire_reminders,
-        trigger=IntervalTrigger(minutes=1),
-        id="reminder_check",
-        name="Check & fire due reminders",
+        reminder_dispatcher.refresh,
+        trigger=IntervalTrigger(minutes=REMINDER_REFRESH_MINUTES),
+        id="reminder_refresh",
+        name="Reload reminder dispatcher horizon",
         replace_existing=True,
         max_instances=1,
-        misfire_grace_time=30,
+        misfire_grace_time=300,
     )
 
     # ──────────────────────────────────────────────
@@ -125,6 +130,52 @@ def start_scheduler():
         misfire_grace_time=3600,
     )
 
+    # ──────────────────────────────────────────────
+    # 7. Offline LLM batch collector (every 10 minutes)
+    #    Writes back narrative / brief / nudge batches submitted in batch mode.
+    # ──────────────────────────────────────────────
+    from app.agent.llm_batch import collect_finished_batches
+    scheduler.add_job(
+        collect_finished_batches,
+        trigger=IntervalTrigger(minutes=10),
+        id="llm_batch_collect",
+        name="Collect finished LLM batches",
+        replace_existing=True,
+        max_instances=1,
+        misfire_grace_time=300,
+    )
+
+    # ──────────────────────────────────────────────
+    # 8. Notification outbox purge (04:00 IST)
+    #    Drops delivered and expired pending_notifications rows.
+    # ──────────────────────────────────────────────
+    from app.services.notification_outbox import run_purge
+    scheduler.add_job(
+        run_purge,
+        trigger=CronTrigger(hour=4, minute=0, timezone=IST),
+        id="notification_outbox_purge",
+        name="Pending notification purge",
+        replace_existing=True,
+        max_instances=1,
+        misfire_grace_time=3600,
+    )
+
+    # ──────────────────────────────────────────────
+    # 9. YouTube form-video prewarm (every 30 minutes)
+    #    Resolves missing exercise videos, most viewed first, within the
+    #    daily search quota (leaves a reserve for live requests).
+    # ──────────────────────────────────────────────
+    from app.services.youtube_videos import run_prewarm
+    scheduler.add_job(
+        run_prewarm,
+        trigger=IntervalTrigger(minutes=30),
+        id="youtube_prewarm",
+        name="YouTube video prewarm",
+        replace_existing=True,
+        max_instances=1,
+        misfire_grace_time=600,
+    )
+
     scheduler.start()
     logger.info("[Scheduler] ✅ Started (IST) — %d jobs registered.", len(scheduler.get_jobs()))
 
@@ -0,0 +1,68 @@
+import asyncio
+
+import httpx
+from openai import RateLimitError
+from sqlalchemy.orm import sessionmaker
+
+from app.agent.job_runner import RateLimitGate, fan_out, with_rate_limit_retry
+from app.models.user import User
+
+
+def _rate_limit_error(retry_after="0.01"):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return RateLimitError("rate limited", response=response, body=None)
+
+
+def test_fan_out_bounds_concurrency_and_isolates_sessions(db_engine, db_session):
+    for i in range(10):
+        db_session.add(User(email=f"u{i}@fitconnect.in", full_name=f"U{i}", hashed_password="x"))
+    db_session.commit()
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
+    in_flight, peak, sessions = 0, 0, []
+
+    async def handler(db, user):
+        nonlocal in_flight, peak
+        sessions.append(db)
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if user.email == "u0@fitconnect.in":
+            raise ValueError("boom")
+        return user.email != "u1@fitconnect.in"
+
+    stats = asyncio.run(fan_out("Test", handler, concurrency=3, session_factory=factory))
+
+    assert peak == 3
+    assert len({id(db) for db in sessions}) == 10
+    assert (stats.total, stats.done, stats.skipped, stats.failed) == (10, 8, 1, 1)
+    assert len(stats.latencies) == 10 and stats.p95_latency > 0
+    assert stats.summary()["users_per_s"] > 0
+
+
+def test_rate_limit_retry_honours_retry_after():
+    calls = 0
+
+    async def flaky():
+        nonlocal calls
+        calls += 1
+        if calls < 3:
+            raise _rate_limit_error()
+        return "ok"
+
+    result = asyncio.run(with_rate_limit_retry(flaky, gate=RateLimitGate()))
+    assert (result, calls) == ("ok", 3)
+
+
+def test_rate_limit_retry_gives_up():
+    async def always_limited():
+        raise _rate_limit_error()
+
+    try:
+        asyncio.run(with_rate_limit_retry(always_limited, attempts=2, gate=RateLimitGate()))
+    except RateLimitError:
+        pass
+    else:
+        raise AssertionError("expected RateLimitError")
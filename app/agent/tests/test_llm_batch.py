@@ -0,0 +1,168 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from sqlalchemy.orm import sessionmaker
+
+from app.agent import llm_batch
+from app.agent.llm_batch import (
+    BatchCollector, BatchItem, LocalBatchBackend, collect_finished_batches, submit_batch,
+)
+from app.models.health_memory import HealthMemory
+
+
+def _narrative_item(user_id, text="Ran 5k."):
+    return BatchItem(
+        kind="daily_narrative",
+        user_id=user_id,
+        prompt=f"summarise: {text}",
+        max_completion_tokens=400,
+        fallback="No activity logged.",
+        payload={"date": "2026-01-01", "raw_event_counts": {"workouts": 1}},
+    )
+
+
+def test_batch_round_trip_writes_health_memory(tmp_path, monkeypatch, db_engine, db_session, test_user):
+    monkeypatch.setenv("AGENT_BATCH_DIR", str(tmp_path))
+    # Second request "fails" inside the batch → falls back to the job's text
+    responses = iter(["The user ran 5k.", None])
+    llm_batch.set_backend(LocalBatchBackend(lambda prompt: next(responses)))
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
+    try:
+        batch = BatchCollector("narrative")
+        batch.add(_narrative_item(test_user.id))
+        batch.add(_narrative_item(test_user.id, "Nothing."))
+
+        async def run():
+            batch_id = await submit_batch(batch)
+            written = await collect_finished_batches(session_factory=factory)
+            again = await collect_finished_batches(session_factory=factory)
+            return batch_id, written, again
+
+        batch_id, written, again = asyncio.run(run())
+    finally:
+        llm_batch.set_backend(None)
+
+    assert batch_id.startswith("local_")
+    assert (written, again) == (2, 0)
+
+    lines = [json.loads(l) for l in open(next(tmp_path.glob("*.jsonl")))]
+    assert lines[0]["url"] == "/v1/chat/completions"
+    assert lines[0]["body"]["messages"][0]["content"] == "summarise: Ran 5k."
+
+    narratives = sorted(
+        m.content["narrative"]
+        for m in db_session.query(HealthMemory).filter(HealthMemory.category == "daily_narrative")
+    )
+    assert narratives == ["No activity logged.", "The user ran 5k."]
+
+
+def test_batch_enabled_reads_env(monkeypatch):
+    monkeypatch.setenv("AGENT_BATCH_JOBS", "daily_narrative, nudge")
+    assert llm_batch.batch_enabled("nudge")
+    assert not llm_batch.batch_enabled("morning_brief")
+
+
+class _PendingBackend(LocalBatchBackend):
+    async def status(self, batch_id: str) -> str:
+        return "pending"
+
+
+def test_partial_backend_fails_at_construction():
+    class _SubmitOnly(llm_batch.BatchBackend):
+        async def submit(self, jsonl_path):
+            return "x"
+
+    with pytest.raises(TypeError):
+        _SubmitOnly()
+
+
+def test_pending_brief_blocks_rerun_and_late_results_are_not_pushed(
+    tmp_path, monkeypatch, db_session, test_user,
+):
+    from app.agent.jobs import morning_brief_job
+    from app.agent.notification_manager import notif_manager
+
+    monkeypatch.setenv("AGENT_BATCH_DIR", str(tmp_path))
+    llm_batch.set_backend(_PendingBackend())
+    try:
+        batch = BatchCollector("morning_brief")
+        batch.add(BatchItem(kind="morning_brief", user_id=test_user.id, prompt="brief", max_completion_tokens=350,
+                            fallback="Good morning", payload={}))
+        asyncio.run(submit_batch(batch))
+        assert llm_batch.pending_user_ids("morning_brief") == {test_user.id}
+        assert llm_batch.pending_user_ids("daily_narrative") == set()
+
+        now = datetime.now(timezone.utc)
+        assert not asyncio.run(morning_brief_job._brief_user(
+            db_session, test_user, now, BatchCollector("morning_brief"), frozenset({test_user.id}),
+        ))
+    finally:
+        llm_batch.set_backend(None)
+
+    pushed = []
+
+    async def _push(user_id, event):
+        pushed.append(event["type"])
+
+    monkeypatch.setattr(notif_manager, "push", _push)
+
+    today = now.strftime("%Y-%m-%d")
+    yesterday = (now - timedelta(days=1)).strftime("%Y-%m-%d")
+    for date, generated_at in [
+        (today, now),                          # on time → stored + pushed
+        (today, now - timedelta(hours=5)),     # same day, batch was slow → stored quietly
+        (yesterday, now - timedelta(days=1)),  # earlier day → dropped
+    ]:
+        payload = {"date": date, "generated_at": generated_at.isoformat(), "stats": {}}
+        asyncio.run(morning_brief_job._store_brief(db_session, test_user.id, "Good morning", payload))
+
+    briefs = db_session.query(HealthMemory).filter(HealthMemory.category == "morning_brief").count()
+    assert briefs == 2
+    assert pushed == ["morning_brief"]
+
+
+def test_narrative_rerun_before_collection_queues_nothing_new(
+    tmp_path, monkeypatch, db_engine, db_session, test_user,
+):
+    from functools import partial
+
+    from app.agent import job_runner
+    from app.agent.jobs import narrative_job
+    from app.models.fitness_tracking import WaterLog
+
+    class _HeldBackend(LocalBatchBackend):
+        ready = False
+
+        async def status(self, batch_id: str) -> str:
+            return await super().status(batch_id) if self.ready else "pending"
+
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+    monkeypatch.setenv("AGENT_BATCH_DIR", str(tmp_path))
+    monkeypatch.setenv("AGENT_BATCH_JOBS", "daily_narrative")
+    monkeypatch.setattr(narrative_job, "fan_out", partial(job_runner.fan_out, session_factory=factory))
+    db_session.add(WaterLog(user_id=test_user.id, date=datetime.now(timezone.utc).date(), glasses=6))
+    db_session.commit()
+
+    backend = _HeldBackend(lambda prompt: "The user drank water.")
+    llm_batch.set_backend(backend)
+    try:
+        async def run():
+            first = await narrative_job.run_daily_narrative_synthesis()
+            # Manual re-trigger while the first batch is still out
+            second = await narrative_job.run_daily_narrative_synthesis()
+            backend.ready = True
+            await collect_finished_batches(session_factory=factory)
+            return first, second
+
+        first, second = asyncio.run(run())
+    finally:
+        llm_batch.set_backend(None)
+
+    assert (first["done"], second["done"], second["skipped"]) == (1, 0, 1)
+    assert len(list(tmp_path.glob("*.manifest.json"))) == 1
+    narratives = db_session.query(HealthMemory).filter(HealthMemory.category == "daily_narrative").count()
+    assert narratives == 1
@@ -0,0 +1,164 @@
+import asyncio
+import json
+
+import pytest
+
+from app.agent.backplane import Backplane, InProcessBackplane, InProcessHub, SQLiteBackplane
+from app.agent.notification_manager import NotificationManager
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+
+def _manager(backplane):
+    manager = NotificationManager(backplane)
+    manager.persisted = []
+
+    async def persist(user_id, event):
+        manager.persisted.append((user_id, event["title"]))
+
+    manager._persist_pending = persist
+    return manager
+
+
+async def _exercise(worker_a, worker_b, settle):
+    await worker_a.start()
+    await worker_b.start()
+    ws = FakeSocket()
+    await worker_a.connect(7, ws)
+
+    await worker_b.push(7, {"type": "nudge", "title": "cross-worker"})
+    await worker_b.broadcast({"type": "insight", "title": "everyone"})
+    await settle()
+    await worker_a.drain()
+    assert [e["title"] for e in ws.sent] == ["cross-worker", "everyone"]
+    assert worker_a.persisted == worker_b.persisted == []
+
+    await worker_a.disconnect(7, ws)
+    await worker_b.push(7, {"type": "nudge", "title": "offline"})
+    assert worker_b.persisted == [(7, "offline")]
+
+    await worker_a.stop()
+    await worker_b.stop()
+
+
+def test_in_process_hub_routes_to_owning_worker():
+    hub = InProcessHub()
+
+    async def settle():
+        pass
+
+    asyncio.run(_exercise(
+        _manager(InProcessBackplane(hub)), _manager(InProcessBackplane(hub)), settle,
+    ))
+
+
+def test_sqlite_backplane_routes_across_workers(tmp_path):
+    path = str(tmp_path / "backplane.db")
+
+    async def settle():
+        await asyncio.sleep(0.2)
+
+    asyncio.run(_exercise(
+        _manager(SQLiteBackplane(path, poll_interval=0.01)),
+        _manager(SQLiteBackplane(path, poll_interval=0.01)),
+        settle,
+    ))
+
+
+def test_single_worker_default_still_persists_offline():
+    manager = _manager(InProcessBackplane())
+
+    async def run():
+        await manager.start()
+        await manager.push(1, {"type": "nudge", "title": "queued"})
+        await manager.stop()
+
+    asyncio.run(run())
+    assert manager.persisted == [(1, "queued")]
+
+
+def test_push_reaches_every_worker_holding_a_socket():
+    # One tab on each of two workers; pushes from either worker or a third reach both
+    hub = InProcessHub()
+    worker_a, worker_b, worker_c = (_manager(InProcessBackplane(hub)) for _ in range(3))
+
+    async def run():
+        for worker in (worker_a, worker_b, worker_c):
+            await worker.start()
+        tab_a, tab_b = FakeSocket(), FakeSocket()
+        await worker_a.connect(7, tab_a)
+        await worker_b.connect(7, tab_b)
+
+        await worker_a.push(7, {"type": "nudge", "title": "from a"})
+        await worker_c.push(7, {"type": "nudge", "title": "from c"})
+        await worker_a.drain()
+        await worker_b.drain()
+        assert [e["title"] for e in tab_a.sent] == ["from a", "from c"]
+        assert [e["title"] for e in tab_b.sent] == ["from a", "from c"]
+
+        # Stale presence for c (no socket there): a delivered locally, so c doesn't persist
+        hub.presence[7].add(worker_c.backplane.worker_id)
+        await worker_a.push(7, {"type": "nudge", "title": "stale presence"})
+        for worker in (worker_a, worker_b, worker_c):
+            await worker.stop()
+
+    asyncio.run(run())
+    assert worker_a.persisted == worker_b.persisted == worker_c.persisted == []
+
+
+def test_partial_backplane_fails_at_construction():
+    class _PublishOnly(Backplane):
+        async def publish(self, message, target=None):
+            pass
+
+    with pytest.raises(TypeError):
+        _PublishOnly()
+
+
+def test_events_dropped_by_full_queues_fall_back_to_the_outbox():
+    class StalledSocket(FakeSocket):
+        def __init__(self):
+            super().__init__()
+            self.release = asyncio.Event()
+
+        async def send_text(self, text):
+            await self.release.wait()
+            await super().send_text(text)
+
+    hub = InProcessHub()
+    worker_a, worker_b = (_manager(InProcessBackplane(hub)) for _ in range(2))
+
+    async def run():
+        for worker in (worker_a, worker_b):
+            worker.queue_size = 1
+            await worker.start()
+        ws = StalledSocket()
+        await worker_a.connect(7, ws)
+
+        # First is with the writer, second fills the queue, the rest are dropped
+        for i in range(4):
+            await worker_a.push(7, {"type": "reminder", "title": f"local {i}"})
+            await asyncio.sleep(0)
+        # Same through the backplane: the owning worker persists what it can't queue
+        await worker_b.push(7, {"type": "reminder", "title": "remote"})
+
+        ws.release.set()
+        await worker_a.drain()
+        for worker in (worker_a, worker_b):
+            await worker.stop()
+        return ws
+
+    ws = asyncio.run(run())
+    assert [e["title"] for e in ws.sent] == ["local 0", "local 1"]
+    assert worker_a.persisted == [(7, "local 2"), (7, "local 3"), (7, "remote")]
+    assert worker_b.persisted == []
+    assert worker_a.stats()["dropped"] == 3
@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+from app.agent.backplane import InProcessBackplane
+from app.agent.notification_manager import NotificationManager
+
+
+class Socket:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(text)
+
+    async def close(self, code=1000):
+        self.closed = True
+
+
+def test_broadcast_is_not_held_up_by_a_slow_client():
+    manager = NotificationManager(InProcessBackplane(), queue_size=4, send_timeout=0.2)
+
+    async def run():
+        fast = [Socket() for _ in range(2000)]
+        stalled = Socket(delay=60)
+        for uid, ws in enumerate(fast):
+            await manager.connect(uid, ws)
+        await manager.connect(9999, stalled)
+
+        started = time.monotonic()
+        await manager.broadcast({"type": "morning_brief", "title": "Brief"})
+        enqueue_s = time.monotonic() - started
+        await asyncio.wait_for(manager.drain(), 5)
+        total_s = time.monotonic() - started
+        return fast, stalled, enqueue_s, total_s
+
+    fast, stalled, enqueue_s, total_s = asyncio.run(run())
+
+    assert enqueue_s < 0.5 and total_s < 2
+    assert all(ws.sent == [fast[0].sent[0]] for ws in fast)
+    # One serialised payload shared by every recipient
+    assert len({id(ws.sent[0]) for ws in fast}) == 1
+    assert stalled.closed and not manager.is_online(9999)
+    stats = manager.stats()
+    assert (stats["sent"], stats["evicted"], stats["timeouts"]) == (2000, 1, 1)
+    assert stats["sockets"] == 2000 and stats["queued"] == 0
+
+
+def test_full_queue_drops_instead_of_blocking():
+    manager = NotificationManager(InProcessBackplane(), queue_size=2, send_timeout=5)
+
+    async def run():
+        ws = Socket(delay=0.05)
+        await manager.connect(1, ws)
+        for i in range(5):
+            await manager.push(1, {"type": "nudge", "title": f"n{i}"})
+        depth = manager.stats()["max_queue_depth"]
+        await manager.drain()
+        return ws, depth
+
+    ws, depth = asyncio.run(run())
+    # push() only enqueues — the writer hasn't run yet, so two fit and three drop
+    assert len(ws.sent) == 2 and depth == 2
+    assert manager.stats()["dropped"] == 3
@@ -0,0 +1,96 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+import app.db.database as database
+from app.agent.backplane import InProcessBackplane
+from app.agent.notification_manager import NotificationManager
+from app.models.health_memory import HealthMemory
+from app.models.pending_notification import PendingNotification
+from app.services.notification_outbox import claim, enqueue, purge
+
+
+def test_batched_offline_writes_one_insert(db_engine, db_session, test_user, monkeypatch):
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=db_engine, autoflush=False))
+    inserts = []
+
+    @event.listens_for(db_engine, "before_cursor_execute")
+    def _capture(conn, cursor, statement, params, context, executemany):
+        if statement.startswith("INSERT INTO pending_notifications"):
+            inserts.append(statement)
+
+    manager = NotificationManager(InProcessBackplane())
+
+    async def run():
+        async with manager.batched_offline():
+            # Spawned tasks share the batch
+            await asyncio.gather(*(
+                manager.push(test_user.id, {"type": "nudge", "title": f"n{i}", "body": "b"})
+                for i in range(3)
+            ))
+            assert inserts == []
+
+    asyncio.run(run())
+
+    assert len(inserts) == 1
+    assert db_session.query(PendingNotification).count() == 3
+    assert db_session.query(HealthMemory).count() == 0
+
+
+def test_claim_marks_delivered_once_oldest_first(db_session, test_user):
+    for i in range(3):
+        enqueue(db_session, test_user.id, {"type": "nudge", "title": f"n{i}"})
+    enqueue(db_session, test_user.id, {"type": "nudge", "title": "stale"}, ttl=timedelta(seconds=-1))
+
+    first = claim(db_session, test_user.id, limit=2)
+    assert [e["title"] for e in first] == ["n0", "n1"]
+    assert [e["title"] for e in claim(db_session, test_user.id)] == ["n2"]
+    assert claim(db_session, test_user.id) == []
+
+    # Expired row is purged without being delivered; delivered rows age out
+    assert purge(db_session) == 1
+    db_session.query(PendingNotification).update(
+        {PendingNotification.delivered_at: datetime.utcnow() - timedelta(days=2)}
+    )
+    db_session.commit()
+    assert purge(db_session) == 3
+    assert db_session.query(PendingNotification).count() == 0
+
+
+def test_pending_rows_not_sent_on_connect_are_requeued(db_session, test_user, monkeypatch):
+    from app.routers import agent_ws
+
+    class DroppingSocket:
+        """Connection dies after two sends."""
+
+        def __init__(self):
+            self.sent = []
+
+        async def accept(self):
+            pass
+
+        async def send_text(self, text):
+            if len(self.sent) == 2:
+                raise ConnectionError("socket gone")
+            self.sent.append(text)
+
+        async def close(self, code=1000):
+            pass
+
+    for i in range(5):
+        enqueue(db_session, test_user.id, {"type": "nudge", "title": f"n{i}"})
+    manager = NotificationManager(InProcessBackplane())
+    monkeypatch.setattr(agent_ws, "notif_manager", manager)
+
+    async def run():
+        ws = DroppingSocket()
+        await manager.connect(test_user.id, ws)
+        await agent_ws._deliver_pending(test_user.id, ws, db_session)
+        return ws
+
+    ws = asyncio.run(run())
+
+    assert len(ws.sent) == 2 and manager.stats()["evicted"] == 1
+    assert [e["title"] for e in claim(db_session, test_user.id)] == ["n2", "n3", "n4"]
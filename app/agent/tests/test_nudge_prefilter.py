@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta, timezone
+
+from app.agent.jobs.nudge_job import prefilter_nudges
+from app.models.fitness_tracking import MealLog, SessionStatus, WaterLog, WorkoutSession
+from app.models.health_memory import HealthMemory
+from app.models.user import User
+from app.services.activity_calendar import backfill
+from app.services.central_context_loader import QueryCounter
+
+# Tuesday evening — T1, T2 and T4 windows are open, T3 is not
+NOW = datetime(2026, 3, 10, 19, 0, tzinfo=timezone.utc)
+
+
+def _naive(dt):
+    return dt.replace(tzinfo=None)
+
+
+def _user(db, name):
+    user = User(email=f"{name}@fitconnect.in", full_name=name, hashed_password="x")
+    db.add(user)
+    db.flush()
+    return user.id
+
+
+def _meal(db, uid, at):
+    db.add(MealLog(
+        user_id=uid, diet_plan_id=1, logged_at=_naive(at), meal_name="lunch", foods_eaten=[],
+        total_calories=500, total_protein=30, total_carbs=50, total_fats=15,
+    ))
+
+
+def _completed(db, uid, at, duration=45):
+    db.add(WorkoutSession(
+        user_id=uid, status=SessionStatus.COMPLETED, started_at=_naive(at),
+        completed_at=_naive(at + timedelta(minutes=duration)), duration_minutes=duration,
+    ))
+
+
+def _seed(db):
+    ids = {}
+
+    # Fed an hour ago, 4-day streak ending yesterday → T4 only
+    ids["streaker"] = _user(db, "streaker")
+    _meal(db, ids["streaker"], NOW - timedelta(hours=1))
+    for days in range(1, 5):
+        _completed(db, ids["streaker"], NOW - timedelta(days=days, hours=2))
+
+    # Never logged a meal, trains on Tuesdays → T1 + T2
+    ids["tuesday"] = _user(db, "tuesday")
+    _completed(db, ids["tuesday"], NOW - timedelta(days=7, hours=1), duration=50)
+    _completed(db, ids["tuesday"], NOW - timedelta(days=14, hours=1), duration=40)
+
+    # No meals but a calorie_gap nudge went out 2h ago → nothing
+    ids["cooled"] = _user(db, "cooled")
+    db.add(HealthMemory(
+        user_id=ids["cooled"], category="nudge_sent", source="system",
+        content={"trigger_type": "calorie_gap"}, created_at=NOW - timedelta(hours=2),
+    ))
+
+    # Already training today, last meal 6h ago → T1 only
+    ids["active"] = _user(db, "active")
+    _meal(db, ids["active"], NOW - timedelta(hours=6))
+    _meal(db, ids["active"], NOW - timedelta(hours=30))
+    for days in range(1, 5):
+        _completed(db, ids["active"], NOW - timedelta(days=days, hours=2))
+    db.add(WorkoutSession(user_id=ids["active"], status=SessionStatus.IN_PROGRESS, started_at=_naive(NOW)))
+
+    db.commit()
+    backfill(db)
+    return ids
+
+
+def _triggers(eligible, uid):
+    return sorted(trigger for trigger, *_ in eligible.get(uid, []))
+
+
+def test_prefilter_matches_trigger_rules(db_session):
+    ids = _seed(db_session)
+
+    checked, eligible = prefilter_nudges(db_session, NOW)
+
+    assert checked == 4
+    assert _triggers(eligible, ids["streaker"]) == ["streak_guard"]
+    assert _triggers(eligible, ids["tuesday"]) == ["calorie_gap", "workout_due"]
+    assert ids["cooled"] not in eligible
+    assert _triggers(eligible, ids["active"]) == ["calorie_gap"]
+
+    streak_ctx = eligible[ids["streaker"]][0][1]
+    assert streak_ctx["streak"] == 4
+    workout_ctx = dict((t, c) for t, c, *_ in eligible[ids["tuesday"]])["workout_due"]
+    assert workout_ctx["historical_sessions_on_this_day"] == 2
+    assert workout_ctx["last_session_duration"] == 50
+
+
+def test_prefilter_water_window(db_session):
+    uid = _user(db_session, "thirsty")
+    _meal(db_session, uid, NOW - timedelta(hours=1))
+    afternoon = NOW.replace(hour=14)
+    db_session.add(WaterLog(user_id=uid, date=afternoon.date(), glasses=2, target_glasses=8))
+    db_session.commit()
+
+    _, eligible = prefilter_nudges(db_session, afternoon)
+    assert _triggers(eligible, uid) == ["water_low"]
+
+
+def test_prefilter_query_count_is_independent_of_users(db_session):
+    _seed(db_session)
+    with QueryCounter(db_session) as small:
+        prefilter_nudges(db_session, NOW)
+
+    for i in range(20):
+        uid = _user(db_session, f"extra{i}")
+        _completed(db_session, uid, NOW - timedelta(days=7, hours=1))
+        _completed(db_session, uid, NOW - timedelta(days=14, hours=1))
+    db_session.commit()
+
+    with QueryCounter(db_session) as large:
+        prefilter_nudges(db_session, NOW)
+    assert large.count == small.count <= 7
@@ -0,0 +1,138 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import sessionmaker
+
+from app.agent.notification_manager import notif_manager
+from app.agent.reminder_dispatcher import ReminderDispatcher
+from app.models.reminder import Reminder
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _reminder(db, user, at, **kw):
+    reminder = Reminder(user_id=user.id, message=f"r@{at:%H:%M:%S}", scheduled_at=at, is_active=True,
+                        missed_processed=False, **kw)
+    db.add(reminder)
+    db.commit()
+    return reminder
+
+
+def _capture_pushes(monkeypatch):
+    pushed = []
+
+    async def push(user_id, event):
+        pushed.append(event)
+
+    monkeypatch.setattr(notif_manager, "push", push)
+    return pushed
+
+
+def test_refresh_catches_up_and_fires_in_one_batch(db_engine, db_session, test_user, monkeypatch):
+    pushed = _capture_pushes(monkeypatch)
+    now = _utcnow()
+    overdue = _reminder(db_session, test_user, now - timedelta(hours=2))       # downtime catch-up
+    soon = _reminder(db_session, test_user, now + timedelta(minutes=10))
+    _reminder(db_session, test_user, now - timedelta(days=2))                  # beyond catch-up
+    _reminder(db_session, test_user, now + timedelta(days=1))                  # beyond horizon
+    _reminder(db_session, test_user, now - timedelta(minutes=5), type="off").is_active = False
+    db_session.commit()
+
+    dispatcher = ReminderDispatcher(sessionmaker(bind=db_engine))
+    assert dispatcher.refresh() == 2
+    assert len(dispatcher) == 2
+
+    due = dispatcher._pop_due((now + timedelta(minutes=11)).replace(tzinfo=timezone.utc).timestamp())
+    assert asyncio.run(dispatcher.fire(due)) == 2
+
+    assert sorted(e["data"]["reminder_id"] for e in pushed) == [overdue.id, soon.id]
+    assert {e["data"]["reminder_id"]: e["data"]["late"] for e in pushed}[overdue.id] is True
+    db_session.expire_all()
+    assert db_session.get(Reminder, overdue.id).missed_processed
+    assert dispatcher.refresh() == 0
+
+
+def test_fires_at_due_time_and_honours_cancel(db_engine, db_session, test_user, monkeypatch):
+    pushed = _capture_pushes(monkeypatch)
+    dispatcher = ReminderDispatcher(sessionmaker(bind=db_engine))
+
+    async def run():
+        await dispatcher.start()
+        keep = _reminder(db_session, test_user, _utcnow() + timedelta(seconds=0.3))
+        drop = _reminder(db_session, test_user, _utcnow() + timedelta(seconds=0.2))
+        dispatcher.upsert(keep)
+        dispatcher.upsert(drop)
+        dispatcher.cancel(drop.id)
+        await asyncio.sleep(0.1)
+        assert pushed == []
+        await asyncio.sleep(0.5)
+        await dispatcher.stop()
+        return keep.id
+
+    keep_id = asyncio.run(run())
+    assert [e["data"]["reminder_id"] for e in pushed] == [keep_id]
+    assert dispatcher.fired == 1
+
+
+def test_upsert_on_commit_waits_for_commit(db_engine, db_session, test_user):
+    dispatcher = ReminderDispatcher(sessionmaker(bind=db_engine))
+    dispatcher.refresh()
+    reminder = Reminder(user_id=test_user.id, message="next", scheduled_at=_utcnow() + timedelta(minutes=5),
+                        is_active=True, missed_processed=False)
+    db_session.add(reminder)
+    db_session.flush()
+    dispatcher.upsert_on_commit(db_session, reminder)
+    assert len(dispatcher) == 0
+    db_session.commit()
+    assert len(dispatcher) == 1
+
+
+def test_firing_a_recurring_reminder_spawns_the_next(db_engine, db_session, test_user, monkeypatch):
+    _capture_pushes(monkeypatch)
+    daily = _reminder(db_session, test_user, _utcnow() - timedelta(minutes=1), recurrence="daily")
+    dispatcher = ReminderDispatcher(sessionmaker(bind=db_engine))
+    dispatcher.refresh()
+
+    asyncio.run(dispatcher.fire(dispatcher._pop_due(time.time())))
+
+    db_session.expire_all()
+    chain = db_session.query(Reminder).filter(Reminder.recurrence == "daily").order_by(Reminder.id).all()
+    assert [r.id for r in chain][0] == daily.id and len(chain) == 2
+    assert chain[1].scheduled_at - chain[0].scheduled_at == timedelta(days=1)
+    assert chain[0].missed_processed and not chain[1].missed_processed
+
+
+def test_workers_claim_before_firing(db_engine, db_session, test_user, monkeypatch):
+    # One dispatcher per worker over the same rows: each reminder goes out once
+    pushed = _capture_pushes(monkeypatch)
+    daily = _reminder(db_session, test_user, _utcnow() - timedelta(minutes=1), recurrence="daily")
+    once = _reminder(db_session, test_user, _utcnow() - timedelta(minutes=2))
+    workers = [ReminderDispatcher(sessionmaker(bind=db_engine)) for _ in range(2)]
+    for dispatcher in workers:
+        dispatcher.refresh()
+
+    async def run():
+        return await asyncio.gather(*(d.fire(d._pop_due(time.time())) for d in workers))
+
+    assert sorted(asyncio.run(run())) == [0, 2]
+    assert sorted(e["data"]["reminder_id"] for e in pushed) == sorted([daily.id, once.id])
+    db_session.expire_all()
+    assert db_session.query(Reminder).filter(Reminder.recurrence == "daily").count() == 2
+
+
+def test_failed_push_releases_the_claim(db_engine, db_session, test_user, monkeypatch):
+    async def push(user_id, event):
+        raise ConnectionError("backplane down")
+
+    monkeypatch.setattr(notif_manager, "push", push)
+    reminder = _reminder(db_session, test_user, _utcnow() - timedelta(minutes=1))
+    dispatcher = ReminderDispatcher(sessionmaker(bind=db_engine))
+    dispatcher.refresh()
+
+    assert asyncio.run(dispatcher.fire(dispatcher._pop_due(time.time()))) == 0
+    db_session.expire_all()
+    assert not db_session.get(Reminder, reminder.id).missed_processed
+    assert dispatcher.refresh() == 1
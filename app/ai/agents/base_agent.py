@@ -5,7 +5,7 @@ from app.ai.orchestrator.llm_engine import LLMEngine
 class BaseAgent:
     def __init__(self, system_prompt_path: str):
         self.system_prompt = self._load_prompt(system_prompt_path)
-        self.llm = LLMEngine()
+        self.llm = LLMEngine(agent=type(self).__name__)
 
     def _load_prompt(self, path: str):
         with open(path, "r") as f:
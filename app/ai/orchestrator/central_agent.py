@@ -1,3 +1,4 @@
+import asyncio
 from typing import Dict, Any, List
 
 from app.ai.intent_router import classify_intent, Intent
@@ -153,15 +154,23 @@ class CentralAgent:
         if not coach:
             return decisions
 
-        coach_result = await coach.respond(goal_text)
-
         # --------------------------------------------------
         # MICRO NUTRITION ENRICHMENT (SUPPORT ONLY)
-        # --------------------------------------------------
-        if self._needs_nutrition_support(goal_text):
-            dietician = self.registry.get_agent("dietician")
-            if dietician:
-                diet_result = await dietician.respond(goal_text)
+        # Dietician runs alongside the coach, not after it
+        # --------------------------------------------------
+        dietician = (
+            self.registry.get_agent("dietician")
+            if self._needs_nutrition_support(goal_text) else None
+        )
+        if dietician:
+            coach_result, diet_result = await asyncio.gather(
+                coach.respond(goal_text),
+                dietician.respond(goal_text),
+                return_exceptions=True,
+            )
+            if isinstance(coach_result, BaseException):
+                raise coach_result
+            if not isinstance(diet_result, BaseException):
                 coach_result["nutrition_hint"] = {
                     "protein": (
                         diet_result.get("macros", {}).get("protein")
@@ -169,6 +178,8 @@ class CentralAgent:
                     ),
                     "note": "Adequate protein supports muscle recovery and growth"
                 }
+        else:
+            coach_result = await coach.respond(goal_text)
 
         decisions.append({
             "agent": "coach",
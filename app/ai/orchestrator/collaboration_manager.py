@@ -2,6 +2,7 @@ import asyncio
 from typing import Any, Dict, List, Optional
 
 from app.ai.agent_registry import AgentRegistry
+from app.ai.orchestrator.llm_engine import LLMDeadlineExceeded, llm_deadline
 from app.ai.orchestrator.state_manager import state_manager
 
 
@@ -46,29 +47,38 @@ class CollaborationManager:
                 if asyncio.iscoroutine(res):
                     res = await res
                 return res
+            except LLMDeadlineExceeded:
+                # Out of time — another method would only wait again
+                raise
             except Exception as e:
                 last_err = e
                 continue
 
         raise RuntimeError(f"Agent '{name}' failed on all known methods. Last error: {last_err}")
 
-    async def broadcast(self, agent_names: List[str], payload: Any):
+    async def broadcast(self, agent_names: List[str], payload: Any, timeout: Optional[float] = None):
         """
-        Calls multiple agents concurrently.
+        Calls multiple agents concurrently — each agent's LLM calls run in
+        parallel on the shared pool, bounded by its own concurrency limit.
+        With `timeout`, every agent shares that deadline; agents that miss
+        it report an error instead of holding up the rest.
         """
-        results = {}
-
         async def one(agent):
             try:
-                result = await self.call_agent(agent, payload)
-                results[agent] = {"ok": True, "result": result}
+                return {"ok": True, "result": await self.call_agent(agent, payload)}
             except Exception as e:
-                results[agent] = {"ok": False, "error": str(e)}
+                return {"ok": False, "error": str(e) or type(e).__name__}
+
+        async def run_all():
+            return await asyncio.gather(*(one(a) for a in agent_names))
 
-        tasks = [asyncio.create_task(one(a)) for a in agent_names]
-        await asyncio.gather(*tasks)
+        if timeout is None:
+            outcomes = await run_all()
+        else:
+            async with llm_deadline(timeout):
+                outcomes = await run_all()
 
-        return results
+        return dict(zip(agent_names, outcomes))
 
     async def orchestrate_flow(self, goal: str, candidate_agents: Optional[List[str]] = None):
         """
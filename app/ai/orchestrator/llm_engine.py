@@ -1,19 +1,108 @@
-from openai import OpenAI
+"""
+llm_engine.py
+=============
+Async LLM engine shared by the orchestrator's agents.
+
+  • Calls go through the pooled AsyncOpenAI client (openai_clients.py), so
+    nothing here blocks the event loop.
+  • Deadlines propagate: `async with llm_deadline(seconds)` sets an absolute
+    deadline for everything awaited inside it, and every generate() under
+    it gets only the time that is left (nested deadlines only tighten).
+    A call that runs out raises LLMDeadlineExceeded.
+  • Hedging: if the primary call is still running after HEDGE_AFTER_S, a
+    second copy of the same request starts alongside it, so a merely slow
+    answer is never swapped for a generic one. The fallback prompt only
+    starts once a call has failed. Whichever answers first wins; the
+    others are cancelled.
+  • Per-agent concurrency: each agent (LLMEngine(agent=...)) holds at most
+    AGENT_CONCURRENCY calls in flight, so one busy agent cannot take the
+    whole connection pool. Waiting for a slot counts against the deadline.
+
+Tunable through LLM_HEDGE_AFTER_S, LLM_AGENT_CONCURRENCY and
+LLM_DEFAULT_DEADLINE_S.
+"""
+
+import asyncio
+import contextvars
+import logging
 import os
+import weakref
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
 from dotenv import load_dotenv
 
+from app.services.openai_clients import get_openai
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+HEDGE_AFTER_S = float(os.getenv("LLM_HEDGE_AFTER_S", "8"))
+AGENT_CONCURRENCY = int(os.getenv("LLM_AGENT_CONCURRENCY", "8"))
+DEFAULT_DEADLINE_S = float(os.getenv("LLM_DEFAULT_DEADLINE_S", "45"))
+
+# Absolute loop.time() by which the current request must be done
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("llm_deadline", default=None)
+
+
+class LLMDeadlineExceeded(asyncio.TimeoutError):
+    """The request's deadline ran out before the model answered."""
+
+
+@asynccontextmanager
+async def llm_deadline(seconds: float):
+    """Deadline for every LLM call awaited inside the block (tasks created inside inherit it)."""
+    loop = asyncio.get_running_loop()
+    outer = _deadline.get()
+    at = loop.time() + seconds
+    token = _deadline.set(at if outer is None else min(outer, at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left before the current deadline, or None when there is none."""
+    at = _deadline.get()
+    if at is None:
+        return None
+    return at - asyncio.get_running_loop().time()
+
+
+# loop → {agent → semaphore}; asyncio primitives are bound to one loop
+_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _agent_slot(agent: str) -> asyncio.Semaphore:
+    per_loop = _limits.setdefault(asyncio.get_running_loop(), {})
+    sem = per_loop.get(agent)
+    if sem is None:
+        sem = per_loop[agent] = asyncio.Semaphore(AGENT_CONCURRENCY)
+    return sem
+
+
 class LLMEngine:
-    def __init__(self):
+    def __init__(self, agent: str = "default"):
         api_key = os.getenv("OPENAI_API_KEY")
 
         if not api_key:
             raise ValueError("OPENAI_API_KEY not found in environment variables.")
 
-        self.client = OpenAI(api_key=api_key)
+        self.model = "gpt-4o-mini"
+        self.agent = agent
+        self.hedge_after = HEDGE_AFTER_S
         self.fallback_prompt = self._load_fallback_prompt()
 
+    @property
+    def client(self):
+        # Shared pooled client for the running loop — agents are built at
+        # import time, before any loop exists, so resolve it per call.
+        return get_openai(self.model)
+
     def _load_fallback_prompt(self):
         path = "app/ai/prompts/fallback_prompt.txt"
         if os.path.exists(path):
@@ -21,30 +110,92 @@ class LLMEngine:
                 return f.read()
         return "You are a helpful assistant."
 
-    async def generate(self, system_prompt: str, user_prompt: str):
+    async def generate(self, system_prompt: str, user_prompt: str, timeout: Optional[float] = None):
         """
         Uses the NEW OpenAI responses API (2024+)
         This works for ALL new keys and models.
+
+        Bounded by `timeout`, the enclosing llm_deadline() or
+        DEFAULT_DEADLINE_S, whichever is tightest.
         """
+        budget = remaining_budget()
+        limit = timeout if timeout is not None else DEFAULT_DEADLINE_S
+        budget = limit if budget is None else min(budget, limit)
+        if budget <= 0:
+            raise LLMDeadlineExceeded(f"[LLM] {self.agent}: deadline already passed")
+
+        loop = asyncio.get_running_loop()
+        at = loop.time() + budget
+        slot = _agent_slot(self.agent)
         try:
-            response = self.client.responses.create(
-                model="gpt-4o-mini",
-                input=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ]
-            )
-
-            return response.output_text
-
-        except Exception as e:
-            # Fallback completion
-            fallback = self.client.responses.create(
-                model="gpt-4o-mini",
-                input=[
-                    {"role": "system", "content": self.fallback_prompt},
-                    {"role": "user", "content": user_prompt},
-                ]
-            )
-
-            return fallback.output_text
+            await asyncio.wait_for(slot.acquire(), budget)
+        except asyncio.TimeoutError:
+            raise LLMDeadlineExceeded(f"[LLM] {self.agent}: no free slot within {budget:.1f}s")
+
+        try:
+            # Time spent queueing for the slot is gone
+            budget = at - loop.time()
+            if budget <= 0:
+                raise LLMDeadlineExceeded(f"[LLM] {self.agent}: deadline passed waiting for a slot")
+            try:
+                async with llm_deadline(budget):
+                    return await asyncio.wait_for(self._hedged(system_prompt, user_prompt), budget)
+            except asyncio.TimeoutError:
+                raise LLMDeadlineExceeded(f"[LLM] {self.agent}: no answer within {budget:.1f}s")
+        finally:
+            slot.release()
+
+    # ──────────────────────────────────────────────────────────
+    # Hedging
+    # ──────────────────────────────────────────────────────────
+
+    async def _hedged(self, system_prompt: str, user_prompt: str) -> str:
+        primary = asyncio.ensure_future(self._call(system_prompt, user_prompt))
+        tasks = [primary]
+        fallback: Optional[asyncio.Future] = None
+        hedged = False
+        errors = []
+        try:
+            pending = {primary}
+            while pending:
+                timeout = None if hedged else self.hedge_after
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Slow, not failed — race a copy of the same request
+                    logger.info(f"[LLM] {self.agent}: primary slow after {self.hedge_after}s — hedging")
+                    hedged = True
+                    hedge = asyncio.ensure_future(self._call(system_prompt, user_prompt))
+                    tasks.append(hedge)
+                    pending.add(hedge)
+                    continue
+
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(task.exception())
+                if fallback is None:
+                    logger.warning(f"[LLM] {self.agent}: call failed ({errors[-1]}) — fallback")
+                    hedged = True
+                    fallback = asyncio.ensure_future(self._call(self.fallback_prompt, user_prompt))
+                    tasks.append(fallback)
+                    pending.add(fallback)
+            # Everything failed — surface the fallback's error, as before
+            raise fallback.exception() if fallback is not None else errors[-1]
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _call(self, system_prompt: str, user_prompt: str) -> str:
+        budget = remaining_budget()
+        options = {"timeout": budget} if budget is not None else {}
+        response = await self.client.responses.create(
+            model=self.model,
+            input=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            **options,
+        )
+
+        return response.output_text
@@ -1,3 +1,5 @@
+import os
+
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.openapi.utils import get_openapi
 from pydantic import BaseModel
@@ -9,6 +11,7 @@ from app.ai.agent_registry import AgentRegistry
 from app.ai.orchestrator.collaboration_manager import CollaborationManager
 from app.ai.orchestrator.state_manager import state_manager
 from app.ai.orchestrator.central_agent import CentralAgent
+from app.ai.orchestrator.llm_engine import LLMDeadlineExceeded, llm_deadline
 from app.ai.orchestrator.reflection_engine import ReflectionEngine
 
 from app.ai.memory.context_builder import ContextBuilder
@@ -56,6 +59,9 @@ def custom_openapi():
 
 app.openapi = custom_openapi
 
+# Whole-request budget; every agent LLM call inside shares it
+ORCHESTRATE_DEADLINE_S = float(os.getenv("ORCHESTRATE_DEADLINE_S", "40"))
+
 # -------------------------------------------------
 # Models
 # -------------------------------------------------
@@ -100,7 +106,12 @@ async def orchestrate(
         "context": context,
     }
 
-    result = await central_agent.handle(payload)
+    try:
+        async with llm_deadline(ORCHESTRATE_DEADLINE_S):
+            result = await central_agent.handle(payload)
+    except LLMDeadlineExceeded:
+        raise HTTPException(504, "Orchestration timed out")
+
     final = result.get("final")
 
     if not final:
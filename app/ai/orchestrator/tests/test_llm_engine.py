@@ -0,0 +1,177 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.ai.orchestrator import llm_engine
+from app.ai.orchestrator.collaboration_manager import CollaborationManager
+from app.ai.orchestrator.llm_engine import LLMDeadlineExceeded, LLMEngine, llm_deadline
+
+
+class FakeResponses:
+    """
+    responses.create stand-in: per-system-prompt delay (or list of delays,
+    one per call) / failure, tracks concurrency.
+    """
+
+    def __init__(self, delays, fail=()):
+        self.delays = delays
+        self.fail = set(fail)
+        self.calls = []
+        self.cancelled = []
+        self.active = 0
+        self.peak = 0
+
+    async def create(self, model, input, timeout=None):
+        system = input[0]["content"]
+        self.calls.append((system, timeout))
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        delay = self.delays.get(system, 0)
+        if isinstance(delay, list):
+            delay = delay.pop(0) if delay else 0
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(system)
+            raise
+        finally:
+            self.active -= 1
+        if system in self.fail:
+            raise RuntimeError(f"{system} failed")
+        return SimpleNamespace(output_text=f"{system}:{input[1]['content']}")
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    responses = FakeResponses({})
+    monkeypatch.setattr(LLMEngine, "client", property(lambda self: SimpleNamespace(responses=responses)))
+    return responses
+
+
+def _engine(agent="coach", hedge_after=0.05):
+    engine = LLMEngine(agent=agent)
+    engine.fallback_prompt = "fallback"
+    engine.hedge_after = hedge_after
+    return engine
+
+
+def test_fallback_on_error_and_hedge_on_slow_primary(fake_llm):
+    engine = _engine()
+
+    fake_llm.fail = {"primary"}
+    assert asyncio.run(engine.generate("primary", "hi")) == "fallback:hi"
+
+    # Slow primary: a copy of the same request is hedged alongside, the
+    # loser cancelled — a slow answer is never swapped for the generic one
+    fake_llm.fail = set()
+    fake_llm.delays = {"primary": [5.0, 0.0]}
+    fake_llm.calls.clear()
+    started = time.monotonic()
+    assert asyncio.run(engine.generate("primary", "hi")) == "primary:hi"
+    assert time.monotonic() - started < 1.0
+    assert [system for system, _ in fake_llm.calls] == ["primary", "primary"]
+    assert fake_llm.cancelled == ["primary"]
+
+    # Slow and still slow when hedged: the first answer wins, still no fallback
+    fake_llm.delays = {"primary": [0.2, 5.0]}
+    fake_llm.calls.clear()
+    assert asyncio.run(engine.generate("primary", "hi")) == "primary:hi"
+    assert "fallback" not in [system for system, _ in fake_llm.calls]
+
+    # Fast primary never starts the fallback
+    fake_llm.delays = {}
+    fake_llm.calls.clear()
+    assert asyncio.run(engine.generate("primary", "hi")) == "primary:hi"
+    assert [system for system, _ in fake_llm.calls] == ["primary"]
+
+
+def test_deadline_propagates_to_every_call(fake_llm):
+    engine = _engine(hedge_after=10)
+    fake_llm.delays = {"primary": 5.0}
+
+    async def run():
+        async with llm_deadline(0.2):
+            await engine.generate("primary", "hi")
+
+    started = time.monotonic()
+    with pytest.raises(LLMDeadlineExceeded):
+        asyncio.run(run())
+    assert time.monotonic() - started < 1.0
+    # The client was handed the remaining budget, not its 60s default
+    assert fake_llm.calls[0][1] <= 0.2
+
+
+def test_per_agent_limit_and_parallel_broadcast(fake_llm, monkeypatch):
+    monkeypatch.setattr(llm_engine, "AGENT_CONCURRENCY", 2)
+    fake_llm.delays = {"coach": 0.1, "dietician": 0.1}
+
+    async def limited():
+        engine = _engine(agent="coach", hedge_after=10)
+        await asyncio.gather(*(engine.generate("coach", str(i)) for i in range(6)))
+
+    asyncio.run(limited())
+    assert fake_llm.peak == 2
+
+    class Agent:
+        def __init__(self, name):
+            self.engine = _engine(agent=name, hedge_after=10)
+            self.name = name
+
+        async def respond(self, payload):
+            return await self.engine.generate(self.name, payload)
+
+    registry = SimpleNamespace(agents={}, get_agent=lambda name: agents.get(name))
+    agents = {"coach": Agent("coach"), "dietician": Agent("dietician")}
+    manager = CollaborationManager(registry, state_mgr=None)
+
+    fake_llm.peak = 0
+    started = time.monotonic()
+    results = asyncio.run(manager.broadcast(["coach", "dietician", "missing"], "plan"))
+    assert time.monotonic() - started < 0.18          # ran side by side
+    assert fake_llm.peak == 2
+    assert results["coach"] == {"ok": True, "result": "coach:plan"}
+    assert results["dietician"]["ok"] is True
+    assert results["missing"]["ok"] is False
+
+    # A shared deadline turns slow agents into errors instead of a hang
+    fake_llm.delays = {"coach": 5.0, "dietician": 0.01}
+    results = asyncio.run(manager.broadcast(["coach", "dietician"], "plan", timeout=0.2))
+    assert results["coach"]["ok"] is False
+    assert results["dietician"]["ok"] is True
+
+
+def test_waiting_for_an_agent_slot_counts_against_the_deadline(fake_llm, monkeypatch):
+    monkeypatch.setattr(llm_engine, "AGENT_CONCURRENCY", 1)
+    engine = _engine(hedge_after=10)
+    fake_llm.delays = {"primary": 1.0}
+
+    async def run():
+        busy = asyncio.ensure_future(engine.generate("primary", "in flight"))
+        await asyncio.sleep(0)
+        started = time.monotonic()
+        with pytest.raises(LLMDeadlineExceeded):
+            async with llm_deadline(0.2):
+                await engine.generate("primary", "queued")
+        waited = time.monotonic() - started
+        await busy
+        return waited
+
+    assert asyncio.run(run()) < 0.5
+    assert len(fake_llm.calls) == 1          # the queued call never reached the client
+
+    # A slot that frees up in time: the call gets what is left, not a fresh budget
+    fake_llm.delays = {"primary": [0.15, 0.0]}
+    fake_llm.calls.clear()
+
+    async def queued():
+        busy = asyncio.ensure_future(engine.generate("primary", "in flight"))
+        await asyncio.sleep(0)
+        async with llm_deadline(0.5):
+            await engine.generate("primary", "queued")
+        await busy
+
+    asyncio.run(queued())
+    assert fake_llm.calls[1][1] <= 0.5 - 0.15 + 0.01
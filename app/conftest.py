@@ -4,3 +4,85 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+# database.py imports the models itself — load it before any model module
+import app.db.database  # noqa: F401
+
+
+def _import_models():
+    # Same set main.py imports so every table (and relationship target) is mapped
+    import app.models.user
+    import app.models.gym
+    import app.models.gym_amenities
+    import app.models.places_area_sync
+    import app.models.visit
+    import app.models.gallery
+    import app.models.workout_log
+    import app.models.weight_log
+    import app.models.reminder
+    import app.models.reminder_log
+    import app.models.medication_schedule
+    import app.models.health_record
+    import app.models.evaluator_state
+    import app.models.health_memory
+    import app.models.pending_notification
+    import app.models.health_profile
+    import app.models.daily_health_snapshot
+    import app.models.vault_item
+    import app.models.vault_collection
+    import app.models.fitness_tracking
+    import app.models.user_ai_preferences
+    import app.models.exercise
+    import app.models.youtube_video
+    import app.models.food
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "test.db"
+
+
+@pytest.fixture
+def db_engine(db_path):
+    from app.db.database import Base
+
+    _import_models()
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(db_engine):
+    db = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def async_session_factory(db_engine, db_path):
+    """AsyncSession factory over the same SQLite file as db_session."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    yield async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def test_user(db_session):
+    from app.models.user import User
+
+    user = User(email="test@fitconnect.in", full_name="Test User", hashed_password="x")
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
@@ -1,5 +1,6 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 import os
 from dotenv import load_dotenv
 
@@ -15,6 +16,32 @@ engine = create_engine(
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+
+# -------------------------------------------------
+# Async engine (used by async def endpoints so DB I/O
+# never blocks the event loop)
+# -------------------------------------------------
+def _to_async_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto the matching asyncio driver."""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:"):
+        return url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    if url.startswith("postgres:"):
+        return url.replace("postgres:", "postgresql+asyncpg:", 1)
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _to_async_url(DATABASE_URL))
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+
+# expire_on_commit=False — ORM rows stay readable after commit without
+# an implicit (sync) refresh, which AsyncSession cannot do.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False,
+)
+
 # -------------------------------------------------
 # DB session dependency
 # -------------------------------------------------
@@ -25,6 +52,11 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # -------------------------------------------------
 # IMPORT ALL MODELS (CRITICAL — KEEP TOGETHER)
 # -------------------------------------------------
@@ -32,6 +64,8 @@ def get_db():
 # Gyms
 from app.models.gym import Gym
 from app.models.gym_amenities import GymAmenities
+from app.models.places_area_sync import PlacesAreaSync
+from app.models.youtube_video import YouTubeQuotaDay, ExerciseVideoLookup
 from app.models.gym_equipment import GymEquipment
 from app.models.gym_pricing import GymPricing
 from app.models.gym_trainer import GymTrainer
@@ -53,6 +87,7 @@ from app.models.weight_log import WeightLog
 # Health
 from app.models.health_profile import HealthProfile
 from app.models.health_memory import HealthMemory
+from app.models.pending_notification import PendingNotification
 
 # Reminders
 from app.models.reminder import Reminder
@@ -16,6 +16,7 @@ from app.db.database import init_db
 import app.models.user
 import app.models.gym
 import app.models.gym_amenities  # ✅ NEW - Added for amenities table
+import app.models.places_area_sync  # per-cell Places sync freshness
 import app.models.visit
 import app.models.gallery
 import app.models.workout_log
@@ -26,11 +27,13 @@ import app.models.medication_schedule
 import app.models.health_record
 import app.models.evaluator_state
 import app.models.health_memory
+import app.models.pending_notification  # offline notification outbox
 import app.models.daily_health_snapshot
 import app.models.vault_item
 import app.models.fitness_tracking  # ensures body_weight_logs + water_logs tables are created
 import app.models.user_ai_preferences  # ensures user_ai_preferences table is created
 import app.models.exercise              # Phase 4 — exercise library
+import app.models.youtube_video         # YouTube quota ledger + video lookup queue
 import app.models.food                  # Phase 4 — food database
 
 # -------------------------------------------------
@@ -135,13 +138,36 @@ async def lifespan(app: FastAPI):
     db.execute(text(behaviour.CREATE_TABLE_SQL))
     db.commit()
 
+    # Food autocomplete index (rebuilt as the food tables change)
+    from app.services.food_search import food_search
+    food_search.warm(db)
+
     # Start the agent scheduler (Foundation A)
     start_scheduler()
 
+    # Join the notification backplane (cross-worker pushes)
+    from app.agent.notification_manager import notif_manager
+    await notif_manager.start()
+
+    # Event-driven reminder delivery
+    from app.agent.reminder_dispatcher import reminder_dispatcher
+    await reminder_dispatcher.start()
+
     yield  # app is running
 
     # ── Shutdown ─────────────────────────────────
+    await reminder_dispatcher.stop()
     stop_scheduler()
+    await notif_manager.stop()
+
+    from app.db.database import async_engine
+    await async_engine.dispose()
+
+    from app.services.openai_clients import close_openai_clients
+    await close_openai_clients()
+
+    from app.services.places import close_places_clients
+    await close_places_clients()
 
 
 # -------------------------------------------------
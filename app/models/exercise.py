@@ -4,8 +4,10 @@ Exercise — the master exercise library.
 Seeded from free-exercise-db (800+ exercises).
 Each exercise has animated GIF, muscle targeting, instructions, tips.
 """
-from sqlalchemy import Column, Integer, String, Boolean, Text, Float
+from sqlalchemy import Column, Integer, String, Boolean, Text, Float, ForeignKey, Index, event, inspect
 from app.db.database import Base
+from app.services.exercise_facets import facet_rows, replace_rows
+from app.services.text_search import EXERCISES_FTS
 
 
 class Exercise(Base):
@@ -41,3 +43,52 @@ class Exercise(Base):
 
     # YouTube — cached on first view, never re-fetched
     youtube_video_id    = Column(String, nullable=True)                # e.g. "dQw4w9WgXcQ"
+
+
+# Full-text index (exercises_fts / search_vector) — see services/text_search.py
+EXERCISES_FTS.attach(Exercise.__table__)
+
+
+class ExerciseFacet(Base):
+    """
+    Normalised filter values per exercise (muscles, equipment, category,
+    difficulty) so filter chips and facet filters never parse the JSON
+    columns. Maintained by the hooks below — see services/exercise_facets.py.
+    """
+    __tablename__ = "exercise_facets"
+    __table_args__ = (
+        Index("ix_exercise_facets_facet_value", "facet", "value", "exercise_id"),
+    )
+
+    exercise_id = Column(Integer, ForeignKey("exercises.id", ondelete="CASCADE"), primary_key=True)
+    facet       = Column(String(20), primary_key=True)     # primary_muscle, secondary_muscle, equipment…
+    value       = Column(String, primary_key=True)         # normalised key filters match on
+    label       = Column(String, nullable=False)           # display spelling
+
+
+_FACET_SOURCES = ("primary_muscles", "secondary_muscles", "equipment", "category", "difficulty")
+
+
+def _write_facets(connection, exercise: Exercise):
+    replace_rows(connection, exercise.id, facet_rows(
+        exercise.id, exercise.primary_muscles, exercise.secondary_muscles,
+        exercise.equipment, exercise.category, exercise.difficulty,
+    ))
+
+
+@event.listens_for(Exercise, "after_insert")
+def _facets_on_insert(mapper, connection, exercise: Exercise):
+    _write_facets(connection, exercise)
+
+
+@event.listens_for(Exercise, "after_update")
+def _facets_on_update(mapper, connection, exercise: Exercise):
+    # Most updates (YouTube id cache, content edits) leave the facets alone
+    state = inspect(exercise)
+    if any(state.attrs[col].history.has_changes() for col in _FACET_SOURCES):
+        _write_facets(connection, exercise)
+
+
+@event.listens_for(Exercise, "after_delete")
+def _facets_on_delete(mapper, connection, exercise: Exercise):
+    replace_rows(connection, exercise.id, [])
@@ -6,12 +6,13 @@ SQLAlchemy Models for FitNova Fitness System
 from sqlalchemy import (
     text,
     Column, Integer, String, Float, Boolean, Text, DateTime, Date, Time,
-    ForeignKey, JSON, Enum as SQLEnum, UniqueConstraint
+    ForeignKey, JSON, Enum as SQLEnum, UniqueConstraint, Index
 )
 from sqlalchemy.orm import relationship, deferred
 import enum
 
 from app.db.database import Base
+from app.services.text_search import FOODS_FTS
 
 # ============================================================================
 # ENUMS
@@ -89,6 +90,9 @@ class FoodSource(str, enum.Enum):
 class WorkoutSession(Base):
     """Tracks workout sessions"""
     __tablename__ = "workout_sessions"
+    __table_args__ = (
+        Index("ix_workout_sessions_user_status_completed", "user_id", "status", "completed_at"),
+    )
 
     # Core columns (exist in DB)
     id = Column(Integer, primary_key=True, index=True)
@@ -288,6 +292,9 @@ class MealFood(Base):
 class MealLog(Base):
     """Daily meal logs"""
     __tablename__ = "meal_logs"
+    __table_args__ = (
+        Index("ix_meal_logs_user_logged", "user_id", "logged_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
@@ -395,6 +402,10 @@ class Food(Base):
 
     user = relationship("User", back_populates="custom_foods")
 
+
+# Full-text index (foods_fts / search_vector) — see services/text_search.py
+FOODS_FTS.attach(Food.__table__)
+
 # ============================================================================
 # BODY METRICS — Weight + Water
 # ============================================================================
@@ -402,6 +413,9 @@ class Food(Base):
 class BodyWeightLog(Base):
     """Daily body weight entries"""
     __tablename__ = "body_weight_logs"
+    __table_args__ = (
+        Index("ix_body_weight_logs_user_logged", "user_id", "logged_at"),
+    )
 
     id       = Column(Integer, primary_key=True, index=True)
     user_id  = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
@@ -420,3 +434,30 @@ class WaterLog(Base):
     date           = Column(Date, nullable=False)
     glasses        = Column(Integer, nullable=False, default=0)
     target_glasses = Column(Integer, nullable=False, default=8)
+
+
+class ActivityDay(Base):
+    """
+    Materialized workout calendar — one row per user per UTC day with session
+    activity. Maintained incrementally by the session complete / abandon
+    endpoints (services/activity_calendar.py); rebuild with backfill_activity_calendar.py.
+    """
+    __tablename__ = "activity_days"
+    __table_args__ = (UniqueConstraint("user_id", "date", name="uq_activity_day"),)
+
+    id                 = Column(Integer, primary_key=True, index=True)
+    user_id            = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    date               = Column(Date, nullable=False)
+    completed_sessions = Column(Integer, nullable=False, default=0)
+    abandoned_sessions = Column(Integer, nullable=False, default=0)
+
+
+class UserStreak(Base):
+    """Running workout streak per user — read in O(1) by home, briefs and nudges."""
+    __tablename__ = "user_streaks"
+
+    user_id          = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    current_streak   = Column(Integer, nullable=False, default=0)  # consecutive days ending on last_active_date
+    longest_streak   = Column(Integer, nullable=False, default=0)
+    last_active_date = Column(Date, nullable=True)                 # last day with a completed session
+    updated_at       = Column(DateTime, nullable=False, server_default=text('CURRENT_TIMESTAMP'))
@@ -9,6 +9,7 @@ Used for food search, nutrition lookup, and meal logging autocomplete.
 """
 from sqlalchemy import Column, Integer, String, Boolean, Text, Float
 from app.db.database import Base
+from app.services.text_search import FOOD_ITEMS_FTS
 
 
 class FoodItem(Base):
@@ -41,3 +42,7 @@ class FoodItem(Base):
 
     # Meta
     is_active       = Column(Boolean, default=True)
+
+
+# Full-text index (food_items_fts / search_vector) — see services/text_search.py
+FOOD_ITEMS_FTS.attach(FoodItem.__table__)
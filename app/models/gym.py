@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, JSON, Boolean, event
 from sqlalchemy.sql import func
 from app.db.database import Base
+from app.services.geo_index import encode as encode_geohash
 
 class Gym(Base):
     __tablename__ = "gyms"
@@ -12,6 +13,7 @@ class Gym(Base):
     address = Column(String, nullable=True)
     lat = Column(Float, nullable=True, index=True)
     lng = Column(Float, nullable=True, index=True)
+    geohash = Column(String(9), nullable=True, index=True)   # spatial index — see geo_index.py
     cover_image_url = Column(String, nullable=True)
     gallery_images = Column(JSON, default=[])
 
@@ -41,3 +43,13 @@ class Gym(Base):
     is_claimed          = Column(Boolean, default=False)    # gym owner has verified listing
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+@event.listens_for(Gym, "before_insert")
+@event.listens_for(Gym, "before_update")
+def _sync_geohash(mapper, connection, gym: Gym):
+    # Every writer (Places upsert, owner create / PATCH) keeps the cell current
+    if gym.lat is not None and gym.lng is not None:
+        gym.geohash = encode_geohash(gym.lat, gym.lng)
+    else:
+        gym.geohash = None
@@ -1,9 +1,15 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Index, event
+from sqlalchemy.orm import Session, object_session
 from sqlalchemy.sql import func
 from app.db.database import Base
+from app.services.context_cache import context_cache
 
 class HealthMemory(Base):
     __tablename__ = "health_memories"
+    __table_args__ = (
+        # Nearly every AI path: user + category, newest first
+        Index("ix_health_memories_user_category_created", "user_id", "category", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -18,3 +24,36 @@ class HealthMemory(Base):
     content = Column(JSON, nullable=False)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# Log-style categories the AI Central context never reads: per-turn chat
+# usage / behaviour signals and sent-notification records
+CONTEXT_EXCLUDED_CATEGORIES = ("ai_insight", "nudge_sent", "notification")
+
+# Every other writer (routers, memory_writer, nightly jobs) drops the AI
+# Central context for the user — but only once the row is committed, so a
+# concurrent rebuild can't cache the pre-commit state. The cache is per
+# process: other workers keep their copy until CENTRAL_CONTEXT_TTL.
+_DIRTY_USERS_KEY = "health_memory_dirty_users"
+
+
+@event.listens_for(HealthMemory, "after_insert")
+@event.listens_for(HealthMemory, "after_update")
+@event.listens_for(HealthMemory, "after_delete")
+def _mark_context_dirty(mapper, connection, memory: HealthMemory):
+    if memory.category in CONTEXT_EXCLUDED_CATEGORIES:
+        return
+    session = object_session(memory)
+    if session is not None and memory.user_id is not None:
+        session.info.setdefault(_DIRTY_USERS_KEY, set()).add(memory.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_context(session):
+    for user_id in session.info.pop(_DIRTY_USERS_KEY, ()):
+        context_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_dirty(session):
+    session.info.pop(_DIRTY_USERS_KEY, None)
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON, Index
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class PendingNotification(Base):
+    """
+    Outbox for push events that found no open socket. Delivered on the
+    next WebSocket connect (or GET /api/agent/notifications), then purged.
+    """
+    __tablename__ = "pending_notifications"
+    __table_args__ = (
+        # Fetch-and-mark on connect: user's undelivered rows, oldest first
+        Index("ix_pending_notifications_user_delivered", "user_id", "delivered", "created_at"),
+        Index("ix_pending_notifications_expires", "expires_at"),
+    )
+
+    id      = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # morning_brief | nudge | reminder | adaptation | insight | …
+    event_type = Column(String, nullable=False, default="notification")
+    title      = Column(String, nullable=True)
+    body       = Column(String, nullable=True)
+    data       = Column(JSON, nullable=True)
+
+    delivered    = Column(Boolean, nullable=False, default=False)
+    delivered_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    expires_at = Column(DateTime, nullable=False)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from app.db.database import Base
+
+
+class PlacesAreaSync(Base):
+    """
+    Last Google Places Nearby Search per geohash cell (area_sync.py).
+    A cell is fresh while synced_at is inside the TTL and the search covered
+    at least the requested radius.
+    """
+    __tablename__ = "places_area_syncs"
+
+    cell         = Column(String(12), primary_key=True)
+    radius_m     = Column(Integer, nullable=False)
+    result_count = Column(Integer, nullable=False, default=0)
+    synced_at    = Column(DateTime(timezone=True), nullable=False)
@@ -1,10 +1,16 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index
 from sqlalchemy.sql import func
 from app.db.database import Base
 
 
 class Reminder(Base):
     __tablename__ = "reminders"
+    __table_args__ = (
+        # Due-reminder scans: active + unprocessed, by fire time
+        Index("ix_reminders_due", "is_active", "missed_processed", "scheduled_at"),
+        # Per-user lists / home / daily snapshot, ordered by fire time
+        Index("ix_reminders_user_scheduled", "user_id", "scheduled_at"),
+    )
 
     id      = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Index
+from app.db.database import Base
+
+
+class YouTubeQuotaDay(Base):
+    """
+    YouTube Data API searches spent per quota day (youtube_videos.py).
+    Shared by every worker and survives restarts; the day is YouTube's own
+    (midnight Pacific), not the server's.
+    """
+    __tablename__ = "youtube_quota_days"
+
+    day          = Column(Date, primary_key=True)
+    searches     = Column(Integer, nullable=False, default=0)
+    search_limit = Column(Integer, nullable=False)  # lowered to `searches` when YouTube says 403
+
+
+class ExerciseVideoLookup(Base):
+    """
+    Resolution state of an exercise's form video. `views` counts requests
+    that found no cached video and orders the prewarm queue; `retry_after`
+    is the negative-cache expiry after no-result or failed searches.
+    """
+    __tablename__ = "exercise_video_lookups"
+    __table_args__ = (
+        Index("ix_exercise_video_lookups_queue", "retry_after", "views"),
+    )
+
+    exercise_id     = Column(Integer, ForeignKey("exercises.id", ondelete="CASCADE"), primary_key=True)
+    views           = Column(Integer, nullable=False, default=0)
+    status          = Column(String(10), nullable=False, default="pending")   # pending | found | none | error
+    attempts        = Column(Integer, nullable=False, default=0)
+    last_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    retry_after     = Column(DateTime(timezone=True), nullable=True)
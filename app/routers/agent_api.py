@@ -8,6 +8,8 @@ GET  /api/agent/notifications     — Pending offline notifications
 GET  /api/agent/weekly-adaptation — Latest weekly adaptation report
 GET  /api/agent/correlations      — Latest correlation insights
 POST /api/agent/trigger/{job}     — Manually trigger a job (dev/admin only)
+GET  /api/agent/jobs/stats        — Throughput / p95 latency of the latest run per job
+GET  /api/agent/notifications/stats — WebSocket queue depth, drops and evictions (this worker)
 """
 
 import logging
@@ -78,35 +80,9 @@ async def get_pending_notifications(
     Returns and clears pending notifications for users who were offline.
     Frontend polls this on app startup as a fallback to WebSocket delivery.
     """
-    pending = (
-        db.query(HealthMemory)
-        .filter(
-            HealthMemory.user_id == current_user.id,
-            HealthMemory.category == "notification",
-        )
-        .order_by(HealthMemory.created_at.asc())
-        .limit(20)
-        .all()
-    )
-
-    results = []
-    for mem in pending:
-        c = mem.content or {}
-        if c.get("pending"):
-            results.append({
-                "id": mem.id,
-                "type": c.get("event_type", "notification"),
-                "title": c.get("title", ""),
-                "body": c.get("body", ""),
-                "data": c.get("data", {}),
-                "created_at": mem.created_at.isoformat() if mem.created_at else None,
-            })
-            # Mark delivered
-            mem.content = {**c, "pending": False}
-
-    if results:
-        db.commit()
+    from app.services.notification_outbox import claim
 
+    results = claim(db, current_user.id, limit=20)
     return {"notifications": results, "count": len(results)}
 
 
@@ -188,13 +164,14 @@ async def trigger_job(
     Manually trigger a background job. Useful for testing without waiting
     for the scheduler clock. Only available to active users.
 
-    Valid job names: morning_brief, narrative, nudge, adaptation
+    Valid job names: morning_brief, narrative, nudge, adaptation, batch_collect
     """
     valid_jobs = {
         "morning_brief": "app.agent.jobs.morning_brief_job.run_morning_brief",
         "narrative": "app.agent.jobs.narrative_job.run_daily_narrative_synthesis",
         "nudge": "app.agent.jobs.nudge_job.run_nudge_check",
         "adaptation": "app.agent.jobs.adaptation_job.run_weekly_adaptation",
+        "batch_collect": "app.agent.llm_batch.collect_finished_batches",
     }
 
     if job_name not in valid_jobs:
@@ -205,8 +182,26 @@ async def trigger_job(
         module_path, func_name = valid_jobs[job_name].rsplit(".", 1)
         module = importlib.import_module(module_path)
         func = getattr(module, func_name)
-        await func()
-        return {"triggered": True, "job": job_name}
+        stats = await func()
+        return {"triggered": True, "job": job_name, "stats": stats}
     except Exception as e:
         logger.error(f"[AgentAPI] Trigger error: {e}")
         return {"triggered": False, "error": str(e)}
+
+
+@router.get("/jobs/stats")
+async def get_job_stats(
+    current_user: User = Depends(get_current_user),
+):
+    """Latest fan-out run per job — users, elapsed, users/s, p95 per-user latency."""
+    from app.agent.job_runner import last_runs
+    return {"runs": last_runs}
+
+
+@router.get("/notifications/stats")
+async def get_notification_stats(
+    current_user: User = Depends(get_current_user),
+):
+    """This worker's WebSocket delivery — sockets, queue depth, sent / dropped / evicted counters."""
+    from app.agent.notification_manager import notif_manager
+    return notif_manager.stats()
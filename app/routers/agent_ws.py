@@ -52,32 +52,23 @@ def _authenticate_ws(token: str, db: Session):
 async def _deliver_pending(user_id: int, ws: WebSocket, db: Session):
     """Send any pending offline notifications to the newly connected user."""
     try:
-        import json
-        from app.models.health_memory import HealthMemory
-
-        pending = (
-            db.query(HealthMemory)
-            .filter(
-                HealthMemory.user_id == user_id,
-                HealthMemory.category == "notification",
-            )
-            .order_by(HealthMemory.created_at.asc())
-            .limit(10)
-            .all()
-        )
-
-        for mem in pending:
-            c = mem.content or {}
-            if c.get("pending"):
-                await ws.send_text(json.dumps({
-                    "type": c.get("event_type", "notification"),
-                    "title": c.get("title", ""),
-                    "body": c.get("body", ""),
-                    "data": c.get("data", {}),
-                }))
-                # Mark as delivered
-                mem.content = {**c, "pending": False}
-                db.commit()
+        from app.services.notification_outbox import claim, release
+
+        # Claimed in one statement (two tabs connecting don't both get them),
+        # sent through the socket's writer queue, and re-queued if not sent
+        pending = claim(db, user_id, limit=10)
+        if not pending:
+            return
+        sent = [False] * len(pending)
+        try:
+            sent = await notif_manager.send_to_socket(user_id, ws, [
+                {"type": event["type"], "title": event["title"], "body": event["body"], "data": event["data"]}
+                for event in pending
+            ])
+        finally:
+            unsent = [event["id"] for event, ok in zip(pending, sent) if not ok]
+            if unsent:
+                release(db, unsent)
     except Exception as e:
         logger.debug(f"[AgentWS] Pending delivery error: {e}")
 
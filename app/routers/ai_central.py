@@ -10,27 +10,33 @@ Endpoints:
   DELETE /ai/central/preferences/{type} — Clear preferences (re-onboard)
   POST /ai/central/dislike         — Log a disliked exercise or food item
   GET  /ai/central/questions/{type} — Get question list for a flow type
+  GET  /ai/central/context-cache   — Per-user context cache counters
 """
 
 import json
 import logging
 import re
-from datetime import datetime, timezone, timedelta
+from collections import OrderedDict
+from datetime import datetime, timezone
 from typing import AsyncGenerator
 
 from fastapi import APIRouter, Depends
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.database import get_db
+from app.db.database import get_db, get_async_db
 from app.deps import get_current_user
 from app.models.health_memory import HealthMemory
-from app.models.fitness_tracking import (
-    WorkoutSession, SessionStatus, MealLog, BodyWeightLog, WaterLog, DietPlan,
-)
 from app.models.user import User
-from app.services.memory_writer import get_disliked_items, write_disliked_item
+from app.services.central_context_loader import (
+    load_context_rows, DISLIKED_CATEGORY, RAW_BUCKET,
+)
+from app.services.context_cache import context_cache
+from app.services.memory_writer import split_disliked_items, write_disliked_item
+from app.services.openai_clients import get_openai
 from app.services.preference_manager import (
     get_preferences, save_preferences, clear_preferences, get_questions,
 )
@@ -42,25 +48,6 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/ai/central", tags=["AI Central"])
 
 
-# ─────────────────────────────────────────────────────────────
-# OpenAI client (lazy async)
-# ─────────────────────────────────────────────────────────────
-
-_openai_client = None
-
-def _get_openai():
-    global _openai_client
-    if _openai_client is None:
-        from openai import AsyncOpenAI
-        import os
-        _openai_client = AsyncOpenAI(
-            api_key=os.getenv("OPENAI_API_KEY"),
-            timeout=90.0,       # outer wall-clock timeout (streaming can be slow for long plans)
-            max_retries=2,      # auto-retry transient 5xx / network errors
-        )
-    return _openai_client
-
-
 # ─────────────────────────────────────────────────────────────
 # Schemas
 # ─────────────────────────────────────────────────────────────
@@ -178,32 +165,63 @@ _INTENT_AGENT = {
 _SEMANTIC_FALLBACK_THRESHOLD = 4
 
 
-def detect_intent(text: str) -> str:
+def _compile_alternation(patterns: list) -> "re.Pattern":
+    return re.compile("|".join(f"(?:{p})" for p in patterns))
+
+
+# One combined regex per intent, compiled once. Intents are still tried in
+# table order so precedence matches the per-pattern loop this replaces.
+_INTENT_REGEXES = {
+    intent: _compile_alternation(patterns)
+    for intent, patterns in _INTENT_PATTERNS.items()
+}
+
+# LRU of normalised short message → LLM-classified intent ("ok", "hi", "legs?")
+_INTENT_CACHE_SIZE = 2048
+_intent_cache: "OrderedDict[str, str]" = OrderedDict()
+
+
+def _normalise_message(text: str) -> str:
+    """Lowercase, drop punctuation, collapse whitespace — 'Legs?' and 'legs' share a key."""
+    return " ".join(re.sub(r"[^\w\s']", " ", text.lower()).split())
+
+
+async def detect_intent(text: str) -> str:
     """
     Two-stage intent detection:
     1. Fast regex (< 1ms, zero cost) — handles explicit, keyword-rich messages.
-    2. Synchronous LLM fallback for short/ambiguous messages (< 4 words, no regex hit).
+    2. Async LLM fallback for short/ambiguous messages (< 4 words, no regex hit),
+       memoised per normalised message so repeats never cost another call.
        Returns a single intent word from the known set.
     """
     t = text.lower().strip()
-    for intent, patterns in _INTENT_PATTERNS.items():
-        for pat in patterns:
-            if re.search(pat, t):
-                return intent
+    for intent, pattern in _INTENT_REGEXES.items():
+        if pattern.search(t):
+            return intent
 
     # Short message with no regex match → ask the model to classify
     word_count = len(t.split())
     if word_count < _SEMANTIC_FALLBACK_THRESHOLD:
-        return _classify_intent_llm(text)
+        key = _normalise_message(text)
+        cached = _intent_cache.get(key)
+        if cached is not None:
+            _intent_cache.move_to_end(key)
+            return cached
+        intent = await _classify_intent_llm(text)
+        if intent is not None:
+            _intent_cache[key] = intent
+            if len(_intent_cache) > _INTENT_CACHE_SIZE:
+                _intent_cache.popitem(last=False)
+            return intent
 
     return "general"
 
 
-def _classify_intent_llm(text: str) -> str:
+async def _classify_intent_llm(text: str) -> str | None:
     """
-    Lightweight synchronous LLM call to classify short/ambiguous messages.
-    Uses gpt-5-nano with a tight prompt — typically under 200ms.
-    Falls back to 'general' on any error.
+    Lightweight async LLM call to classify short/ambiguous messages.
+    Uses gpt-5-nano with a tight prompt on the pooled client — typically under 200ms.
+    Returns None on any error so transient failures are not cached.
     """
     valid_intents = list(_INTENT_AGENT.keys())
     prompt = (
@@ -213,19 +231,18 @@ def _classify_intent_llm(text: str) -> str:
         f"Reply with ONLY the intent word. No punctuation, no explanation."
     )
     try:
-        from openai import OpenAI
-        import os
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        resp = client.chat.completions.create(
+        client = get_openai("gpt-5-nano")
+        resp = await client.chat.completions.create(
             model="gpt-5-nano",
             messages=[{"role": "user", "content": prompt}],
             max_completion_tokens=10,
+            timeout=10.0,
         )
         result = resp.choices[0].message.content.strip().lower()
         return result if result in valid_intents else "general"
     except Exception as e:
         logger.debug(f"[Intent LLM fallback] {e}")
-        return "general"
+        return None
 
 
 # ─────────────────────────────────────────────────────────────
@@ -243,6 +260,7 @@ _INJURY_SIGNALS = [
     r"can'?t\s+(do|use|lift)", r"avoid.*exercise", r"skip.*exercise",
     r"don'?t\s+(train|work)\s+(my\s+)?(leg|arm|chest|shoulder|back)",
 ]
+_INJURY_RE = _compile_alternation(_INJURY_SIGNALS)
 
 
 def _detect_inline_injury(text: str) -> str | None:
@@ -251,10 +269,8 @@ def _detect_inline_injury(text: str) -> str | None:
     alongside a workout request (so the trainer can adapt the plan immediately).
     Returns None if no injury signals found.
     """
-    t = text.lower()
-    for pat in _INJURY_SIGNALS:
-        if re.search(pat, t):
-            return text.strip()
+    if _INJURY_RE.search(text.lower()):
+        return text.strip()
     return None
 
 
@@ -262,12 +278,7 @@ def _detect_inline_injury(text: str) -> str | None:
 # Rich context builder
 # ─────────────────────────────────────────────────────────────
 
-def build_rich_context(db: Session, user: User) -> dict:
-    now = datetime.now(timezone.utc)
-    today = now.date()
-    week_ago = now - timedelta(days=7)
-    three_days_ago = now - timedelta(days=3)
-
+async def build_rich_context(db: AsyncSession, user: User) -> dict:
     ctx = {
         "user_name": getattr(user, "full_name", None) or getattr(user, "name", "User"),
         # ── Agent-synthesised layers (highest signal) ─────────
@@ -288,15 +299,17 @@ def build_rich_context(db: Session, user: User) -> dict:
         "water_today": None,
         "health_memories": [],
         "disliked_items": {"exercises": [], "foods": []},
+        # ── Stored preferences (workout / meal / profile) ────
+        "preferences": {},
     }
 
+    # One windowed HealthMemory query + one query per remaining table
+    rows = await load_context_rows(db, user)
+    ctx["preferences"] = rows.preferences
+
     # ── Layer 1: Daily narratives ─────────────────────────────────────────────
     try:
-        narratives = (
-            db.query(HealthMemory)
-            .filter(HealthMemory.user_id == user.id, HealthMemory.category == "daily_narrative")
-            .order_by(HealthMemory.created_at.desc()).limit(7).all()
-        )
+        narratives = rows.memories.get("daily_narrative", [])
         ctx["daily_narratives"] = [
             {"date": m.content.get("date", "?"), "summary": m.content.get("narrative", "")}
             for m in reversed(narratives) if m.content.get("narrative")
@@ -306,11 +319,7 @@ def build_rich_context(db: Session, user: User) -> dict:
 
     # ── Layer 2: Morning brief ────────────────────────────────────────────────
     try:
-        brief = (
-            db.query(HealthMemory)
-            .filter(HealthMemory.user_id == user.id, HealthMemory.category == "morning_brief")
-            .order_by(HealthMemory.created_at.desc()).first()
-        )
+        brief = rows.latest("morning_brief")
         if brief and brief.content.get("brief"):
             ctx["morning_brief"] = {
                 "date": brief.content.get("date"),
@@ -322,11 +331,7 @@ def build_rich_context(db: Session, user: User) -> dict:
 
     # ── Layer 4: Correlation insights ─────────────────────────────────────────
     try:
-        corr = (
-            db.query(HealthMemory)
-            .filter(HealthMemory.user_id == user.id, HealthMemory.category == "correlation_insight")
-            .order_by(HealthMemory.created_at.desc()).first()
-        )
+        corr = rows.latest("correlation_insight")
         if corr and corr.content.get("insights"):
             ctx["correlation_insights"] = [
                 i.get("insight", "") for i in corr.content["insights"] if i.get("insight")
@@ -336,11 +341,7 @@ def build_rich_context(db: Session, user: User) -> dict:
 
     # ── Layer 5: Weekly adaptation ────────────────────────────────────────────
     try:
-        adapt = (
-            db.query(HealthMemory)
-            .filter(HealthMemory.user_id == user.id, HealthMemory.category == "weekly_adaptation")
-            .order_by(HealthMemory.created_at.desc()).first()
-        )
+        adapt = rows.latest("weekly_adaptation")
         if adapt and adapt.content.get("report"):
             ctx["weekly_adaptation"] = {
                 "date": adapt.content.get("date"),
@@ -352,11 +353,7 @@ def build_rich_context(db: Session, user: User) -> dict:
 
     # ── Past AI recommendations (last 3) ──────────────────────────────────────
     try:
-        recs = (
-            db.query(HealthMemory)
-            .filter(HealthMemory.user_id == user.id, HealthMemory.category == "ai_recommendation")
-            .order_by(HealthMemory.created_at.desc()).limit(3).all()
-        )
+        recs = rows.memories.get("ai_recommendation", [])
         ctx["ai_recommendations"] = [
             {
                 "date": m.content.get("date", "?"),
@@ -370,8 +367,7 @@ def build_rich_context(db: Session, user: User) -> dict:
 
     # ── Health profile (conditions) ───────────────────────────────────────────
     try:
-        from app.models.health_profile import HealthProfile
-        hp = db.query(HealthProfile).filter(HealthProfile.user_id == user.id).first()
+        hp = rows.health_profile
         if hp:
             conditions = []
             for field in ("diabetes", "hypertension", "thyroid", "pcos", "asthma"):
@@ -388,18 +384,12 @@ def build_rich_context(db: Session, user: User) -> dict:
 
     # ── Body composition (TDEE, BF%, calorie target) ─────────────────────────
     try:
-        # Get latest weight
-        latest_w = (
-            db.query(BodyWeightLog)
-            .filter(BodyWeightLog.user_id == user.id)
-            .order_by(BodyWeightLog.logged_at.desc()).first()
-        )
-        weight_kg = latest_w.weight_kg if latest_w else None
+        # Latest weight is the head of the weight history
+        weight_kg = rows.weights[0].weight_kg if rows.weights else None
 
-        # Pull workout prefs for activity level + goal
-        w_prefs = get_preferences(db, user.id, "workout") or {}
-        # Pull profile prefs for height/age/gender
-        p_prefs = get_preferences(db, user.id, "profile") or {}
+        # Workout prefs for activity level + goal, profile prefs for height/age/gender
+        w_prefs = rows.preferences.get("workout") or {}
+        p_prefs = rows.preferences.get("profile") or {}
 
         if weight_kg:
             height_cm = _safe_float(p_prefs.get("height_cm"))
@@ -430,50 +420,35 @@ def build_rich_context(db: Session, user: User) -> dict:
 
     # ── Active diet plan targets ──────────────────────────────────────────────
     try:
-        if hasattr(user, "active_diet_plan_id") and user.active_diet_plan_id:
-            diet_plan = db.query(DietPlan).filter(DietPlan.id == user.active_diet_plan_id).first()
-            if diet_plan:
-                ctx["diet_targets"] = {
-                    "calories": diet_plan.target_calories,
-                    "protein_g": round(diet_plan.target_protein or 0),
-                    "carbs_g": round(diet_plan.target_carbs or 0),
-                    "fats_g": round(diet_plan.target_fats or 0),
-                }
+        diet_plan = rows.diet_plan
+        if diet_plan:
+            ctx["diet_targets"] = {
+                "calories": diet_plan.target_calories,
+                "protein_g": round(diet_plan.target_protein or 0),
+                "carbs_g": round(diet_plan.target_carbs or 0),
+                "fats_g": round(diet_plan.target_fats or 0),
+            }
     except Exception as e:
         logger.debug(f"[Context] diet_targets: {e}")
 
     # ── Active workout program ────────────────────────────────────────────────
     try:
-        if hasattr(user, "active_workout_program_id") and user.active_workout_program_id:
-            from app.models.vault_item import VaultItem
-            program = db.query(VaultItem).filter(
-                VaultItem.id == user.active_workout_program_id,
-                VaultItem.user_id == user.id,
-            ).first()
-            if program:
-                content = program.content or {}
-                days = content.get("days", [])
-                day_names = [d.get("name", f"Day {i+1}") for i, d in enumerate(days)]
-                ctx["active_program"] = {
-                    "name": program.title or "Active Program",
-                    "days": day_names,
-                    "total_days": len(days),
-                }
+        program = rows.program
+        if program:
+            content = program.content or {}
+            days = content.get("days", [])
+            day_names = [d.get("name", f"Day {i+1}") for i, d in enumerate(days)]
+            ctx["active_program"] = {
+                "name": program.title or "Active Program",
+                "days": day_names,
+                "total_days": len(days),
+            }
     except Exception as e:
         logger.debug(f"[Context] active_program: {e}")
 
     # ── Raw workout sessions ──────────────────────────────────────────────────
     try:
-        sessions = (
-            db.query(WorkoutSession)
-            .filter(
-                WorkoutSession.user_id == user.id,
-                WorkoutSession.status == SessionStatus.COMPLETED,
-                WorkoutSession.completed_at >= week_ago,
-            )
-            .order_by(WorkoutSession.completed_at.desc()).limit(7).all()
-        )
-        for s in sessions:
+        for s in rows.sessions:
             ctx["recent_workouts"].append({
                 "date": s.completed_at.strftime("%b %d") if s.completed_at else "?",
                 "duration_mins": s.duration_minutes or 0,
@@ -484,12 +459,7 @@ def build_rich_context(db: Session, user: User) -> dict:
 
     # ── Raw meal logs ─────────────────────────────────────────────────────────
     try:
-        meals = (
-            db.query(MealLog)
-            .filter(MealLog.user_id == user.id, MealLog.logged_at >= three_days_ago)
-            .order_by(MealLog.logged_at.desc()).limit(12).all()
-        )
-        for m in meals:
+        for m in rows.meals:
             ctx["recent_meals"].append({
                 "date": m.logged_at.strftime("%b %d") if m.logged_at else "?",
                 "meal_name": m.meal_name or "Meal",
@@ -503,53 +473,33 @@ def build_rich_context(db: Session, user: User) -> dict:
 
     # ── Weight history ────────────────────────────────────────────────────────
     try:
-        weights = (
-            db.query(BodyWeightLog)
-            .filter(BodyWeightLog.user_id == user.id)
-            .order_by(BodyWeightLog.logged_at.desc()).limit(14).all()
-        )
         ctx["weight_history"] = [
             {"date": w.logged_at.strftime("%b %d"), "kg": w.weight_kg}
-            for w in reversed(weights)
+            for w in reversed(rows.weights)
         ]
     except Exception as e:
         logger.debug(f"[Context] weight: {e}")
 
     # ── Water ─────────────────────────────────────────────────────────────────
     try:
-        water = db.query(WaterLog).filter(
-            WaterLog.user_id == user.id, WaterLog.date == today
-        ).first()
+        water = rows.water
         if water:
             ctx["water_today"] = {"glasses": water.glasses, "target": water.target_glasses}
     except Exception as e:
         logger.debug(f"[Context] water: {e}")
 
-    # ── Raw health memories (exclude agent-generated categories) ─────────────
+    # ── Raw health memories (agent-generated categories are bucketed apart) ──
     try:
-        _exclude = {
-            "disliked_item", "daily_narrative", "morning_brief",
-            "weekly_adaptation", "correlation_insight", "nudge_sent",
-            "notification", "ai_recommendation",
-        }
-        memories = (
-            db.query(HealthMemory)
-            .filter(
-                HealthMemory.user_id == user.id,
-                HealthMemory.category.notin_(_exclude),
-            )
-            .order_by(HealthMemory.created_at.desc()).limit(20).all()
-        )
         ctx["health_memories"] = [
             {"category": m.category, "content": m.content}
-            for m in memories
+            for m in rows.memories.get(RAW_BUCKET, [])
         ]
     except Exception as e:
         logger.debug(f"[Context] memories: {e}")
 
     # ── Disliked items ────────────────────────────────────────────────────────
     try:
-        ctx["disliked_items"] = get_disliked_items(db, user.id)
+        ctx["disliked_items"] = split_disliked_items(rows.memories.get(DISLIKED_CATEGORY, []))
     except Exception as e:
         logger.debug(f"[Context] disliked: {e}")
 
@@ -739,6 +689,20 @@ def format_context_for_prompt(ctx: dict) -> str:
     return "\n".join(lines)
 
 
+async def get_central_context(db: AsyncSession, user: User) -> tuple[dict, str]:
+    """
+    Return (ctx, ctx_text) for the user — from the per-user cache when warm,
+    otherwise built fresh and cached. Writers invalidate via context_cache.
+    """
+    cached = context_cache.get(user.id)
+    if cached:
+        return cached
+    ctx = await build_rich_context(db, user)
+    ctx_text = format_context_for_prompt(ctx)
+    context_cache.put(user.id, ctx, ctx_text)
+    return ctx, ctx_text
+
+
 # ─────────────────────────────────────────────────────────────
 # Per-intent system prompts
 # ─────────────────────────────────────────────────────────────
@@ -928,7 +892,7 @@ Answer directly using the user's actual data where relevant. Use markdown where
 # Reminder creation helper
 # ─────────────────────────────────────────────────────────────
 
-async def _create_reminder_from_answers(db: Session, user: User, answers: dict):
+async def _create_reminder_from_answers(db: AsyncSession, user: User, answers: dict):
     """Create a Reminder from a Central AI conversation flow."""
     try:
         from app.models.reminder import Reminder
@@ -1001,11 +965,17 @@ async def _create_reminder_from_answers(db: Session, user: User, answers: dict):
             is_active    = True,
         )
         db.add(reminder)
-        db.commit()
+        await db.commit()
+        from app.agent.reminder_dispatcher import reminder_dispatcher
+        reminder_dispatcher.upsert(reminder)
         logger.info(f"[ai_central] Reminder created: {title} @ {scheduled.strftime('%H:%M')} ({recurrence})")
         return reminder
     except Exception as e:
         logger.warning(f"[ai_central] Reminder creation failed: {e}")
+        try:
+            await db.rollback()
+        except Exception:
+            pass
         return None
 
 
@@ -1013,8 +983,8 @@ async def _create_reminder_from_answers(db: Session, user: User, answers: dict):
 # Recommendation memory writer (B-5)
 # ─────────────────────────────────────────────────────────────
 
-def _write_recommendation_memory(
-    db: Session,
+async def _write_recommendation_memory(
+    db: AsyncSession,
     user_id: int,
     intent: str,
     prefs: dict,
@@ -1058,12 +1028,12 @@ def _write_recommendation_memory(
                 "summary": summary,
             },
         ))
-        db.commit()
+        await db.commit()
         logger.info(f"[ai_central] Rec memory: {intent} → {summary[:80]}")
     except Exception as e:
         logger.debug(f"[ai_central] rec_memory write failed: {e}")
         try:
-            db.rollback()
+            await db.rollback()
         except Exception:
             pass
 
@@ -1073,7 +1043,7 @@ def _write_recommendation_memory(
 # ─────────────────────────────────────────────────────────────
 
 async def _stream_openai(messages: list, intent: str = "general") -> AsyncGenerator[str, None]:
-    client = _get_openai()
+    client = get_openai("gpt-5-nano")
     agent_label = _INTENT_AGENT.get(intent, _INTENT_AGENT["general"])
     try:
         # Send agent metadata first so the frontend can show who's responding
@@ -1114,28 +1084,27 @@ def _build_messages(system_prompt: str, conv_history: list, question: str) -> li
 @router.post("/stream")
 async def stream_central(
     body: AskRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     question = body.question.strip()
     conv_history = body.conversation_history or []
     flow_ctx = body.flow_context or {}
 
-    ctx = build_rich_context(db, current_user)
-    ctx_text = format_context_for_prompt(ctx)
+    ctx, ctx_text = await get_central_context(db, current_user)
     disliked = ctx["disliked_items"]
 
-    intent = flow_ctx.get("intent") or detect_intent(question)
+    intent = flow_ctx.get("intent") or await detect_intent(question)
     prefs: dict = {}   # populated below for workout/meal; used by rec-memory writer
 
     if intent == "workout":
-        prefs = get_preferences(db, current_user.id, "workout") or {}
+        prefs = ctx["preferences"].get("workout") or {}
         # Detect inline injury mentions in THIS message (overrides saved prefs)
         inline_injury = _detect_inline_injury(question)
         system_prompt = _system_workout(prefs, ctx_text, disliked, injury_note=inline_injury)
 
     elif intent == "meal":
-        prefs = get_preferences(db, current_user.id, "meal") or {}
+        prefs = ctx["preferences"].get("meal") or {}
         ws_str = "\n".join(
             f"  • {w['date']} — {w['duration_mins']} min"
             for w in ctx["recent_workouts"]
@@ -1162,17 +1131,21 @@ async def stream_central(
             from datetime import date
             import json as _json
             today = date.today().isoformat()
-            schedules = db.query(MedicationSchedule).filter(
-                MedicationSchedule.user_id == current_user.id,
-                MedicationSchedule.is_active == True,
-            ).all()
+            schedules = (await db.execute(
+                select(MedicationSchedule).where(
+                    MedicationSchedule.user_id == current_user.id,
+                    MedicationSchedule.is_active == True,
+                )
+            )).scalars().all()
             if schedules:
                 lines = ["## Today's Medication Schedule"]
                 for s in schedules:
-                    log = db.query(MedicationLog).filter(
-                        MedicationLog.schedule_id == s.id,
-                        MedicationLog.log_date == today,
-                    ).first()
+                    log = (await db.execute(
+                        select(MedicationLog).where(
+                            MedicationLog.schedule_id == s.id,
+                            MedicationLog.log_date == today,
+                        )
+                    )).scalars().first()
                     tablets = _json.loads(s.tablets or "[]")
                     status = _json.loads(log.tablets_status if log else "{}") if log else {}
                     lines.append(f"\n**{s.name}** ({s.scheduled_time})")
@@ -1198,7 +1171,7 @@ async def stream_central(
     # When a workout or meal plan is being generated (answers collected = flow complete),
     # record what we're about to recommend so future context includes it.
     if intent in ("workout", "meal") and flow_ctx.get("answers"):
-        _write_recommendation_memory(db, current_user.id, intent, prefs, ctx)
+        await _write_recommendation_memory(db, current_user.id, intent, prefs, ctx)
 
     # Log agent usage to health memory (fire-and-forget, non-blocking)
     try:
@@ -1207,7 +1180,7 @@ async def stream_central(
             content={"question": question[:200], "intent": intent,
                      "agent": _INTENT_AGENT.get(intent, "Central AI")},
         ))
-        db.commit()
+        await db.commit()
     except Exception:
         pass
 
@@ -1229,23 +1202,24 @@ async def stream_central(
 @router.post("/ask")
 async def ask_central(
     body: AskRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     question = body.question.strip()
     conv_history = body.conversation_history or []
     flow_ctx = body.flow_context or {}
 
-    ctx = build_rich_context(db, current_user)
-    ctx_text = format_context_for_prompt(ctx)
+    ctx, ctx_text = await get_central_context(db, current_user)
     disliked = ctx["disliked_items"]
-    intent = flow_ctx.get("intent") or detect_intent(question)
+    intent = flow_ctx.get("intent") or await detect_intent(question)
 
     if intent == "workout":
         inline_injury = _detect_inline_injury(question)
-        system_prompt = _system_workout(get_preferences(db, current_user.id, "workout") or {}, ctx_text, disliked, injury_note=inline_injury)
+        workout_prefs = ctx["preferences"].get("workout") or {}
+        system_prompt = _system_workout(workout_prefs, ctx_text, disliked, injury_note=inline_injury)
     elif intent == "meal":
-        system_prompt = _system_meal(get_preferences(db, current_user.id, "meal") or {}, ctx_text, disliked, "")
+        meal_prefs = ctx["preferences"].get("meal") or {}
+        system_prompt = _system_meal(meal_prefs, ctx_text, disliked, "")
     elif intent == "motivate":
         system_prompt = _system_motivate(ctx_text, len(ctx["health_memories"]))
     elif intent == "progress":
@@ -1258,7 +1232,7 @@ async def ask_central(
     messages = _build_messages(system_prompt, conv_history, question)
 
     try:
-        client = _get_openai()
+        client = get_openai("gpt-5-nano")
         resp = await client.chat.completions.create(
             model="gpt-5-nano", messages=messages, max_completion_tokens=16000,
             timeout=120.0,
@@ -1269,7 +1243,7 @@ async def ask_central(
                 user_id=current_user.id, category="ai_insight", source="ai",
                 content={"question": question, "answer": answer[:400], "intent": intent},
             ))
-            db.commit()
+            await db.commit()
         except Exception:
             pass
         return {"answer": answer, "intent": intent}
@@ -1317,3 +1291,12 @@ async def log_dislike(body: DislikeRequest, db: Session = Depends(get_db), curre
 @router.get("/questions/{flow_type}")
 async def get_flow_questions(flow_type: str):
     return {"flow_type": flow_type, "questions": get_questions(flow_type)}
+
+
+# ─────────────────────────────────────────────────────────────
+# Context cache stats
+# ─────────────────────────────────────────────────────────────
+
+@router.get("/context-cache")
+async def get_context_cache_stats(current_user: User = Depends(get_current_user)):
+    return context_cache.stats()
@@ -13,6 +13,7 @@ from pydantic import BaseModel
 from app.db.database import get_db
 from app.models.fitness_tracking import BodyWeightLog, WaterLog, WorkoutSession, SessionStatus
 from app.deps import get_current_user
+from app.services.context_cache import context_cache
 
 router = APIRouter(prefix="/api/metrics", tags=["Body Metrics"])
 
@@ -44,6 +45,7 @@ async def log_weight(
     db.add(entry)
     db.commit()
     db.refresh(entry)
+    context_cache.invalidate(current_user.id)
 
     # ── Write health memory (fire-and-forget) ──────────────────────────────
     try:
@@ -134,6 +136,7 @@ async def update_water_today(
         if data.target_glasses:
             log.target_glasses = data.target_glasses
     db.commit()
+    context_cache.invalidate(current_user.id)
     return {"glasses": log.glasses, "target_glasses": log.target_glasses, "date": today.isoformat()}
 
 
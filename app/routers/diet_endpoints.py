@@ -17,6 +17,8 @@ from app.models.fitness_tracking import (
 )
 from app.models.food import FoodItem
 from app.deps import get_current_user
+from app.services.context_cache import context_cache
+from app.services.food_search import FOOD as FOOD_KIND, ITEM as ITEM_KIND, food_search
 
 router = APIRouter(prefix="/api/diet", tags=["Diet & Nutrition"])
 
@@ -163,6 +165,7 @@ async def create_diet_plan(
     # Update user's active_diet_plan_id
     current_user.active_diet_plan_id = plan.id
     db.commit()
+    context_cache.invalidate(current_user.id)
 
     return plan
 
@@ -226,6 +229,7 @@ async def activate_diet_plan(
     current_user.active_diet_plan_id = plan.id
 
     db.commit()
+    context_cache.invalidate(current_user.id)
 
     return {"message": "Diet plan activated", "plan_id": plan_id}
 
@@ -247,6 +251,7 @@ async def deactivate_diet_plan(
     # Clear pointer on user
     current_user.active_diet_plan_id = None
     db.commit()
+    context_cache.invalidate(current_user.id)
 
     return {"message": "Diet plan deactivated"}
 
@@ -293,6 +298,7 @@ async def delete_diet_plan(
 
     db.delete(plan)
     db.commit()
+    context_cache.invalidate(current_user.id)
 
     return {"message": "Diet plan deleted", "plan_id": plan_id}
 
@@ -452,6 +458,7 @@ async def log_meal(
     db.add(log)
     db.commit()
     db.refresh(log)
+    context_cache.invalidate(current_user.id)
 
     # ── Update FoodPreference for each food eaten ─────────────────────────────
     for food_item in data.foods_eaten:
@@ -622,43 +629,29 @@ async def search_foods(
     current_user = Depends(get_current_user)
 ):
     """
-    Search foods database.
-    Prioritizes: user's custom foods > frequently used > USDA food_items.
+    Search foods database (in-memory index, see services/food_search.py).
+    Ranking blends match quality with: user's custom foods, frequently
+    used, Indian foods. Tolerates typos.
     """
-    search_term = f"%{q.lower()}%"
-    half = max(limit // 2, 10)
-
-    # ── 1. Search old Food table (user-custom + previously logged) ────────────
-    legacy_foods = db.query(Food).filter(
-        or_(
-            Food.name.ilike(search_term),
-            Food.brand.ilike(search_term)
-        )
-    ).order_by(
-        (Food.user_id == current_user.id).desc(),
-        Food.times_used.desc(),
-        Food.is_verified.desc()
-    ).limit(half).all()
+    hits = food_search.search(db, q, limit=limit, user_id=current_user.id)
 
-    results = list(legacy_foods)
-
-    # ── 2. Fill remaining slots from FoodItem (USDA + seeded) ────────────────
-    remaining = limit - len(results)
-    if remaining > 0:
-        fi_rows = db.query(FoodItem).filter(
-            or_(
-                FoodItem.name.ilike(search_term),
-                FoodItem.category.ilike(search_term)
-            ),
+    food_ids = [h.id for h in hits if h.kind == FOOD_KIND]
+    item_ids = [h.id for h in hits if h.kind == ITEM_KIND]
+    foods = {f.id: f for f in db.query(Food).filter(Food.id.in_(food_ids))} if food_ids else {}
+    items = {
+        i.id: i for i in db.query(FoodItem).filter(
+            FoodItem.id.in_(item_ids),
             FoodItem.is_active == True  # noqa: E712
-        ).order_by(
-            FoodItem.is_indian.desc(),   # surface Indian foods first
-            FoodItem.name.asc()
-        ).limit(remaining).all()
+        )
+    } if item_ids else {}
 
-        # Convert to dict so Pydantic can coerce without needing from_attributes
-        for item in fi_rows:
-            results.append(_food_item_to_response(item))
+    results = []
+    for hit in hits:
+        if hit.kind == FOOD_KIND and hit.id in foods:
+            results.append(foods[hit.id])
+        elif hit.kind == ITEM_KIND and hit.id in items:
+            # Convert to dict so Pydantic can coerce without needing from_attributes
+            results.append(_food_item_to_response(items[hit.id]))
 
     return results
 
@@ -693,12 +686,14 @@ async def create_custom_food(
         common_serving_grams=common_serving_grams,
         source=FoodSource.USER_CUSTOM,
         user_id=current_user.id,
-        is_verified=False
+        is_verified=False,
+        created_at=datetime.utcnow(),
     )
 
     db.add(food)
     db.commit()
     db.refresh(food)
+    food_search.add_food(food)
 
     return food
 
@@ -841,6 +836,7 @@ async def increment_food_usage(
     if food:
         food.times_used += 1
         db.commit()
+        food_search.note_use(food.id)
 
     return {"message": "Usage incremented"}
 
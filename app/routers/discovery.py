@@ -8,27 +8,35 @@ GET  /discovery/featured      — trending gyms (most visited this week)
 
 Flow:
   1. Client sends lat/lng + filters
-  2. Backend checks DB cache (< 24h, >= 5 gyms near this area)
-  3. If stale/empty → calls Google Places Nearby Search → upserts gyms
+  2. Backend checks the area's geohash cell (synced < 24h ago?) — area_sync.py
+  3. If stale/empty → one Places Nearby Search per cell (shared by concurrent
+     requests) → bulk upsert; with PLACES_SYNC_BACKGROUND=1 this runs in the
+     background and the request answers from the DB straight away
   4. Queries DB and returns typed response
 
+Radius queries (feed, chains, featured, area freshness) go through the
+geohash index (geo_index.py): candidates come from a few indexed cell
+ranges, geo_index.rank() computes distances, the radius cut and the sort
+order for all of them at once in NumPy, and only the final page is loaded
+as full rows and built into response objects.
+
 Photo proxy:
   Client requests /discovery/photo?ref=<photo_reference>&maxwidth=400
-  Backend fetches from Google and streams back the image bytes.
-  This keeps the API key server-side.
+  Backend fetches from Google once per (ref, maxwidth) into the on-disk
+  photo cache (photo_cache.py) and streams the file back with an ETag;
+  If-None-Match revalidations get a 304. This keeps the API key server-side.
 """
 
 import logging
-import math
 import os
 from datetime import datetime, timezone
 from typing import List, Optional
 
 import httpx
-from fastapi import APIRouter, Depends, Query, HTTPException
-from fastapi.responses import Response, StreamingResponse
+from fastapi import APIRouter, Depends, Header, Query, HTTPException
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, or_
 
 from app.db.database import get_db
 from app.models.gym import Gym
@@ -36,13 +44,13 @@ from app.models.gym_amenities import GymAmenities
 from app.models.visit import Visit
 from app.schemas.discovery import DiscoveryGymOut, FeaturedGymOut, GymDetailOut
 from app.services.places import (
-    search_nearby_gyms,
     get_place_details,
     upsert_gym_from_place,
-    area_needs_sync,
     PLACES_API_KEY,
-    PLACE_PHOTO_URL,
 )
+from app.services.area_sync import area_sync
+from app.services.photo_cache import photo_cache
+from app.services.geo_index import covering_cells, haversine_km, rank, within_cells, within_radius
 from app.deps import get_current_user
 
 logger = logging.getLogger(__name__)
@@ -53,31 +61,26 @@ router = APIRouter(prefix="/discovery", tags=["Discovery"])
 DEFAULT_LAT = 13.0827
 DEFAULT_LNG = 80.2707
 
+# "Trending near you" catchment for /discovery/featured
+FEATURED_RADIUS_KM = 25.0
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Helpers
 # ─────────────────────────────────────────────────────────────────────────────
 
-def _haversine(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
-    """Distance between two coordinates in km (Haversine formula)."""
-    if not all([lat1, lng1, lat2, lng2]):
-        return None
-    R = 6371.0
-    d_lat = math.radians(lat2 - lat1)
-    d_lng = math.radians(lng2 - lng1)
-    a = (math.sin(d_lat / 2) ** 2
-         + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2))
-         * math.sin(d_lng / 2) ** 2)
-    return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-
 def _build_gym_out(gym: Gym, amenities: Optional[GymAmenities],
                    visit_count: int, user_lat: Optional[float],
-                   user_lng: Optional[float]) -> DiscoveryGymOut:
-    """Assemble a DiscoveryGymOut from ORM rows."""
-    distance_km = None
-    if user_lat and user_lng and gym.lat and gym.lng:
-        distance_km = round(_haversine(user_lat, user_lng, gym.lat, gym.lng), 2)
+                   user_lng: Optional[float],
+                   distance_km: Optional[float] = None) -> DiscoveryGymOut:
+    """
+    Assemble a DiscoveryGymOut from ORM rows. Feeds pass the distance
+    already computed by geo_index.rank(); single lookups compute it here.
+    """
+    if distance_km is None and user_lat and user_lng and gym.lat and gym.lng:
+        distance_km = haversine_km(user_lat, user_lng, gym.lat, gym.lng)
+    if distance_km is not None:
+        distance_km = round(distance_km, 2)
 
     # Build tag list for frontend filter chips
     tags = []
@@ -125,20 +128,16 @@ def _build_gym_out(gym: Gym, amenities: Optional[GymAmenities],
     )
 
 
-async def _sync_area_if_needed(db: Session, lat: float, lng: float,
-                                radius_m: int = 3000) -> None:
-    """If the area cache is stale, fetch from Places and upsert into DB."""
-    if not area_needs_sync(db, lat, lng):
-        return
-
-    logger.info(f"[Discovery] Syncing area ({lat:.4f},{lng:.4f}) from Places API")
-    places = await search_nearby_gyms(lat, lng, radius_m)
-
-    for place in places:
-        try:
-            upsert_gym_from_place(db, place, details=None)
-        except Exception as e:
-            logger.warning(f"[Discovery] Upsert failed for {place.get('place_id')}: {e}")
+def _visit_counts(db: Session, gym_ids: List[int]) -> dict:
+    """gym_id → total visits, for just these gyms."""
+    if not gym_ids:
+        return {}
+    return dict(
+        db.query(Visit.gym_id, func.count(Visit.id))
+        .filter(Visit.gym_id.in_(gym_ids))
+        .group_by(Visit.gym_id)
+        .all()
+    )
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -171,15 +170,13 @@ async def discover_gyms(
     lng = user_lng or DEFAULT_LNG
 
     # 1. Populate cache from Places if needed
-    await _sync_area_if_needed(db, lat, lng, radius_m=int(radius_km * 1000))
+    await area_sync.ensure(lat, lng, radius_m=int(radius_km * 1000))
 
-    # 2. Query DB with amenity filters
+    # 2. Candidates: geohash cells around the user + amenity filters, light columns only
     query = (
-        db.query(Gym, GymAmenities, func.count(Visit.id).label("visit_count"))
+        db.query(Gym.id, Gym.lat, Gym.lng, Gym.sponsored_rank, Gym.created_at)
         .outerjoin(GymAmenities, GymAmenities.gym_id == Gym.id)
-        .outerjoin(Visit, Visit.gym_id == Gym.id)
-        .filter(Gym.lat.isnot(None), Gym.lng.isnot(None))
-        .group_by(Gym.id, GymAmenities.id)
+        .filter(within_cells(Gym.geohash, covering_cells(lat, lng, radius_km)))
     )
 
     if is_24_7 is not None:
@@ -196,37 +193,42 @@ async def discover_gyms(
         query = query.filter(Gym.category == category)
     if sponsored_only:
         query = query.filter(Gym.is_sponsored == True)
-
+    if open_now is not None:
+        # Unknown hours stay in, as before
+        cached_open = Gym.opening_hours_json["open_now"].as_boolean()
+        query = query.filter(or_(cached_open.is_(None), cached_open == open_now))
+
+    # 3. Distances, radius mask, ordering and top-N for the whole candidate set in one pass
+    candidates = query.all()
+    visits = _visit_counts(db, [row.id for row in candidates]) if sort_by == "popular" else None
     if sort_by == "sponsored":
-        query = query.order_by(Gym.sponsored_rank.asc())
+        keys = [[row.sponsored_rank if row.sponsored_rank is not None else 9999 for row in candidates]]
     elif sort_by == "newest":
-        query = query.order_by(Gym.created_at.desc())
+        keys = [[-row.created_at.timestamp() if row.created_at else 0.0 for row in candidates]]
     elif sort_by == "popular":
-        query = query.order_by(func.count(Visit.id).desc())
-    # distance sorting handled in Python below
-
-    results = query.limit(limit * 3).all()  # over-fetch for distance trim
-
-    # 3. Build response, apply radius + open_now filter, sort by distance
-    gym_list = []
-    for gym, amenities, visit_count in results:
-        dist = _haversine(lat, lng, gym.lat, gym.lng)
-        if dist is not None and dist > radius_km:
-            continue
-
-        # open_now filter
-        if open_now is not None and gym.opening_hours_json:
-            cached_open = gym.opening_hours_json.get("open_now")
-            if cached_open is not None and cached_open != open_now:
-                continue
-
-        gym_out = _build_gym_out(gym, amenities, visit_count, lat, lng)
-        gym_list.append(gym_out)
-
-    if sort_by == "distance":
-        gym_list.sort(key=lambda g: g.distance_km if g.distance_km is not None else 9999)
-
-    return gym_list[:limit]
+        keys = [[-visits.get(row.id, 0) for row in candidates]]
+    else:
+        keys = []   # distance
+    hits = rank(candidates, lat, lng, radius_km, limit=limit, keys=keys)
+
+    # 4. Materialise + build response objects for just the page
+    ids = [row.id for _, row in hits]
+    if visits is None:
+        visits = _visit_counts(db, ids)
+    rows = {
+        gym.id: (gym, amenities)
+        for gym, amenities in (
+            db.query(Gym, GymAmenities)
+            .outerjoin(GymAmenities, GymAmenities.gym_id == Gym.id)
+            .filter(Gym.id.in_(ids))
+            .all()
+        )
+    }
+    return [
+        _build_gym_out(*rows[row.id], visits.get(row.id, 0), lat, lng, distance_km=dist)
+        for dist, row in hits
+        if row.id in rows
+    ]
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -279,33 +281,33 @@ async def get_gym_detail(
 async def get_gym_photo(
     ref:      str = Query(..., description="Google Places photo_reference"),
     maxwidth: int = Query(800, ge=100, le=1600),
+    if_none_match: Optional[str] = Header(None),
     current_user = Depends(get_current_user),
 ):
     """
     Proxies a Google Places photo so the API key stays server-side.
     Frontend calls: /discovery/photo?ref=<photo_reference>&maxwidth=400
+    Served from the on-disk photo cache; honours If-None-Match.
     """
     if not PLACES_API_KEY:
         raise HTTPException(status_code=503, detail="Places API key not configured")
 
-    url = f"{PLACE_PHOTO_URL}?photoreference={ref}&maxwidth={maxwidth}&key={PLACES_API_KEY}"
-
     try:
-        async with httpx.AsyncClient(timeout=10, follow_redirects=True) as client:
-            resp = await client.get(url)
-            resp.raise_for_status()
-
-        content_type = resp.headers.get("content-type", "image/jpeg")
-        return Response(
-            content=resp.content,
-            media_type=content_type,
-            headers={"Cache-Control": "public, max-age=86400"},  # cache 24h in browser
-        )
-
+        photo = await photo_cache.get(ref, maxwidth)
     except httpx.HTTPError as e:
         logger.error(f"[Photo proxy] HTTP error: {e}")
         raise HTTPException(status_code=502, detail="Failed to fetch photo")
 
+    etag = f'"{photo.etag}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=86400"}  # cache 24h in browser
+    if if_none_match and (
+        if_none_match.strip() == "*"
+        or etag in (t.strip().removeprefix("W/") for t in if_none_match.split(","))
+    ):
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(photo.path, media_type=photo.content_type, headers=headers)
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # GET /discovery/chains — chain brands near user
@@ -326,19 +328,17 @@ async def nearby_chains(
     lat = user_lat or DEFAULT_LAT
     lng = user_lng or DEFAULT_LNG
 
-    gyms = db.query(Gym).filter(
+    candidates = db.query(
+        Gym.id, Gym.name, Gym.address, Gym.lat, Gym.lng,
+        Gym.chain_name, Gym.rating, Gym.category,
+    ).filter(
         Gym.chain_name.isnot(None),
-        Gym.lat.isnot(None),
-        Gym.lng.isnot(None),
+        within_cells(Gym.geohash, covering_cells(lat, lng, radius_km)),
     ).all()
 
-    # Group by chain, filter by radius
+    # Group by chain — within_radius yields nearest first
     chains: dict[str, dict] = {}
-    for gym in gyms:
-        dist = _haversine(lat, lng, gym.lat, gym.lng)
-        if dist is None or dist > radius_km:
-            continue
-
+    for dist, gym in within_radius(candidates, lat, lng, radius_km):
         chain = gym.chain_name
         if chain not in chains:
             chains[chain] = {
@@ -380,31 +380,55 @@ async def nearby_chains(
 
 @router.get("/featured", response_model=List[FeaturedGymOut])
 async def featured_gyms(
-    user_lat: Optional[float] = Query(None),
-    user_lng: Optional[float] = Query(None),
-    limit:    int             = Query(10),
-    db:       Session         = Depends(get_db),
-    current_user              = Depends(get_current_user),
+    user_lat:  Optional[float] = Query(None),
+    user_lng:  Optional[float] = Query(None),
+    radius_km: float           = Query(FEATURED_RADIUS_KM),
+    limit:     int             = Query(10),
+    db:        Session         = Depends(get_db),
+    current_user               = Depends(get_current_user),
 ):
-    """Trending gyms based on visit count in the past 7 days."""
+    """
+    Trending gyms based on visit count in the past 7 days, within radius_km
+    of the user. Falls back to trending everywhere when nothing nearby was
+    visited this week.
+    """
     from datetime import timedelta
     since = datetime.now(timezone.utc) - timedelta(days=7)
 
-    query = (
-        db.query(Gym, GymAmenities, func.count(Visit.id).label("visit_count"))
+    lat = user_lat or DEFAULT_LAT
+    lng = user_lng or DEFAULT_LNG
+
+    def _trending(*filters):
+        return (
+            db.query(Gym, GymAmenities, func.count(Visit.id).label("visit_count"))
+            .join(Visit, Visit.gym_id == Gym.id)
+            .outerjoin(GymAmenities, GymAmenities.gym_id == Gym.id)
+            .filter(Visit.created_at >= since, *filters)
+            .group_by(Gym.id, GymAmenities.id)
+            .order_by(func.count(Visit.id).desc())
+        )
+
+    # Visit counts for nearby gyms only (index seek on geohash), exact radius, top-k
+    nearby = (
+        db.query(Gym.id, Gym.lat, Gym.lng, func.count(Visit.id).label("visit_count"))
         .join(Visit, Visit.gym_id == Gym.id)
-        .outerjoin(GymAmenities, GymAmenities.gym_id == Gym.id)
-        .filter(Visit.created_at >= since)
-        .group_by(Gym.id, GymAmenities.id)
-        .order_by(func.count(Visit.id).desc())
-        .limit(limit)
+        .filter(
+            Visit.created_at >= since,
+            within_cells(Gym.geohash, covering_cells(lat, lng, radius_km)),
+        )
+        .group_by(Gym.id)
+        .all()
     )
+    top = [row for _, row in rank(nearby, lat, lng, radius_km, limit=limit, keys=[[-r.visit_count for r in nearby]])]
 
-    lat = user_lat or DEFAULT_LAT
-    lng = user_lng or DEFAULT_LNG
+    if top:
+        ids = [r.id for r in top]
+        rows = sorted(_trending(Gym.id.in_(ids)).all(), key=lambda r: ids.index(r[0].id))
+    else:
+        rows = _trending().limit(limit).all()
 
     featured_list = []
-    for gym, amenities, visit_count in query.all():
+    for gym, amenities, visit_count in rows:
         gym_out = _build_gym_out(gym, amenities, visit_count, lat, lng)
         dist = gym_out.distance_km
 
@@ -1,15 +1,10 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
 from typing import Optional
-import asyncio
 import json
-import os
 import logging
-from datetime import date
 from pathlib import Path
 
-import httpx
 from dotenv import load_dotenv
 
 # Ensure .env is loaded regardless of import order or working directory
@@ -18,41 +13,12 @@ load_dotenv(dotenv_path=Path(__file__).resolve().parents[2] / ".env", override=F
 from app.core.deps import get_current_user
 from app.db.database import get_db
 from app.models.exercise import Exercise
+from app.services.exercise_facets import RESPONSE_KEYS, facet_counts, filter_exercises
+from app.services.text_search import EXERCISES_FTS
+from app.services.youtube_videos import youtube_resolver
 
 logger = logging.getLogger(__name__)
 
-# Read lazily via helper so restarts / env changes are picked up
-def _yt_api_key() -> str:
-    return os.getenv("YOUTUBE_API_KEY", "")
-
-# ── YouTube rate limiter ───────────────────────────────────────────────────────
-# Free quota: 10,000 units/day.  Each search costs 100 units.
-# We cap at 85 searches/day (8,500 units) — leaves buffer for spikes / manual queries.
-_YT_MAX_SEARCHES_PER_DAY = int(os.getenv("YT_DAILY_SEARCH_LIMIT", "85"))
-_yt_semaphore   = asyncio.Semaphore(3)   # max 3 concurrent YouTube API calls
-_yt_quota_lock  = asyncio.Lock()
-_yt_quota_date: Optional[date] = None
-_yt_quota_used  = 0                      # searches consumed today
-
-
-async def _yt_quota_ok() -> bool:
-    """Return True if we still have quota remaining today."""
-    global _yt_quota_date, _yt_quota_used
-    today = date.today()
-    async with _yt_quota_lock:
-        if _yt_quota_date != today:
-            _yt_quota_date = today
-            _yt_quota_used = 0
-        return _yt_quota_used < _YT_MAX_SEARCHES_PER_DAY
-
-
-async def _yt_consume_quota():
-    """Increment the daily search counter (call after a successful API request)."""
-    global _yt_quota_used
-    async with _yt_quota_lock:
-        _yt_quota_used += 1
-        logger.debug(f"[YouTube] quota used today: {_yt_quota_used}/{_YT_MAX_SEARCHES_PER_DAY}")
-
 # ── "Not in library" suggestion map ──────────────────────────────────────────
 # When a search returns 0 results, the frontend uses this to show a YouTube
 # search suggestion.  Keys are lowercase search terms the DB doesn't contain;
@@ -118,31 +84,23 @@ def list_exercises(
     _:          any = Depends(get_current_user),
 ):
     q = db.query(Exercise).filter(Exercise.is_active == True)
+    ranked = None
 
     if search:
-        # Split into words (ignore single-char tokens) and require ALL to appear
-        # in the name regardless of order.  This makes "incline barbell press"
-        # match "Barbell Incline Bench Press - Medium Grip" correctly.
-        words = [w for w in search.strip().split() if len(w) > 1]
-        if len(words) > 1:
-            q = q.filter(and_(*[Exercise.name.ilike(f"%{w}%") for w in words]))
-        else:
-            q = q.filter(Exercise.name.ilike(f"%{search}%"))
-    if muscle:
-        q = q.filter(
-            or_(
-                Exercise.primary_muscles.ilike(f"%{muscle}%"),
-                Exercise.secondary_muscles.ilike(f"%{muscle}%"),
-            )
-        )
-    if equipment:
-        q = q.filter(Exercise.equipment.ilike(f"%{equipment}%"))
-    if difficulty:
-        q = q.filter(Exercise.difficulty.ilike(f"%{difficulty}%"))
-    if category:
-        q = q.filter(Exercise.category.ilike(f"%{category}%"))
-
-    exercises = q.order_by(Exercise.name.asc()).offset(offset).limit(limit).all()
+        # Full-text match: every word (single chars ignored) as a prefix, any
+        # order, so "incline barbell press" finds "Barbell Incline Bench Press
+        # - Medium Grip". BM25-ranked, name hits above muscle / equipment.
+        ranked = EXERCISES_FTS.ranked(db.get_bind().dialect.name, search)
+        if ranked is not None:
+            q = q.join(ranked, ranked.c.id == Exercise.id)
+    # Facet filters (muscle = primary or secondary) — indexed lookups on
+    # exercise_facets, not ilike over the JSON columns
+    q = filter_exercises(q, {
+        "muscle": muscle, "equipment": equipment, "difficulty": difficulty, "category": category,
+    })
+
+    order = [ranked.c.rank, Exercise.name.asc()] if ranked is not None else [Exercise.name.asc()]
+    exercises = q.order_by(*order).offset(offset).limit(limit).all()
     return [serialize(e) for e in exercises]
 
 
@@ -165,29 +123,27 @@ def get_exercise(
 
 @router.get("/meta/filters", response_model=dict)
 def get_filter_options(
-    db: Session = Depends(get_db),
-    _:  any = Depends(get_current_user),
+    muscle:     Optional[str] = Query(None),
+    equipment:  Optional[str] = Query(None),
+    difficulty: Optional[str] = Query(None),
+    category:   Optional[str] = Query(None),
+    db:         Session = Depends(get_db),
+    _:          any = Depends(get_current_user),
 ):
-    """Return all unique filter values for the UI filter chips."""
-    exercises = db.query(Exercise).filter(Exercise.is_active == True).all()
-
-    muscles    = set()
-    equipments = set()
-    categories = set()
-    levels     = set()
-
-    for e in exercises:
-        if e.equipment:  equipments.add(e.equipment)
-        if e.category:   categories.add(e.category)
-        if e.difficulty: levels.add(e.difficulty)
-        for m in (json.loads(e.primary_muscles) if e.primary_muscles else []):
-            muscles.add(m)
-
+    """
+    Return all unique filter values for the UI filter chips, plus a count
+    per chip. With filters selected, each facet is counted under the other
+    selections — the number of exercises that chip would give.
+    """
+    facets = facet_counts(db, {
+        "muscle": muscle, "equipment": equipment, "difficulty": difficulty, "category": category,
+    })
     return {
-        "muscles":    sorted(muscles),
-        "equipment":  sorted(equipments),
-        "categories": sorted(categories),
-        "difficulty": sorted(levels),
+        **{RESPONSE_KEYS[param]: [chip["value"] for chip in chips] for param, chips in facets.items()},
+        "counts": {
+            RESPONSE_KEYS[param]: {chip["value"]: chip["count"] for chip in chips}
+            for param, chips in facets.items()
+        },
     }
 
 
@@ -202,96 +158,25 @@ async def get_exercise_video(
     """
     Return a YouTube video ID for this exercise demonstrating proper form.
 
-    Strategy:
+    Strategy (app/services/youtube_videos.py):
       1. Check DB cache (youtube_video_id column) — return instantly if found.
-      2. Call YouTube Data API v3 search to find the best form tutorial.
-      3. Cache the video ID in the DB so we never call the API for this exercise again.
+      2. Searches that found nothing are not repeated for a week ("cached" null).
+      3. Otherwise join / start the exercise's YouTube search and wait a few
+         seconds; a slower search finishes in the background ("pending") and
+         the next request finds it cached.
       4. If YouTube API key is missing or quota exceeded, return null gracefully.
 
-    Cost: 100 YouTube API units per uncached exercise (free quota: 10,000/day).
-    Once cached, zero API cost forever.
+    Most videos are resolved ahead of time by the prewarm job, most viewed
+    exercises first, so users rarely reach step 3.
     """
     exercise = db.query(Exercise).filter(Exercise.id == exercise_id).first()
     if not exercise:
         raise HTTPException(status_code=404, detail="Exercise not found")
 
-    # ── 1. Return cached video immediately ───────────────────────────────────
     if exercise.youtube_video_id:
         return {"video_id": exercise.youtube_video_id, "cached": True}
 
-    # ── 2. No API key → return null gracefully ───────────────────────────────
-    YOUTUBE_API_KEY = _yt_api_key()
-    if not YOUTUBE_API_KEY:
-        logger.warning("[YouTube] YOUTUBE_API_KEY not set — skipping video fetch")
-        return {"video_id": None, "cached": False}
-
-    # ── 3a. Daily quota guard ─────────────────────────────────────────────────
-    if not await _yt_quota_ok():
-        logger.warning(
-            f"[YouTube] Daily quota limit ({_YT_MAX_SEARCHES_PER_DAY} searches) reached "
-            f"— returning null for '{exercise.name}'"
-        )
-        return {"video_id": None, "cached": False, "quota_exceeded": True}
-
-    # ── 3b. Concurrency guard + API call ─────────────────────────────────────
-    # Semaphore ensures at most 3 concurrent YouTube calls regardless of traffic.
-    query   = f"{exercise.name} proper form technique tutorial"
-    api_url = "https://www.googleapis.com/youtube/v3/search"
-    params  = {
-        "part":              "snippet",
-        "q":                 query,
-        "type":              "video",
-        "maxResults":        5,
-        "videoDuration":     "medium",    # 4–20 min — proper tutorials
-        "relevanceLanguage": "en",
-        "safeSearch":        "strict",
-        "key":               YOUTUBE_API_KEY,
-    }
-
-    try:
-        async with _yt_semaphore:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                resp = await client.get(api_url, params=params)
-                resp.raise_for_status()
-                data = resp.json()
-            await _yt_consume_quota()
-
-        items = data.get("items", [])
-        if not items:
-            logger.info(f"[YouTube] No results for '{exercise.name}'")
-            return {"video_id": None, "cached": False}
-
-        # Pick best result — prefer videos whose title contains the exercise name
-        video_id = None
-        ex_name_lower = exercise.name.lower()
-        for item in items:
-            title = item["snippet"]["title"].lower()
-            if ex_name_lower in title or any(w in title for w in ex_name_lower.split()):
-                video_id = item["id"]["videoId"]
-                break
-        # Fall back to first result if none matched by name
-        if not video_id:
-            video_id = items[0]["id"]["videoId"]
-
-        # ── 4. Cache in DB — permanent, no re-fetch ever ─────────────────────
-        exercise.youtube_video_id = video_id
-        db.commit()
-        logger.info(f"[YouTube] Cached video {video_id} for '{exercise.name}'")
-
-        return {"video_id": video_id, "cached": False}
-
-    except httpx.HTTPStatusError as e:
-        if e.response.status_code == 403:
-            logger.warning("[YouTube] Quota exceeded or API key invalid (HTTP 403)")
-        else:
-            logger.error(f"[YouTube] API error: {e}")
-        return {"video_id": None, "cached": False}
-    except asyncio.TimeoutError:
-        logger.warning(f"[YouTube] Timeout fetching video for '{exercise.name}'")
-        return {"video_id": None, "cached": False}
-    except Exception as e:
-        logger.error(f"[YouTube] Unexpected error: {e}")
-        return {"video_id": None, "cached": False}
+    return await youtube_resolver.lookup(exercise.id, exercise.name)
 
 
 # ── NOT-IN-LIBRARY HINT ────────────────────────────────────────────────────────
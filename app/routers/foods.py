@@ -1,12 +1,12 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
 from typing import Optional
 import json
 
 from app.core.deps import get_current_user
 from app.db.database import get_db
 from app.models.food import FoodItem
+from app.services.food_search import ITEM, food_search
 
 router = APIRouter(prefix="/api/foods", tags=["Foods"])
 
@@ -53,15 +53,18 @@ def search_foods(
     db:        Session = Depends(get_db),
     _:         any = Depends(get_current_user),
 ):
-    q = db.query(FoodItem).filter(FoodItem.is_active == True)
-
     if search:
-        q = q.filter(
-            or_(
-                FoodItem.name.ilike(f"%{search}%"),
-                FoodItem.brand.ilike(f"%{search}%"),
-            )
+        # Ranked, typo-tolerant match from the in-memory index
+        hits = food_search.search(
+            db, search, limit=limit, offset=offset,
+            kinds=(ITEM,), category=category, is_indian=is_indian,
         )
+        ids = [h.id for h in hits]
+        rows = {f.id: f for f in db.query(FoodItem).filter(FoodItem.id.in_(ids), FoodItem.is_active == True)} if ids else {}
+        return [serialize(rows[i]) for i in ids if i in rows]
+
+    q = db.query(FoodItem).filter(FoodItem.is_active == True)
+
     if category:
         q = q.filter(FoodItem.category.ilike(f"%{category}%"))
     if is_indian is not None:
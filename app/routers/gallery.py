@@ -1,7 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from sqlalchemy.orm import Session
 from typing import List
-import os, uuid
 
 from app.db.database import get_db
 from app.models.gym import Gym
@@ -9,13 +8,11 @@ from app.models.gallery import GalleryItem
 from app.schemas.gallery import GalleryItemOut
 from app.deps import get_current_user, require_gym_owner_or_admin
 from app.services.roles import require_roles
+from app.services.uploads import limit_for, save_upload
 
 router = APIRouter(prefix="/gyms", tags=["Gallery"])
 
-# === limits ===
-MAX_VIDEO_SIZE_MB = 50
-MAX_VIDEO_SIZE = MAX_VIDEO_SIZE_MB * 1024 * 1024
-
+# === limits (sizes: MAX_VIDEO_MB / MAX_UPLOAD_MB, enforced while streaming) ===
 ALLOWED_VIDEO_TYPES = [
     "video/mp4",
     "video/mpeg",
@@ -39,42 +36,25 @@ async def upload_gallery_items(
     # require_gym_owner_or_admin already ensured permission
 
     folder_path = f"static/gyms/{gym_id}/gallery"
-    os.makedirs(folder_path, exist_ok=True)
 
     created_items = []
 
     for upload in files:
         mime = upload.content_type or ""
 
-        # read content once
-        content = await upload.read()
-
         # === validation ===
         if mime.startswith("image/"):
             media_type = "image"
         elif mime.startswith("video/"):
             if mime not in ALLOWED_VIDEO_TYPES:
                 raise HTTPException(status_code=400, detail="Only MP4/MPEG/MOV videos allowed")
-
-            if len(content) > MAX_VIDEO_SIZE:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Video too large. Max allowed is {MAX_VIDEO_SIZE_MB}MB."
-                )
-
             media_type = "video"
         else:
             raise HTTPException(status_code=400, detail=f"Unsupported media type: {mime}")
 
-        # === file saving ===
-        ext = upload.filename.split(".")[-1]
-        unique_name = f"{uuid.uuid4().hex}.{ext}"
-        save_path = f"{folder_path}/{unique_name}"
-
-        with open(save_path, "wb") as f:
-            f.write(content)
-
-        file_url = f"/static/gyms/{gym_id}/gallery/{unique_name}"
+        # === file saving — streamed, size-checked, content-addressed ===
+        stored = await save_upload(upload, folder_path, max_bytes=limit_for(mime))
+        file_url = f"/static/gyms/{gym_id}/gallery/{stored.name}"
 
         # === save to DB ===
         item = GalleryItem(
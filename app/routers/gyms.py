@@ -10,6 +10,7 @@ from app.models.gym import Gym
 from app.deps import get_current_user, require_gym_owner_or_admin
 from app.services.roles import require_roles
 from app.models.user import User
+from app.services.uploads import limit_for, save_upload
 
 # DB MODELS (THIS WAS MISSING)
 from app.models.gym_amenities import GymAmenities
@@ -84,13 +85,8 @@ async def upload_cover_image(
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="Only image uploads allowed")
 
-    folder_path = f"static/gyms/{gym_id}"
-    os.makedirs(folder_path, exist_ok=True)
-
-    file_path = f"{folder_path}/cover.jpg"
-
-    with open(file_path, "wb") as buffer:
-        buffer.write(await file.read())
+    # Replaced atomically — the old cover is served until the new one is complete
+    await save_upload(file, f"static/gyms/{gym_id}", name="cover.jpg")
 
     gym.cover_image_url = f"/static/gyms/{gym_id}/cover.jpg"
     db.commit()
@@ -116,7 +112,6 @@ async def upload_gallery_images(
     gym = db.query(Gym).filter(Gym.id == gym_id).first()
 
     gallery_path = f"static/gyms/{gym_id}/gallery"
-    os.makedirs(gallery_path, exist_ok=True)
 
     saved_items = []
 
@@ -132,20 +127,9 @@ async def upload_gallery_images(
                 detail="Only images or videos allowed"
             )
 
-        # Make filename unique
-        filename = file.filename
-        idx = 0
-        base = filename
-
-        # fix path checking bug
-        while os.path.exists(os.path.join(gallery_path, filename)):
-            idx += 1
-            filename = f"{idx}_{base}"
-
-        file_path = os.path.join(gallery_path, filename)
-
-        with open(file_path, "wb") as buffer:
-            buffer.write(await file.read())
+        # Content-addressed name — unique per file, re-uploads reuse it
+        stored = await save_upload(file, gallery_path, max_bytes=limit_for(content_type))
+        filename = stored.name
 
         saved_items.append({
             "gym_id": gym_id,
@@ -4,7 +4,7 @@ Health Records endpoints.
 Supports upload of files (PDF, images) + structured metadata.
 All files are saved to /static/health_records/{user_id}/
 """
-import json, os, shutil
+import json, os
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from fastapi.responses import FileResponse
@@ -14,6 +14,7 @@ from typing import List, Optional
 from app.core.deps import get_current_user
 from app.db.database import get_db
 from app.models.health_record import HealthRecord
+from app.services.uploads import save_upload
 
 router = APIRouter(prefix="/health-records", tags=["Health Records"])
 
@@ -92,15 +93,11 @@ async def create_record(
     saved_paths = []
     if files:
         user_dir = os.path.join(UPLOAD_DIR, str(user.id))
-        os.makedirs(user_dir, exist_ok=True)
         for f in files:
             if not f.filename:
                 continue
-            safe_name = f"{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{f.filename}"
-            dest = os.path.join(user_dir, safe_name)
-            with open(dest, "wb") as out:
-                shutil.copyfileobj(f.file, out)
-            saved_paths.append(f"health_records/{user.id}/{safe_name}")
+            stored = await save_upload(f, user_dir, keep_filename=True)
+            saved_paths.append(f"health_records/{user.id}/{stored.name}")
 
     record = HealthRecord(
         user_id            = user.id,
@@ -1,5 +1,4 @@
 import os
-import shutil
 from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
 from sqlalchemy.orm import Session
 
@@ -8,6 +7,7 @@ from app.deps import get_current_user
 from app.models.user import User
 from app.models.library_item import LibraryItem
 from app.models.health_memory import HealthMemory
+from app.services.uploads import save_upload
 
 router = APIRouter(prefix="/library", tags=["Library"])
 
@@ -15,25 +15,22 @@ BASE_UPLOAD_DIR = "backend/static/library"
 
 
 @router.post("/upload")
-def upload_file(
+async def upload_file(
     file: UploadFile = File(...),
     category: str = Form(...),  # medical, prescription, report, scan
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     # -----------------------------
-    # Create user directory
+    # User directory
     # -----------------------------
     user_dir = os.path.join(BASE_UPLOAD_DIR, f"user_{current_user.id}")
-    os.makedirs(user_dir, exist_ok=True)
-
-    file_path = os.path.join(user_dir, file.filename)
 
     # -----------------------------
-    # Save file
+    # Save file (streamed; hash-prefixed name keeps the original readable)
     # -----------------------------
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    stored = await save_upload(file, user_dir, keep_filename=True)
+    file_path = os.path.join(user_dir, stored.name)
 
     # -----------------------------
     # Store in Library
@@ -116,7 +113,13 @@ def delete_library_item(
     if not item:
         raise HTTPException(status_code=404, detail="File not found")
 
-    if os.path.exists(item.file_path):
+    # Uploads are deduplicated — keep the file while another item points at it
+    shared = (
+        db.query(LibraryItem.id)
+        .filter(LibraryItem.file_path == item.file_path, LibraryItem.id != item.id)
+        .first()
+    )
+    if not shared and os.path.exists(item.file_path):
         os.remove(item.file_path)
 
     db.delete(item)
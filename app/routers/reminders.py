@@ -2,126 +2,32 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone, timedelta
 from typing import Optional
-import json
-import calendar
 
+from app.agent.reminder_dispatcher import reminder_dispatcher
 from app.core.deps import get_current_user
 from app.db.database import get_db
 from app.models.reminder import Reminder
 from app.models.reminder_log import ReminderLog
 from app.schemas.reminder import ReminderCreate, ReminderUpdate
+from app.services.reminder_recurrence import REMINDER_EXPANSION_DAYS, reminder_schedule, spawn_next, upcoming
 from app.services.reminder_followup import trigger_ai_followup
 
 router = APIRouter(prefix="/reminders", tags=["Reminders"])
 
 
 # -------------------------------------------------
-# RECURRENCE ENGINE
+# RECURRENCE — see services/reminder_recurrence.py
 # -------------------------------------------------
-_WEEKDAY_MAP = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
-
-def _next_occurrence(
-    scheduled_at: datetime,
-    recurrence: Optional[str],
-    recurrence_days: Optional[str],
-    recurrence_interval: Optional[int],
-) -> Optional[datetime]:
-    """
-    Calculate the next scheduled_at for a recurring reminder.
-    Returns None if recurrence is 'once' or unrecognised.
-
-    Recurrence types:
-      once       → no next occurrence
-      daily      → same time next day
-      weekly     → same time next week
-      biweekly   → same time in 2 weeks
-      monthly    → same time same-ish day next month (clamped to month-end)
-      specific   → recurrence_days JSON array e.g. ["mon","wed","fri"]
-      custom     → recurrence_interval days later
-    """
-    if not recurrence or recurrence == "once":
-        return None
-
-    # Make timezone-aware (assume UTC if naive)
-    if scheduled_at.tzinfo is None:
-        scheduled_at = scheduled_at.replace(tzinfo=timezone.utc)
-
-    if recurrence == "daily":
-        return scheduled_at + timedelta(days=1)
-
-    elif recurrence == "weekly":
-        return scheduled_at + timedelta(weeks=1)
-
-    elif recurrence == "biweekly":
-        return scheduled_at + timedelta(weeks=2)
-
-    elif recurrence == "monthly":
-        month = scheduled_at.month + 1
-        year = scheduled_at.year
-        if month > 12:
-            month = 1
-            year += 1
-        # Clamp day to the actual max day of the target month
-        max_day = calendar.monthrange(year, month)[1]
-        day = min(scheduled_at.day, max_day)
-        return scheduled_at.replace(year=year, month=month, day=day)
-
-    elif recurrence == "specific" and recurrence_days:
-        try:
-            days = json.loads(recurrence_days)  # e.g. ["mon","wed","fri"]
-            target_weekdays = sorted(
-                [_WEEKDAY_MAP[d.lower()] for d in days if d.lower() in _WEEKDAY_MAP]
-            )
-            if not target_weekdays:
-                return None
-            current_weekday = scheduled_at.weekday()
-            # Find the next weekday strictly after today
-            for wd in target_weekdays:
-                if wd > current_weekday:
-                    return scheduled_at + timedelta(days=(wd - current_weekday))
-            # All target days are earlier in the week — wrap to next week
-            first_wd = target_weekdays[0]
-            days_until = (7 - current_weekday) + first_wd
-            return scheduled_at + timedelta(days=days_until)
-        except Exception:
-            return None
-
-    elif recurrence == "custom" and recurrence_interval:
-        return scheduled_at + timedelta(days=recurrence_interval)
-
-    return None
-
-
 def _spawn_next_reminder(db: Session, reminder: Reminder) -> Optional[int]:
     """
     If the reminder recurs, create the next occurrence in the DB and return its ID.
-    Returns None for one-off reminders.
+    Returns None for one-off reminders. Idempotent — the dispatcher may
+    already have spawned it when this occurrence fired.
     """
-    next_dt = _next_occurrence(
-        reminder.scheduled_at,
-        reminder.recurrence,
-        reminder.recurrence_days,
-        reminder.recurrence_interval,
-    )
-    if next_dt is None:
+    next_reminder = spawn_next(db, reminder)
+    if next_reminder is None:
         return None
-
-    next_reminder = Reminder(
-        user_id             = reminder.user_id,
-        type                = reminder.type,
-        title               = reminder.title,
-        message             = reminder.message,
-        scheduled_at        = next_dt,
-        recurrence          = reminder.recurrence,
-        recurrence_days     = reminder.recurrence_days,
-        recurrence_interval = reminder.recurrence_interval,
-        category_meta       = reminder.category_meta,
-        is_active           = True,
-        consent_required    = reminder.consent_required,
-        missed_processed    = False,
-    )
-    db.add(next_reminder)
-    db.flush()   # get the ID without a full commit
+    reminder_dispatcher.upsert_on_commit(db, next_reminder)
     return next_reminder.id
 
 
@@ -170,6 +76,7 @@ def create_reminder(
     db.add(reminder)
     db.commit()
     db.refresh(reminder)
+    reminder_dispatcher.upsert(reminder)
 
     return {
         "id": reminder.id,
@@ -186,14 +93,35 @@ def create_reminder(
 # Query params:
 #   active_only=true  → only is_active=True rows (default: false = all)
 #   history=true      → only inactive rows (for history tab)
+#   upcoming_days=N   → occurrences in the next N days (≤ 14), recurring
+#                       reminders expanded from the precomputed schedule
 # -------------------------------------------------
 @router.get("/", response_model=list)
 def get_reminders(
     active_only: Optional[bool] = Query(False, description="Return only active reminders"),
     history: Optional[bool] = Query(False, description="Return only inactive (past) reminders"),
+    upcoming_days: Optional[int] = Query(
+        None, ge=1, le=REMINDER_EXPANSION_DAYS, description="Expand upcoming occurrences over N days",
+    ),
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
+    if upcoming_days:
+        now = datetime.now(timezone.utc)
+        return [
+            {
+                "id":            r.id,
+                "type":          r.type,
+                "title":         r.title,
+                "message":       r.message,
+                "scheduled_at":  at.isoformat(),
+                "recurrence":    r.recurrence,
+                "category_meta": r.category_meta,
+                "projected":     projected,   # True → not yet a reminder row
+            }
+            for at, r, projected in upcoming(db, current_user.id, now, now + timedelta(days=upcoming_days))
+        ]
+
     q = db.query(Reminder).filter(Reminder.user_id == current_user.id)
 
     if history:
@@ -328,6 +256,7 @@ def update_reminder(
 
     db.commit()
     db.refresh(reminder)
+    reminder_dispatcher.upsert(reminder)
 
     return {
         "id": reminder.id,
@@ -362,6 +291,8 @@ def delete_reminder(
 
     db.delete(reminder)
     db.commit()
+    reminder_dispatcher.cancel(reminder_id)
+    reminder_schedule.invalidate(reminder_id)
 
     return {"status": "deleted", "reminder_id": reminder_id}
 
@@ -404,6 +335,7 @@ def acknowledge_reminder(
 
     db.commit()
     db.refresh(log)
+    reminder_dispatcher.cancel(reminder.id)
 
     ai_result = trigger_ai_followup(
         db=db,
@@ -460,6 +392,7 @@ def mark_reminder_missed(
 
     db.commit()
     db.refresh(log)
+    reminder_dispatcher.cancel(reminder.id)
 
     ai_result = trigger_ai_followup(
         db=db,
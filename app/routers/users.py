@@ -7,6 +7,7 @@ from app.deps import get_current_user
 from app.models.user import User
 from app.models.user_gym import UserGymLink
 from app.models.gym import Gym
+from app.services.context_cache import context_cache
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -126,6 +127,7 @@ def set_active_workout_program(
     # Update user's active workout program
     current_user.active_workout_program_id = data.workout_id
     db.commit()
+    context_cache.invalidate(current_user.id)
     db.refresh(current_user)
 
     return {
@@ -166,6 +168,7 @@ def set_active_diet_plan(
     # Update user's active diet plan
     current_user.active_diet_plan_id = data.diet_plan_id
     db.commit()
+    context_cache.invalidate(current_user.id)
     db.refresh(current_user)
 
     return {
@@ -191,6 +194,7 @@ def clear_active_workout_program(
     """
     current_user.active_workout_program_id = None
     db.commit()
+    context_cache.invalidate(current_user.id)
     db.refresh(current_user)
 
     return {
@@ -215,6 +219,7 @@ def clear_active_diet_plan(
     """
     current_user.active_diet_plan_id = None
     db.commit()
+    context_cache.invalidate(current_user.id)
     db.refresh(current_user)
 
     return {
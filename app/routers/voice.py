@@ -22,10 +22,10 @@ from typing import Optional
 
 from fastapi import APIRouter, Depends, File, Form, UploadFile, HTTPException
 from fastapi.responses import Response
-from openai import AsyncOpenAI
 from pydantic import BaseModel
 
 from app.deps import get_current_user
+from app.services.openai_clients import get_openai
 
 logger = logging.getLogger(__name__)
 
@@ -94,24 +94,6 @@ TTS_VOICES = [
 ]
 
 
-# ─────────────────────────────────────────────────────────────────────────────
-# Lazy async client
-# ─────────────────────────────────────────────────────────────────────────────
-
-_openai_client: Optional[AsyncOpenAI] = None
-
-
-def _get_client() -> AsyncOpenAI:
-    global _openai_client
-    if _openai_client is None:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise RuntimeError("OPENAI_API_KEY is not set on the server.")
-        _openai_client = AsyncOpenAI(api_key=api_key)
-        logger.info(f"[Voice] OpenAI client ready — STT={STT_MODEL} TTS={TTS_MODEL}")
-    return _openai_client
-
-
 # ─────────────────────────────────────────────────────────────────────────────
 # POST /ai/voice/transcribe — Whisper STT
 # ─────────────────────────────────────────────────────────────────────────────
@@ -152,7 +134,7 @@ async def transcribe_audio(
     content_type = audio.content_type or "audio/webm"
 
     try:
-        client = _get_client()
+        client = get_openai(STT_MODEL)
 
         # Build the file tuple OpenAI's SDK expects: (filename, bytes, content_type)
         audio_file = (filename, audio_bytes, content_type)
@@ -224,7 +206,7 @@ async def speak_text(
     )
 
     try:
-        client = _get_client()
+        client = get_openai(TTS_MODEL)
 
         response = await client.audio.speech.create(
             model=TTS_MODEL,
@@ -22,6 +22,8 @@ from app.models.fitness_tracking import (
     FormQuality, EnergyLevel
 )
 from app.deps import get_current_user
+from app.services.activity_calendar import record_session
+from app.services.context_cache import context_cache
 
 router = APIRouter(prefix="/api/workouts", tags=["Workout Tracking"])
 
@@ -297,6 +299,17 @@ async def get_active_session(
     return session
 
 
+def _record_activity(db: Session, user_id: int, session_status: SessionStatus, at: datetime):
+    """Fold a finished session into the activity calendar + streak (fire-and-forget)."""
+    try:
+        record_session(db, user_id, session_status, at)
+        db.commit()
+    except Exception as _cal_err:
+        db.rollback()
+        import logging
+        logging.getLogger(__name__).warning(f"[workout_endpoints] activity calendar update failed: {_cal_err}")
+
+
 @router.patch("/sessions/{session_id}/complete", response_model=WorkoutSessionResponse)
 async def complete_workout_session(
     session_id: int,
@@ -334,6 +347,8 @@ async def complete_workout_session(
     db.commit()
     db.refresh(session)
 
+    _record_activity(db, current_user.id, SessionStatus.COMPLETED, session.completed_at)
+
     # ── Write health memory (fire-and-forget) ──────────────────────────────
     try:
         import json as _json
@@ -400,6 +415,9 @@ async def abandon_workout_session(
     if not session:
         raise HTTPException(status_code=404, detail="Workout session not found")
 
+    if session.status != SessionStatus.IN_PROGRESS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Session is not in progress")
+
     session.status = SessionStatus.ABANDONED
     session.completed_at = datetime.utcnow()
     session.duration_minutes = int((session.completed_at - session.started_at).total_seconds() / 60)
@@ -407,6 +425,8 @@ async def abandon_workout_session(
 
     db.commit()
 
+    _record_activity(db, current_user.id, SessionStatus.ABANDONED, session.completed_at)
+
     return {"message": "Workout session abandoned", "session_id": session_id}
 
 
@@ -544,6 +564,7 @@ async def activate_workout_program(
 
     current_user.active_workout_program_id = program_id
     db.commit()
+    context_cache.invalidate(current_user.id)
 
     return {
         "message":      "Workout program activated",
@@ -559,6 +580,7 @@ async def deactivate_workout_program(
 ):
     current_user.active_workout_program_id = None
     db.commit()
+    context_cache.invalidate(current_user.id)
     return {"message": "Workout program deactivated"}
 
 
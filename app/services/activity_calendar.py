@@ -0,0 +1,195 @@
+"""
+activity_calendar.py
+====================
+Materialized workout calendar + streak.
+
+ActivityDay holds one row per user per UTC day with completed / abandoned
+session counts; UserStreak holds the running streak. Both are folded forward
+by record_session() from the session complete / abandon endpoints, so
+readers never re-scan workout_sessions:
+
+  • streak_as_of() / live_streak()  — O(1) from the UserStreak row
+  • completed_days()                — calendar rows for a date range (home)
+
+backfill() rebuilds both tables from workout_sessions — run it once after
+deploying (backfill_activity_calendar.py) or whenever they drift.
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.models.fitness_tracking import (
+    ActivityDay, UserStreak, WorkoutSession, SessionStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────────────────────
+# Reads
+# ─────────────────────────────────────────────────────────────
+
+def streak_as_of(streak: Optional[UserStreak], day: date) -> int:
+    """Consecutive completed days ending exactly on `day` (0 when `day` was missed)."""
+    if streak is None or streak.last_active_date is None:
+        return 0
+    if streak.last_active_date == day:
+        return streak.current_streak
+    # Trained the following day too — the run through `day` is one shorter
+    if streak.last_active_date == day + timedelta(days=1):
+        return max(streak.current_streak - 1, 0)
+    return 0
+
+
+def live_streak(streak: Optional[UserStreak], today: date) -> int:
+    """Streak still alive today — counts through today, or through yesterday if today isn't done yet."""
+    return streak_as_of(streak, today) or streak_as_of(streak, today - timedelta(days=1))
+
+
+def get_streak(db: Session, user_id: int) -> Optional[UserStreak]:
+    return db.get(UserStreak, user_id)
+
+
+def completed_days(db: Session, user_id: int, start: date, end: date) -> set:
+    """Days in [start, end] with at least one completed session."""
+    rows = (
+        db.query(ActivityDay.date)
+        .filter(
+            ActivityDay.user_id == user_id,
+            ActivityDay.date >= start,
+            ActivityDay.date <= end,
+            ActivityDay.completed_sessions > 0,
+        )
+        .all()
+    )
+    return {d for (d,) in rows}
+
+
+# ─────────────────────────────────────────────────────────────
+# Incremental writes
+# ─────────────────────────────────────────────────────────────
+
+def record_session(db: Session, user_id: int, status: SessionStatus, at: datetime) -> None:
+    """
+    Fold one finished session into the calendar + streak.
+    Adds to the caller's transaction — the caller commits.
+    """
+    day = at.date()
+    activity = (
+        db.query(ActivityDay)
+        .filter(ActivityDay.user_id == user_id, ActivityDay.date == day)
+        .first()
+    )
+    if activity is None:
+        activity = ActivityDay(user_id=user_id, date=day, completed_sessions=0, abandoned_sessions=0)
+        db.add(activity)
+
+    if status == SessionStatus.ABANDONED:
+        activity.abandoned_sessions += 1
+        return
+    if status != SessionStatus.COMPLETED:
+        return
+    activity.completed_sessions += 1
+
+    streak = db.get(UserStreak, user_id)
+    if streak is None:
+        streak = UserStreak(user_id=user_id, current_streak=0, longest_streak=0)
+        db.add(streak)
+
+    last = streak.last_active_date
+    if last is None or day > last + timedelta(days=1):
+        streak.current_streak = 1
+    elif day == last + timedelta(days=1):
+        streak.current_streak += 1
+    elif day < last:
+        # Back-dated completion — may bridge an old gap, so recount from the calendar
+        db.flush()
+        _recount(db, streak)
+        return
+    streak.last_active_date = max(day, last) if last else day
+    streak.longest_streak = max(streak.longest_streak or 0, streak.current_streak)
+    streak.updated_at = datetime.utcnow()
+
+
+def _runs(days: Iterable[date]) -> tuple:
+    """(current run ending on the latest day, longest run, latest day) for ascending days."""
+    current = longest = 0
+    prev = None
+    for d in days:
+        current = current + 1 if prev is not None and d == prev + timedelta(days=1) else 1
+        longest = max(longest, current)
+        prev = d
+    return current, longest, prev
+
+
+def _recount(db: Session, streak: UserStreak) -> None:
+    days = [
+        d for (d,) in db.query(ActivityDay.date)
+        .filter(ActivityDay.user_id == streak.user_id, ActivityDay.completed_sessions > 0)
+        .order_by(ActivityDay.date)
+    ]
+    streak.current_streak, streak.longest_streak, streak.last_active_date = _runs(days)
+    streak.updated_at = datetime.utcnow()
+
+
+# ─────────────────────────────────────────────────────────────
+# Backfill
+# ─────────────────────────────────────────────────────────────
+
+def backfill(db: Session, user_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Rebuild ActivityDay + UserStreak from workout_sessions with one grouped
+    query. Returns the number of users rebuilt. Commits.
+    """
+    finished_at = func.coalesce(WorkoutSession.completed_at, WorkoutSession.started_at)
+    day = func.date(finished_at)
+    query = (
+        db.query(
+            WorkoutSession.user_id,
+            day,
+            func.sum(case((WorkoutSession.status == SessionStatus.COMPLETED, 1), else_=0)),
+            func.sum(case((WorkoutSession.status == SessionStatus.ABANDONED, 1), else_=0)),
+        )
+        .filter(WorkoutSession.status.in_([SessionStatus.COMPLETED, SessionStatus.ABANDONED]))
+        .group_by(WorkoutSession.user_id, day)
+        .order_by(WorkoutSession.user_id, day)
+    )
+    ids = list(user_ids) if user_ids is not None else None
+    if ids is not None:
+        query = query.filter(WorkoutSession.user_id.in_(ids))
+
+    calendar: dict = {}
+    for uid, d, completed, abandoned in query:
+        # SQLite's date() returns text, Postgres returns a date
+        d = d if isinstance(d, date) else date.fromisoformat(str(d))
+        calendar.setdefault(uid, []).append((d, completed or 0, abandoned or 0))
+
+    targets = ids if ids is not None else list(calendar)
+    day_q = db.query(ActivityDay)
+    streak_q = db.query(UserStreak)
+    if ids is not None:
+        day_q = day_q.filter(ActivityDay.user_id.in_(ids))
+        streak_q = streak_q.filter(UserStreak.user_id.in_(ids))
+    day_q.delete(synchronize_session=False)
+    streak_q.delete(synchronize_session=False)
+
+    now = datetime.utcnow()
+    for uid in targets:
+        days = calendar.get(uid, [])
+        db.add_all(
+            ActivityDay(user_id=uid, date=d, completed_sessions=c, abandoned_sessions=a)
+            for d, c, a in days
+        )
+        current, longest, last = _runs(d for d, c, _ in days if c > 0)
+        db.add(UserStreak(
+            user_id=uid, current_streak=current, longest_streak=longest,
+            last_active_date=last, updated_at=now,
+        ))
+
+    db.commit()
+    logger.info(f"[ActivityCalendar] backfilled {len(targets)} users")
+    return len(targets)
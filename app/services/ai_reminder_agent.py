@@ -9,6 +9,7 @@ def create_proactive_reminders(db: Session, user_id: int):
     AI analyzes user behavior and creates reminders proactively
     """
     now = datetime.utcnow()
+    created = None
     
     # Check workout consistency
     recent_workouts = db.query(WorkoutLog).filter(
@@ -34,6 +35,7 @@ def create_proactive_reminders(db: Session, user_id: int):
                 consent_required=False,  # AI-generated, gentle nudge
             )
             db.add(reminder)
+            created = reminder
             
             # Log to health memory
             memory = HealthMemory(
@@ -43,4 +45,7 @@ def create_proactive_reminders(db: Session, user_id: int):
             )
             db.add(memory)
     
-    db.commit()
\ No newline at end of file
+    db.commit()
+    if created is not None:
+        from app.agent.reminder_dispatcher import reminder_dispatcher
+        reminder_dispatcher.upsert(created)
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""
+area_sync.py
+============
+Google Places area sync for discovery, one geohash cell at a time.
+
+  • Freshness is tracked per cell (places_area_syncs). A cell synced within
+    CACHE_TTL_HOURS for at least the requested radius is not searched again.
+    Areas populated before the table existed stay fresh while they still
+    hold MIN_GYMS_CACHED_FOR_AREA fresh gyms (places.area_needs_sync).
+  • A cell search gets one page (NEARBY_PAGE_SIZE results). When that page
+    was full and the user's own area is still short of fresh gyms — e.g.
+    near the cell edge in a dense city — the finer spot cell around the user
+    (LOCAL_CELL_PRECISION) is searched and tracked the same way.
+  • Concurrent requests for the same cell share one in-flight sync.
+  • A sync writes the whole search page — gyms, amenities and the cell
+    row — in one transaction (places.bulk_upsert_places), off the event
+    loop.
+  • PLACES_SYNC_BACKGROUND=1: the request path never waits on Google.
+    Stale or cold cells are refreshed in the background and the request
+    answers from what the DB already holds.
+
+The search is centred on the cell, with the requested radius widened by
+the cell's half-diagonal, so it covers that radius for any user in the cell.
+
+Counters: stats().
+"""
+
+import asyncio
+import logging
+import math
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.places_area_sync import PlacesAreaSync
+from app.services import places
+from app.services.geo_index import KM_PER_DEG_LAT, cell_size_deg, decode, encode
+
+logger = logging.getLogger(__name__)
+
+AREA_CELL_PRECISION = 5          # ≈ 4.9 km × 4.9 km
+LOCAL_CELL_PRECISION = 6         # ≈ 1.2 km × 0.6 km — top-up around one user
+MAX_SEARCH_RADIUS_M = 50_000     # Nearby Search limit
+SYNC_IN_BACKGROUND = os.getenv("PLACES_SYNC_BACKGROUND", "0") == "1"
+
+
+class AreaSyncService:
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        background: bool = SYNC_IN_BACKGROUND,
+        ttl_hours: float = places.CACHE_TTL_HOURS,
+    ):
+        self._session_factory = session_factory
+        self.background = background
+        self.ttl = timedelta(hours=ttl_hours)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.metrics = {"fresh": 0, "synced": 0, "coalesced": 0, "background": 0, "failed": 0}
+
+    @property
+    def session_factory(self) -> Callable[[], Session]:
+        if self._session_factory is None:
+            from app.db.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory
+
+    @staticmethod
+    def cell_for(lat: float, lng: float) -> str:
+        return encode(lat, lng, AREA_CELL_PRECISION)
+
+    # ──────────────────────────────────────────────────────────
+    # Request path
+    # ──────────────────────────────────────────────────────────
+
+    async def ensure(self, lat: float, lng: float, radius_m: int, wait: Optional[bool] = None) -> bool:
+        """
+        Make sure the cell around (lat, lng) has been synced for radius_m.
+        Waits for the sync unless running in background mode (or wait=False).
+        Returns True when this call waited on a successful sync.
+        """
+        if not places.PLACES_API_KEY:
+            logger.error("[AreaSync] GOOGLE_PLACES_API_KEY not set — cannot fetch gyms.")
+            return False
+
+        cell = self.sync_key(lat, lng, radius_m)
+        if cell is None:
+            self.metrics["fresh"] += 1
+            return False
+
+        task = self._inflight.get(cell)
+        if task is not None:
+            self.metrics["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(self._sync(cell, radius_m))
+            self._inflight[cell] = task
+            task.add_done_callback(lambda _: self._inflight.pop(cell, None))
+
+        should_wait = (not self.background) if wait is None else wait
+        if not should_wait:
+            self.metrics["background"] += 1
+            return False
+        # One caller going away must not cancel the sync the others wait on
+        return await asyncio.shield(task)
+
+    def sync_key(self, lat: float, lng: float, radius_m: int) -> Optional[str]:
+        """
+        The cell to search for a user at (lat, lng), or None when the DB
+        already covers them: their area cell, or — when that cell's single
+        page was full and their own area is still thin — their spot cell.
+        """
+        db = self.session_factory()
+        try:
+            cell = self.cell_for(lat, lng)
+            row = db.get(PlacesAreaSync, cell)
+            if row is None:
+                return cell if places.area_needs_sync(db, lat, lng) else None
+            if not self._row_fresh(row, radius_m):
+                return cell
+            if row.result_count < places.NEARBY_PAGE_SIZE or not places.area_needs_sync(db, lat, lng):
+                return None
+
+            spot = encode(lat, lng, LOCAL_CELL_PRECISION)
+            spot_row = db.get(PlacesAreaSync, spot)
+            return None if spot_row is not None and self._row_fresh(spot_row, radius_m) else spot
+        finally:
+            db.close()
+
+    def _row_fresh(self, row: PlacesAreaSync, radius_m: int) -> bool:
+        synced_at = row.synced_at
+        if synced_at.tzinfo is None:   # SQLite drops the offset
+            synced_at = synced_at.replace(tzinfo=timezone.utc)
+        return row.radius_m >= radius_m and datetime.now(timezone.utc) - synced_at < self.ttl
+
+    async def drain(self) -> None:
+        """Wait for in-flight syncs (tests / shutdown)."""
+        await asyncio.gather(*list(self._inflight.values()), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._inflight), **self.metrics}
+
+    # ──────────────────────────────────────────────────────────
+    # Sync
+    # ──────────────────────────────────────────────────────────
+
+    def search_radius_m(self, cell: str, radius_m: int) -> int:
+        """Requested radius widened by the cell's half-diagonal, for a search from its centre."""
+        lat, _ = decode(cell)
+        h, w = cell_size_deg(len(cell))
+        half_h = h / 2 * KM_PER_DEG_LAT * 1000
+        half_w = w / 2 * KM_PER_DEG_LAT * 1000 * math.cos(math.radians(lat))
+        return min(int(radius_m + math.hypot(half_h, half_w)), MAX_SEARCH_RADIUS_M)
+
+    async def _sync(self, cell: str, radius_m: int) -> bool:
+        lat, lng = decode(cell)
+        try:
+            results = await places.nearby_search(lat, lng, self.search_radius_m(cell, radius_m))
+            await asyncio.to_thread(self._write, cell, radius_m, results)
+            self.metrics["synced"] += 1
+            logger.info(f"[AreaSync] cell {cell}: {len(results)} places")
+            return True
+        except Exception as e:
+            self.metrics["failed"] += 1
+            logger.warning(f"[AreaSync] cell {cell} sync failed: {e}")
+            return False
+
+    def _write(self, cell: str, radius_m: int, results: list) -> None:
+        """Gyms, amenities and the cell's freshness row in one transaction."""
+        db = self.session_factory()
+        try:
+            places.bulk_upsert_places(db, results)
+            row = db.get(PlacesAreaSync, cell)
+            if row is None:
+                row = PlacesAreaSync(cell=cell)
+                db.add(row)
+            row.radius_m = radius_m
+            row.result_count = len(results)
+            row.synced_at = datetime.now(timezone.utc)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+# Global singleton — import this everywhere
+area_sync = AreaSyncService()
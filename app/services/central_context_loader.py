@@ -0,0 +1,272 @@
+"""
+central_context_loader.py
+=========================
+Batched data loader behind ai_central.build_rich_context.
+
+Every HealthMemory category the context needs (narratives, morning brief,
+correlation insight, weekly adaptation, past recommendations, dislikes and
+the raw event tail) comes back from ONE windowed query — latest N rows per
+category via ROW_NUMBER() OVER (PARTITION BY category). The remaining tables
+are read with one query each (weight feeds both "latest weight" and the
+history; all preference rows come back together).
+
+CONTEXT_QUERY_BUDGET is the number of round trips a context build is allowed
+to cost. QueryCounter lets tests assert on it; production logs a warning
+when a build goes over.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import case, event, literal, or_, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, undefer
+
+from app.models.health_memory import CONTEXT_EXCLUDED_CATEGORIES, HealthMemory
+from app.models.health_profile import HealthProfile
+from app.models.user import User
+from app.models.user_ai_preferences import UserAIPreferences
+from app.models.vault_item import VaultItem
+from app.models.fitness_tracking import (
+    WorkoutSession, SessionStatus, MealLog, BodyWeightLog, WaterLog, DietPlan,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────────────────────
+# Windows
+# ─────────────────────────────────────────────────────────────
+
+# Agent-synthesised categories → how many of the newest rows the context reads
+MEMORY_WINDOWS: dict[str, int] = {
+    "daily_narrative":     7,
+    "morning_brief":       1,
+    "correlation_insight": 1,
+    "weekly_adaptation":   1,
+    "ai_recommendation":   3,
+}
+
+# Every dislike is an exclusion, so this bucket is never truncated
+DISLIKED_CATEGORY = "disliked_item"
+
+# Everything else (workout, nutrition, body_metrics, …) shares one bucket;
+# chat usage logs and sent notifications are left out entirely
+RAW_BUCKET = "__raw__"
+RAW_MEMORY_LIMIT = 20
+RAW_EXCLUDE = CONTEXT_EXCLUDED_CATEGORIES
+
+PREFERENCE_TYPES = ("workout", "meal", "profile")
+
+WEIGHT_HISTORY_LIMIT = 14
+WORKOUT_LIMIT = 7
+MEAL_LIMIT = 12
+
+# memories + weights + preferences + sessions + meals + water
+# + health profile + diet plan + program
+CONTEXT_QUERY_BUDGET = 9
+
+
+# ─────────────────────────────────────────────────────────────
+# Query counting
+# ─────────────────────────────────────────────────────────────
+
+class QueryCounter:
+    """
+    Counts statements a session executes while active.
+
+    Listens on the session itself (not the engine), so concurrent requests on
+    other sessions never leak into the count.
+
+        with QueryCounter(db) as qc:
+            rows = await load_context_rows(db, user)
+        assert qc.count <= CONTEXT_QUERY_BUDGET
+    """
+
+    def __init__(self, db):
+        self._session = getattr(db, "sync_session", db)
+        self.count = 0
+
+    def _on_execute(self, orm_execute_state):
+        self.count += 1
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self._session, "do_orm_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self._session, "do_orm_execute", self._on_execute)
+        return False
+
+
+# ─────────────────────────────────────────────────────────────
+# Result bundle
+# ─────────────────────────────────────────────────────────────
+
+@dataclass
+class ContextRows:
+    # category (or RAW_BUCKET) → rows, newest first
+    memories: dict[str, list] = field(default_factory=dict)
+    # preference_type → stored data dict
+    preferences: dict[str, dict] = field(default_factory=dict)
+    weights: list = field(default_factory=list)          # newest first
+    sessions: list = field(default_factory=list)         # newest first
+    meals: list = field(default_factory=list)            # newest first
+    water: Optional[WaterLog] = None
+    health_profile: Optional[HealthProfile] = None
+    diet_plan: Optional[DietPlan] = None
+    program: Optional[VaultItem] = None
+    queries: int = 0
+
+    def latest(self, category: str) -> Any:
+        rows = self.memories.get(category) or []
+        return rows[0] if rows else None
+
+
+# ─────────────────────────────────────────────────────────────
+# Loader
+# ─────────────────────────────────────────────────────────────
+
+def _windowed_memories_stmt(user_id: int):
+    """Latest N HealthMemory rows per category for one user, in a single SELECT."""
+    named = list(MEMORY_WINDOWS) + [DISLIKED_CATEGORY]
+    bucket = case(
+        (HealthMemory.category.in_(named), HealthMemory.category),
+        else_=literal(RAW_BUCKET),
+    ).label("bucket")
+    rn = func.row_number().over(
+        partition_by=bucket,
+        order_by=(HealthMemory.created_at.desc(), HealthMemory.id.desc()),
+    ).label("rn")
+
+    ranked = (
+        select(HealthMemory, bucket, rn)
+        .where(
+            HealthMemory.user_id == user_id,
+            HealthMemory.category.notin_(RAW_EXCLUDE),
+        )
+        .subquery()
+    )
+    window = case(MEMORY_WINDOWS, value=ranked.c.bucket, else_=RAW_MEMORY_LIMIT)
+    hm = aliased(HealthMemory, ranked)
+
+    return (
+        select(hm, ranked.c.bucket)
+        .where(or_(ranked.c.bucket == DISLIKED_CATEGORY, ranked.c.rn <= window))
+        .order_by(ranked.c.bucket, ranked.c.rn)
+    )
+
+
+async def load_context_rows(db: AsyncSession, user: User) -> ContextRows:
+    """
+    Fetch everything build_rich_context needs in at most CONTEXT_QUERY_BUDGET
+    round trips. Each fetch degrades independently — a failing table leaves
+    its field empty rather than breaking the whole context.
+    """
+    now = datetime.now(timezone.utc)
+    rows = ContextRows()
+
+    with QueryCounter(db) as qc:
+        try:
+            result = await db.execute(_windowed_memories_stmt(user.id))
+            for memory, bucket in result.all():
+                rows.memories.setdefault(bucket, []).append(memory)
+        except Exception as e:
+            logger.debug(f"[ContextLoader] memories: {e}")
+
+        try:
+            result = await db.execute(
+                select(UserAIPreferences.preference_type, UserAIPreferences.data).where(
+                    UserAIPreferences.user_id == user.id,
+                    UserAIPreferences.preference_type.in_(PREFERENCE_TYPES),
+                )
+            )
+            rows.preferences = {ptype: data for ptype, data in result.all()}
+        except Exception as e:
+            logger.debug(f"[ContextLoader] preferences: {e}")
+
+        try:
+            rows.weights = (await db.execute(
+                select(BodyWeightLog)
+                .where(BodyWeightLog.user_id == user.id)
+                .order_by(BodyWeightLog.logged_at.desc()).limit(WEIGHT_HISTORY_LIMIT)
+            )).scalars().all()
+        except Exception as e:
+            logger.debug(f"[ContextLoader] weights: {e}")
+
+        try:
+            rows.sessions = (await db.execute(
+                select(WorkoutSession)
+                .where(
+                    WorkoutSession.user_id == user.id,
+                    WorkoutSession.status == SessionStatus.COMPLETED,
+                    WorkoutSession.completed_at >= now - timedelta(days=7),
+                )
+                .options(
+                    undefer(WorkoutSession.completed_at),
+                    undefer(WorkoutSession.duration_minutes),
+                    undefer(WorkoutSession.day_number),
+                )
+                .order_by(WorkoutSession.completed_at.desc()).limit(WORKOUT_LIMIT)
+            )).scalars().all()
+        except Exception as e:
+            logger.debug(f"[ContextLoader] sessions: {e}")
+
+        try:
+            rows.meals = (await db.execute(
+                select(MealLog)
+                .where(MealLog.user_id == user.id, MealLog.logged_at >= now - timedelta(days=3))
+                .order_by(MealLog.logged_at.desc()).limit(MEAL_LIMIT)
+            )).scalars().all()
+        except Exception as e:
+            logger.debug(f"[ContextLoader] meals: {e}")
+
+        try:
+            rows.water = (await db.execute(
+                select(WaterLog).where(WaterLog.user_id == user.id, WaterLog.date == now.date())
+            )).scalars().first()
+        except Exception as e:
+            logger.debug(f"[ContextLoader] water: {e}")
+
+        try:
+            rows.health_profile = (await db.execute(
+                select(HealthProfile).where(HealthProfile.user_id == user.id)
+            )).scalars().first()
+        except Exception as e:
+            logger.debug(f"[ContextLoader] health_profile: {e}")
+
+        try:
+            if getattr(user, "active_diet_plan_id", None):
+                rows.diet_plan = (await db.execute(
+                    select(DietPlan)
+                    .where(DietPlan.id == user.active_diet_plan_id)
+                    .options(
+                        undefer(DietPlan.target_calories), undefer(DietPlan.target_protein),
+                        undefer(DietPlan.target_carbs), undefer(DietPlan.target_fats),
+                    )
+                )).scalars().first()
+        except Exception as e:
+            logger.debug(f"[ContextLoader] diet_plan: {e}")
+
+        try:
+            if getattr(user, "active_workout_program_id", None):
+                rows.program = (await db.execute(
+                    select(VaultItem).where(
+                        VaultItem.id == user.active_workout_program_id,
+                        VaultItem.user_id == user.id,
+                    )
+                )).scalars().first()
+        except Exception as e:
+            logger.debug(f"[ContextLoader] program: {e}")
+
+    rows.queries = qc.count
+    if qc.count > CONTEXT_QUERY_BUDGET:
+        logger.warning(
+            f"[ContextLoader] user {user.id}: {qc.count} queries "
+            f"(budget {CONTEXT_QUERY_BUDGET})"
+        )
+    return rows
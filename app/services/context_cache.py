@@ -0,0 +1,97 @@
+"""
+context_cache.py
+================
+Per-user cache for the AI Central context.
+
+Holds the (context dict, prompt text) pair produced by build_rich_context +
+format_context_for_prompt, so the turns of a multi-turn chat reuse one build.
+
+Entries expire after CENTRAL_CONTEXT_TTL seconds and are dropped eagerly by
+the writers that change what the context shows:
+  • any committed HealthMemory insert / update / delete — mapper events in
+    app/models/health_memory.py (routers, memory_writer, nightly agent jobs).
+    The per-turn ai_insight usage log is not part of the context and does
+    not invalidate it.
+  • meal, weight and water log endpoints
+  • save_preferences / clear_preferences
+  • workout program + diet plan activation / deactivation
+
+The cache lives in each worker process. Invalidation is local too: a write
+handled by one uvicorn worker does not reach the others, which keep serving
+their copy until the TTL expires.
+
+Hit / miss / invalidation counters are served by GET /ai/central/context-cache.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class ContextCache:
+    """Thread-safe TTL + LRU map of user_id → (ctx, ctx_text)."""
+
+    def __init__(self, ttl_seconds: float = 300, max_users: int = 5000):
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self._entries: "OrderedDict[int, Tuple[float, dict, str]]" = OrderedDict()
+        # Sync endpoints invalidate from the threadpool, so a plain lock (not asyncio)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get(self, user_id: int) -> Optional[Tuple[dict, str]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, user_id: int, ctx: dict, ctx_text: str) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[user_id] = (expires_at, ctx, ctx_text)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_users": self.max_users,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
+
+
+# Global singleton — import this everywhere
+context_cache = ContextCache(
+    ttl_seconds=float(os.getenv("CENTRAL_CONTEXT_TTL", "300")),
+    max_users=int(os.getenv("CENTRAL_CONTEXT_MAX_USERS", "5000")),
+)
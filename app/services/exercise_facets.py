@@ -0,0 +1,149 @@
+"""
+exercise_facets.py
+==================
+Filter facets for the exercise library.
+
+Exercise keeps its muscles as JSON text, which is fine for display but
+means every filter-chip request used to load and json.loads every row,
+and muscle filtering was an ilike over JSON. Instead each exercise's facet
+values live normalised in exercise_facets (one row per exercise × facet ×
+value, indexed on (facet, value)):
+
+  facet              value source
+  primary_muscle     primary_muscles  (JSON list)
+  secondary_muscle   secondary_muscles (JSON list)
+  equipment          equipment
+  category           category
+  difficulty         difficulty
+
+`value` is the lower-cased key filters match on; `label` keeps the display
+spelling. Rows are rewritten by the Exercise mapper hooks
+(models/exercise.py) whenever one of those columns changes — seeders and
+admin edits included — and backfilled by migration 013.
+
+  • filter_exercises(q, selected) — combined facet filtering as indexed
+    `id IN (…)` subqueries; a muscle matches primary or secondary.
+  • facet_counts(db, selected)  — chips with counts per facet. Each facet
+    is counted under every *other* selected facet, so a chip shows how many
+    exercises you would get by switching to it.
+"""
+
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+# Request parameter → facet names it matches
+FACETS: Dict[str, Tuple[str, ...]] = {
+    "muscle":     ("primary_muscle", "secondary_muscle"),
+    "equipment":  ("equipment",),
+    "category":   ("category",),
+    "difficulty": ("difficulty",),
+}
+
+# Response keys of /meta/filters
+RESPONSE_KEYS = {"muscle": "muscles", "equipment": "equipment", "category": "categories", "difficulty": "difficulty"}
+
+
+def facet_key(value: str) -> str:
+    return " ".join(value.split()).lower()
+
+
+def _parse_list(val: Optional[str]) -> List[str]:
+    # Same leniency as routers/exercises.serialize: bad JSON is one value
+    if not val:
+        return []
+    try:
+        parsed = json.loads(val)
+    except Exception:
+        return [val]
+    return parsed if isinstance(parsed, list) else [parsed]
+
+
+def facet_rows(exercise_id: int, primary_muscles, secondary_muscles,
+               equipment, category, difficulty) -> List[dict]:
+    """exercise_facets rows for one exercise (pure — also used by migration 013)."""
+    seen = set()
+    rows = []
+
+    def add(facet: str, label):
+        if not isinstance(label, str) or not label.strip():
+            return
+        value = facet_key(label)
+        if (facet, value) in seen:
+            return
+        seen.add((facet, value))
+        rows.append({"exercise_id": exercise_id, "facet": facet, "value": value, "label": label.strip()})
+
+    for m in _parse_list(primary_muscles):
+        add("primary_muscle", m)
+    for m in _parse_list(secondary_muscles):
+        add("secondary_muscle", m)
+    add("equipment", equipment)
+    add("category", category)
+    add("difficulty", difficulty)
+    return rows
+
+
+# ─────────────────────────────────────────────────────────────
+# Queries
+# ─────────────────────────────────────────────────────────────
+
+def _ids_with(param: str, value: str):
+    from app.models.exercise import ExerciseFacet
+    return select(ExerciseFacet.exercise_id).where(
+        ExerciseFacet.facet.in_(FACETS[param]),
+        ExerciseFacet.value == facet_key(value),
+    )
+
+
+def filter_exercises(q, selected: Dict[str, Optional[str]], skip: Optional[str] = None):
+    """Narrow an Exercise query to every selected facet value (except `skip`)."""
+    from app.models.exercise import Exercise
+    for param, value in selected.items():
+        if value and param != skip:
+            q = q.filter(Exercise.id.in_(_ids_with(param, value)))
+    return q
+
+
+def facet_counts(db: Session, selected: Optional[Dict[str, Optional[str]]] = None) -> Dict[str, List[dict]]:
+    """{param: [{"value": label, "count": n}, …]} over active exercises, sorted by label."""
+    from app.models.exercise import Exercise, ExerciseFacet
+
+    selected = selected or {}
+    out: Dict[str, List[dict]] = {}
+    for param, facets in FACETS.items():
+        base = filter_exercises(
+            db.query(Exercise.id).filter(Exercise.is_active == True),  # noqa: E712
+            selected, skip=param,
+        ).subquery()
+        q = (
+            db.query(
+                ExerciseFacet.value,
+                func.min(ExerciseFacet.label),
+                func.count(func.distinct(ExerciseFacet.exercise_id)),
+            )
+            .join(base, base.c.id == ExerciseFacet.exercise_id)
+            .filter(ExerciseFacet.facet.in_(facets))
+            .group_by(ExerciseFacet.value)
+        )
+        if param == "muscle":
+            # Chips are primary muscles (as before); counts include secondary hits,
+            # matching what the muscle filter returns
+            q = q.having(func.max(case((ExerciseFacet.facet == "primary_muscle", 1), else_=0)) == 1)
+        out[param] = sorted(
+            ({"value": label, "count": count} for _, label, count in q),
+            key=lambda chip: chip["value"].lower(),
+        )
+    return out
+
+
+def replace_rows(connection, exercise_id: int, rows: Iterable[dict]) -> None:
+    """Rewrite one exercise's facet rows on `connection` (mapper hooks)."""
+    from app.models.exercise import ExerciseFacet
+    table = ExerciseFacet.__table__
+    connection.execute(table.delete().where(table.c.exercise_id == exercise_id))
+    rows = list(rows)
+    if rows:
+        connection.execute(table.insert(), rows)
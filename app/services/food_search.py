@@ -0,0 +1,445 @@
+"""
+food_search.py
+==============
+In-memory food search for meal-logging autocomplete.
+
+Both food tables — food_items (USDA + hand-seeded) and the legacy foods
+table (user-custom + previously logged) — are tokenised once into:
+
+  • a sorted vocabulary with term → postings, so each query token is an
+    exact hit or a bisect-range of prefix hits ("chick" → chicken, chickpea);
+  • a trigram → term index, consulted only when a token matches few foods
+    by prefix, for typo tolerance ("chiken", "panner") within a bounded
+    edit distance.
+
+A food matches when every query token hits its name, brand or category.
+The score blends match quality (exact > prefix > fuzzy, name > brand >
+category, whole-name and name-prefix bonuses) with times_used, the
+searcher's own custom foods and is_indian. Search returns (kind, id)
+hits; endpoints load those few rows by primary key, so nutrients are
+always current.
+
+Freshness:
+  • create_custom_food adds its row straight away (add_food), and usage
+    bumps update popularity in place (note_use). Both advance the stamp
+    by their own write, so neither causes a rebuild here.
+  • Every REFRESH_CHECK_S the index compares a cheap stamp (row count +
+    max id per table, plus total times_used for foods) with the DB. When
+    it moved — rows written by the seeders, which run as separate
+    processes, or custom foods and usage from other workers — the index
+    is rebuilt on a background thread with its own session and swapped
+    in; searches keep answering from the current one meanwhile, so a
+    rebuild never runs on the request path. Only a cold index is built
+    inline. In-process callers can invalidate().
+
+FOOD_SEARCH_BACKEND=fts answers from the database's full-text indexes
+instead (services/text_search.py — FTS5 on SQLite, tsvector on Postgres):
+same hits and scoring, BM25 standing in for match quality, nothing held
+in memory, no warm-up — for multi-worker deployments. Prefix matching
+only; typo tolerance is the in-memory backend's.
+
+Benchmark: python bench_food_search.py
+"""
+
+import bisect
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+REFRESH_CHECK_S = float(os.getenv("FOOD_SEARCH_REFRESH_CHECK_S", "30"))
+FOOD_SEARCH_BACKEND = os.getenv("FOOD_SEARCH_BACKEND", "memory")   # memory | fts
+
+ITEM = "item"      # food_items
+FOOD = "food"      # legacy foods
+
+# Field weights: a hit on the name counts more than on brand or category
+_FIELD_WEIGHT = {"name": 1.0, "brand": 0.7, "category": 0.5}
+
+# Match quality per token
+_EXACT, _PREFIX, _FUZZY = 1.0, 0.75, 0.5
+
+_FUZZY_MIN_LEN = 4
+_FUZZY_CANDIDATES = 40
+_FUZZY_BELOW_HITS = 20     # look for typos only when a token is this rare
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN.findall((text or "").lower())
+
+
+def _trigrams(term: str) -> set:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _within_edits(a: str, b: str, max_edits: int) -> bool:
+    """Optimal-string-alignment distance(a, b) <= max_edits (adjacent swaps count once)."""
+    if abs(len(a) - len(b)) > max_edits:
+        return False
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > max_edits:
+            return False
+        prev2, prev = prev, cur
+    return prev[-1] <= max_edits
+
+
+class FoodDoc(NamedTuple):
+    kind: str
+    id: int
+    name: str
+    category: Optional[str]
+    is_indian: bool
+    times_used: int
+    user_id: Optional[int]
+    name_tokens: Tuple[str, ...]
+
+
+class FoodHit(NamedTuple):
+    kind: str
+    id: int
+    score: float
+
+
+class FoodSearchIndex:
+    def __init__(self, backend: str = FOOD_SEARCH_BACKEND):
+        self.backend = backend
+        self._docs: List[FoodDoc] = []
+        self._by_key: Dict[Tuple[str, int], int] = {}
+        self._postings: Dict[str, Dict[int, float]] = {}    # term → {doc → field weight}
+        self._vocab: List[str] = []                         # sorted terms
+        self._trigrams: Dict[str, set] = defaultdict(set)   # trigram → terms
+        self._stamp: Optional[tuple] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+
+    # ──────────────────────────────────────────────────────────
+    # Build
+    # ──────────────────────────────────────────────────────────
+
+    def warm(self, db: Session) -> None:
+        """Startup: build the in-memory index (the fts backend needs nothing)."""
+        if self.backend == "memory":
+            self.refresh(db)
+
+    def refresh(self, db: Session) -> int:
+        """Rebuild from both tables. Returns the number of foods indexed."""
+        from app.models.fitness_tracking import Food
+        from app.models.food import FoodItem
+
+        started = time.perf_counter()
+        stamp = self._read_stamp(db)    # before reading rows: a concurrent insert triggers another rebuild
+        items = db.query(
+            FoodItem.id, FoodItem.name, FoodItem.brand, FoodItem.category, FoodItem.is_indian,
+        ).filter(FoodItem.is_active == True).all()  # noqa: E712
+        foods = db.query(
+            Food.id, Food.name, Food.brand, Food.category, Food.times_used, Food.user_id,
+        ).all()
+
+        fresh = FoodSearchIndex()
+        for r in items:
+            fresh._add(ITEM, r.id, r.name, r.brand, r.category, bool(r.is_indian), 0, None)
+        for r in foods:
+            fresh._add(FOOD, r.id, r.name, r.brand, r.category, False, r.times_used or 0, r.user_id)
+        fresh._vocab = sorted(fresh._postings)
+
+        with self._lock:
+            self._docs, self._by_key = fresh._docs, fresh._by_key
+            self._postings, self._vocab, self._trigrams = fresh._postings, fresh._vocab, fresh._trigrams
+            self._stamp = stamp
+            self._checked_at = time.monotonic()
+        logger.info(
+            f"[FoodSearch] indexed {len(self._docs)} foods, {len(self._vocab)} terms "
+            f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+        return len(self._docs)
+
+    def add_food(self, food) -> None:
+        """Index one legacy Food row right away (create_custom_food)."""
+        if self.backend != "memory":
+            return   # the database's triggers already indexed it
+        with self._lock:
+            if (FOOD, food.id) in self._by_key:
+                return
+            new_terms = self._add(
+                FOOD, food.id, food.name, food.brand, food.category,
+                False, food.times_used or 0, food.user_id,
+            )
+            for term in new_terms:
+                bisect.insort(self._vocab, term)
+            # The insert's own effect on the stamp — not a reason to rebuild
+            if self._stamp is not None:
+                items, (count, max_id, uses) = self._stamp
+                self._stamp = (items, (count + 1, max(max_id or 0, food.id), uses + (food.times_used or 0)))
+
+    def note_use(self, food_id: int) -> None:
+        """times_used went up for a legacy food — keep its popularity current."""
+        with self._lock:
+            idx = self._by_key.get((FOOD, food_id))
+            if idx is not None:
+                doc = self._docs[idx]
+                self._docs[idx] = doc._replace(times_used=doc.times_used + 1)
+            if self._stamp is not None:
+                items, (count, max_id, uses) = self._stamp
+                self._stamp = (items, (count, max_id, uses + 1))
+
+    def invalidate(self) -> None:
+        """Force a stamp check on the next search."""
+        self._checked_at = 0.0
+        self._stamp = None
+
+    def _add(self, kind, doc_id, name, brand, category, is_indian, times_used, user_id) -> List[str]:
+        key = (kind, doc_id)
+        if key in self._by_key:
+            return []
+        idx = len(self._docs)
+        name_tokens = tuple(tokenize(name))
+        self._docs.append(FoodDoc(kind, doc_id, name or "", category, is_indian, times_used, user_id, name_tokens))
+        self._by_key[key] = idx
+
+        new_terms = []
+        for field, tokens in (("name", name_tokens), ("brand", tokenize(brand)), ("category", tokenize(category))):
+            weight = _FIELD_WEIGHT[field]
+            for term in tokens:
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    new_terms.append(term)
+                    for gram in _trigrams(term):
+                        self._trigrams[gram].add(term)
+                if postings.get(idx, 0) < weight:
+                    postings[idx] = weight
+        return new_terms
+
+    # ──────────────────────────────────────────────────────────
+    # Freshness
+    # ──────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _read_stamp(db: Session) -> tuple:
+        from app.models.fitness_tracking import Food
+        from app.models.food import FoodItem
+        items = db.query(func.count(FoodItem.id), func.max(FoodItem.id)).one()
+        count, max_id, uses = db.query(
+            func.count(Food.id), func.max(Food.id), func.coalesce(func.sum(Food.times_used), 0),
+        ).one()
+        return tuple(items), (count, max_id, int(uses))
+
+    def ensure_fresh(self, db: Session) -> None:
+        now = time.monotonic()
+        if self._stamp is not None and now - self._checked_at < REFRESH_CHECK_S:
+            return
+        with self._refresh_lock:
+            if self._stamp is not None and time.monotonic() - self._checked_at < REFRESH_CHECK_S:
+                return   # another thread just checked
+            if self._refresher is not None and self._refresher.is_alive():
+                return   # a rebuild is already on its way
+            if self._read_stamp(db) == self._stamp:
+                self._checked_at = now
+            elif not self._docs:
+                self.refresh(db)   # cold: nothing to answer from yet
+            else:
+                self._checked_at = now
+                self._refresher = threading.Thread(
+                    target=self._refresh_in_background, args=(db.get_bind(),),
+                    name="food_search_refresh", daemon=True,
+                )
+                self._refresher.start()
+
+    def _refresh_in_background(self, bind) -> None:
+        db = Session(bind=bind)
+        try:
+            self.refresh(db)
+        except Exception as e:
+            logger.warning(f"[FoodSearch] background refresh failed: {e}")
+        finally:
+            db.close()
+
+    def drain(self, timeout: Optional[float] = None) -> None:
+        """Wait for an in-flight background rebuild (tests / shutdown)."""
+        refresher = self._refresher
+        if refresher is not None:
+            refresher.join(timeout)
+
+    # ──────────────────────────────────────────────────────────
+    # Query
+    # ──────────────────────────────────────────────────────────
+
+    def search(
+        self,
+        db: Session,
+        q: str,
+        limit: int = 20,
+        offset: int = 0,
+        user_id: Optional[int] = None,
+        kinds: Sequence[str] = (ITEM, FOOD),
+        category: Optional[str] = None,
+        is_indian: Optional[bool] = None,
+    ) -> List[FoodHit]:
+        if self.backend == "fts":
+            return self._search_fts(db, q, limit, offset, user_id, kinds, category, is_indian)
+        self.ensure_fresh(db)
+        tokens = tokenize(q)
+        if not tokens:
+            return []
+
+        with self._lock:
+            docs = self._docs
+            # Rarest token first so the intersection shrinks quickly
+            per_token = sorted((self._matches(t) for t in tokens), key=len)
+        if not per_token or not per_token[0]:
+            return []
+
+        scores = dict(per_token[0])
+        for matches in per_token[1:]:
+            scores = {d: s + matches[d] for d, s in scores.items() if d in matches}
+            if not scores:
+                return []
+
+        phrase = " ".join(tokens)
+        category = category.lower() if category else None
+        hits = []
+        for idx, match in scores.items():
+            doc = docs[idx]
+            if doc.kind not in kinds:
+                continue
+            if is_indian is not None and doc.is_indian != is_indian:
+                continue
+            if category and category not in (doc.category or "").lower():
+                continue
+            hits.append((-self._score(doc, match / len(tokens), phrase, user_id), doc.name.lower(), doc))
+
+        hits.sort(key=lambda h: (h[0], h[1]))
+        return [FoodHit(doc.kind, doc.id, -neg) for neg, _, doc in hits[offset:offset + limit]]
+
+    def _search_fts(self, db, q, limit, offset, user_id, kinds, category, is_indian) -> List[FoodHit]:
+        from app.models.fitness_tracking import Food
+        from app.models.food import FoodItem
+        from app.services.text_search import FOOD_ITEMS_FTS, FOODS_FTS
+
+        dialect = db.get_bind().dialect.name
+        depth = max(50, 3 * (limit + offset))   # BM25 top-k per table, re-scored below
+        ranked_docs = []
+
+        if ITEM in kinds:
+            ranked = FOOD_ITEMS_FTS.ranked(dialect, q)
+            if ranked is None:
+                return []
+            query = db.query(
+                FoodItem.id, FoodItem.name, FoodItem.category, FoodItem.is_indian, ranked.c.rank,
+            ).join(ranked, ranked.c.id == FoodItem.id).filter(FoodItem.is_active == True)  # noqa: E712
+            if category:
+                query = query.filter(FoodItem.category.ilike(f"%{category}%"))
+            if is_indian is not None:
+                query = query.filter(FoodItem.is_indian == is_indian)
+            for r in query.order_by(ranked.c.rank).limit(depth):
+                doc = FoodDoc(ITEM, r.id, r.name, r.category, bool(r.is_indian), 0, None, tuple(tokenize(r.name)))
+                ranked_docs.append((r.rank, doc))
+
+        # Legacy foods carry no is_indian flag
+        if FOOD in kinds and not is_indian:
+            ranked = FOODS_FTS.ranked(dialect, q)
+            if ranked is None:
+                return []
+            query = db.query(
+                Food.id, Food.name, Food.category, Food.times_used, Food.user_id, ranked.c.rank,
+            ).join(ranked, ranked.c.id == Food.id)
+            if category:
+                query = query.filter(Food.category.ilike(f"%{category}%"))
+            for r in query.order_by(ranked.c.rank).limit(depth):
+                doc = FoodDoc(FOOD, r.id, r.name, r.category, False, r.times_used or 0, r.user_id,
+                              tuple(tokenize(r.name)))
+                ranked_docs.append((r.rank, doc))
+
+        if not ranked_docs:
+            return []
+        # rank is "lower is better" and negative; the best row maps to match 1.0
+        best = min(rank for rank, _ in ranked_docs) or -1.0
+        phrase = " ".join(tokenize(q))
+        hits = [
+            (-self._score(doc, (rank or 0.0) / best, phrase, user_id), doc.name.lower(), doc)
+            for rank, doc in ranked_docs
+        ]
+        hits.sort(key=lambda h: (h[0], h[1]))
+        return [FoodHit(doc.kind, doc.id, -neg) for neg, _, doc in hits[offset:offset + limit]]
+
+    def _matches(self, token: str) -> Dict[int, float]:
+        """doc → best (quality × field weight) for one query token."""
+        out: Dict[int, float] = {}
+
+        def take(term: str, quality: float):
+            for idx, weight in self._postings[term].items():
+                s = quality * weight
+                if s > out.get(idx, 0):
+                    out[idx] = s
+
+        lo = bisect.bisect_left(self._vocab, token)
+        hi = bisect.bisect_left(self._vocab, token + "{")   # '{' sorts after every [a-z0-9]
+        for term in self._vocab[lo:hi]:
+            if term == token:
+                take(term, _EXACT)
+            else:
+                # closer completions rank higher: "egg" → eggs before eggplant
+                take(term, _PREFIX * (0.8 + 0.2 * len(token) / len(term)))
+        if len(out) >= _FUZZY_BELOW_HITS or len(token) < _FUZZY_MIN_LEN:
+            return out
+
+        for term in self._fuzzy_terms(token):
+            take(term, _FUZZY)
+        return out
+
+    def _fuzzy_terms(self, token: str) -> Iterable[str]:
+        max_edits = 1 if len(token) < 8 else 2
+        overlap: Counter = Counter()
+        for gram in _trigrams(token):
+            overlap.update(self._trigrams.get(gram, ()))
+        for term, _ in overlap.most_common(_FUZZY_CANDIDATES):
+            # Also accept a typo in the part typed so far ("chik" → chicken)
+            if _within_edits(token, term, max_edits) or (
+                len(term) > len(token) and _within_edits(token, term[:len(token)], max_edits)
+            ):
+                yield term
+
+    @staticmethod
+    def _score(doc: FoodDoc, match: float, phrase: str, user_id: Optional[int]) -> float:
+        score = match
+        name = " ".join(doc.name_tokens)
+        if name == phrase:
+            score += 0.5
+        elif name.startswith(phrase):
+            score += 0.3
+        score -= 0.01 * len(doc.name_tokens)                        # "Chicken breast" over SR Legacy essays
+        score += min(0.3, 0.05 * math.log1p(doc.times_used))
+        if user_id is not None and doc.user_id == user_id:
+            score += 0.4
+        if doc.is_indian:
+            score += 0.1
+        return score
+
+    def stats(self) -> dict:
+        return {"foods": len(self._docs), "terms": len(self._vocab), "stamp": self._stamp}
+
+
+# Global singleton — import this everywhere
+food_search = FoodSearchIndex()
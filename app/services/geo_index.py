@@ -0,0 +1,195 @@
+"""
+geo_index.py
+============
+Geohash spatial index for gym discovery.
+
+Every Gym row carries a geohash of its coordinates (gyms.geohash, indexed,
+kept in sync by a mapper hook in models/gym.py). A radius query becomes a
+handful of indexed range scans instead of a scan of the whole table:
+
+  1. precision_for(radius, lat) picks the finest geohash length whose cells
+     are at least `radius` tall and wide.
+  2. covering_cells() takes the cell holding the centre plus its 8
+     neighbours — with cells that big, the 3×3 block always contains the
+     whole circle.
+  3. within_cells(column, cells) turns each cell prefix into a
+     `geohash >= prefix AND geohash < prefix + '{'` range the B-tree index
+     can seek ('{' sorts straight after 'z', the last geohash character).
+
+Callers then select only (id, lat, lng, …sort keys) for the candidates and
+hand them to rank(), which computes every distance, the radius mask and the
+ordering in NumPy and returns just the top k. Only those survivors are
+loaded as full rows and turned into response objects.
+
+Pure functions — no DB or model imports, so models/gym.py can use encode().
+"""
+
+import math
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import and_, or_
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT = 111.32
+
+# Stored precision: 9 chars ≈ 4.8 m × 4.8 m cells
+GEOHASH_PRECISION = 9
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_PREFIX_END = "{"   # chr(ord("z") + 1)
+
+
+def encode(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Standard base-32 geohash of (lat, lng)."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    n_bits = 0
+    even = True   # geohash interleaves bits, longitude first
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                bits = (bits << 1) | 1
+                lng_lo = mid
+            else:
+                bits <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                bits = (bits << 1) | 1
+                lat_lo = mid
+            else:
+                bits <<= 1
+                lat_hi = mid
+        even = not even
+        n_bits += 1
+        if n_bits == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            n_bits = 0
+    return "".join(chars)
+
+
+def decode(cell: str) -> Tuple[float, float]:
+    """Centre (lat, lng) of a geohash cell."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    even = True
+    for ch in cell:
+        bits = _BASE32.index(ch)
+        for shift in range(4, -1, -1):
+            bit = (bits >> shift) & 1
+            if even:
+                mid = (lng_lo + lng_hi) / 2
+                lng_lo, lng_hi = (mid, lng_hi) if bit else (lng_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return (lat_lo + lat_hi) / 2, (lng_lo + lng_hi) / 2
+
+
+def cell_size_deg(precision: int) -> Tuple[float, float]:
+    """(height, width) of a geohash cell in degrees."""
+    total = 5 * precision
+    lng_bits = (total + 1) // 2
+    lat_bits = total // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def precision_for(radius_km: float, lat: float) -> int:
+    """Finest precision whose cells are at least radius_km in both directions at `lat`."""
+    lat_deg = radius_km / KM_PER_DEG_LAT
+    lng_deg = radius_km / (KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 0.01))
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        h, w = cell_size_deg(precision)
+        if h >= lat_deg and w >= lng_deg:
+            return precision
+    return 1
+
+
+def covering_cells(lat: float, lng: float, radius_km: float) -> List[str]:
+    """Geohash prefixes (centre cell + neighbours) that together contain the circle."""
+    precision = precision_for(radius_km, lat)
+    h, w = cell_size_deg(precision)
+    cells = set()
+    for dy in (-1, 0, 1):
+        cell_lat = lat + dy * h
+        if not -90.0 <= cell_lat <= 90.0:
+            continue
+        for dx in (-1, 0, 1):
+            cell_lng = (lng + dx * w + 180.0) % 360.0 - 180.0
+            cells.add(encode(cell_lat, cell_lng, precision))
+    return sorted(cells)
+
+
+def within_cells(column, cells: Iterable[str]):
+    """SQL filter: `column` starts with one of `cells` — index range scans, not LIKE."""
+    return or_(*(and_(column >= cell, column < cell + _PREFIX_END) for cell in cells))
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    d_lat = math.radians(lat2 - lat1)
+    d_lng = math.radians(lng2 - lng1)
+    a = (math.sin(d_lat / 2) ** 2
+         + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2))
+         * math.sin(d_lng / 2) ** 2)
+    return EARTH_RADIUS_KM * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+# ─────────────────────────────────────────────────────────────
+# Batch ranking
+# ─────────────────────────────────────────────────────────────
+
+def distances_km(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """Haversine from (lat, lng) to every point at once. NaN coordinates give NaN."""
+    lat1 = math.radians(lat)
+    lat2 = np.radians(lats)
+    d_lat = lat2 - lat1
+    d_lng = np.radians(lngs - lng)
+    a = np.sin(d_lat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(d_lng / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def rank(rows: Sequence, lat: float, lng: float, radius_km: float,
+         limit: Optional[int] = None, keys: Sequence[Sequence[float]] = ()) -> List[Tuple[float, object]]:
+    """
+    (distance_km, row) for candidate rows (.lat / .lng) inside the radius,
+    ordered by `keys` then distance, cut to `limit`.
+
+    Distances, the radius mask and the ordering are computed for the whole
+    candidate set in NumPy; Python only touches the rows that are returned.
+    `keys` are per-row sort keys, ascending, primary first (negate for
+    descending).
+    """
+    n = len(rows)
+    if n == 0:
+        return []
+    lats = np.fromiter((r.lat if r.lat is not None else np.nan for r in rows), float, n)
+    lngs = np.fromiter((r.lng if r.lng is not None else np.nan for r in rows), float, n)
+    dist = distances_km(lat, lng, lats, lngs)
+
+    inside = np.flatnonzero(dist <= radius_km)   # NaN compares False
+    d = dist[inside]
+    if keys:
+        # lexsort: last key is primary
+        order = np.lexsort([d] + [np.asarray(k, dtype=float)[inside] for k in reversed(keys)])
+        if limit is not None:
+            order = order[:limit]
+    elif limit is not None and limit < len(d):
+        top = np.argpartition(d, limit)[:limit]
+        order = top[np.argsort(d[top], kind="stable")]
+    else:
+        order = np.argsort(d, kind="stable")
+
+    return [(float(d[i]), rows[inside[i]]) for i in order]
+
+
+def within_radius(rows: Sequence, lat: float, lng: float, radius_km: float,
+                  limit: Optional[int] = None) -> List[Tuple[float, object]]:
+    """(distance_km, row) inside the radius, nearest first, cut to `limit`."""
+    return rank(rows, lat, lng, radius_km, limit=limit)
@@ -9,7 +9,9 @@ from app.models.workout_log import WorkoutLog
 from app.models.reminder import Reminder
 from app.models.reminder_log import ReminderLog
 from app.models.evaluator_state import EvaluatorState
-from app.models.fitness_tracking import WorkoutSession, MealLog, DietPlan, SessionStatus
+from app.models.fitness_tracking import WorkoutSession, MealLog, DietPlan
+from app.services.activity_calendar import completed_days, get_streak, live_streak
+from app.services.reminder_recurrence import upcoming as upcoming_occurrences
 
 
 class HomeService:
@@ -50,23 +52,17 @@ class HomeService:
             .count()
         )
 
-        # "Upcoming today" = active reminders not yet fired, scheduled later today
-        upcoming_reminders = (
-            db.query(Reminder)
-            .filter(
-                Reminder.user_id == user.id,
-                Reminder.scheduled_at >= _now_utc_reminders,
-                Reminder.scheduled_at <= today_end,
-                Reminder.is_active == True,
-                Reminder.missed_processed == False,  # not yet fired/sent
-            )
-            .count()
+        # "Upcoming today" = occurrences still to fire later today — pending
+        # rows plus recurring projections, from the precomputed schedule
+        upcoming_reminders = len(
+            upcoming_occurrences(db, user.id, _now_utc_reminders, today_end)
         )
 
         # -------------------------
-        # CONSISTENCY (14 DAYS) - Using new workout_sessions
+        # CONSISTENCY (14 DAYS) + STREAK - Using the activity calendar
         # -------------------------
         consistency = self._get_consistency(db, user, today)
+        streak = self._get_streak(db, user, _now_utc.date())
 
         # -------------------------
         # EVALUATOR STATE
@@ -108,6 +104,7 @@ class HomeService:
                 }
             },
             "consistency": consistency,
+            "streak": streak,
             "quick_actions": ["workout", "diet", "central"]
         }
 
@@ -251,23 +248,12 @@ class HomeService:
 
     def _get_consistency(self, db: Session, user: User, today: date) -> list:
         """
-        Get 14-day consistency data using workout_sessions table.
+        Get 14-day consistency data from the materialized activity calendar.
         """
         start_date = today - timedelta(days=13)
 
-        # Query workout sessions from the last 14 days
-        sessions = (
-            db.query(WorkoutSession.started_at)
-            .filter(
-                WorkoutSession.user_id == user.id,
-                WorkoutSession.started_at >= start_date,
-                WorkoutSession.status == SessionStatus.COMPLETED
-            )
-            .all()
-        )
-
-        # Create a set of dates where workouts were completed
-        days_logged = {session.started_at.date().isoformat() for session in sessions}
+        # Days in the window with a completed session (≤ 14 calendar rows)
+        days_logged = completed_days(db, user.id, start_date, today)
 
         # Build consistency array
         consistency = []
@@ -275,7 +261,15 @@ class HomeService:
             d = start_date + timedelta(days=i)
             consistency.append({
                 "date": d.isoformat(),
-                "worked_out": d.isoformat() in days_logged
+                "worked_out": d in days_logged
             })
 
-        return consistency
\ No newline at end of file
+        return consistency
+
+    def _get_streak(self, db: Session, user: User, today: date) -> dict:
+        """Current + longest streak — one primary-key read of user_streaks."""
+        streak = get_streak(db, user.id)
+        return {
+            "current": live_streak(streak, today),
+            "longest": streak.longest_streak if streak else 0,
+        }
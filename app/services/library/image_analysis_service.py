@@ -1,7 +1,7 @@
 from app.ai.orchestrator.llm_engine import LLMEngine
 from app.models.health_memory import HealthMemory
 
-llm = LLMEngine()
+llm = LLMEngine(agent="image_analysis")
 
 async def analyze_image_and_store(
     db,
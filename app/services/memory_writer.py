@@ -185,7 +185,11 @@ def get_disliked_items(db: Session, user_id: int) -> dict:
         )
         .all()
     )
+    return split_disliked_items(memories)
 
+
+def split_disliked_items(memories) -> dict:
+    """Bucket disliked_item memories into {exercises: [str], foods: [str]}."""
     exercises = []
     foods = []
 
@@ -0,0 +1,144 @@
+"""
+notification_outbox.py
+======================
+Pending-notification outbox — events that found no open socket.
+
+  • enqueue() / enqueue_many()  — one row / one bulk INSERT
+  • claim()                     — fetch-and-mark in a single
+                                  UPDATE … RETURNING for a user's oldest
+                                  undelivered, unexpired rows
+  • release()                   — un-claims rows that could not be sent
+  • purge()                     — drops delivered and expired rows
+                                  (daily scheduler job, run_purge)
+
+Rows live NOTIFICATION_TTL_DAYS; after that a notification is stale and
+never delivered.
+"""
+
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models.pending_notification import PendingNotification
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_TTL_DAYS = int(os.getenv("NOTIFICATION_TTL_DAYS", "7"))
+DELIVERED_RETENTION_DAYS = 1
+CLAIM_LIMIT = 20
+
+
+def _row(user_id: int, event: dict, now: datetime, ttl: Optional[timedelta]) -> dict:
+    return {
+        "user_id": user_id,
+        "event_type": event.get("type") or "notification",
+        "title": event.get("title"),
+        "body": event.get("body"),
+        "data": event.get("data") or {},
+        "delivered": False,
+        "created_at": now,
+        "expires_at": now + (ttl or timedelta(days=NOTIFICATION_TTL_DAYS)),
+    }
+
+
+def enqueue(db: Session, user_id: int, event: dict, ttl: Optional[timedelta] = None) -> None:
+    enqueue_many(db, [(user_id, event)], ttl=ttl)
+
+
+def enqueue_many(db: Session, items: Iterable[tuple], ttl: Optional[timedelta] = None) -> int:
+    """Bulk-insert (user_id, event) pairs in one statement. Commits. Returns the row count."""
+    now = datetime.utcnow()
+    rows = [_row(user_id, event, now, ttl) for user_id, event in items]
+    if not rows:
+        return 0
+    db.execute(insert(PendingNotification), rows)
+    db.commit()
+    return len(rows)
+
+
+def claim(db: Session, user_id: int, limit: int = CLAIM_LIMIT) -> list:
+    """
+    Mark the user's oldest undelivered, unexpired notifications delivered and
+    return them as event dicts, oldest first — one statement. Commits.
+    """
+    now = datetime.utcnow()
+    oldest = (
+        select(PendingNotification.id)
+        .where(
+            PendingNotification.user_id == user_id,
+            PendingNotification.delivered == False,
+            PendingNotification.expires_at > now,
+        )
+        .order_by(PendingNotification.created_at.asc(), PendingNotification.id.asc())
+        .limit(limit)
+    )
+    rows = db.execute(
+        update(PendingNotification)
+        .where(PendingNotification.id.in_(oldest.scalar_subquery()))
+        .values(delivered=True, delivered_at=now)
+        .returning(
+            PendingNotification.id, PendingNotification.event_type, PendingNotification.title,
+            PendingNotification.body, PendingNotification.data, PendingNotification.created_at,
+        )
+    ).all()
+    db.commit()
+
+    # RETURNING order isn't guaranteed
+    rows.sort(key=lambda r: (r.created_at, r.id))
+    return [
+        {
+            "id": r.id,
+            "type": r.event_type,
+            "title": r.title or "",
+            "body": r.body or "",
+            "data": r.data or {},
+            "created_at": r.created_at.isoformat() if r.created_at else None,
+        }
+        for r in rows
+    ]
+
+
+def release(db: Session, ids: Iterable[int]) -> int:
+    """Return claimed rows to the queue — e.g. the socket dropped before they were sent. Commits."""
+    ids = list(ids)
+    if not ids:
+        return 0
+    result = db.execute(
+        update(PendingNotification)
+        .where(PendingNotification.id.in_(ids))
+        .values(delivered=False, delivered_at=None)
+    )
+    db.commit()
+    return result.rowcount or 0
+
+
+def purge(db: Session) -> int:
+    """Delete expired rows and rows delivered more than a day ago. Commits."""
+    now = datetime.utcnow()
+    result = db.execute(
+        delete(PendingNotification).where(
+            or_(
+                PendingNotification.expires_at <= now,
+                PendingNotification.delivered_at <= now - timedelta(days=DELIVERED_RETENTION_DAYS),
+            )
+        )
+    )
+    db.commit()
+    return result.rowcount or 0
+
+
+def run_purge() -> int:
+    """Scheduler entry point for purge()."""
+    from app.db.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        removed = purge(db)
+        logger.info(f"[Outbox] Purged {removed} pending notification rows.")
+        return removed
+    finally:
+        db.close()
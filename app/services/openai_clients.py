@@ -0,0 +1,130 @@
+"""
+openai_clients.py
+=================
+Shared, pooled AsyncOpenAI clients.
+
+Every OpenAI call site — AI Central chat and the intent fallback, voice
+STT/TTS, the agent jobs and LLMEngine — goes through get_openai(model)
+instead of building its own client, so they all share one httpx connection
+pool with keep-alive and stop paying socket setup + TLS handshake per call.
+
+  • One base client per event loop. httpx connections are bound to the loop
+    that opened them, and uvicorn/APScheduler, asyncio.run() callers and
+    tests each run their own loop.
+  • Per-model clients are with_options() copies of the base client: same
+    pool, model-specific timeout (MODEL_TIMEOUTS).
+  • close_openai_clients() on shutdown drains the pools.
+
+Pool size and keep-alive are tunable through OPENAI_MAX_CONNECTIONS,
+OPENAI_MAX_KEEPALIVE and OPENAI_KEEPALIVE_EXPIRY.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────────────────────
+# Tuning
+# ─────────────────────────────────────────────────────────────
+
+# Wall-clock budget per model. Chat streams long plans on gpt-5-nano, so it
+# keeps the 90s the router used; call sites can still pass timeout= per request.
+MODEL_TIMEOUTS: dict[str, float] = {
+    "gpt-5-nano":  90.0,
+    "gpt-4o-mini": 60.0,
+    "whisper-1":   120.0,   # audio upload + transcription
+    "tts-1":       60.0,
+}
+DEFAULT_TIMEOUT = 90.0
+CONNECT_TIMEOUT = 10.0
+MAX_RETRIES = 2
+
+POOL_LIMITS = httpx.Limits(
+    max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE", "20")),
+    keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60")),
+)
+
+
+def _timeout_for(model: Optional[str]) -> httpx.Timeout:
+    total = MODEL_TIMEOUTS.get(model, DEFAULT_TIMEOUT) if model else DEFAULT_TIMEOUT
+    return httpx.Timeout(total, connect=CONNECT_TIMEOUT)
+
+
+# ─────────────────────────────────────────────────────────────
+# Registry
+# ─────────────────────────────────────────────────────────────
+
+class OpenAIClientRegistry:
+    """Event-loop-scoped pool of AsyncOpenAI clients, one per model on top."""
+
+    def __init__(self):
+        # loop → {model | None → client}; entries vanish with their loop
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, model: Optional[str] = None) -> AsyncOpenAI:
+        """
+        Client for `model` on the running loop. Must be called from a
+        coroutine; raises RuntimeError when OPENAI_API_KEY is not set.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            per_loop = self._clients.get(loop)
+            if per_loop is None:
+                per_loop = self._clients[loop] = {None: self._build_base()}
+            client = per_loop.get(model)
+            if client is None:
+                client = per_loop[model] = per_loop[None].with_options(
+                    timeout=_timeout_for(model),
+                )
+            return client
+
+    def _build_base(self) -> AsyncOpenAI:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise RuntimeError("OPENAI_API_KEY is not set on the server.")
+        logger.info(
+            f"[OpenAI] pooled client ready — max_connections={POOL_LIMITS.max_connections} "
+            f"keepalive={POOL_LIMITS.max_keepalive_connections}"
+        )
+        return AsyncOpenAI(
+            api_key=api_key,
+            timeout=_timeout_for(None),
+            max_retries=MAX_RETRIES,
+            http_client=DefaultAsyncHttpxClient(limits=POOL_LIMITS),
+        )
+
+    async def aclose(self) -> None:
+        """Close the pool owned by the running loop (per-model copies share it)."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            per_loop = self._clients.pop(loop, None)
+        if per_loop:
+            try:
+                await per_loop[None].close()
+            except Exception as e:
+                logger.debug(f"[OpenAI] close error: {e}")
+
+
+# Global singleton — import this everywhere
+openai_clients = OpenAIClientRegistry()
+
+
+def get_openai(model: Optional[str] = None) -> AsyncOpenAI:
+    return openai_clients.get(model)
+
+
+async def close_openai_clients() -> None:
+    await openai_clients.aclose()
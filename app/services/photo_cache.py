@@ -0,0 +1,226 @@
+"""
+photo_cache.py
+==============
+On-disk cache behind the /discovery/photo proxy.
+
+Gym list screens request the same Google Places photos over and over; each
+(photo_reference, maxwidth) is fetched from Google once and then served
+from disk.
+
+  • Files live under PHOTO_CACHE_DIR as <key[:2]>/<key>-<etag>.<ext>, where
+    key = sha256(photo_reference, maxwidth) and etag = sha256 of the bytes.
+    The name carries everything needed to serve it, so a restart rebuilds
+    the index by listing the directory — no sidecar metadata.
+  • Total size is capped at PHOTO_CACHE_MAX_MB; least-recently-served files
+    are evicted first (order after a restart starts from file mtime).
+  • Concurrent misses for the same key share one upstream fetch.
+  • Upstream calls go through the pooled Places client (places.py).
+  • Writes land in a temp file and are renamed into place, so a reader
+    never sees a partial image.
+
+Hit / miss / coalesced / eviction counters: stats().
+"""
+
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PHOTO_CACHE_DIR = os.getenv("PHOTO_CACHE_DIR", "photo_cache")
+PHOTO_CACHE_MAX_MB = int(os.getenv("PHOTO_CACHE_MAX_MB", "512"))
+
+_FILE_RE = re.compile(r"^(?P<key>[0-9a-f]{64})-(?P<etag>[0-9a-f]{16})(?P<ext>\.\w+)$")
+
+
+@dataclass(frozen=True)
+class CachedPhoto:
+    key: str
+    path: Path
+    content_type: str
+    etag: str
+    size: int
+
+
+class PhotoCache:
+    """Size-bounded LRU of photo files on disk, keyed by (photo_reference, maxwidth)."""
+
+    def __init__(self, directory: str = PHOTO_CACHE_DIR, max_bytes: int = PHOTO_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedPhoto]" = OrderedDict()
+        self._bytes = 0
+        # _store runs in a worker thread, lookups on the loop
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key_for(ref: str, maxwidth: int) -> str:
+        return hashlib.sha256(f"{ref}\x00{maxwidth}".encode()).hexdigest()
+
+    # ──────────────────────────────────────────────────────────
+    # Lookup
+    # ──────────────────────────────────────────────────────────
+
+    async def get(self, ref: str, maxwidth: int) -> CachedPhoto:
+        """
+        Cached photo for (ref, maxwidth), fetching it on a miss. Raises
+        httpx.HTTPError when the upstream fetch fails (nothing is cached).
+        """
+        if not self._loaded:
+            await asyncio.to_thread(self._load)
+
+        key = self.key_for(ref, maxwidth)
+        entry = self._lookup(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._fill(key, ref, maxwidth))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # A client that disconnects must not cancel the fetch others wait on
+        return await asyncio.shield(task)
+
+    def _lookup(self, key: str) -> Optional[CachedPhoto]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if not entry.path.exists():
+                # Removed behind our back — refetch
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    # ──────────────────────────────────────────────────────────
+    # Fill
+    # ──────────────────────────────────────────────────────────
+
+    async def _fill(self, key: str, ref: str, maxwidth: int) -> CachedPhoto:
+        content, content_type = await self.fetch(ref, maxwidth)
+        return await asyncio.to_thread(self._store, key, content, content_type)
+
+    async def fetch(self, ref: str, maxwidth: int) -> Tuple[bytes, str]:
+        """Image bytes + content type from Google Places."""
+        from app.services.places import PLACE_PHOTO_URL, PLACES_API_KEY, get_places_client
+
+        resp = await get_places_client().get(
+            PLACE_PHOTO_URL,
+            params={"photoreference": ref, "maxwidth": maxwidth, "key": PLACES_API_KEY},
+        )
+        resp.raise_for_status()
+        content_type = resp.headers.get("content-type", "image/jpeg").split(";")[0].strip()
+        return resp.content, content_type
+
+    def _store(self, key: str, content: bytes, content_type: str) -> CachedPhoto:
+        etag = hashlib.sha256(content).hexdigest()[:16]
+        ext = mimetypes.guess_extension(content_type) or ".img"
+        folder = self.directory / key[:2]
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"{key}-{etag}{ext}"
+
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+        entry = CachedPhoto(key=key, path=path, content_type=content_type, etag=etag, size=len(content))
+        with self._lock:
+            old = self._entries.get(key)
+            if old is not None and old.path != path:
+                self._drop(key)
+            elif old is not None:
+                self._bytes -= old.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self._evict()
+        return entry
+
+    # ──────────────────────────────────────────────────────────
+    # Eviction + index
+    # ──────────────────────────────────────────────────────────
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        try:
+            entry.path.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"[PhotoCache] could not remove {entry.path}: {e}")
+
+    def _evict(self) -> None:
+        # Never the entry just stored (most recent)
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            self._drop(key)
+            self.evictions += 1
+
+    def _load(self) -> None:
+        """Rebuild the index from disk, oldest mtime first."""
+        with self._lock:
+            if self._loaded:
+                return
+            found = []
+            if self.directory.exists():
+                for path in self.directory.glob("*/*"):
+                    if path.suffix == ".tmp":
+                        path.unlink(missing_ok=True)   # interrupted write
+                        continue
+                    m = _FILE_RE.match(path.name)
+                    if not m:
+                        continue
+                    st = path.stat()
+                    content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+                    found.append((st.st_mtime, CachedPhoto(
+                        key=m["key"], path=path, content_type=content_type,
+                        etag=m["etag"], size=st.st_size,
+                    )))
+            for _, entry in sorted(found, key=lambda f: f[0]):
+                self._entries[entry.key] = entry
+                self._bytes += entry.size
+            self._evict()
+            self._loaded = True
+        if found:
+            logger.info(f"[PhotoCache] {len(self._entries)} photos ({self._bytes // 1024} KiB) on disk")
+
+    def stats(self) -> dict:
+        return {
+            "photos": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+        }
+
+
+# Global singleton — import this everywhere
+photo_cache = PhotoCache()
@@ -6,6 +6,10 @@ Wraps Google Places API (new) for gym discovery.
   search_nearby_gyms(lat, lng, radius_m)  →  list of raw Place dicts
   get_place_details(place_id)              →  enriched Place dict (phone, hours, photos)
   upsert_gym_from_place(db, place)         →  create/update Gym + GymAmenities row
+  bulk_upsert_places(db, places)           →  same for a whole search page, set-based
+
+Area syncs (search + bulk upsert, per geohash cell) are driven by
+area_sync.py. PLACES_BACKEND=fake answers everything from places_fake.py.
 
 Uses:
   GOOGLE_PLACES_API_KEY env var (same key as YouTube — just enable Places API in GCP console)
@@ -13,24 +17,36 @@ Uses:
 Caching strategy:
   - A gym row is considered fresh if places_fetched_at < CACHE_TTL_HOURS old.
   - An area search is considered fresh if ≥ MIN_GYMS_CACHED_FOR_AREA gyms already exist
-    near that coordinate that were fetched within the TTL.
+    within AREA_RADIUS_KM of that coordinate that were fetched within the TTL
+    (looked up through the geohash index, geo_index.py).
 
 Photo references:
   - Stored as JSON list in gym.photo_references_json.
-  - Actual image bytes are served through the /discovery/photo proxy endpoint.
+  - Actual image bytes are served through the /discovery/photo proxy endpoint,
+    backed by the on-disk cache in photo_cache.py.
+
+HTTP:
+  - All calls share one pooled keep-alive client per event loop
+    (get_places_client); close_places_clients() runs on shutdown.
 """
 
 import os
+import asyncio
 import logging
 import json
+import threading
+import weakref
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 import httpx
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
 
 from app.models.gym import Gym
 from app.models.gym_amenities import GymAmenities
+from app.services.geo_index import covering_cells, within_cells, within_radius
+from app.services.geo_index import encode as encode_geohash
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +54,10 @@ logger = logging.getLogger(__name__)
 # Constants
 # ─────────────────────────────────────────────────────────────────────────────
 
-PLACES_API_KEY = os.getenv("GOOGLE_PLACES_API_KEY", "")
+# PLACES_BACKEND=fake serves every call from places_fake.FakePlacesServer (local dev)
+PLACES_BACKEND = os.getenv("PLACES_BACKEND", "google")
+
+PLACES_API_KEY = os.getenv("GOOGLE_PLACES_API_KEY", "") or ("fake" if PLACES_BACKEND == "fake" else "")
 
 # Nearby Search endpoint (Places API legacy — well-supported, simpler response)
 NEARBY_SEARCH_URL = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
@@ -52,8 +71,12 @@ PLACE_PHOTO_URL   = "https://maps.googleapis.com/maps/api/place/photo"
 # Cache: re-fetch after this many hours
 CACHE_TTL_HOURS = 24
 
-# If this many gyms already exist near a coordinate (within ~3 km) and are fresh → skip API call
+# If this many gyms already exist near a coordinate (within AREA_RADIUS_KM) and are fresh → skip API call
 MIN_GYMS_CACHED_FOR_AREA = 5
+AREA_RADIUS_KM = 3.0
+
+# Nearby Search answers one page of at most this many results per request
+NEARBY_PAGE_SIZE = 20
 
 # Fields to request from Place Details (reduces billing)
 DETAILS_FIELDS = (
@@ -71,6 +94,13 @@ NEARBY_FIELDS = (
 # Timeout for external HTTP calls (seconds)
 HTTP_TIMEOUT = 10
 
+# Shared connection pool for every Places call (search, details, photos)
+POOL_LIMITS = httpx.Limits(
+    max_connections=int(os.getenv("PLACES_MAX_CONNECTIONS", "50")),
+    max_keepalive_connections=int(os.getenv("PLACES_MAX_KEEPALIVE", "20")),
+    keepalive_expiry=60,
+)
+
 # ── Known premium chains (India-centric, case-insensitive substring match) ───
 PREMIUM_CHAINS: list[tuple[str, str]] = [
     # (match_keyword, normalised_display_name)
@@ -189,43 +219,93 @@ def _infer_amenities(place: dict) -> dict:
     }
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Pooled HTTP client
+# ─────────────────────────────────────────────────────────────────────────────
+
+# One client per event loop — httpx connections are bound to the loop that
+# opened them (uvicorn, APScheduler jobs and tests each run their own)
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+_clients_lock = threading.Lock()
+_transport: Optional[httpx.AsyncBaseTransport] = None
+if PLACES_BACKEND == "fake":
+    from app.services.places_fake import FakePlacesServer
+    _transport = FakePlacesServer().transport()
+
+
+def get_places_client() -> httpx.AsyncClient:
+    """Pooled keep-alive client for the running loop. Call from a coroutine."""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _clients.get(loop)
+        if client is None or client.is_closed:
+            client = _clients[loop] = httpx.AsyncClient(
+                timeout=HTTP_TIMEOUT,
+                follow_redirects=True,
+                limits=POOL_LIMITS,
+                transport=_transport,
+            )
+        return client
+
+
+def set_places_transport(transport: Optional[httpx.AsyncBaseTransport]) -> None:
+    """Route Places traffic through `transport` (tests / local fake); None restores the network."""
+    global _transport
+    with _clients_lock:
+        _transport = transport
+        _clients.clear()
+
+
+async def close_places_clients() -> None:
+    """Close the running loop's pool. Called on app shutdown."""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # API calls
 # ─────────────────────────────────────────────────────────────────────────────
 
-async def search_nearby_gyms(lat: float, lng: float, radius_m: int = 3000) -> list[dict]:
+async def nearby_search(lat: float, lng: float, radius_m: int = 3000) -> list[dict]:
     """
     Call Google Places Nearby Search for gyms within radius_m metres.
-    Returns a list of raw place result dicts (may be empty on error).
+    Returns the raw place result dicts; raises on HTTP / API errors so
+    callers can tell "no gyms here" from "Google failed".
     """
-    if not PLACES_API_KEY:
-        logger.error("[Places] GOOGLE_PLACES_API_KEY not set — cannot fetch gyms.")
-        return []
-
     params = {
         "location": f"{lat},{lng}",
         "radius":   radius_m,
         "type":     "gym",
         "key":      PLACES_API_KEY,
     }
+    resp = await get_places_client().get(NEARBY_SEARCH_URL, params=params)
+    resp.raise_for_status()
+    data = resp.json()
 
-    try:
-        async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
-            resp = await client.get(NEARBY_SEARCH_URL, params=params)
-            resp.raise_for_status()
-            data = resp.json()
+    status = data.get("status")
+    if status not in ("OK", "ZERO_RESULTS"):
+        raise RuntimeError(f"Nearby search status={status}")
 
-        status = data.get("status")
-        if status not in ("OK", "ZERO_RESULTS"):
-            logger.warning(f"[Places] Nearby search status={status} lat={lat} lng={lng}")
-            return []
+    results = data.get("results", [])
+    logger.info(f"[Places] Nearby search → {len(results)} gyms at ({lat:.4f},{lng:.4f})")
+    return results
 
-        results = data.get("results", [])
-        logger.info(f"[Places] Nearby search → {len(results)} gyms at ({lat:.4f},{lng:.4f})")
-        return results
 
+async def search_nearby_gyms(lat: float, lng: float, radius_m: int = 3000) -> list[dict]:
+    """nearby_search() that logs and returns [] on any error."""
+    if not PLACES_API_KEY:
+        logger.error("[Places] GOOGLE_PLACES_API_KEY not set — cannot fetch gyms.")
+        return []
+
+    try:
+        return await nearby_search(lat, lng, radius_m)
     except Exception as e:
-        logger.error(f"[Places] Nearby search error: {e}")
+        logger.error(f"[Places] Nearby search error lat={lat} lng={lng}: {e}")
         return []
 
 
@@ -244,10 +324,9 @@ async def get_place_details(place_id: str) -> Optional[dict]:
     }
 
     try:
-        async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
-            resp = await client.get(PLACE_DETAILS_URL, params=params)
-            resp.raise_for_status()
-            data = resp.json()
+        resp = await get_places_client().get(PLACE_DETAILS_URL, params=params)
+        resp.raise_for_status()
+        data = resp.json()
 
         if data.get("status") != "OK":
             logger.warning(f"[Places] Details status={data.get('status')} place_id={place_id}")
@@ -264,22 +343,17 @@ async def get_place_details(place_id: str) -> Optional[dict]:
 # DB upsert
 # ─────────────────────────────────────────────────────────────────────────────
 
-def upsert_gym_from_place(db: Session, place: dict, details: Optional[dict] = None) -> Gym:
+def _place_fields(place: dict, details: Optional[dict] = None) -> tuple[dict, dict]:
     """
-    Create or update a Gym row from a Google Places result.
-    If `details` is provided (from Place Details API), enriches phone/hours/website.
-    Always updates GymAmenities (creating if missing).
-    Returns the Gym ORM object.
+    (Gym column values, amenity flags) for a Places result. Phone and
+    website only come from Place Details, so they're left out otherwise
+    rather than wiping what an earlier Details call stored.
     """
-    place_id = place["place_id"]
-
     # Use detailed result if available, fall back to nearby result
     source = details or place
 
-    # Coordinates
-    location = place.get("geometry", {}).get("location", {})
-    lat = location.get("lat")
-    lng = location.get("lng")
+    # Coordinates — the detail refresh passes a bare {"place_id"} as `place`
+    location = (place.get("geometry") or source.get("geometry") or {}).get("location", {})
 
     # Address — Place Details gives formatted_address, Nearby gives vicinity
     address = (
@@ -299,8 +373,52 @@ def upsert_gym_from_place(db: Session, place: dict, details: Optional[dict] = No
         "open_now":     opening_hours.get("open_now", None),
     }
 
+    fields = {
+        "name":                  source.get("name") or place.get("name", "Unknown Gym"),
+        "address":               address,
+        "rating":                source.get("rating") or place.get("rating"),
+        "user_ratings_total":    source.get("user_ratings_total") or place.get("user_ratings_total"),
+        "price_level":           source.get("price_level") or place.get("price_level"),
+        "opening_hours_json":    opening_hours_clean,
+        "photo_references_json": photo_refs,
+        "places_fetched_at":     datetime.now(timezone.utc),
+    }
+    if location.get("lat") is not None and location.get("lng") is not None:
+        fields["lat"] = location["lat"]
+        fields["lng"] = location["lng"]
+    if details is not None:
+        fields["phone_number"] = details.get("formatted_phone_number")
+        fields["website"]      = details.get("website")
+
     # Amenity inference
-    amenity_data = _infer_amenities({**place, **(details or {})})
+    return fields, _infer_amenities({**place, **(details or {})})
+
+
+def _apply_place(gym: Gym, fields: dict) -> None:
+    for key, value in fields.items():
+        setattr(gym, key, value)
+    # Marketplace fields — infer from name (don't overwrite if owner has claimed)
+    if not gym.is_claimed:
+        gym.category   = _infer_category(gym.name)
+        gym.chain_name = _infer_chain(gym.name)
+
+
+def _apply_amenities(gym: Gym, amenities: GymAmenities, amenity_data: dict) -> None:
+    # Only update amenities if not claimed (claimed gyms manage their own data)
+    if not gym.is_claimed:
+        for key, value in amenity_data.items():
+            setattr(amenities, key, value)
+
+
+def upsert_gym_from_place(db: Session, place: dict, details: Optional[dict] = None) -> Gym:
+    """
+    Create or update a Gym row from a Google Places result.
+    If `details` is provided (from Place Details API), enriches phone/hours/website.
+    Always updates GymAmenities (creating if missing).
+    Returns the Gym ORM object.
+    """
+    place_id = place["place_id"]
+    fields, amenity_data = _place_fields(place, details)
 
     # Existing gym?
     gym = db.query(Gym).filter(Gym.place_id == place_id).first()
@@ -308,30 +426,11 @@ def upsert_gym_from_place(db: Session, place: dict, details: Optional[dict] = No
     if gym is None:
         gym = Gym(place_id=place_id)
         db.add(gym)
-        logger.info(f"[Places] Creating gym: {source.get('name')} ({place_id})")
+        logger.info(f"[Places] Creating gym: {fields['name']} ({place_id})")
     else:
-        logger.info(f"[Places] Updating gym: {source.get('name')} ({place_id})")
-
-    # Update all fields
-    gym_name = source.get("name") or place.get("name", "Unknown Gym")
-    gym.name                  = gym_name
-    gym.address               = address
-    gym.lat                   = lat
-    gym.lng                   = lng
-    gym.rating                = source.get("rating") or place.get("rating")
-    gym.user_ratings_total    = source.get("user_ratings_total") or place.get("user_ratings_total")
-    gym.phone_number          = source.get("formatted_phone_number")
-    gym.website               = source.get("website")
-    gym.price_level           = source.get("price_level") or place.get("price_level")
-    gym.opening_hours_json    = opening_hours_clean
-    gym.photo_references_json = photo_refs
-    gym.places_fetched_at     = datetime.now(timezone.utc)
-
-    # Marketplace fields — infer from name (don't overwrite if owner has claimed)
-    if not gym.is_claimed:
-        gym.category   = _infer_category(gym_name)
-        gym.chain_name = _infer_chain(gym_name)
+        logger.info(f"[Places] Updating gym: {fields['name']} ({place_id})")
 
+    _apply_place(gym, fields)
     db.flush()  # get gym.id
 
     # Upsert amenities
@@ -339,43 +438,106 @@ def upsert_gym_from_place(db: Session, place: dict, details: Optional[dict] = No
     if amenities is None:
         amenities = GymAmenities(gym_id=gym.id)
         db.add(amenities)
-
-    # Only update amenities if not claimed (claimed gyms manage their own data)
-    if not gym.is_claimed:
-        amenities.is_24_7      = amenity_data["is_24_7"]
-        amenities.has_trainers = amenity_data["has_trainers"]
-        amenities.has_sauna    = amenity_data["has_sauna"]
-        amenities.has_pool     = amenity_data["has_pool"]
-        amenities.is_premium   = amenity_data["is_premium"]
-        amenities.has_parking  = amenity_data["has_parking"]
+    _apply_amenities(gym, amenities, amenity_data)
 
     db.commit()
     db.refresh(gym)
     return gym
 
 
+def _group_by_keys(rows: list[dict]) -> list[list[dict]]:
+    """Split executemany parameter sets into groups that share the same keys."""
+    groups: dict[tuple, list[dict]] = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    return list(groups.values())
+
+
+def bulk_upsert_places(db: Session, places: list[dict]) -> int:
+    """
+    Upsert a whole Nearby Search page set-based: one SELECT of the existing
+    gyms, one executemany INSERT / UPDATE for gyms and again for amenities.
+    Bulk statements skip mapper hooks, so the geohash is set here. Does not
+    commit — the caller owns the transaction. Returns the number of places
+    written.
+    """
+    by_id = {p["place_id"]: p for p in places if p.get("place_id")}
+    if not by_id:
+        return 0
+
+    existing = {
+        row.place_id: row
+        for row in db.query(Gym.place_id, Gym.id, Gym.is_claimed).filter(Gym.place_id.in_(list(by_id)))
+    }
+
+    new_gyms, gym_updates = [], []
+    for place_id, place in by_id.items():
+        fields, _ = _place_fields(place)
+        if fields.get("lat") is not None:
+            fields["geohash"] = encode_geohash(fields["lat"], fields["lng"])
+        current = existing.get(place_id)
+        if current is None or not current.is_claimed:
+            fields["category"]   = _infer_category(fields["name"])
+            fields["chain_name"] = _infer_chain(fields["name"])
+        if current is None:
+            new_gyms.append({"place_id": place_id, **fields})
+        else:
+            gym_updates.append({"id": current.id, **fields})
+
+    # Places without geometry carry no lat / lng / geohash keys — executemany
+    # needs one key set per statement, and an update must not null them
+    for rows in _group_by_keys(new_gyms):
+        db.execute(insert(Gym.__table__), rows)
+    for rows in _group_by_keys(gym_updates):
+        db.execute(update(Gym), rows)
+
+    # gym_id for every place, then amenities — claimed gyms manage their own
+    gym_ids = dict(db.query(Gym.place_id, Gym.id).filter(Gym.place_id.in_(list(by_id))).all())
+    claimed = {row.id for row in existing.values() if row.is_claimed}
+    amenity_ids = dict(
+        db.query(GymAmenities.gym_id, GymAmenities.id)
+        .filter(GymAmenities.gym_id.in_(list(gym_ids.values())))
+        .all()
+    )
+    new_amenities, amenity_updates = [], []
+    for place_id, place in by_id.items():
+        gym_id = gym_ids[place_id]
+        amenity_data = _infer_amenities(place)
+        if gym_id not in amenity_ids:
+            new_amenities.append({"gym_id": gym_id, **amenity_data})
+        elif gym_id not in claimed:
+            amenity_updates.append({"id": amenity_ids[gym_id], **amenity_data})
+
+    if new_amenities:
+        db.execute(insert(GymAmenities.__table__), new_amenities)
+    if amenity_updates:
+        db.execute(update(GymAmenities), amenity_updates)
+
+    logger.info(f"[Places] Bulk upsert: {len(by_id)} places ({len(new_gyms)} new)")
+    return len(by_id)
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Area freshness check
 # ─────────────────────────────────────────────────────────────────────────────
 
-def area_needs_sync(db: Session, lat: float, lng: float, radius_deg: float = 0.03) -> bool:
+def area_needs_sync(db: Session, lat: float, lng: float, radius_km: float = AREA_RADIUS_KM) -> bool:
     """
     Return True if we need to call Places API for this area.
-    False = we already have enough fresh gyms nearby.
-    radius_deg ≈ 0.03° ≈ 3 km
+    False = we already have enough fresh gyms within radius_km.
     """
     cutoff = datetime.now(timezone.utc) - timedelta(hours=CACHE_TTL_HOURS)
 
-    fresh_count = (
-        db.query(Gym)
+    candidates = (
+        db.query(Gym.lat, Gym.lng)
         .filter(
-            Gym.lat.between(lat - radius_deg, lat + radius_deg),
-            Gym.lng.between(lng - radius_deg, lng + radius_deg),
+            within_cells(Gym.geohash, covering_cells(lat, lng, radius_km)),
             Gym.places_fetched_at.isnot(None),
             Gym.places_fetched_at >= cutoff,
         )
-        .count()
+        .all()
     )
+    fresh_count = len(within_radius(candidates, lat, lng, radius_km))
 
     needs = fresh_count < MIN_GYMS_CACHED_FOR_AREA
     logger.info(
@@ -0,0 +1,123 @@
+"""
+places_fake.py
+==============
+Local stand-in for the Google Places endpoints places.py calls — Nearby
+Search, Place Details and Place Photo — served through an httpx transport,
+so no network or API key is involved.
+
+The fake world is a lattice of gyms every SPACING_DEG degrees. Nearby Search
+returns the nearest lattice points within the radius (max 20, like Google's
+first page); Details and Photo answer for any place_id it handed out.
+Request counts per endpoint are kept in `calls`.
+
+Use:
+  tests          server = FakePlacesServer(); set_places_transport(server.transport())
+  local dev      PLACES_BACKEND=fake — places.py installs one at import
+"""
+
+import asyncio
+import math
+from collections import Counter
+from typing import Optional
+
+import httpx
+
+SPACING_DEG = 0.004     # ≈ 445 m between fake gyms
+PAGE_SIZE = 20
+
+_NAMES = [
+    "Cult.fit", "Gold's Gym", "Anytime Fitness", "Iron Paradise", "Flex Studio",
+    "Aqua Swim Centre", "Zen Yoga Shala", "Knockout Boxing Club", "Core Strength",
+    "Elite Performance",
+]
+
+
+class FakePlacesServer:
+    def __init__(self, spacing_deg: float = SPACING_DEG, latency: float = 0.0):
+        self.spacing_deg = spacing_deg
+        self.latency = latency
+        self.fail = False            # True → every request answers 500
+        self.calls: Counter = Counter()
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        # …/place/nearbysearch/json | …/place/details/json | …/place/photo
+        parts = request.url.path.rstrip("/").split("/")
+        endpoint = parts[-2] if parts[-1] == "json" else parts[-1]
+        self.calls[endpoint] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail:
+            return httpx.Response(500, json={"status": "UNKNOWN_ERROR"})
+
+        params = request.url.params
+        if endpoint == "nearbysearch":
+            lat, lng = (float(v) for v in params["location"].split(","))
+            results = self.nearby(lat, lng, int(float(params.get("radius", 3000))))
+            return httpx.Response(200, json={"status": "OK" if results else "ZERO_RESULTS", "results": results})
+        if endpoint == "details":
+            place = self.place(params["place_id"], details=True)
+            if place is None:
+                return httpx.Response(200, json={"status": "NOT_FOUND"})
+            return httpx.Response(200, json={"status": "OK", "result": place})
+        if endpoint == "photo":
+            body = f"fake-photo:{params.get('photoreference')}:{params.get('maxwidth')}".encode()
+            return httpx.Response(200, content=body, headers={"content-type": "image/jpeg"})
+        return httpx.Response(404, json={"status": "INVALID_REQUEST"})
+
+    # ──────────────────────────────────────────────────────────
+    # Fake world
+    # ──────────────────────────────────────────────────────────
+
+    def nearby(self, lat: float, lng: float, radius_m: int) -> list:
+        r_lat = radius_m / 111_320
+        r_lng = r_lat / max(math.cos(math.radians(lat)), 0.01)
+        found = []
+        for i in range(math.floor((lat - r_lat) / self.spacing_deg), math.ceil((lat + r_lat) / self.spacing_deg) + 1):
+            for j in range(math.floor((lng - r_lng) / self.spacing_deg), math.ceil((lng + r_lng) / self.spacing_deg) + 1):
+                plat, plng = i * self.spacing_deg, j * self.spacing_deg
+                d = _distance_m(lat, lng, plat, plng)
+                if d <= radius_m:
+                    found.append((d, i, j))
+        found.sort()
+        return [self._place(i, j) for _, i, j in found[:PAGE_SIZE]]
+
+    def place(self, place_id: str, details: bool = False) -> Optional[dict]:
+        try:
+            _, i, j = place_id.split("_")
+            place = self._place(int(i), int(j))
+        except ValueError:
+            return None
+        if details:
+            place.update({
+                "formatted_address": f"{place['vicinity']}, Fake City",
+                "formatted_phone_number": f"+91 {abs(int(i)) % 100000:05d} {abs(int(j)) % 100000:05d}",
+                "website": f"https://example.com/{place_id}",
+            })
+        return place
+
+    def _place(self, i: int, j: int) -> dict:
+        brand = _NAMES[(i * 31 + j) % len(_NAMES)]
+        place_id = f"fake_{i}_{j}"
+        return {
+            "place_id": place_id,
+            "name": f"{brand} {abs(i) % 1000}-{abs(j) % 1000}",
+            "vicinity": f"{abs(i) % 100} Fake Street",
+            "geometry": {"location": {"lat": i * self.spacing_deg, "lng": j * self.spacing_deg}},
+            "rating": round(3.5 + ((i + j) % 15) / 10, 1),
+            "user_ratings_total": (i * j) % 900 + 12,
+            "price_level": (i + 2 * j) % 5,
+            "opening_hours": {"open_now": (i + j) % 2 == 0},
+            "photos": [{"photo_reference": f"{place_id}_photo_{k}"} for k in range(2)],
+            "types": ["gym", "health"],
+        }
+
+
+def _distance_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    d_lat = math.radians(lat2 - lat1)
+    d_lng = math.radians(lng2 - lng1)
+    a = (math.sin(d_lat / 2) ** 2
+         + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lng / 2) ** 2)
+    return 6_371_000 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from app.models.user_ai_preferences import UserAIPreferences
+from app.services.context_cache import context_cache
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +48,7 @@ def save_preferences(db: Session, user_id: int, preference_type: str, data: dict
         existing.data = data
         db.commit()
         db.refresh(existing)
+        context_cache.invalidate(user_id)
         return existing
     else:
         row = UserAIPreferences(
@@ -57,6 +59,7 @@ def save_preferences(db: Session, user_id: int, preference_type: str, data: dict
         db.add(row)
         db.commit()
         db.refresh(row)
+        context_cache.invalidate(user_id)
         return row
 
 
@@ -76,6 +79,7 @@ def clear_preferences(db: Session, user_id: int, preference_type: str) -> bool:
     if row:
         db.delete(row)
         db.commit()
+        context_cache.invalidate(user_id)
         return True
     return False
 
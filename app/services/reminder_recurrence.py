@@ -0,0 +1,359 @@
+"""
+reminder_recurrence.py
+======================
+Recurrence engine for reminders.
+
+A recurring reminder is a chain of Reminder rows, one per occurrence; the
+next row is spawned when the current one fires (dispatcher) or is
+acknowledged / missed (endpoints). This module owns the recurrence math
+for that chain and precomputes what comes next:
+
+  • rule_for()         — parses recurrence / recurrence_days / interval once
+                         per distinct combination (LRU), not once per call
+  • ReminderSchedule   — per-reminder expansion over a rolling horizon of
+                         REMINDER_EXPANSION_DAYS, stored as a tuple of epoch
+                         seconds and recomputed only when the row's schedule
+                         changes or the horizon rolls over (once a day)
+  • upcoming()         — occurrences for a user in a window: pending rows
+                         plus projections past each chain's latest row,
+                         loading only those rows, not the fired history.
+                         Serves GET /reminders?upcoming_days=N and home.
+  • spawn_next()       — materialises the next row of a chain, idempotently,
+                         so fire → acknowledge never double-spawns
+
+All datetimes are UTC; the DB stores them naive.
+"""
+
+import calendar
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone, timedelta
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.reminder import Reminder
+
+logger = logging.getLogger(__name__)
+
+REMINDER_EXPANSION_DAYS = int(os.getenv("REMINDER_EXPANSION_DAYS", "14"))
+MAX_CACHED_SERIES = 50_000
+
+_WEEKDAY_MAP = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+
+
+def _utc(dt: datetime) -> datetime:
+    """Aware UTC — naive values are assumed to already be UTC."""
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _naive(dt: datetime) -> datetime:
+    return _utc(dt).replace(tzinfo=None)
+
+
+# ─────────────────────────────────────────────────────────────
+# Rules
+# ─────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class RecurrenceRule:
+    kind: str                  # once | daily | weekly | biweekly | monthly | specific | custom
+    weekdays: tuple = ()       # specific → sorted weekday ints (Mon=0)
+    interval_days: int = 0     # custom → every N days
+
+    @property
+    def repeats(self) -> bool:
+        return self.kind != "once"
+
+
+ONCE = RecurrenceRule("once")
+
+
+@lru_cache(maxsize=1024)
+def rule_for(
+    recurrence: Optional[str],
+    recurrence_days: Optional[str],
+    recurrence_interval: Optional[int],
+) -> RecurrenceRule:
+    """Parse a reminder's recurrence columns. Unrecognised / incomplete rules never repeat."""
+    if recurrence in ("daily", "weekly", "biweekly", "monthly"):
+        return RecurrenceRule(recurrence)
+
+    if recurrence == "specific" and recurrence_days:
+        try:
+            days = json.loads(recurrence_days)  # e.g. ["mon","wed","fri"]
+            weekdays = tuple(sorted({_WEEKDAY_MAP[d.lower()] for d in days if d.lower() in _WEEKDAY_MAP}))
+        except Exception:
+            return ONCE
+        return RecurrenceRule("specific", weekdays=weekdays) if weekdays else ONCE
+
+    if recurrence == "custom" and recurrence_interval:
+        return RecurrenceRule("custom", interval_days=recurrence_interval)
+
+    return ONCE
+
+
+def rule_of(reminder: Reminder) -> RecurrenceRule:
+    return rule_for(reminder.recurrence, reminder.recurrence_days, reminder.recurrence_interval)
+
+
+def next_occurrence(rule: RecurrenceRule, at: datetime) -> Optional[datetime]:
+    """
+    The occurrence after `at` (aware UTC), or None for one-off rules.
+
+      daily / weekly / biweekly → +1d / +7d / +14d
+      monthly  → same day next month, clamped to month-end
+      specific → next listed weekday strictly after `at`'s
+      custom   → +interval_days
+    """
+    at = _utc(at)
+
+    if rule.kind == "daily":
+        return at + timedelta(days=1)
+    if rule.kind == "weekly":
+        return at + timedelta(weeks=1)
+    if rule.kind == "biweekly":
+        return at + timedelta(weeks=2)
+
+    if rule.kind == "monthly":
+        month = at.month + 1
+        year = at.year
+        if month > 12:
+            month = 1
+            year += 1
+        max_day = calendar.monthrange(year, month)[1]
+        return at.replace(year=year, month=month, day=min(at.day, max_day))
+
+    if rule.kind == "specific":
+        current = at.weekday()
+        for wd in rule.weekdays:
+            if wd > current:
+                return at + timedelta(days=wd - current)
+        # All target days are earlier in the week — wrap to next week
+        return at + timedelta(days=(7 - current) + rule.weekdays[0])
+
+    if rule.kind == "custom":
+        return at + timedelta(days=rule.interval_days)
+
+    return None
+
+
+def expand(rule: RecurrenceRule, anchor: datetime, until: datetime) -> list:
+    """[anchor, next, next, …] up to and including `until` — the same chain spawning would produce."""
+    occurrences = [_utc(anchor)]
+    until = _utc(until)
+    while rule.repeats:
+        nxt = next_occurrence(rule, occurrences[-1])
+        if nxt is None or nxt > until:
+            break
+        occurrences.append(nxt)
+    return occurrences
+
+
+# ─────────────────────────────────────────────────────────────
+# Precomputed schedule
+# ─────────────────────────────────────────────────────────────
+
+@dataclass
+class _Expansion:
+    signature: tuple
+    until: float               # covers occurrences up to this epoch
+    occurrences: tuple         # epoch seconds, ascending; [0] is the row's own scheduled_at
+
+
+class ReminderSchedule:
+    """
+    In-process cache of reminder expansions, keyed by reminder id.
+
+    An entry is reused while the row's (scheduled_at, recurrence …) signature
+    is unchanged and its horizon still covers now + expansion days, so a
+    series is expanded at most once a day. LRU-bounded at MAX_CACHED_SERIES.
+    """
+
+    def __init__(self, days: int = REMINDER_EXPANSION_DAYS, max_series: int = MAX_CACHED_SERIES):
+        self.days = days
+        self.max_series = max_series
+        self._cache: "OrderedDict[int, _Expansion]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def occurrences(self, reminder: Reminder, now: Optional[datetime] = None) -> tuple:
+        """Epoch seconds of this row's occurrence and its projections within the horizon."""
+        anchor = _utc(reminder.scheduled_at)
+        signature = (anchor.timestamp(), reminder.recurrence, reminder.recurrence_days, reminder.recurrence_interval)
+        start = max(anchor, _utc(now) if now else datetime.now(timezone.utc))
+        needed = (start + timedelta(days=self.days)).timestamp()
+
+        with self._lock:
+            entry = self._cache.get(reminder.id)
+            if entry is not None and entry.signature == signature and entry.until >= needed:
+                self._cache.move_to_end(reminder.id)
+                self.hits += 1
+                return entry.occurrences
+
+        # Expand to the end of the horizon's UTC day so the entry lasts until tomorrow
+        until = (start + timedelta(days=self.days + 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        occurrences = tuple(dt.timestamp() for dt in expand(rule_of(reminder), anchor, until))
+
+        with self._lock:
+            self.misses += 1
+            self._cache[reminder.id] = _Expansion(signature, until.timestamp(), occurrences)
+            self._cache.move_to_end(reminder.id)
+            while len(self._cache) > self.max_series:
+                self._cache.popitem(last=False)
+        return occurrences
+
+    def next_after(self, reminder: Reminder) -> Optional[datetime]:
+        """The occurrence that follows this row — from the expansion when it's in the horizon."""
+        rule = rule_of(reminder)
+        if not rule.repeats:
+            return None
+        occurrences = self.occurrences(reminder)
+        if len(occurrences) > 1:
+            return datetime.fromtimestamp(occurrences[1], timezone.utc)
+        return next_occurrence(rule, reminder.scheduled_at)   # e.g. monthly, beyond the horizon
+
+    def invalidate(self, reminder_id: int) -> None:
+        with self._lock:
+            self._cache.pop(reminder_id, None)
+
+    def stats(self) -> dict:
+        return {"series": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+# Global singleton — import this everywhere
+reminder_schedule = ReminderSchedule()
+
+
+_SERIES_COLUMNS = (
+    Reminder.type, Reminder.title, Reminder.message,
+    Reminder.recurrence, Reminder.recurrence_days, Reminder.recurrence_interval,
+)
+
+
+def _series_key(reminder: Reminder) -> tuple:
+    return tuple(getattr(reminder, column.key) for column in _SERIES_COLUMNS)
+
+
+def upcoming(db: Session, user_id: int, start: datetime, end: datetime) -> list:
+    """
+    Occurrences in [start, end] for the user's active reminders, ascending:
+    [(aware UTC datetime, Reminder, projected)].
+
+    A row contributes its own time while it hasn't fired; the latest row of
+    each chain also contributes its projected occurrences. Fired rows stay
+    active, so only unfired rows in the window plus each recurring chain's
+    latest row (ROW_NUMBER over the series key) are loaded — never the
+    user's whole history. No recurrence math beyond cache misses.
+    """
+    start, end = _utc(start), _utc(end)
+    ranked = (
+        select(
+            Reminder.id,
+            func.row_number().over(
+                partition_by=_SERIES_COLUMNS,
+                order_by=(Reminder.scheduled_at.desc(), Reminder.id.desc()),
+            ).label("rank"),
+        )
+        .where(
+            Reminder.user_id == user_id,
+            Reminder.is_active == True,
+            Reminder.scheduled_at <= _naive(end),
+            Reminder.recurrence.isnot(None),
+            Reminder.recurrence != "once",
+        )
+        .subquery()
+    )
+    rows = (
+        db.query(Reminder)
+        .filter(
+            Reminder.user_id == user_id,
+            Reminder.is_active == True,
+            or_(
+                Reminder.id.in_(select(ranked.c.id).where(ranked.c.rank == 1)),
+                and_(
+                    Reminder.missed_processed == False,
+                    Reminder.scheduled_at >= _naive(start),
+                    Reminder.scheduled_at <= _naive(end),
+                ),
+            ),
+        )
+        .order_by(Reminder.scheduled_at.asc(), Reminder.id.asc())
+        .all()
+    )
+
+    heads = {}
+    for reminder in rows:
+        heads[_series_key(reminder)] = reminder     # ascending → last one wins
+
+    lo, hi = start.timestamp(), end.timestamp()
+    out = []
+    for reminder in rows:
+        anchor = _utc(reminder.scheduled_at).timestamp()
+        if not reminder.missed_processed and lo <= anchor <= hi:
+            out.append((anchor, reminder, False))
+        if heads[_series_key(reminder)] is reminder and rule_of(reminder).repeats:
+            for ts in reminder_schedule.occurrences(reminder, now=start)[1:]:
+                if ts > hi:
+                    break
+                if ts >= lo:
+                    out.append((ts, reminder, True))
+
+    out.sort(key=lambda item: (item[0], item[1].id))
+    return [(datetime.fromtimestamp(ts, timezone.utc), reminder, projected) for ts, reminder, projected in out]
+
+
+# ─────────────────────────────────────────────────────────────
+# Chain spawning
+# ─────────────────────────────────────────────────────────────
+
+def spawn_next(db: Session, reminder: Reminder) -> Optional[Reminder]:
+    """
+    Add (and flush) the chain's next row, or return it if it already exists.
+    None for one-off reminders. The caller commits.
+    """
+    next_dt = reminder_schedule.next_after(reminder)
+    if next_dt is None:
+        return None
+    next_at = _naive(next_dt)
+
+    existing = (
+        db.query(Reminder)
+        .filter(
+            Reminder.user_id == reminder.user_id,
+            Reminder.scheduled_at == next_at,
+            Reminder.recurrence == reminder.recurrence,
+            Reminder.title == reminder.title,
+            Reminder.message == reminder.message,
+        )
+        .first()
+    )
+    if existing is not None:
+        return existing
+
+    next_reminder = Reminder(
+        user_id             = reminder.user_id,
+        type                = reminder.type,
+        title               = reminder.title,
+        message             = reminder.message,
+        scheduled_at        = next_at,
+        recurrence          = reminder.recurrence,
+        recurrence_days     = reminder.recurrence_days,
+        recurrence_interval = reminder.recurrence_interval,
+        category_meta       = reminder.category_meta,
+        is_active           = True,
+        consent_required    = reminder.consent_required,
+        missed_processed    = False,
+    )
+    db.add(next_reminder)
+    db.flush()   # get the ID without a full commit
+    return next_reminder
@@ -0,0 +1,115 @@
+from datetime import date, datetime, timedelta
+
+from app.models.fitness_tracking import ActivityDay, SessionStatus, UserStreak, WorkoutSession
+from app.services.activity_calendar import (
+    backfill, completed_days, get_streak, live_streak, record_session, streak_as_of,
+)
+
+DAY = datetime(2026, 3, 10, 18, 0)
+
+
+def _record(db, uid, days_ago, status=SessionStatus.COMPLETED):
+    at = DAY - timedelta(days=days_ago)
+    db.add(WorkoutSession(
+        user_id=uid, status=status, started_at=at - timedelta(minutes=45),
+        completed_at=at if status == SessionStatus.COMPLETED else None,
+    ))
+    record_session(db, uid, status, at)
+    db.commit()
+
+
+def _snapshot(db, uid):
+    streak = get_streak(db, uid)
+    days = {
+        (a.date, a.completed_sessions, a.abandoned_sessions)
+        for a in db.query(ActivityDay).filter(ActivityDay.user_id == uid)
+    }
+    return (streak.current_streak, streak.longest_streak, streak.last_active_date), days
+
+
+def test_incremental_streak(db_session, test_user):
+    uid = test_user.id
+    for days_ago in (6, 5, 4):
+        _record(db_session, uid, days_ago)
+    _record(db_session, uid, 2)                       # gap on day 3 → restart
+    _record(db_session, uid, 1, SessionStatus.ABANDONED)
+    _record(db_session, uid, 2)                       # second session, same day
+
+    streak = get_streak(db_session, uid)
+    assert (streak.current_streak, streak.longest_streak) == (1, 3)
+    assert streak.last_active_date == (DAY - timedelta(days=2)).date()
+
+    today = DAY.date()
+    assert live_streak(streak, today) == 0
+    assert streak_as_of(streak, today - timedelta(days=2)) == 1
+    assert completed_days(db_session, uid, today - timedelta(days=7), today) == {
+        (DAY - timedelta(days=d)).date() for d in (6, 5, 4, 2)
+    }
+
+    # Back-dated completion bridges the gap
+    _record(db_session, uid, 3)
+    streak = get_streak(db_session, uid)
+    assert (streak.current_streak, streak.longest_streak) == (5, 5)
+    assert live_streak(streak, today - timedelta(days=1)) == 5
+
+
+def test_streak_as_of_day_before_last_active():
+    streak = UserStreak(user_id=1, current_streak=4, longest_streak=4, last_active_date=date(2026, 3, 10))
+    assert streak_as_of(streak, date(2026, 3, 9)) == 3
+    assert streak_as_of(streak, date(2026, 3, 8)) == 0
+    assert live_streak(streak, date(2026, 3, 11)) == 4
+    assert live_streak(None, date(2026, 3, 11)) == 0
+
+
+def test_backfill_matches_incremental(db_session, test_user):
+    uid = test_user.id
+    for days_ago in (9, 8, 6, 5, 4):
+        _record(db_session, uid, days_ago)
+    _record(db_session, uid, 4)
+    _record(db_session, uid, 3, SessionStatus.ABANDONED)
+    incremental = _snapshot(db_session, uid)
+
+    assert backfill(db_session) == 1
+    db_session.expire_all()
+    assert _snapshot(db_session, uid) == incremental
+
+
+def _workout_api(db, user):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.db.database import get_db
+    from app.deps import get_current_user
+    from app.routers import workout_endpoints
+
+    api = FastAPI()
+    api.include_router(workout_endpoints.router)
+    api.dependency_overrides[get_db] = lambda: db
+    api.dependency_overrides[get_current_user] = lambda: user
+    return TestClient(api)
+
+
+def test_abandon_only_applies_to_in_progress_sessions(db_session, test_user):
+    uid = test_user.id
+    client = _workout_api(db_session, test_user)
+    started = datetime.utcnow() - timedelta(minutes=30)
+    done = WorkoutSession(user_id=uid, status=SessionStatus.IN_PROGRESS, started_at=started)
+    dropped = WorkoutSession(user_id=uid, status=SessionStatus.IN_PROGRESS, started_at=started)
+    db_session.add_all([done, dropped])
+    db_session.commit()
+
+    assert client.patch(f"/api/workouts/sessions/{done.id}/complete", json={}).status_code == 200
+    before = _snapshot(db_session, uid)
+
+    # Abandon-after-complete is rejected and leaves the calendar + streak alone
+    assert client.patch(f"/api/workouts/sessions/{done.id}/abandon").status_code == 400
+    db_session.expire_all()
+    assert db_session.get(WorkoutSession, done.id).status == SessionStatus.COMPLETED
+    assert _snapshot(db_session, uid) == before
+
+    # A second abandon doesn't count the session twice
+    assert client.patch(f"/api/workouts/sessions/{dropped.id}/abandon").status_code == 200
+    assert client.patch(f"/api/workouts/sessions/{dropped.id}/abandon").status_code == 400
+    db_session.expire_all()
+    (_, days) = _snapshot(db_session, uid)
+    assert [(c, a) for _, c, a in days] == [(1, 1)]
@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+import app.routers.discovery as discovery
+from app.db.database import get_db
+from app.deps import get_current_user
+from app.models.gym import Gym
+from app.models.gym_amenities import GymAmenities
+from app.models.places_area_sync import PlacesAreaSync
+from app.services import places
+from app.services.area_sync import LOCAL_CELL_PRECISION, AreaSyncService
+from app.services.geo_index import cell_size_deg, decode, encode
+from app.services.places_fake import FakePlacesServer
+from app.services.places import set_places_transport
+
+CHENNAI = (13.0827, 80.2707)
+
+
+@pytest.fixture
+def fake_places(monkeypatch):
+    server = FakePlacesServer(latency=0.05)
+    monkeypatch.setattr(places, "PLACES_API_KEY", "test-key")
+    set_places_transport(server.transport())
+    yield server
+    set_places_transport(None)
+
+
+def test_concurrent_requests_share_one_search_and_one_transaction(db_engine, db_session, fake_places):
+    service = AreaSyncService(sessionmaker(bind=db_engine, autoflush=False))
+    statements = []
+
+    @event.listens_for(db_engine, "before_cursor_execute")
+    def _capture(conn, cursor, statement, params, context, executemany):
+        statements.append(statement.split()[0].upper())
+
+    async def run():
+        # Twenty users scattered inside the same cell
+        points = [(CHENNAI[0] + i * 0.0005, CHENNAI[1] + i * 0.0005) for i in range(20)]
+        waited = await asyncio.gather(*(service.ensure(lat, lng, 5000) for lat, lng in points))
+        assert all(waited)
+        assert await service.ensure(*CHENNAI, 5000) is False   # fresh now
+
+    asyncio.run(run())
+
+    assert fake_places.calls["nearbysearch"] == 1
+    assert service.stats()["coalesced"] == 19
+    assert db_session.query(Gym).count() == 20
+    assert db_session.query(GymAmenities).count() == 20
+    row = db_session.get(PlacesAreaSync, service.cell_for(*CHENNAI))
+    assert row.result_count == 20 and row.radius_m == 5000
+
+    # Set-based write: a few statements for 20 places, not 2 SELECTs + commit each
+    writes = [s for s in statements if s in ("INSERT", "UPDATE")]
+    assert len(writes) <= 3, writes
+
+    # A wider radius than the cell was synced for searches again
+    asyncio.run(service.ensure(*CHENNAI, 8000))
+    assert fake_places.calls["nearbysearch"] == 2
+    assert db_session.query(Gym).count() == 20
+
+
+def test_background_mode_never_waits_and_failures_are_retried(db_engine, db_session, fake_places):
+    service = AreaSyncService(sessionmaker(bind=db_engine, autoflush=False), background=True)
+
+    async def run():
+        fake_places.fail = True
+        assert await service.ensure(*CHENNAI, 3000) is False
+        await service.drain()
+        assert service.stats()["failed"] == 1
+        assert db_session.query(PlacesAreaSync).count() == 0
+
+        fake_places.fail = False
+        assert await service.ensure(*CHENNAI, 3000) is False   # returns before Google answers
+        assert db_session.query(Gym).count() == 0
+        await service.drain()
+
+    asyncio.run(run())
+    assert db_session.query(Gym).count() == 20
+    assert fake_places.calls["nearbysearch"] == 2
+
+
+def test_discovery_feed_through_fake_places(db_engine, db_session, fake_places, monkeypatch):
+    monkeypatch.setattr(discovery, "area_sync", AreaSyncService(sessionmaker(bind=db_engine, autoflush=False)))
+    api = FastAPI()
+    api.include_router(discovery.router)
+    api.dependency_overrides[get_db] = lambda: db_session
+    api.dependency_overrides[get_current_user] = lambda: None
+
+    with TestClient(api) as client:
+        params = {"user_lat": CHENNAI[0], "user_lng": CHENNAI[1], "radius_km": 3, "limit": 5}
+        first = client.get("/discovery/gyms", params=params).json()
+        second = client.get("/discovery/gyms", params=params).json()
+
+    assert len(first) == 5 and first == second
+    assert [g["distance_km"] for g in first] == sorted(g["distance_km"] for g in first)
+    assert fake_places.calls["nearbysearch"] == 1
+
+
+def test_user_at_a_full_cells_edge_gets_a_spot_search(db_engine, db_session, monkeypatch):
+    # Dense fake city: the cell's one 20-result page barely reaches its corners
+    server = FakePlacesServer(spacing_deg=0.002)
+    monkeypatch.setattr(places, "PLACES_API_KEY", "test-key")
+    set_places_transport(server.transport())
+    service = AreaSyncService(sessionmaker(bind=db_engine, autoflush=False))
+    try:
+        cell = service.cell_for(*CHENNAI)
+        lat, lng = decode(cell)
+        h, w = cell_size_deg(len(cell))
+        corner = (lat + h * 0.49, lng + w * 0.49)
+
+        async def run():
+            assert await service.ensure(*CHENNAI, 3000)             # area cell
+            assert await service.ensure(*corner, 3000)              # still thin here → spot cell
+            assert await service.ensure(*corner, 3000) is False     # spot is fresh now
+            assert await service.ensure(*CHENNAI, 3000) is False
+
+        asyncio.run(run())
+    finally:
+        set_places_transport(None)
+
+    assert server.calls["nearbysearch"] == 2
+    spot = db_session.get(PlacesAreaSync, encode(*corner, LOCAL_CELL_PRECISION))
+    assert spot is not None and spot.cell.startswith(cell)
+    assert not places.area_needs_sync(db_session, *corner)
+
+
+def test_bulk_upsert_with_and_without_geometry(db_session):
+    located = FakePlacesServer().place("fake_3270_20067")
+    bare = {"place_id": "no_geometry", "name": "Pop-up Bootcamp", "types": ["gym"]}
+
+    # Mixed key sets in one page, in both orders, inserting then updating
+    for page in ([located, bare], [bare, located]):
+        assert places.bulk_upsert_places(db_session, page) == 2
+        db_session.commit()
+
+    gyms = {g.place_id: g for g in db_session.query(Gym)}
+    assert len(gyms) == 2
+    assert gyms["fake_3270_20067"].lat == located["geometry"]["location"]["lat"]
+    assert gyms["fake_3270_20067"].geohash is not None
+    assert gyms["no_geometry"].lat is None and gyms["no_geometry"].geohash is None
@@ -0,0 +1,86 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+from app.models.health_memory import HealthMemory
+from app.models.vault_item import VaultItem
+from app.models.fitness_tracking import (
+    BodyWeightLog, DietPlan, GoalType, WaterLog, WorkoutSession, SessionStatus,
+)
+from app.services.central_context_loader import (
+    CONTEXT_QUERY_BUDGET, DISLIKED_CATEGORY, RAW_BUCKET, RAW_MEMORY_LIMIT,
+    QueryCounter, load_context_rows,
+)
+from app.services.preference_manager import save_preferences
+
+
+def _memory(db, user, category, content, minutes_ago):
+    db.add(HealthMemory(
+        user_id=user.id, category=category, source="system", content=content,
+        created_at=datetime.utcnow() - timedelta(minutes=minutes_ago),
+    ))
+
+
+def _load(async_session_factory, user):
+    async def run():
+        async with async_session_factory() as adb:
+            return await load_context_rows(adb, user)
+    return asyncio.run(run())
+
+
+def test_memory_windows(db_session, async_session_factory, test_user):
+    for i in range(10):
+        _memory(db_session, test_user, "daily_narrative", {"narrative": f"n{i}"}, i)
+    for i in range(3):
+        _memory(db_session, test_user, "morning_brief", {"brief": f"b{i}"}, i)
+    for i in range(25):
+        _memory(db_session, test_user, "workout", {"event": f"w{i}"}, i)
+    for i in range(30):
+        _memory(db_session, test_user, DISLIKED_CATEGORY, {"item_name": f"d{i}", "item_type": "food"}, i)
+    for i in range(5):
+        _memory(db_session, test_user, "nudge_sent", {"trigger_type": "water_low"}, i)
+    db_session.commit()
+
+    rows = _load(async_session_factory, test_user)
+
+    assert [m.content["narrative"] for m in rows.memories["daily_narrative"]] == [f"n{i}" for i in range(7)]
+    assert rows.latest("morning_brief").content["brief"] == "b0"
+    assert len(rows.memories[RAW_BUCKET]) == RAW_MEMORY_LIMIT
+    assert all(m.category == "workout" for m in rows.memories[RAW_BUCKET])
+    assert len(rows.memories[DISLIKED_CATEGORY]) == 30
+
+
+def test_full_context_within_query_budget(db_session, async_session_factory, test_user):
+    program = VaultItem(user_id=test_user.id, type="workout", category="plan", title="PPL",
+                        content={"days": [{"name": "Push"}, {"name": "Pull"}]})
+    plan = DietPlan(user_id=test_user.id, name="Cut", goal_type=GoalType.CUT, start_date=date.today(),
+                    created_at=datetime.utcnow(), target_calories=2000, target_protein=150,
+                    target_carbs=200, target_fats=60)
+    db_session.add_all([program, plan])
+    db_session.commit()
+    test_user.active_workout_program_id = program.id
+    test_user.active_diet_plan_id = plan.id
+    db_session.add_all([
+        BodyWeightLog(user_id=test_user.id, weight_kg=80),
+        WaterLog(user_id=test_user.id, date=date.today(), glasses=3, target_glasses=8),
+        WorkoutSession(user_id=test_user.id, status=SessionStatus.COMPLETED,
+                       completed_at=datetime.utcnow(), duration_minutes=45, day_number=1),
+    ])
+    _memory(db_session, test_user, "weekly_adaptation", {"report": "r"}, 0)
+    db_session.commit()
+    save_preferences(db_session, test_user.id, "workout", {"goal": "Lose fat"})
+    save_preferences(db_session, test_user.id, "meal", {"diet_type": "Vegan"})
+
+    async def run():
+        async with async_session_factory() as adb:
+            with QueryCounter(adb) as qc:
+                rows = await load_context_rows(adb, test_user)
+            return rows, qc.count
+
+    rows, count = asyncio.run(run())
+
+    assert count <= CONTEXT_QUERY_BUDGET
+    assert rows.queries == count
+    assert rows.program.title == "PPL"
+    assert rows.diet_plan.target_calories == 2000
+    assert rows.sessions[0].duration_minutes == 45
+    assert rows.preferences == {"workout": {"goal": "Lose fat"}, "meal": {"diet_type": "Vegan"}}
@@ -0,0 +1,106 @@
+import asyncio
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db.database import get_async_db
+from app.deps import get_current_user
+from app.models.health_memory import HealthMemory
+from app.services.context_cache import ContextCache, context_cache
+from app.services.memory_writer import write_weight_memory
+from app.services.preference_manager import save_preferences
+
+
+def test_hit_miss_and_ttl():
+    cache = ContextCache(ttl_seconds=60)
+    assert cache.get(1) is None
+    cache.put(1, {"user_name": "A"}, "USER: A")
+    assert cache.get(1) == ({"user_name": "A"}, "USER: A")
+
+    expired = ContextCache(ttl_seconds=0)
+    expired.put(1, {}, "")
+    assert expired.get(1) is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+
+def test_lru_bound():
+    cache = ContextCache(ttl_seconds=60, max_users=2)
+    for uid in (1, 2, 3):
+        cache.put(uid, {}, "")
+    assert cache.get(1) is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_writers_invalidate(db_session, test_user):
+    context_cache.put(test_user.id, {}, "stale")
+    write_weight_memory(db_session, test_user.id, weight_kg=80.0, trend="stable")
+    assert context_cache.get(test_user.id) is None
+
+    context_cache.put(test_user.id, {}, "stale")
+    save_preferences(db_session, test_user.id, "workout", {"goal": "Build muscle"})
+    assert context_cache.get(test_user.id) is None
+
+
+def test_any_health_memory_commit_invalidates(db_session, async_session_factory, test_user):
+    # Direct inserts (routers, nightly jobs) never go through memory_writer
+    context_cache.put(test_user.id, {}, "stale")
+    db_session.add(HealthMemory(user_id=test_user.id, category="workout", source="manual", content={}))
+    db_session.flush()
+    assert context_cache.get(test_user.id) is not None   # not until the commit
+    db_session.commit()
+    assert context_cache.get(test_user.id) is None
+
+    context_cache.put(test_user.id, {}, "stale")
+    db_session.add(HealthMemory(user_id=test_user.id, category="workout", source="manual", content={}))
+    db_session.flush()
+    db_session.rollback()
+    db_session.commit()
+    assert context_cache.get(test_user.id) is not None
+
+    async def _async_insert():
+        async with async_session_factory() as db:
+            db.add(HealthMemory(user_id=test_user.id, category="daily_narrative", source="ai", content={}))
+            await db.commit()
+
+    asyncio.run(_async_insert())
+    assert context_cache.get(test_user.id) is None
+
+
+def test_consecutive_ask_turns_share_the_context(db_session, async_session_factory, test_user, monkeypatch):
+    from app.routers import ai_central
+
+    class FakeCompletions:
+        async def create(self, **kwargs):
+            message = SimpleNamespace(content="answer")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    monkeypatch.setattr(
+        ai_central, "get_openai",
+        lambda model: SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions())),
+    )
+
+    async def async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    api = FastAPI()
+    api.include_router(ai_central.router)
+    api.dependency_overrides[get_async_db] = async_db
+    api.dependency_overrides[get_current_user] = lambda: test_user
+    context_cache.invalidate(test_user.id)
+    before = context_cache.stats()
+
+    with TestClient(api) as client:
+        for question in ("how am I doing?", "and this week?"):
+            body = {"question": question, "flow_context": {"intent": "general"}}
+            assert client.post("/ai/central/ask", json=body).json()["answer"] == "answer"
+
+    after = context_cache.stats()
+    assert db_session.query(HealthMemory).filter_by(category="ai_insight").count() == 2
+    # The first turn builds the context, its ai_insight usage log leaves it
+    # alone, and the second turn reuses it
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
@@ -0,0 +1,76 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.deps import get_current_user
+from app.db.database import get_db
+from app.models.exercise import Exercise, ExerciseFacet
+from app.routers import exercises
+
+
+def _exercise(name, primary, secondary=(), equipment=None, difficulty=None, category="strength", active=True):
+    return Exercise(
+        name=name, primary_muscles=json.dumps(list(primary)), secondary_muscles=json.dumps(list(secondary)),
+        equipment=equipment, difficulty=difficulty, category=category, is_active=active,
+    )
+
+
+def test_facets_follow_writes_and_serve_chips_and_filters(db_engine, db_session):
+    bench = _exercise("Bench Press", ["Chest"], ["Triceps", "Shoulders"], "barbell", "intermediate")
+    db_session.add_all([
+        bench,
+        _exercise("Dumbbell Flyes", ["chest"], [], "dumbbell", "beginner"),
+        _exercise("Tricep Pushdown", ["triceps"], [], "cable", "beginner"),
+        _exercise("Skull Crusher", ["triceps"], ["forearms"], "barbell", "intermediate"),
+        _exercise("Old Pec Deck", ["chest"], [], "machine", "beginner", active=False),
+    ])
+    db_session.commit()
+
+    api = FastAPI()
+    api.include_router(exercises.router)
+    api.dependency_overrides[get_db] = lambda: db_session
+    api.dependency_overrides[get_current_user] = lambda: None
+
+    statements = []
+
+    @event.listens_for(db_engine, "before_cursor_execute")
+    def _capture(conn, cursor, statement, params, context, executemany):
+        statements.append(statement)
+
+    with TestClient(api) as client:
+        filters = client.get("/api/exercises/meta/filters").json()
+        assert filters["muscles"] == ["Chest", "Triceps"]    # primary only, one chip per spelling
+        assert filters["counts"]["muscles"] == {"Chest": 2, "Triceps": 3}   # Bench Press hits triceps too
+        assert filters["counts"]["equipment"] == {"barbell": 2, "cable": 1, "dumbbell": 1}
+        assert filters["difficulty"] == ["beginner", "intermediate"]
+
+        # Disjunctive counts: equipment counted under muscle=triceps, muscles under equipment=barbell
+        narrowed = client.get("/api/exercises/meta/filters", params={"muscle": "Triceps", "equipment": "barbell"}).json()
+        assert narrowed["counts"]["equipment"] == {"barbell": 2, "cable": 1}
+        assert narrowed["counts"]["muscles"] == {"Chest": 1, "Triceps": 2}
+
+        names = lambda **p: sorted(e["name"] for e in client.get("/api/exercises/", params=p).json())
+        assert names(muscle="triceps") == ["Bench Press", "Skull Crusher", "Tricep Pushdown"]
+        assert names(muscle="TRICEPS", equipment="barbell", difficulty="intermediate") == ["Bench Press", "Skull Crusher"]
+        assert names(muscle="chest", equipment="machine") == []
+
+    # Chips and filters are indexed lookups, never ilike over the JSON columns
+    reads = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    assert not any("LIKE" in s.upper() for s in reads)
+
+    # Facets follow updates and deletes; unrelated updates leave them alone
+    bench.primary_muscles = json.dumps(["Chest", "Front Delts"])
+    db_session.commit()
+    facets = {(f.facet, f.value) for f in db_session.query(ExerciseFacet).filter_by(exercise_id=bench.id)}
+    assert ("primary_muscle", "front delts") in facets
+
+    statements.clear()
+    bench.youtube_video_id = "abc123"
+    db_session.commit()
+    assert not any("exercise_facets" in s for s in statements)
+
+    db_session.delete(bench)
+    db_session.commit()
+    assert db_session.query(ExerciseFacet).filter_by(exercise_id=bench.id).count() == 0
@@ -0,0 +1,118 @@
+from datetime import datetime
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models.fitness_tracking import Food, FoodSource
+from app.models.food import FoodItem
+from app.services import food_search as food_search_module
+from app.services.food_search import FOOD, ITEM, FoodSearchIndex
+
+ITEMS = [
+    ("Chicken Breast (grilled)", "Protein", False),
+    ("Chicken, broilers or fryers, breast, meat only, cooked, roasted", "Poultry Products", False),
+    ("Chickpeas, mature seeds, cooked, boiled", "Legumes", False),
+    ("Paneer (full fat)", "Dairy", True),
+    ("Paneer Butter Masala", "North Indian", True),
+    ("Cottage cheese, creamed", "Dairy", False),
+    ("Banana (medium)", "Fruits", False),
+]
+
+
+def _custom(db, name, user_id, times_used=0):
+    food = Food(
+        name=name, calories_per_100g=100, protein_per_100g=10, carbs_per_100g=5, fats_per_100g=2,
+        source=FoodSource.USER_CUSTOM, user_id=user_id, times_used=times_used, created_at=datetime.utcnow(),
+    )
+    db.add(food)
+    db.commit()
+    return food
+
+
+def _names(db, hits):
+    return [db.get(FoodItem if h.kind == ITEM else Food, h.id).name for h in hits]
+
+
+def test_prefix_typo_and_ranking(db_session, test_user):
+    db_session.add_all(
+        FoodItem(name=n, category=c, is_indian=i, calories=100, is_active=True) for n, c, i in ITEMS
+    )
+    db_session.add(FoodItem(name="Chicken Tikka (inactive)", calories=1, is_active=False))
+    db_session.commit()
+    index = FoodSearchIndex()
+    index.refresh(db_session)
+
+    # Autocomplete: short, name-first matches before USDA prose; inactive rows never show
+    hits = _names(db_session, index.search(db_session, "chick"))
+    assert hits[0] == "Chicken Breast (grilled)"
+    assert "Chickpeas, mature seeds, cooked, boiled" in hits
+    assert "Chicken Tikka (inactive)" not in hits
+    assert _names(db_session, index.search(db_session, "chicken breast"))[:2] == [
+        "Chicken Breast (grilled)",
+        "Chicken, broilers or fryers, breast, meat only, cooked, roasted",
+    ]
+
+    # Typos still land
+    assert _names(db_session, index.search(db_session, "chiken brest"))[0] == "Chicken Breast (grilled)"
+    assert "Paneer (full fat)" in _names(db_session, index.search(db_session, "panner"))
+    assert _names(db_session, index.search(db_session, "bannana")) == ["Banana (medium)"]
+
+    # Category filter and kinds
+    dairy = index.search(db_session, "paneer", kinds=(ITEM,), category="dairy")
+    assert _names(db_session, dairy) == ["Paneer (full fat)"]
+
+    # The searcher's own custom food outranks an identical name
+    mine = _custom(db_session, "Paneer Bhurji", test_user.id)
+    theirs = _custom(db_session, "Paneer Bhurji", test_user.id + 1, times_used=3)
+    index.add_food(mine)
+    index.add_food(theirs)
+    top = index.search(db_session, "paneer bhurji", user_id=test_user.id)
+    assert [(h.kind, h.id) for h in top[:2]] == [(FOOD, mine.id), (FOOD, theirs.id)]
+
+
+def test_picks_up_rows_written_elsewhere(db_engine, db_session, monkeypatch):
+    monkeypatch.setattr(food_search_module, "REFRESH_CHECK_S", 0)
+    db_session.add(FoodItem(name="Rice, white", calories=130, is_active=True))
+    db_session.commit()
+    index = FoodSearchIndex()
+    index.refresh(db_session)
+    assert index.search(db_session, "quinoa") == []
+
+    # A seeder run in another process / session
+    other = sessionmaker(bind=db_engine)()
+    other.add(FoodItem(name="Quinoa, cooked", calories=120, is_active=True))
+    other.commit()
+    other.close()
+
+    # The rebuild runs off the request path; the current index answers meanwhile
+    assert index.search(db_session, "quin") == []
+    index.drain()
+    assert _names(db_session, index.search(db_session, "quin")) == ["Quinoa, cooked"]
+    assert index.stats()["foods"] == 2
+
+
+def test_own_writes_skip_the_rebuild_other_workers_pick_them_up(db_session, test_user, monkeypatch):
+    monkeypatch.setattr(food_search_module, "REFRESH_CHECK_S", 0)
+    db_session.add(FoodItem(name="Oats, rolled", calories=380, is_active=True))
+    db_session.commit()
+    here, there = FoodSearchIndex(), FoodSearchIndex()
+    here.refresh(db_session)
+    there.refresh(db_session)
+    rebuilds = []
+    monkeypatch.setattr(here, "refresh", lambda db: rebuilds.append(db))
+
+    # create_custom_food + a usage bump in this worker: indexed in place, stamp kept in step
+    mine = _custom(db_session, "Overnight Oats", test_user.id)
+    here.add_food(mine)
+    mine.times_used += 1
+    db_session.commit()
+    here.note_use(mine.id)
+    assert [h.id for h in here.search(db_session, "overnight")] == [mine.id]
+    here.drain()
+    assert rebuilds == []
+
+    # Another worker sees both the new row and its popularity on its next check
+    there.search(db_session, "oats")
+    there.drain()
+    hit = there.search(db_session, "overnight", kinds=(FOOD,))
+    assert [h.id for h in hit] == [mine.id]
+    assert there._docs[there._by_key[(FOOD, mine.id)]].times_used == 1
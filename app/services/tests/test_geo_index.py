@@ -0,0 +1,117 @@
+import random
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import app.routers.discovery as discovery
+from app.db.database import get_db
+from app.deps import get_current_user
+from app.models.gym import Gym
+from app.services.geo_index import covering_cells, encode, haversine_km
+
+CHENNAI = (13.0827, 80.2707)
+CITIES = [(19.0760, 72.8777), (28.6139, 77.2090), (12.9716, 77.5946), (22.5726, 88.3639)]
+
+
+def test_covering_cells_contain_every_point_in_radius():
+    assert encode(42.6, -5.6, 5) == "ezs42"
+
+    rng = random.Random(7)
+    for radius_km in (0.5, 3.0, 10.0, 40.0):
+        for _ in range(200):
+            lat, lng = rng.uniform(-60, 60), rng.uniform(-179, 179)
+            cells = covering_cells(lat, lng, radius_km)
+            # Random point inside the circle (via a small offset in degrees)
+            dlat = rng.uniform(-1, 1) * radius_km / 111.32
+            dlng = rng.uniform(-1, 1) * radius_km / 111.32
+            plat, plng = lat + dlat, lng + dlng
+            if haversine_km(lat, lng, plat, plng) > radius_km:
+                continue
+            assert any(encode(plat, plng).startswith(c) for c in cells)
+
+
+def _seed(db, rng, n_far=3000, n_near=40):
+    gyms = []
+    for i in range(n_far):
+        clat, clng = rng.choice(CITIES)
+        gyms.append(Gym(name=f"far-{i}", lat=clat + rng.uniform(-0.2, 0.2), lng=clng + rng.uniform(-0.2, 0.2)))
+    for i in range(n_near):
+        gyms.append(Gym(
+            name=f"near-{i}", lat=CHENNAI[0] + rng.uniform(-0.08, 0.08),
+            lng=CHENNAI[1] + rng.uniform(-0.08, 0.08), chain_name="Cult.fit" if i % 3 == 0 else None,
+        ))
+    db.add_all(gyms)
+    db.commit()
+    return gyms
+
+
+def test_discovery_feed_seeks_geohash_index(db_engine, db_session, monkeypatch):
+    gyms = _seed(db_session, random.Random(3))
+    assert all(g.geohash == encode(g.lat, g.lng) for g in gyms)
+
+    async def no_sync(*args, **kwargs):
+        return False
+    monkeypatch.setattr(discovery.area_sync, "ensure", no_sync)
+
+    api = FastAPI()
+    api.include_router(discovery.router)
+    api.dependency_overrides[get_db] = lambda: db_session
+    api.dependency_overrides[get_current_user] = lambda: None
+
+    statements = []
+
+    @event.listens_for(db_engine, "before_cursor_execute")
+    def _capture(conn, cursor, statement, params, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "geohash >=" in statement:
+            statements.append((statement, params))
+
+    with TestClient(api) as client:
+        resp = client.get("/discovery/gyms", params={
+            "user_lat": CHENNAI[0], "user_lng": CHENNAI[1], "radius_km": 5, "limit": 10,
+        })
+        chains = client.get("/discovery/chains", params={
+            "user_lat": CHENNAI[0], "user_lng": CHENNAI[1], "radius_km": 8,
+        }).json()
+    assert resp.status_code == 200
+
+    expected = sorted(
+        (haversine_km(*CHENNAI, g.lat, g.lng), g.name) for g in gyms
+        if haversine_km(*CHENNAI, g.lat, g.lng) <= 5
+    )[:10]
+    assert [g["name"] for g in resp.json()] == [name for _, name in expected]
+    assert all(g["distance_km"] <= 5 for g in resp.json())
+
+    near_chain = [g for g in gyms if g.chain_name and haversine_km(*CHENNAI, g.lat, g.lng) <= 8]
+    assert [c["branch_count"] for c in chains] == [len(near_chain)]
+
+    # Candidate queries are index range seeks on geohash, never a table scan
+    assert len(statements) == 2
+    with db_engine.connect() as conn:
+        for statement, params in statements:
+            plan = " | ".join(r[-1] for r in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", tuple(params)))
+            assert "ix_gyms_geohash" in plan, plan
+            assert "SCAN gyms" not in plan, plan
+
+
+def test_rank_matches_scalar_reference():
+    from types import SimpleNamespace
+    from app.services.geo_index import rank
+
+    rng = random.Random(11)
+    rows = [
+        SimpleNamespace(lat=CHENNAI[0] + rng.uniform(-0.1, 0.1), lng=CHENNAI[1] + rng.uniform(-0.1, 0.1),
+                        visits=rng.randint(0, 5))
+        for _ in range(2000)
+    ] + [SimpleNamespace(lat=None, lng=None, visits=99)]
+
+    inside = [(haversine_km(*CHENNAI, r.lat, r.lng), r) for r in rows[:-1]]
+    inside = [h for h in inside if h[0] <= 6]
+
+    nearest = rank(rows, *CHENNAI, 6, limit=15)
+    assert [r for _, r in nearest] == [r for _, r in sorted(inside, key=lambda h: h[0])[:15]]
+    assert all(abs(d - haversine_km(*CHENNAI, r.lat, r.lng)) < 1e-9 for d, r in nearest)
+
+    popular = rank(rows, *CHENNAI, 6, limit=15, keys=[[-r.visits for r in rows]])
+    expected = sorted(inside, key=lambda h: (-h[1].visits, h[0]))[:15]
+    assert [r for _, r in popular] == [r for _, r in expected]
@@ -0,0 +1,90 @@
+import asyncio
+import re
+from collections import OrderedDict
+
+import pytest
+
+from app.routers import ai_central
+
+
+def _per_pattern_intent(text: str) -> str | None:
+    # The loop _INTENT_REGEXES replaced: every pattern, in table order
+    t = text.lower().strip()
+    for intent, patterns in ai_central._INTENT_PATTERNS.items():
+        for p in patterns:
+            if re.search(p, t):
+                return intent
+    return None
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Stub classifier: records calls, answers from `llm.replies` (default 'general')."""
+    class _Stub:
+        def __init__(self):
+            self.calls = []
+            self.replies = {}
+
+        async def __call__(self, text):
+            self.calls.append(text)
+            return self.replies.get(text, "general")
+
+    stub = _Stub()
+    monkeypatch.setattr(ai_central, "_classify_intent_llm", stub)
+    monkeypatch.setattr(ai_central, "_intent_cache", OrderedDict())
+    return stub
+
+
+def test_alternation_keeps_per_pattern_precedence(llm):
+    messages = [
+        "Create a workout plan for my legs",
+        "I'm sore, what should I eat today?",       # meal before recovery
+        "remind me to take my medication",           # reminder before medication
+        "I hit a new PR on leg day",                 # workout before celebration
+        "Feeling lazy, show my stats",               # motivate before progress
+        "my progress has hit a plateau",
+        "did I take my medicine this morning",
+        "I need a rest day, feeling exhausted",
+        "I'm so proud, I lost 3 kg this month",
+        "brief me",
+        "stretch after a deload week",
+        "how many calories in a banana",
+    ]
+    for msg in messages:
+        expected = _per_pattern_intent(msg)
+        assert expected is not None, msg
+        assert asyncio.run(ai_central.detect_intent(msg)) == expected, msg
+    assert llm.calls == []
+
+
+def test_intent_cache_is_lru_and_skips_failures(llm, monkeypatch):
+    monkeypatch.setattr(ai_central, "_INTENT_CACHE_SIZE", 2)
+    llm.replies.update({"hi": "check_in", "legs?": "workout", "ok": "general"})
+
+    assert asyncio.run(ai_central.detect_intent("hi")) == "check_in"
+    assert asyncio.run(ai_central.detect_intent("legs?")) == "workout"
+    # "Hi!" normalises onto "hi" — a hit, which also makes it most recent
+    assert asyncio.run(ai_central.detect_intent("Hi!")) == "check_in"
+    assert llm.calls == ["hi", "legs?"]
+
+    asyncio.run(ai_central.detect_intent("ok"))
+    assert list(ai_central._intent_cache) == ["hi", "ok"]   # "legs" evicted, not "hi"
+
+    # A failed classification (None) falls back to general and is not cached
+    async def _failing(text):
+        llm.calls.append(text)
+        return None
+
+    monkeypatch.setattr(ai_central, "_classify_intent_llm", _failing)
+    assert asyncio.run(ai_central.detect_intent("yo")) == "general"
+    assert asyncio.run(ai_central.detect_intent("yo")) == "general"
+    assert llm.calls[-2:] == ["yo", "yo"]
+    assert "yo" not in ai_central._intent_cache
+
+
+def test_inline_injury_regex():
+    assert ai_central._detect_inline_injury("Make me a plan, I hurt my shoulder ") == "Make me a plan, I hurt my shoulder"
+    assert ai_central._detect_inline_injury("bad knee, need a leg day")
+    assert ai_central._detect_inline_injury("I can't lift heavy after surgery")
+    assert ai_central._detect_inline_injury("Lower back pain since Monday")
+    assert ai_central._detect_inline_injury("Create a push day program") is None
@@ -0,0 +1,78 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import app.routers.discovery as discovery
+from app.deps import get_current_user
+from app.services.photo_cache import PhotoCache
+from app.services.places import set_places_transport
+
+
+def _fake_google(calls, delay=0.0):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.params["photoreference"])
+        await asyncio.sleep(delay)
+        body = f"jpeg:{request.url.params['photoreference']}:{request.url.params['maxwidth']}".encode()
+        return httpx.Response(200, content=body.ljust(100, b"."), headers={"content-type": "image/jpeg"})
+    return httpx.MockTransport(handler)
+
+
+def test_concurrent_misses_share_one_fetch_and_lru_evicts(tmp_path):
+    calls = []
+    set_places_transport(_fake_google(calls, delay=0.05))
+    try:
+        cache = PhotoCache(tmp_path, max_bytes=250)
+
+        async def run():
+            photos = await asyncio.gather(*(cache.get("ref-a", 400) for _ in range(20)))
+            assert len({p.path for p in photos}) == 1
+            assert photos[0].path.read_bytes().startswith(b"jpeg:ref-a:400")
+
+            await cache.get("ref-b", 400)
+            await cache.get("ref-a", 400)      # hit — a is now most recent
+            await cache.get("ref-c", 400)      # over 250 bytes → evicts b
+            return photos[0]
+
+        first = asyncio.run(run())
+        assert calls == ["ref-a", "ref-b", "ref-c"]
+        assert cache.stats()["coalesced"] == 19
+        assert cache.stats()["evictions"] == 1
+        assert first.path.exists()
+
+        # Restart: index rebuilt from file names, no refetch
+        reloaded = PhotoCache(tmp_path, max_bytes=250)
+        photo = asyncio.run(reloaded.get("ref-a", 400))
+        assert photo.etag == first.etag and photo.content_type == "image/jpeg"
+        assert calls == ["ref-a", "ref-b", "ref-c"]
+    finally:
+        set_places_transport(None)
+
+
+def test_photo_endpoint_etag_and_conditional_get(tmp_path, monkeypatch):
+    calls = []
+    set_places_transport(_fake_google(calls))
+    monkeypatch.setattr(discovery, "PLACES_API_KEY", "test-key")
+    monkeypatch.setattr(discovery, "photo_cache", PhotoCache(tmp_path))
+
+    api = FastAPI()
+    api.include_router(discovery.router)
+    api.dependency_overrides[get_current_user] = lambda: None
+    try:
+        with TestClient(api) as client:
+            first = client.get("/discovery/photo", params={"ref": "ref-a", "maxwidth": 400})
+            assert first.status_code == 200
+            assert first.headers["content-type"] == "image/jpeg"
+            assert first.content.startswith(b"jpeg:ref-a:400")
+
+            etag = first.headers["etag"]
+            again = client.get(
+                "/discovery/photo", params={"ref": "ref-a", "maxwidth": 400},
+                headers={"If-None-Match": etag},
+            )
+            assert again.status_code == 304
+            assert again.content == b""
+        assert calls == ["ref-a"]
+    finally:
+        set_places_transport(None)
@@ -0,0 +1,101 @@
+"""
+EXPLAIN QUERY PLAN regression tests for the hot tables.
+
+Each test drives a real hot path, captures every SELECT it sends, and
+asks SQLite for the plan. Any full scan of a hot table fails the test —
+a dropped or mis-ordered composite index shows up here before it shows
+up as latency.
+"""
+
+import asyncio
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, select
+
+from app.agent.jobs.nudge_job import prefilter_nudges
+from app.models.health_memory import HealthMemory
+from app.services.central_context_loader import load_context_rows
+from app.services.home_service import HomeService
+from app.services.reminder_evaluator import evaluate_missed_reminders
+
+HOT_TABLES = {"health_memories", "meal_logs", "body_weight_logs", "workout_sessions", "reminders"}
+
+# "SCAN meal_logs", "SCAN reminders USING INDEX ..." — aliases get a _N suffix
+_SCAN = re.compile(r"^SCAN (\w+?)(?:_\d+)?(?: |$)")
+
+
+@contextmanager
+def _captured(engine):
+    statements = []
+
+    def _on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _on_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _on_execute)
+
+
+def _plan(engine, statement, parameters) -> list:
+    with engine.connect() as conn:
+        return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+
+def _assert_no_hot_scans(engine, statements):
+    assert statements, "hot path issued no queries"
+    offenders = []
+    for statement, parameters in statements:
+        for detail in _plan(engine, statement, parameters):
+            match = _SCAN.match(detail)
+            if match and match.group(1) in HOT_TABLES:
+                offenders.append(f"{detail}\n    {statement}")
+    assert not offenders, "full-table scans:\n" + "\n".join(offenders)
+
+
+def test_context_loader_plans(db_engine, async_session_factory, test_user):
+    async def run():
+        async with async_session_factory() as adb:
+            await load_context_rows(adb, test_user)
+
+    async_engine = async_session_factory.kw["bind"].sync_engine
+    with _captured(async_engine) as statements:
+        asyncio.run(run())
+    _assert_no_hot_scans(db_engine, statements)
+
+
+def test_nudge_prefilter_plans(db_engine, db_session, test_user):
+    with _captured(db_engine) as statements:
+        prefilter_nudges(db_session, datetime(2026, 3, 10, 19, 0, tzinfo=timezone.utc))
+    _assert_no_hot_scans(db_engine, statements)
+
+
+def test_home_and_reminder_plans(db_engine, db_session, test_user):
+    with _captured(db_engine) as statements:
+        HomeService().build_home(db_session, test_user)
+        evaluate_missed_reminders(db_session)
+    _assert_no_hot_scans(db_engine, statements)
+
+
+def test_latest_memory_by_category_uses_index_order(db_engine, db_session, test_user):
+    stmt = (
+        select(HealthMemory)
+        .where(
+            HealthMemory.user_id == test_user.id,
+            HealthMemory.category == "morning_brief",
+            HealthMemory.created_at >= datetime.utcnow() - timedelta(days=7),
+        )
+        .order_by(HealthMemory.created_at.desc())
+        .limit(1)
+    )
+    with _captured(db_engine) as statements:
+        db_session.execute(stmt).all()
+    _assert_no_hot_scans(db_engine, statements)
+
+    plan = _plan(db_engine, *statements[0])
+    assert any("ix_health_memories_user_category_created" in d for d in plan)
+    assert not any("TEMP B-TREE" in d for d in plan)
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models.reminder import Reminder
+from app.services.reminder_recurrence import (
+    ReminderSchedule, expand, next_occurrence, rule_for, spawn_next, upcoming,
+)
+
+NOW = datetime(2026, 3, 10, 6, 0, tzinfo=timezone.utc)     # Tuesday
+
+
+def _row(db, user, at, recurrence="once", **kw):
+    reminder = Reminder(user_id=user.id, type="meal", title=kw.pop("title", "Lunch"), message="eat",
+                        scheduled_at=at.replace(tzinfo=None), recurrence=recurrence,
+                        is_active=True, missed_processed=kw.pop("missed_processed", False), **kw)
+    db.add(reminder)
+    db.commit()
+    return reminder
+
+
+def test_rules_parse_once_and_expand_like_the_chain():
+    rule = rule_for("specific", '["fri","mon","wed"]', None)
+    assert rule is rule_for("specific", '["fri","mon","wed"]', None)
+    assert rule.weekdays == (0, 2, 4)
+    assert rule_for("specific", '["xyz"]', None).repeats is False
+    assert rule_for("custom", None, None).repeats is False
+
+    days = [d.strftime("%a") for d in expand(rule, NOW, NOW + timedelta(days=7))]
+    assert days == ["Tue", "Wed", "Fri", "Mon"]
+
+    # Monthly clamps through the chain exactly as spawning one row at a time did
+    monthly = rule_for("monthly", None, None)
+    jan31 = datetime(2026, 1, 31, 8, tzinfo=timezone.utc)
+    chain = expand(monthly, jan31, datetime(2026, 4, 30, tzinfo=timezone.utc))
+    assert [d.day for d in chain] == [31, 28, 28, 28]
+    assert next_occurrence(monthly, chain[-2]) == chain[-1]
+
+
+def test_schedule_expands_once_per_signature(db_session, test_user):
+    schedule = ReminderSchedule(days=14)
+    daily = _row(db_session, test_user, NOW + timedelta(hours=6), recurrence="daily")
+
+    first = schedule.occurrences(daily, now=NOW)
+    assert len(first) == 15                       # today + 14 projected days
+    assert schedule.occurrences(daily, now=NOW) is first
+    assert (schedule.hits, schedule.misses) == (1, 1)
+
+    daily.recurrence = "weekly"
+    assert len(schedule.occurrences(daily, now=NOW)) == 3
+    assert schedule.misses == 2
+
+
+def test_upcoming_merges_rows_and_projections(db_session, test_user):
+    fired = _row(db_session, test_user, NOW - timedelta(days=1), recurrence="daily")
+    fired.missed_processed = True
+    spawned = _row(db_session, test_user, NOW + timedelta(hours=6), recurrence="daily")
+    one_off = _row(db_session, test_user, NOW + timedelta(hours=2), title="Doctor")
+    db_session.commit()
+
+    items = upcoming(db_session, test_user.id, NOW, NOW + timedelta(days=2))
+
+    assert [(r.id, projected) for _, r, projected in items] == [
+        (one_off.id, False), (spawned.id, False), (spawned.id, True),
+    ]
+    assert [at for at, *_ in items] == sorted(at for at, *_ in items)
+
+
+def test_spawn_next_is_idempotent(db_session, test_user):
+    daily = _row(db_session, test_user, NOW, recurrence="daily")
+    first = spawn_next(db_session, daily)
+    db_session.commit()
+    assert first.scheduled_at == (NOW + timedelta(days=1)).replace(tzinfo=None)
+    assert spawn_next(db_session, daily).id == first.id
+    assert spawn_next(db_session, first).id != first.id
+
+
+def test_upcoming_skips_fired_history(db_engine, db_session, test_user):
+    # A year of fired daily rows plus a fired one-off: none of them are loaded
+    for days_ago in range(365, 0, -1):
+        _row(db_session, test_user, NOW - timedelta(days=days_ago), recurrence="daily", missed_processed=True)
+    _row(db_session, test_user, NOW - timedelta(days=3), title="Doctor", missed_processed=True)
+    head = _row(db_session, test_user, NOW + timedelta(hours=6), recurrence="daily")
+    weekly = _row(db_session, test_user, NOW - timedelta(days=2), recurrence="weekly", title="Weigh-in",
+                  missed_processed=True)                      # fired, still the latest of its chain
+
+    fresh = sessionmaker(bind=db_engine)()
+    try:
+        items = upcoming(fresh, test_user.id, NOW, NOW + timedelta(days=7))
+        assert len(fresh.identity_map) == 2
+    finally:
+        fresh.close()
+
+    assert [(r.id, projected) for _, r, projected in items][:2] == [(head.id, False), (head.id, True)]
+    assert [at for at, r, _ in items if r.id == weekly.id] == [NOW + timedelta(days=5)]
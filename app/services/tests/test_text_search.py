@@ -0,0 +1,67 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.deps import get_current_user
+from app.db.database import get_db
+from app.models.exercise import Exercise
+from app.models.food import FoodItem
+from app.routers import exercises
+from app.services.food_search import ITEM, FoodSearchIndex
+from app.services.text_search import FOOD_ITEMS_FTS
+
+
+def _fts_ids(db, index, search):
+    ranked = index.ranked("sqlite", search)
+    return [r.id for r in db.query(ranked.c.id).order_by(ranked.c.rank)]
+
+
+def test_triggers_keep_fts_in_sync(db_session):
+    egg = FoodItem(name="Egg, whole, boiled", category="Dairy and Egg Products", calories=78, is_active=True)
+    db_session.add(egg)
+    db_session.commit()
+    assert _fts_ids(db_session, FOOD_ITEMS_FTS, "boil egg") == [egg.id]
+
+    egg.name = "Egg, whole, scrambled"
+    db_session.commit()
+    assert _fts_ids(db_session, FOOD_ITEMS_FTS, "boil") == []
+    assert _fts_ids(db_session, FOOD_ITEMS_FTS, "scram") == [egg.id]
+
+    db_session.delete(egg)
+    db_session.commit()
+    assert _fts_ids(db_session, FOOD_ITEMS_FTS, "egg") == []
+    # Quotes, operators and stray punctuation never reach MATCH as syntax
+    assert _fts_ids(db_session, FOOD_ITEMS_FTS, 'egg" OR * NEAR(') == []
+
+
+def test_list_exercises_and_food_search_use_bm25(db_session):
+    db_session.add_all([
+        Exercise(name="Barbell Incline Bench Press - Medium Grip", primary_muscles='["chest"]',
+                 equipment="barbell", is_active=True),
+        Exercise(name="Dumbbell Flyes", primary_muscles='["chest"]', equipment="dumbbell", is_active=True),
+        Exercise(name="Chest Dip", primary_muscles='["triceps"]', equipment="body only", is_active=True),
+        Exercise(name="Incline Walk", primary_muscles='["quadriceps"]', is_active=False),
+    ])
+    db_session.add_all([
+        FoodItem(name="Paneer (full fat)", category="Dairy", is_indian=True, calories=265, is_active=True),
+        FoodItem(name="Palak Paneer", category="North Indian", is_indian=True, calories=180, is_active=True),
+        FoodItem(name="Cheese, paneer style", category="Dairy", calories=300, is_active=False),
+    ])
+    db_session.commit()
+
+    api = FastAPI()
+    api.include_router(exercises.router)
+    api.dependency_overrides[get_db] = lambda: db_session
+    api.dependency_overrides[get_current_user] = lambda: None
+    with TestClient(api) as client:
+        names = lambda **p: [e["name"] for e in client.get("/api/exercises/", params=p).json()]
+        assert names(search="incline barbell press") == ["Barbell Incline Bench Press - Medium Grip"]
+        assert names(search="incl") == ["Barbell Incline Bench Press - Medium Grip"]
+        # Name hit first, then exercises that only target the muscle
+        assert names(search="chest")[0] == "Chest Dip"
+        assert set(names(search="chest")) == {"Chest Dip", "Barbell Incline Bench Press - Medium Grip", "Dumbbell Flyes"}
+        assert names(search="chest", equipment="dumbbell") == ["Dumbbell Flyes"]
+
+    index = FoodSearchIndex(backend="fts")
+    hits = index.search(db_session, "pane", kinds=(ITEM,))
+    assert [db_session.get(FoodItem, h.id).name for h in hits] == ["Paneer (full fat)", "Palak Paneer"]
+    assert index.search(db_session, "pane", kinds=(ITEM,), category="north")[0].id == hits[1].id
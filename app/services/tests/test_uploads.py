@@ -0,0 +1,61 @@
+import asyncio
+import hashlib
+import tempfile
+
+import pytest
+from starlette.datastructures import Headers, UploadFile
+
+from app.services import uploads
+from app.services.uploads import UploadTooLarge, safe_filename, save_upload
+
+
+def _upload(content: bytes, filename: str = "clip.MP4", declare_size: bool = True) -> UploadFile:
+    spool = tempfile.SpooledTemporaryFile(max_size=1024)
+    spool.write(content)
+    spool.seek(0)
+    return UploadFile(
+        spool, size=len(content) if declare_size else None, filename=filename,
+        headers=Headers({"content-type": "video/mp4"}),
+    )
+
+
+def test_streams_hashes_and_dedupes(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "CHUNK_BYTES", 4096)
+    content = bytes(range(256)) * 1000   # 256 kB → many chunks
+
+    async def run():
+        first = await save_upload(_upload(content), tmp_path)
+        again = await save_upload(_upload(content, filename="other.mp4"), tmp_path)
+        named = await save_upload(_upload(content, filename="../../etc/Lab Report.pdf"), tmp_path, keep_filename=True)
+        return first, again, named
+
+    first, again, named = asyncio.run(run())
+
+    sha = hashlib.sha256(content).hexdigest()
+    assert first.name == f"{sha[:32]}.mp4" and first.sha256 == sha and first.size == len(content)
+    assert first.path.read_bytes() == content
+    assert again.name == first.name and again.deduplicated
+    assert named.name == f"{sha[:16]}_Lab_Report.pdf" and named.path.parent == tmp_path
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([first.name, named.name])   # no temp files left
+
+
+def test_size_limit_enforced_while_streaming(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "CHUNK_BYTES", 1024)
+
+    # Client declared no size — the copy stops at the limit and cleans up
+    with pytest.raises(UploadTooLarge) as exc:
+        asyncio.run(save_upload(_upload(b"x" * 10_000, declare_size=False), tmp_path, max_bytes=4096))
+    assert exc.value.status_code == 413
+    assert list(tmp_path.iterdir()) == []
+
+    # Fixed names are replaced atomically
+    asyncio.run(save_upload(_upload(b"old"), tmp_path, name="cover.jpg"))
+    stored = asyncio.run(save_upload(_upload(b"new"), tmp_path, name="cover.jpg"))
+    assert stored.path.read_bytes() == b"new" and not stored.deduplicated
+
+
+def test_safe_filename():
+    assert safe_filename("..\\..\\boot.ini") == "boot.ini"
+    assert safe_filename("/etc/passwd") == "passwd"
+    assert safe_filename("..") == "file"
+    assert safe_filename(None) == "file"
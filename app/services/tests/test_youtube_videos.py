@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models.exercise import Exercise
+from app.models.youtube_video import ExerciseVideoLookup, YouTubeQuotaDay
+from app.services.youtube_fake import FakeYouTubeServer
+from app.services.youtube_videos import YouTubeResolver, quota_day, search_query
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setenv("YOUTUBE_API_KEY", "test-key")
+    return FakeYouTubeServer(latency=0.05)
+
+
+def _resolver(db_engine, server, **kw):
+    return YouTubeResolver(sessionmaker(bind=db_engine, autoflush=False), transport=server.transport(), **kw)
+
+
+def _exercises(db, *names):
+    rows = [Exercise(name=n, is_active=True) for n in names]
+    db.add_all(rows)
+    db.commit()
+    return rows
+
+
+def test_concurrent_requests_share_one_search_and_cache_it(db_engine, db_session, server):
+    squat, = _exercises(db_session, "Barbell Squat")
+    resolver = _resolver(db_engine, server)
+
+    async def run():
+        return await asyncio.gather(*(resolver.lookup(squat.id, squat.name) for _ in range(10)))
+
+    results = asyncio.run(run())
+
+    assert server.calls[search_query("Barbell Squat")] == 1
+    expected = FakeYouTubeServer.video_id("Barbell Squat", 1)   # title match, not the first result
+    assert {r["video_id"] for r in results} == {expected}
+    db_session.refresh(squat)
+    assert squat.youtube_video_id == expected
+    assert db_session.get(ExerciseVideoLookup, squat.id).views == 10
+    assert db_session.get(YouTubeQuotaDay, quota_day()).searches == 1
+
+
+def test_negative_cache_until_ttl(db_engine, db_session, server):
+    odd, = _exercises(db_session, "Zercher Carry")
+    server.no_results.add("zercher")
+    resolver = _resolver(db_engine, server)
+
+    for _ in range(3):
+        assert asyncio.run(resolver.lookup(odd.id, odd.name))["video_id"] is None
+    assert server.calls[search_query("Zercher Carry")] == 1
+    assert resolver.queue(10) == []
+
+    # TTL over — searched again
+    row = db_session.get(ExerciseVideoLookup, odd.id)
+    row.retry_after = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db_session.commit()
+    server.no_results.clear()
+    assert asyncio.run(resolver.lookup(odd.id, odd.name))["video_id"]
+    assert server.calls[search_query("Zercher Carry")] == 2
+
+
+def test_prewarm_follows_views_and_leaves_reserve(db_engine, db_session, server):
+    a, b, c, d = _exercises(db_session, "Deadlift", "Bench Press", "Pull Up", "Lunge")
+    db_session.add_all([
+        ExerciseVideoLookup(exercise_id=c.id, views=9),
+        ExerciseVideoLookup(exercise_id=b.id, views=4),
+    ])
+    db_session.commit()
+    resolver = _resolver(db_engine, server, daily_limit=4, reserve=2)
+
+    assert [name for _, name in resolver.queue(10)] == ["Pull Up", "Bench Press", "Deadlift", "Lunge"]
+    assert asyncio.run(resolver.prewarm()) == 2
+    assert set(server.calls) == {search_query("Pull Up"), search_query("Bench Press")}
+
+    # The reserve is still there for a live request; then the day is spent,
+    # for every resolver sharing the ledger
+    assert asyncio.run(resolver.lookup(a.id, a.name))["video_id"]
+    other = _resolver(db_engine, server, daily_limit=4, reserve=2)
+    assert other.consume_quota() is True
+    assert asyncio.run(other.lookup(d.id, d.name)) == {"video_id": None, "cached": False, "quota_exceeded": True}
+    assert db_session.get(YouTubeQuotaDay, quota_day()).searches == 4
+
+
+def test_403_quota_exceeded_closes_the_day(db_engine, db_session, server):
+    row, = _exercises(db_session, "Face Pull")
+    server.quota_exhausted = True
+    resolver = _resolver(db_engine, server)
+
+    assert asyncio.run(resolver.lookup(row.id, row.name))["quota_exceeded"] is True
+    assert resolver.consume_quota() is False
+    day = db_session.get(YouTubeQuotaDay, quota_day())
+    assert day.searches == day.search_limit == 1
+    # Not the exercise's fault — no negative cache
+    assert db_session.get(ExerciseVideoLookup, row.id).retry_after is None
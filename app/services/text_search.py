@@ -0,0 +1,157 @@
+"""
+text_search.py
+==============
+Database full-text search for foods and exercises.
+
+Each searchable table gets a full-text index living in the database itself,
+so every worker shares it and there is nothing to warm up:
+
+  • SQLite   — an FTS5 external-content table (<table>_fts) over the
+    searchable columns, kept in sync by AFTER INSERT / UPDATE OF / DELETE
+    triggers. Every write path (seeders, custom foods, admin edits, raw
+    SQL) goes through them.
+  • Postgres — a generated `search_vector` tsvector column (weighted per
+    column) with a GIN index.
+
+Both sit behind FTSIndex.ranked(dialect, text): a subquery of (id, rank)
+for rows matching every word of `text` as a prefix, best first (rank
+ascending: bm25() on SQLite, -ts_rank_cd on Postgres). Callers join it to
+the source table for their filters:
+
+    ranked = EXERCISES_FTS.ranked(db.get_bind().dialect.name, search)
+    q = q.join(ranked, ranked.c.id == Exercise.id).order_by(ranked.c.rank)
+
+The DDL runs after the source table is created (attach() in the model
+module) and from migration 012 for existing databases.
+
+No model imports here — models/*.py attach to these at import time.
+"""
+
+import logging
+import re
+from typing import List, Optional, Sequence
+
+from sqlalchemy import Float, Integer, event, text
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def query_terms(search: Optional[str]) -> List[str]:
+    """Lower-cased words of `search`; single characters dropped unless they are all there is."""
+    words = _WORD.findall((search or "").lower())
+    longer = [w for w in words if len(w) > 1]
+    return longer or words
+
+
+class FTSIndex:
+    def __init__(self, table: str, columns: Sequence[str], weights: Sequence[float]):
+        self.table = table
+        self.columns = tuple(columns)
+        self.weights = tuple(weights)
+        self.fts = f"{table}_fts"
+
+    def attach(self, table_obj) -> None:
+        """Install the index whenever `table_obj` is created (create_all, tests)."""
+        event.listen(table_obj, "after_create", lambda target, connection, **kw: self.install(connection))
+
+    # ──────────────────────────────────────────────────────────
+    # DDL
+    # ──────────────────────────────────────────────────────────
+
+    def install(self, connection) -> None:
+        dialect = connection.dialect.name
+        if dialect == "sqlite":
+            self._install_sqlite(connection)
+        elif dialect == "postgresql":
+            self._install_postgres(connection)
+        else:
+            logger.warning(f"[TextSearch] no full-text index for dialect {dialect} — {self.table} search disabled")
+
+    def _install_sqlite(self, connection) -> None:
+        cols = ", ".join(self.columns)
+        new_vals = ", ".join(f"new.{c}" for c in self.columns)
+        old_vals = ", ".join(f"old.{c}" for c in self.columns)
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.fts,)
+        ).first()
+
+        connection.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.fts} USING fts5("
+            f"{cols}, content='{self.table}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {self.fts}_ai AFTER INSERT ON {self.table} BEGIN "
+            f"INSERT INTO {self.fts}(rowid, {cols}) VALUES (new.id, {new_vals}); END"
+        )
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {self.fts}_ad AFTER DELETE ON {self.table} BEGIN "
+            f"INSERT INTO {self.fts}({self.fts}, rowid, {cols}) VALUES ('delete', old.id, {old_vals}); END"
+        )
+        # Only the indexed columns — times_used bumps and nutrient patches skip the index
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {self.fts}_au AFTER UPDATE OF {cols} ON {self.table} BEGIN "
+            f"INSERT INTO {self.fts}({self.fts}, rowid, {cols}) VALUES ('delete', old.id, {old_vals}); "
+            f"INSERT INTO {self.fts}(rowid, {cols}) VALUES (new.id, {new_vals}); END"
+        )
+        if not exists:
+            # Rows written before the index existed
+            connection.exec_driver_sql(f"INSERT INTO {self.fts}({self.fts}) VALUES ('rebuild')")
+
+    def _install_postgres(self, connection) -> None:
+        labels = "ABCD"
+        vector = " || ".join(
+            f"setweight(to_tsvector('simple', coalesce({c}, '')), '{labels[min(i, 3)]}')"
+            for i, c in enumerate(self.columns)
+        )
+        connection.exec_driver_sql(
+            f"ALTER TABLE {self.table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({vector}) STORED"
+        )
+        connection.exec_driver_sql(
+            f"CREATE INDEX IF NOT EXISTS ix_{self.table}_search_vector "
+            f"ON {self.table} USING GIN (search_vector)"
+        )
+
+    def uninstall(self, connection) -> None:
+        if connection.dialect.name == "sqlite":
+            for suffix in ("ai", "ad", "au"):
+                connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {self.fts}_{suffix}")
+            connection.exec_driver_sql(f"DROP TABLE IF EXISTS {self.fts}")
+        elif connection.dialect.name == "postgresql":
+            connection.exec_driver_sql(f"DROP INDEX IF EXISTS ix_{self.table}_search_vector")
+            connection.exec_driver_sql(f"ALTER TABLE {self.table} DROP COLUMN IF EXISTS search_vector")
+
+    # ──────────────────────────────────────────────────────────
+    # Query
+    # ──────────────────────────────────────────────────────────
+
+    def ranked(self, dialect: str, search: str):
+        """(id, rank) subquery of rows matching every word as a prefix, or None for an empty query."""
+        terms = query_terms(search)
+        if not terms:
+            return None
+
+        if dialect == "postgresql":
+            stmt = text(
+                f"SELECT id, -ts_rank_cd(search_vector, to_tsquery('simple', :q)) AS rank "
+                f"FROM {self.table} WHERE search_vector @@ to_tsquery('simple', :q)"
+            ).bindparams(q=" & ".join(f"{t}:*" for t in terms))
+        else:
+            weights = ", ".join(str(w) for w in self.weights)
+            stmt = text(
+                f"SELECT rowid AS id, bm25({self.fts}, {weights}) AS rank "
+                f"FROM {self.fts} WHERE {self.fts} MATCH :q"
+            ).bindparams(q=" ".join(f'"{t}"*' for t in terms))
+
+        return stmt.columns(id=Integer, rank=Float).subquery(f"{self.table}_ranked")
+
+
+# Name hits dominate; the other columns break ties and catch category words
+FOOD_ITEMS_FTS = FTSIndex("food_items", ("name", "brand", "category"), (10.0, 3.0, 1.0))
+FOODS_FTS      = FTSIndex("foods", ("name", "brand", "category"), (10.0, 3.0, 1.0))
+EXERCISES_FTS  = FTSIndex("exercises", ("name", "primary_muscles", "equipment"), (10.0, 2.0, 1.0))
+
+ALL_INDEXES = (FOOD_ITEMS_FTS, FOODS_FTS, EXERCISES_FTS)
@@ -0,0 +1,143 @@
+"""
+uploads.py
+==========
+Streaming storage for user uploads (gym covers and galleries, library
+files, health records).
+
+Starlette has already spooled each multipart file to a temporary file by
+the time an endpoint runs; reading it with `await file.read()` pulled the
+whole thing — videos included — back into memory and the write then ran
+on the event loop. save_upload() instead copies it on a small dedicated
+thread pool:
+
+  • CHUNK_BYTES at a time into a hidden temp file in the destination
+    folder, so memory per upload is one chunk however large the file is
+    and UPLOAD_WORKERS bounds how many copies run at once.
+  • The size limit is checked up front when the client declared a size and
+    again while streaming, so an oversized upload stops at the limit
+    (413) and leaves nothing behind.
+  • Content is sha256-hashed on the way through. Hash-named files dedupe:
+    a second upload of the same bytes reuses the existing file.
+  • The temp file is renamed into place (os.replace), so /static never
+    serves a partial file — also when replacing a fixed name like
+    cover.jpg.
+
+Client file names only ever contribute their base name.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+from fastapi import HTTPException, UploadFile
+
+CHUNK_BYTES    = int(os.getenv("UPLOAD_CHUNK_KB", "1024")) * 1024
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "4"))
+MAX_UPLOAD_MB  = int(os.getenv("MAX_UPLOAD_MB", "25"))
+MAX_UPLOAD_BYTES = MAX_UPLOAD_MB * 1024 * 1024
+MAX_VIDEO_MB   = int(os.getenv("MAX_VIDEO_MB", "50"))
+MAX_VIDEO_BYTES = MAX_VIDEO_MB * 1024 * 1024
+
+_UNSAFE = re.compile(r"[^\w.\-]+")
+
+_pool = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="upload")
+
+
+class UploadTooLarge(HTTPException):
+    def __init__(self, max_bytes: int):
+        super().__init__(status_code=413, detail=f"File too large. Max allowed is {max_bytes // (1024 * 1024)}MB.")
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    path: Path
+    name: str              # file name inside the destination folder
+    size: int
+    sha256: str
+    deduplicated: bool     # identical content was already stored under this name
+
+
+def limit_for(content_type: Optional[str]) -> int:
+    """Size limit for an upload of this content type."""
+    return MAX_VIDEO_BYTES if (content_type or "").startswith("video/") else MAX_UPLOAD_BYTES
+
+
+def safe_filename(filename: Optional[str]) -> str:
+    """Base name of a client-supplied file name, reduced to [A-Za-z0-9_.-]."""
+    base = os.path.basename((filename or "").replace("\\", "/"))
+    return _UNSAFE.sub("_", base).strip("._") or "file"
+
+
+def extension(filename: Optional[str]) -> str:
+    """'.ext' of a client file name (lower-case), or ''."""
+    return os.path.splitext(safe_filename(filename))[1].lower()
+
+
+async def save_upload(
+    upload: UploadFile,
+    folder: Union[str, Path],
+    *,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    name: Optional[str] = None,
+    keep_filename: bool = False,
+) -> StoredUpload:
+    """
+    Stream `upload` into `folder`.
+
+    The stored name is `name` when given (replaced atomically), otherwise
+    derived from the content hash: `<sha256[:32]><.ext>`, or with
+    keep_filename `<sha256[:16]>_<client file name>` for files users
+    recognise by name. Raises UploadTooLarge past `max_bytes`.
+    """
+    if upload.size is not None and upload.size > max_bytes:
+        raise UploadTooLarge(max_bytes)
+    if name is not None:
+        naming = lambda digest: name                                          # noqa: E731
+    elif keep_filename:
+        naming = lambda digest: f"{digest[:16]}_{safe_filename(upload.filename)}"   # noqa: E731
+    else:
+        naming = lambda digest: f"{digest[:32]}{extension(upload.filename)}"  # noqa: E731
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _pool, _store, upload.file, Path(folder), max_bytes, naming, name is not None
+    )
+
+
+def _store(src: BinaryIO, folder: Path, max_bytes: int, naming, replace: bool) -> StoredUpload:
+    folder.mkdir(parents=True, exist_ok=True)
+    src.seek(0)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = src.read(CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                digest.update(chunk)
+                out.write(chunk)
+
+        sha = digest.hexdigest()
+        name = naming(sha)
+        path = folder / name
+        if not replace and path.exists():
+            # Hash-named — same bytes already stored
+            os.unlink(tmp)
+            return StoredUpload(path, name, size, sha, deduplicated=True)
+        os.chmod(tmp, 0o644)   # mkstemp creates 0600; static files are world-readable
+        os.replace(tmp, path)
+        return StoredUpload(path, name, size, sha, deduplicated=False)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
@@ -0,0 +1,66 @@
+"""
+youtube_fake.py
+===============
+Local stand-in for the YouTube Data API v3 search endpoint that
+youtube_videos.py calls, served through an httpx transport, so no network,
+key or quota is involved.
+
+Every query answers with a few deterministic videos whose titles echo the
+query (so the title-matching pick is exercised). Queries containing one of
+`no_results` answer with an empty list; `quota_exhausted` answers 403
+quotaExceeded like the real API; `fail` answers 500. Requests are counted
+in `calls` (by q).
+
+Use:
+  tests          server = FakeYouTubeServer(); resolver.transport = server.transport()
+  local dev      YOUTUBE_BACKEND=fake — youtube_videos.py installs one at import
+"""
+
+import asyncio
+import hashlib
+from collections import Counter
+
+import httpx
+
+
+class FakeYouTubeServer:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.no_results: set = set()
+        self.quota_exhausted = False
+        self.fail = False
+        self.calls: Counter = Counter()
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if not request.url.path.endswith("/youtube/v3/search"):
+            return httpx.Response(404, json={"error": {"code": 404, "message": "Not Found"}})
+        q = request.url.params.get("q", "")
+        self.calls[q] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail:
+            return httpx.Response(500, json={"error": {"code": 500, "message": "backendError"}})
+        if self.quota_exhausted:
+            return httpx.Response(403, json={"error": {
+                "code": 403, "errors": [{"reason": "quotaExceeded", "domain": "youtube.quota"}],
+            }})
+        if any(term in q.lower() for term in self.no_results):
+            return httpx.Response(200, json={"items": []})
+
+        subject = q.replace(" proper form technique tutorial", "")
+        count = int(request.url.params.get("maxResults", 5))
+        return httpx.Response(200, json={"items": [
+            {
+                "id": {"kind": "youtube#video", "videoId": self.video_id(subject, i)},
+                # First result is off-topic so the title match has to pick the second
+                "snippet": {"title": "Top 10 gym fails" if i == 0 else f"How to do {subject} — {i}"},
+            }
+            for i in range(count)
+        ]})
+
+    @staticmethod
+    def video_id(subject: str, rank: int) -> str:
+        return hashlib.sha1(f"{subject}:{rank}".encode()).hexdigest()[:11]
@@ -0,0 +1,421 @@
+"""
+youtube_videos.py
+=================
+Form-video resolution for the exercise library (YouTube Data API v3).
+
+Each search costs 100 of the 10,000 free daily units, so every resolved
+video is kept on Exercise.youtube_video_id forever and the searches that
+remain are spent where users will look:
+
+  • Quota ledger — searches are counted per YouTube quota day (midnight
+    Pacific) in youtube_quota_days, shared by every worker and kept across
+    restarts. A search is only made after atomically claiming a slot
+    (UPDATE … WHERE searches < limit); a 403 quotaExceeded closes the day.
+  • Prewarm — a scheduler job resolves active exercises without a video,
+    most requested first (exercise_video_lookups.views), stopping
+    INTERACTIVE_RESERVE searches short of the limit so requests for
+    never-viewed exercises can still be served the same day.
+  • Negative cache — searches with no results are not retried for
+    NEGATIVE_TTL_DAYS; failures back off exponentially up to that TTL.
+  • Request path — a cached id answers straight from the DB. Otherwise the
+    request joins (or starts) the exercise's single in-flight search and
+    waits at most REQUEST_WAIT_S; a slower search finishes in the
+    background and the next request finds it cached.
+
+YOUTUBE_BACKEND=fake answers every search from youtube_fake.py (local dev).
+
+Counters: stats().
+"""
+
+import asyncio
+import logging
+import os
+import weakref
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import httpx
+from sqlalchemy import func, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.exercise import Exercise
+from app.models.youtube_video import ExerciseVideoLookup, YouTubeQuotaDay
+
+logger = logging.getLogger(__name__)
+
+SEARCH_URL = "https://www.googleapis.com/youtube/v3/search"
+
+# 85 searches = 8,500 units — leaves a buffer for spikes / manual queries
+DAILY_SEARCH_LIMIT  = int(os.getenv("YT_DAILY_SEARCH_LIMIT", "85"))
+INTERACTIVE_RESERVE = int(os.getenv("YT_INTERACTIVE_RESERVE", "15"))
+CONCURRENCY         = int(os.getenv("YOUTUBE_CONCURRENCY", "3"))
+REQUEST_WAIT_S      = float(os.getenv("YOUTUBE_REQUEST_WAIT_S", "3"))
+NEGATIVE_TTL_DAYS   = float(os.getenv("YOUTUBE_NEGATIVE_TTL_DAYS", "7"))
+ERROR_BACKOFF_S     = float(os.getenv("YOUTUBE_ERROR_BACKOFF_S", "900"))
+PREWARM_BATCH       = int(os.getenv("YOUTUBE_PREWARM_BATCH", "40"))
+
+QUOTA_TZ = ZoneInfo("America/Los_Angeles")   # YouTube quota resets at midnight Pacific
+
+# YOUTUBE_BACKEND=fake serves every search from youtube_fake.FakeYouTubeServer (local dev)
+YOUTUBE_BACKEND = os.getenv("YOUTUBE_BACKEND", "youtube")
+
+# Outcomes of one resolution
+FOUND, NONE, ERROR, NO_QUOTA = "found", "none", "error", "no_quota"
+
+
+class QuotaExhausted(Exception):
+    """YouTube answered 403 quotaExceeded / dailyLimitExceeded."""
+
+
+def quota_day(now: Optional[datetime] = None) -> date:
+    return (now or datetime.now(timezone.utc)).astimezone(QUOTA_TZ).date()
+
+
+def search_query(name: str) -> str:
+    return f"{name} proper form technique tutorial"
+
+
+def pick_video(name: str, items: List[dict]) -> Optional[str]:
+    """Prefer a result whose title contains the exercise name (or one of its words)."""
+    if not items:
+        return None
+    name_lower = name.lower()
+    for item in items:
+        title = item["snippet"]["title"].lower()
+        if name_lower in title or any(w in title for w in name_lower.split()):
+            return item["id"]["videoId"]
+    return items[0]["id"]["videoId"]
+
+
+def _aware(dt: Optional[datetime]) -> Optional[datetime]:
+    if dt is not None and dt.tzinfo is None:   # SQLite drops the offset
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+class YouTubeResolver:
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        daily_limit: int = DAILY_SEARCH_LIMIT,
+        reserve: int = INTERACTIVE_RESERVE,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self._session_factory = session_factory
+        self.daily_limit = daily_limit
+        self.reserve = reserve
+        self.transport = transport
+        self._inflight: Dict[int, asyncio.Task] = {}
+        self._slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.metrics = {"searched": 0, "found": 0, "none": 0, "failed": 0,
+                        "coalesced": 0, "negative_hits": 0, "no_quota": 0, "waited_out": 0}
+
+    @property
+    def session_factory(self) -> Callable[[], Session]:
+        if self._session_factory is None:
+            from app.db.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory
+
+    @staticmethod
+    def api_key() -> str:
+        # Read lazily so restarts / env changes are picked up
+        return os.getenv("YOUTUBE_API_KEY", "") or ("fake" if YOUTUBE_BACKEND == "fake" else "")
+
+    def _slot(self) -> asyncio.Semaphore:
+        # asyncio primitives are bound to one loop
+        loop = asyncio.get_running_loop()
+        sem = self._slots.get(loop)
+        if sem is None:
+            sem = self._slots[loop] = asyncio.Semaphore(CONCURRENCY)
+        return sem
+
+    # ──────────────────────────────────────────────────────────
+    # Request path
+    # ──────────────────────────────────────────────────────────
+
+    async def lookup(self, exercise_id: int, name: str) -> dict:
+        """
+        Video for an exercise with no cached id, as the /video endpoint returns it:
+        {"video_id", "cached"} plus "pending" (still searching in the background)
+        or "quota_exceeded".
+        """
+        retry_after = await asyncio.to_thread(self._note_view, exercise_id)
+        if retry_after is not None and retry_after > datetime.now(timezone.utc):
+            self.metrics["negative_hits"] += 1
+            return {"video_id": None, "cached": True}
+
+        if not self.api_key():
+            logger.warning("[YouTube] YOUTUBE_API_KEY not set — skipping video fetch")
+            return {"video_id": None, "cached": False}
+
+        task = self._start(exercise_id, name, self.daily_limit)
+        try:
+            # One caller going away must not cancel the search the others wait on
+            outcome, video_id = await asyncio.wait_for(asyncio.shield(task), REQUEST_WAIT_S)
+        except asyncio.TimeoutError:
+            self.metrics["waited_out"] += 1
+            return {"video_id": None, "cached": False, "pending": True}
+
+        if outcome == NO_QUOTA:
+            return {"video_id": None, "cached": False, "quota_exceeded": True}
+        return {"video_id": video_id, "cached": False}
+
+    def _start(self, exercise_id: int, name: str, ceiling: Optional[int]) -> asyncio.Task:
+        task = self._inflight.get(exercise_id)
+        if task is not None:
+            self.metrics["coalesced"] += 1
+            return task
+        task = asyncio.ensure_future(self._resolve(exercise_id, name, ceiling))
+        self._inflight[exercise_id] = task
+        task.add_done_callback(lambda _: self._inflight.pop(exercise_id, None))
+        return task
+
+    async def drain(self) -> None:
+        """Wait for in-flight searches (tests / shutdown)."""
+        await asyncio.gather(*list(self._inflight.values()), return_exceptions=True)
+
+    def stats(self) -> dict:
+        db = self.session_factory()
+        try:
+            row = db.get(YouTubeQuotaDay, quota_day())
+            used, limit = (row.searches, row.search_limit) if row else (0, self.daily_limit)
+        finally:
+            db.close()
+        return {"in_flight": len(self._inflight), "searches_today": used, "limit_today": limit, **self.metrics}
+
+    # ──────────────────────────────────────────────────────────
+    # Prewarm
+    # ──────────────────────────────────────────────────────────
+
+    async def prewarm(self, limit: Optional[int] = None) -> int:
+        """
+        Resolve missing videos, most viewed first, while the day's quota stays
+        above the interactive reserve. Returns the number of videos found.
+        """
+        if not self.api_key():
+            return 0
+        queue = await asyncio.to_thread(self.queue, limit or PREWARM_BATCH)
+        ceiling = self.daily_limit - self.reserve
+        found = 0
+        exhausted = False
+        for i in range(0, len(queue), CONCURRENCY):
+            batch = []
+            for ex_id, name in queue[i:i + CONCURRENCY]:
+                if ex_id in self._inflight:
+                    batch.append(self._inflight[ex_id])
+                # Slots are claimed in queue order, so the most viewed win the last ones
+                elif await asyncio.to_thread(self.consume_quota, ceiling):
+                    batch.append(self._start(ex_id, name, None))
+                else:
+                    exhausted = True
+                    break
+            outcomes = [outcome for outcome, _ in await asyncio.gather(*batch)]
+            found += outcomes.count(FOUND)
+            if exhausted or NO_QUOTA in outcomes:
+                break
+        if queue:
+            logger.info(f"[YouTube] prewarm: {found}/{len(queue)} videos resolved")
+        return found
+
+    def queue(self, limit: int) -> List[Tuple[int, str]]:
+        """(id, name) of active exercises without a video and not negative-cached, most viewed first."""
+        db = self.session_factory()
+        try:
+            now = datetime.now(timezone.utc)
+            views = func.coalesce(ExerciseVideoLookup.views, 0)
+            rows = (
+                db.query(Exercise.id, Exercise.name)
+                .outerjoin(ExerciseVideoLookup, ExerciseVideoLookup.exercise_id == Exercise.id)
+                .filter(
+                    Exercise.is_active == True,  # noqa: E712
+                    Exercise.youtube_video_id.is_(None),
+                    or_(ExerciseVideoLookup.retry_after.is_(None), ExerciseVideoLookup.retry_after <= now),
+                )
+                .order_by(views.desc(), Exercise.id)
+                .limit(limit)
+                .all()
+            )
+            return [(r.id, r.name) for r in rows]
+        finally:
+            db.close()
+
+    # ──────────────────────────────────────────────────────────
+    # Resolution
+    # ──────────────────────────────────────────────────────────
+
+    async def _resolve(self, exercise_id: int, name: str, ceiling: Optional[int]) -> Tuple[str, Optional[str]]:
+        """One search; `ceiling` None means the caller already claimed its quota slot."""
+        async with self._slot():
+            # Resolved meanwhile — by a search that just finished or another worker
+            cached = await asyncio.to_thread(self._cached_video, exercise_id)
+            if cached:
+                return FOUND, cached
+            if ceiling is not None and not await asyncio.to_thread(self.consume_quota, ceiling):
+                self.metrics["no_quota"] += 1
+                return NO_QUOTA, None
+            self.metrics["searched"] += 1
+            try:
+                video_id = pick_video(name, await self._search(name))
+            except QuotaExhausted:
+                logger.warning("[YouTube] 403 quotaExceeded — no more searches until midnight Pacific")
+                await asyncio.to_thread(self.exhaust_quota)
+                self.metrics["no_quota"] += 1
+                return NO_QUOTA, None
+            except Exception as e:
+                logger.warning(f"[YouTube] search for '{name}' failed: {e}")
+                self.metrics["failed"] += 1
+                await asyncio.to_thread(self._record, exercise_id, ERROR, None)
+                return ERROR, None
+
+        outcome = FOUND if video_id else NONE
+        self.metrics[outcome] += 1
+        await asyncio.to_thread(self._record, exercise_id, outcome, video_id)
+        if video_id:
+            logger.info(f"[YouTube] Cached video {video_id} for '{name}'")
+        else:
+            logger.info(f"[YouTube] No results for '{name}' — not retrying for {NEGATIVE_TTL_DAYS:g} days")
+        return outcome, video_id
+
+    async def _search(self, name: str) -> List[dict]:
+        params = {
+            "part":              "snippet",
+            "q":                 search_query(name),
+            "type":              "video",
+            "maxResults":        5,
+            "videoDuration":     "medium",    # 4–20 min — proper tutorials
+            "relevanceLanguage": "en",
+            "safeSearch":        "strict",
+            "key":               self.api_key(),
+        }
+        async with httpx.AsyncClient(timeout=10.0, transport=self.transport) as client:
+            resp = await client.get(SEARCH_URL, params=params)
+        if resp.status_code == 403:
+            reasons = {e.get("reason") for e in resp.json().get("error", {}).get("errors", [])}
+            if reasons & {"quotaExceeded", "dailyLimitExceeded"}:
+                raise QuotaExhausted()
+        resp.raise_for_status()
+        return resp.json().get("items", [])
+
+    # ──────────────────────────────────────────────────────────
+    # Ledger + lookup rows (sync — run via asyncio.to_thread)
+    # ──────────────────────────────────────────────────────────
+
+    def consume_quota(self, ceiling: Optional[int] = None) -> bool:
+        """Claim one search for today if fewer than min(ceiling, day limit) are spent."""
+        ceiling = self.daily_limit if ceiling is None else ceiling
+        day = quota_day()
+        db = self.session_factory()
+        try:
+            for _ in range(2):
+                claimed = db.execute(
+                    update(YouTubeQuotaDay)
+                    .where(
+                        YouTubeQuotaDay.day == day,
+                        YouTubeQuotaDay.searches < YouTubeQuotaDay.search_limit,
+                        YouTubeQuotaDay.searches < ceiling,
+                    )
+                    .values(searches=YouTubeQuotaDay.searches + 1)
+                ).rowcount
+                if claimed:
+                    db.commit()
+                    return True
+                if db.get(YouTubeQuotaDay, day) is not None:
+                    db.rollback()
+                    return False
+                # First search of the day — another worker may create the row first
+                try:
+                    db.add(YouTubeQuotaDay(day=day, searches=0, search_limit=self.daily_limit))
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()
+            return False
+        finally:
+            db.close()
+
+    def exhaust_quota(self) -> None:
+        db = self.session_factory()
+        try:
+            db.execute(
+                update(YouTubeQuotaDay)
+                .where(YouTubeQuotaDay.day == quota_day())
+                .values(search_limit=YouTubeQuotaDay.searches)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _cached_video(self, exercise_id: int) -> Optional[str]:
+        db = self.session_factory()
+        try:
+            return db.query(Exercise.youtube_video_id).filter(Exercise.id == exercise_id).scalar()
+        finally:
+            db.close()
+
+    def _note_view(self, exercise_id: int) -> Optional[datetime]:
+        """Count a request for an uncached video; returns the lookup's retry_after."""
+        db = self.session_factory()
+        try:
+            row = db.get(ExerciseVideoLookup, exercise_id)
+            if row is None:
+                row = ExerciseVideoLookup(exercise_id=exercise_id, views=0, status="pending", attempts=0)
+                db.add(row)
+                try:
+                    db.flush()
+                except IntegrityError:
+                    db.rollback()
+                    row = db.get(ExerciseVideoLookup, exercise_id)
+            db.execute(
+                update(ExerciseVideoLookup)
+                .where(ExerciseVideoLookup.exercise_id == exercise_id)
+                .values(views=ExerciseVideoLookup.views + 1)
+            )
+            retry_after = _aware(row.retry_after)
+            db.commit()
+            return retry_after
+        finally:
+            db.close()
+
+    def _record(self, exercise_id: int, outcome: str, video_id: Optional[str]) -> None:
+        db = self.session_factory()
+        try:
+            row = db.get(ExerciseVideoLookup, exercise_id)
+            if row is None:
+                row = ExerciseVideoLookup(exercise_id=exercise_id, views=0, attempts=0)
+                db.add(row)
+            now = datetime.now(timezone.utc)
+            row.status = outcome
+            row.attempts = (row.attempts or 0) + 1
+            row.last_attempt_at = now
+            if outcome == FOUND:
+                row.retry_after = None
+                db.execute(
+                    update(Exercise).where(Exercise.id == exercise_id).values(youtube_video_id=video_id)
+                )
+            elif outcome == NONE:
+                row.retry_after = now + timedelta(days=NEGATIVE_TTL_DAYS)
+            else:
+                backoff = min(ERROR_BACKOFF_S * 2 ** (row.attempts - 1), NEGATIVE_TTL_DAYS * 86400)
+                row.retry_after = now + timedelta(seconds=backoff)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+# Global singleton — import this everywhere
+youtube_resolver = YouTubeResolver()
+if YOUTUBE_BACKEND == "fake":
+    from app.services.youtube_fake import FakeYouTubeServer
+    youtube_resolver.transport = FakeYouTubeServer().transport()
+
+
+async def run_prewarm() -> int:
+    """Scheduler entry point."""
+    return await youtube_resolver.prewarm()
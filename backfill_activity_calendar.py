@@ -0,0 +1,40 @@
+"""
+Backfill the materialized activity calendar + streaks.
+Rebuilds `activity_days` and `user_streaks` from workout_sessions.
+
+Run once after deploying migration 007, or any time the tables drift.
+
+Usage:
+  cd backend
+  python backfill_activity_calendar.py
+"""
+import sys, os
+sys.path.insert(0, os.path.dirname(__file__))
+
+# ── Import ALL models first so SQLAlchemy can resolve all relationships ──────
+import app.models.fitness_tracking   # noqa: F401
+import app.models.user               # noqa: F401
+import app.models.exercise           # noqa: F401
+import app.models.reminder           # noqa: F401
+import app.models.medication         # noqa: F401
+import app.models.vault_item         # noqa: F401
+
+from app.db.database import SessionLocal
+from app.services.activity_calendar import backfill
+
+
+def main():
+    db = SessionLocal()
+    try:
+        users = backfill(db)
+        print(f"✅ Activity calendar rebuilt for {users} users")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Backfill failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark the in-memory food search (app/services/food_search.py).
+
+Uses the configured database when food_items is seeded (seed_foods.py +
+seed_usda_foods.py, ~10k rows). Otherwise builds a throwaway SQLite DB with
+the hand-seeded foods plus ~10k USDA SR Legacy-style names, so the numbers
+are comparable without fetching from FDC.
+
+Replays autocomplete keystrokes, multi-word and misspelled queries and
+reports per-query latency. Exits non-zero if p95 is not single-digit ms.
+
+Usage:
+  cd backend
+  python bench_food_search.py [--iterations 20] [--backend memory|fts]
+"""
+import sys, os
+sys.path.insert(0, os.path.dirname(__file__))
+
+# ── Import ALL models first so SQLAlchemy can resolve all relationships ──────
+import app.models.fitness_tracking   # noqa: F401
+import app.models.user               # noqa: F401
+import app.models.exercise           # noqa: F401
+import app.models.reminder           # noqa: F401
+import app.models.medication         # noqa: F401
+import app.models.vault_item         # noqa: F401
+
+import itertools
+import random
+import statistics
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base, SessionLocal
+from app.models.fitness_tracking import Food, FoodSource
+from app.models.food import FoodItem
+from app.services.food_search import FoodSearchIndex
+
+TARGET_ROWS = 10_000
+
+QUERIES = (
+    # Keystroke-by-keystroke autocomplete
+    [word[:n] for word in ("chicken", "paneer", "banana", "oats") for n in range(2, len(word) + 1)]
+    + ["chicken breast", "chicken breast roasted", "brown rice", "greek yogurt", "dal tadka",
+       "whole milk", "egg white", "peanut butter"]
+    # Typos
+    + ["chiken", "panner", "bannana", "yoghurt", "brocoli", "chiken brest"]
+)
+
+_BASES = ["Chicken", "Beef", "Pork", "Lamb", "Turkey", "Fish, salmon", "Fish, tuna", "Egg", "Milk",
+          "Cheese", "Yogurt", "Rice", "Wheat flour", "Oats", "Beans", "Lentils", "Peas", "Potatoes",
+          "Tomatoes", "Spinach", "Broccoli", "Carrots", "Onions", "Apples", "Bananas", "Oranges",
+          "Mangos", "Grapes", "Almonds", "Peanuts", "Cashew nuts", "Bread", "Pasta", "Corn",
+          "Cabbage", "Cauliflower", "Mushrooms", "Peppers", "Squash", "Soybeans", "Barley", "Quinoa",
+          "Chickpeas", "Tofu", "Butter", "Cream", "Shrimp", "Duck", "Pineapple"]
+_PARTS = ["whole", "breast", "thigh", "ground", "raw", "skin only", "meat only", "white", "brown",
+          "dried", "frozen", "canned", "fresh", "mature seeds", "whole grain", "enriched"]
+_PREPS = ["raw", "cooked, boiled", "cooked, roasted", "fried", "steamed", "baked", "grilled",
+          "drained solids", "with salt", "without salt", "unprepared", "microwaved", "braised"]
+
+
+def _synthetic_db():
+    """Throwaway SQLite DB shaped like a fully seeded one."""
+    from seed_foods import FOODS
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    rows = [
+        {"name": f[0], "brand": f[1], "category": f[2], "is_indian": f[4], "calories": f[8], "is_active": True}
+        for f in FOODS
+    ]
+    rng = random.Random(42)
+    combos = list(itertools.product(_BASES, _PARTS, _PREPS))
+    rng.shuffle(combos)
+    for base, part, prep in combos[:TARGET_ROWS - len(rows)]:
+        rows.append({
+            "name": f"{base}, {part}, {prep}", "category": base.split(",")[0] + " Products",
+            "is_indian": False, "calories": rng.uniform(20, 600), "is_active": True,
+        })
+    db.bulk_insert_mappings(FoodItem, rows)
+    db.bulk_insert_mappings(Food, [
+        {"name": f"{rng.choice(_BASES)} {rng.choice(_PREPS)} (custom)", "calories_per_100g": 100,
+         "protein_per_100g": 5, "carbs_per_100g": 10, "fats_per_100g": 3, "source": FoodSource.USER_CUSTOM,
+         "user_id": rng.randint(1, 50), "times_used": rng.randint(0, 40), "created_at": datetime.utcnow()}
+        for _ in range(300)
+    ])
+    db.commit()
+    return db
+
+
+def main(iterations: int = 20, backend: str = "memory"):
+    db = SessionLocal()
+    try:
+        seeded = db.query(FoodItem).count()
+    except Exception:
+        seeded = 0
+    if seeded < 1000:
+        db.close()
+        print(f"food_items has {seeded} rows — using a synthetic {TARGET_ROWS:,}-row dataset")
+        db = _synthetic_db()
+    else:
+        print(f"Using the configured database ({seeded:,} food_items)")
+
+    index = FoodSearchIndex(backend=backend)
+    if backend == "memory":
+        started = time.perf_counter()
+        n = index.refresh(db)
+        print(f"Index build : {n:,} foods, {index.stats()['terms']:,} terms in {(time.perf_counter() - started) * 1000:.0f} ms\n")
+    else:
+        print("Backend     : database full-text index (no build step)\n")
+
+    per_query = {q: [] for q in QUERIES}
+    for _ in range(iterations):
+        for q in QUERIES:
+            t0 = time.perf_counter()
+            index.search(db, q, limit=20, user_id=7)
+            per_query[q].append((time.perf_counter() - t0) * 1000)
+
+    all_ms = sorted(ms for samples in per_query.values() for ms in samples)
+    p50 = statistics.median(all_ms)
+    p95 = all_ms[int(len(all_ms) * 0.95) - 1]
+    print(f"{'query':<26}{'median ms':>10}  top hit")
+    for q, samples in per_query.items():
+        top = index.search(db, q, limit=1, user_id=7)
+        name = ""
+        if top:
+            model = FoodItem if top[0].kind == "item" else Food
+            name = db.get(model, top[0].id).name
+        print(f"{q:<26}{statistics.median(samples):>10.2f}  {name[:48]}")
+    print(f"\n{len(all_ms):,} searches — p50 {p50:.2f} ms · p95 {p95:.2f} ms · max {all_ms[-1]:.2f} ms")
+    db.close()
+    return p95
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[sys.argv.index("--iterations") + 1]) if "--iterations" in sys.argv else 20
+    backend = sys.argv[sys.argv.index("--backend") + 1] if "--backend" in sys.argv else "memory"
+    p95 = main(iterations, backend)
+    sys.exit(0 if p95 < 10 else 1)